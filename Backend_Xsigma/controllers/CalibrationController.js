@@ -28,6 +28,11 @@ const handleError = (error, res) => {
     timestamp: new Date().toISOString()
   };
   
+  // Estimate and budget of a request rejected by the cost model
+  if (error.cost) {
+    errorResponse.cost = error.cost;
+  }
+
   // Include detailed error info in development mode
   if (process.env.NODE_ENV === 'development') {
     errorResponse.details = {
@@ -0,0 +1,104 @@
+'use strict';
+
+/**
+ * Curve Calibration Controller
+ * Handles HTTP requests for rates, cross-currency and inflation curve calibration
+ * Following Backend_Xsigma structure pattern
+ *
+ * @module CurveCalibrationController
+ * @version 1.0.0
+ */
+
+const utils = require('../utils/writer.js');
+const CurveCalibrationService = require('../service/CurveCalibrationService.js');
+
+/**
+ * Generic error handler for all controller methods
+ * @param {Error} error - The error object
+ * @param {Object} res - Express response object
+ * @returns {Object} JSON response with error details
+ */
+const handleError = (error, res) => {
+  console.error('CurveCalibration Controller error:', error);
+  const status = error.status || 500;
+  const errorResponse = {
+    status: 'error',
+    error: error.message || 'Internal Server Error',
+    errorType: error.name || 'GeneralError',
+    service: 'CurveCalibration',
+    timestamp: new Date().toISOString()
+  };
+
+  // Include detailed error info in development mode
+  if (process.env.NODE_ENV === 'development') {
+    errorResponse.details = {
+      stack: error.stack,
+      code: error.code
+    };
+  }
+
+  return utils.writeJson(res, errorResponse, status);
+};
+
+/**
+ * Controller for full curve calibration
+ * Handles /api/curve-calibration POST requests
+ */
+module.exports.postCalibration = async function postCalibration(req, res, next) {
+  console.log('Calibrating curves with body params:', JSON.stringify(req.body, null, 2));
+  try {
+    await CurveCalibrationService.calibrateCurves(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
+/**
+ * Controller for quote updates
+ * Handles /api/curve-calibration/quotes POST requests
+ */
+module.exports.postQuotes = async function postQuotes(req, res, next) {
+  try {
+    await CurveCalibrationService.updateQuotes(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
+/**
+ * Controller for multi-currency curve builds
+ * Handles /api/curve-calibration/market POST requests
+ */
+module.exports.postMarketCalibration = async function postMarketCalibration(req, res, next) {
+  console.log('Calibrating multi-currency curves with body params:', JSON.stringify(req.body, null, 2));
+  try {
+    await CurveCalibrationService.calibrateMarket(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
+/**
+ * Controller for resident curves
+ * Handles /api/curve-calibration/curves GET requests
+ */
+module.exports.getCurves = async function getCurves(req, res, next) {
+  try {
+    await CurveCalibrationService.getCurves(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
+/**
+ * Controller for Health Check endpoint
+ * Handles /api/curve-calibration/health GET requests
+ */
+module.exports.getHealth = async function getHealth(req, res, next) {
+  console.log('Checking curve calibration service health');
+  try {
+    await CurveCalibrationService.getCurveCalibrationHealth(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
@@ -0,0 +1,87 @@
+'use strict';
+
+/**
+ * FX-Rates Hybrid Controller
+ * Handles HTTP requests for the lognormal FX with Markovian HJM rates hybrid simulation
+ * Following Backend_Xsigma structure pattern
+ *
+ * @module FXRatesHybridController
+ * @version 1.0.0
+ */
+
+const utils = require('../utils/writer.js');
+const FXRatesHybridService = require('../service/FXRatesHybridService.js');
+
+/**
+ * Generic error handler for all controller methods
+ * @param {Error} error - The error object
+ * @param {Object} res - Express response object
+ * @returns {Object} JSON response with error details
+ */
+const handleError = (error, res) => {
+  console.error('FXRatesHybrid Controller error:', error);
+  const status = error.status || 500;
+  const errorResponse = {
+    status: 'error',
+    error: error.message || 'Internal Server Error',
+    errorType: error.name || 'GeneralError',
+    service: 'FXRatesHybrid',
+    timestamp: new Date().toISOString()
+  };
+
+  // Estimate and budget of a request rejected by the cost model
+  if (error.cost) {
+    errorResponse.cost = error.cost;
+  }
+
+  // Include detailed error info in development mode
+  if (process.env.NODE_ENV === 'development') {
+    errorResponse.details = {
+      stack: error.stack,
+      code: error.code,
+      stderr: error.stderr
+    };
+  }
+
+  return utils.writeJson(res, errorResponse, status);
+};
+
+/**
+ * Controller for FX-rates hybrid GET endpoint
+ * Handles /api/fx-rates-hybrid GET requests
+ */
+module.exports.getHybridSimulation = async function getHybridSimulation(req, res, next) {
+  console.log('Running FX-rates hybrid simulation with params:', JSON.stringify(req.query, null, 2));
+  try {
+    await FXRatesHybridService.runHybridSimulation(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
+/**
+ * Controller for FX-rates hybrid POST endpoint
+ * Handles /api/fx-rates-hybrid POST requests
+ */
+module.exports.postHybridSimulation = async function postHybridSimulation(req, res, next) {
+  console.log('Running FX-rates hybrid simulation with body params:', JSON.stringify(req.body, null, 2));
+  try {
+    // Convert body to query format for service compatibility
+    await FXRatesHybridService.runHybridSimulation({ query: req.body, startTime: req.startTime }, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
+/**
+ * Controller for Health Check endpoint
+ * Handles /api/fx-rates-hybrid/health GET requests
+ */
+module.exports.getHybridHealth = async function getHybridHealth(req, res, next) {
+  console.log('Checking FX-rates hybrid service health');
+  try {
+    await FXRatesHybridService.getHybridHealth(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
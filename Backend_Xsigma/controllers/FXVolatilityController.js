@@ -79,6 +79,19 @@ module.exports.getMarketData = async function getMarketData(req, res, next) {
   }
 };
 
+/**
+ * Controller for per-tenor surface calibration
+ * Handles /api/fx-volatility/calibration GET requests
+ */
+module.exports.getSurfaceCalibration = async function getSurfaceCalibration(req, res, next) {
+  console.log('Calibrating FX volatility surface with params:', JSON.stringify(req.query, null, 2));
+  try {
+    await FXVolatilityService.getSurfaceCalibration(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
 /**
  * Controller for FX Health Check endpoint
  * Handles /api/fx-volatility/health GET requests
@@ -13,6 +13,7 @@ const path = require('path');
 const { spawn } = require('child_process');
 const utils = require('../utils/writer.js');
 const { createSuccessResponse, createErrorResponse } = require('../utils/errorHandler');
+const costModel = require('../service/utils/costModel');
 
 // Python configuration
 const PYTHON_EXECUTABLE = process.env.XSIGMA_PYTHON || 'python';
@@ -27,6 +28,7 @@ async function executePythonScript(params) {
   return new Promise((resolve, reject) => {
     const pythonProcess = spawn(PYTHON_EXECUTABLE, [
       PYTHON_SCRIPT_PATH,
+      'calculate',
       JSON.stringify(params)
     ], {
       env: {
@@ -49,23 +51,26 @@ async function executePythonScript(params) {
     });
 
     pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        console.error('Python script error:', errorString);
-        reject(new Error(`Python script failed with code ${code}: ${errorString}`));
-        return;
-      }
-
+      let result;
       try {
-        const result = JSON.parse(dataString.trim());
-        if (result.status === 'error') {
-          reject(new Error(result.error));
-        } else {
-          resolve(result.data);
-        }
+        result = JSON.parse(dataString.trim());
       } catch (parseError) {
+        if (code !== 0) {
+          console.error('Python script error:', errorString);
+          reject(new Error(`Python script failed with code ${code}: ${errorString}`));
+          return;
+        }
         console.error('JSON parse error:', parseError);
         console.error('Raw output:', dataString);
         reject(new Error(`Failed to parse Python output: ${parseError.message}`));
+        return;
+      }
+
+      // Failed requests exit non-zero with their error envelope on stdout
+      if (result.status === 'error') {
+        reject(new Error(result.error));
+      } else {
+        resolve(result.data);
       }
     });
 
@@ -106,11 +111,16 @@ async function getHartmanWatson(req, res) {
       return utils.writeJson(res, createErrorResponse('Invalid parameters: x_0 must be less than x_n'), 400);
     }
 
+    // Reject grids over budget before spawning
+    const cost = costModel.check('hartman_watson', params);
     const result = await executePythonScript(params);
-    utils.writeJson(res, createSuccessResponse(result));
+    utils.writeJson(res, createSuccessResponse(result, undefined, { cost }));
 
   } catch (error) {
     console.error('Error in getHartmanWatson:', error);
+    if (error.cost) {
+      return utils.writeJson(res, createErrorResponse(error.message, 'COST_BUDGET_EXCEEDED', { cost: error.cost }), error.status);
+    }
     utils.writeJson(res, createErrorResponse(error.message), 500);
   }
 }
@@ -146,11 +156,16 @@ async function postHartmanWatson(req, res) {
       return utils.writeJson(res, createErrorResponse('Invalid parameters: x_0 must be less than x_n'), 400);
     }
 
+    // Reject grids over budget before spawning
+    const cost = costModel.check('hartman_watson', params);
     const result = await executePythonScript(params);
-    utils.writeJson(res, createSuccessResponse(result));
+    utils.writeJson(res, createSuccessResponse(result, undefined, { cost }));
 
   } catch (error) {
     console.error('Error in postHartmanWatson:', error);
+    if (error.cost) {
+      return utils.writeJson(res, createErrorResponse(error.message, 'COST_BUDGET_EXCEEDED', { cost: error.cost }), error.status);
+    }
     utils.writeJson(res, createErrorResponse(error.message), 500);
   }
 }
@@ -184,21 +199,22 @@ async function getTestCases(req, res) {
     });
 
     pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        console.error('Python script error:', errorString);
-        return utils.writeJson(res, createErrorResponse(`Python script failed: ${errorString}`), 500);
-      }
-
+      let result;
       try {
-        const result = JSON.parse(dataString.trim());
-        if (result.status === 'error') {
-          return utils.writeJson(res, createErrorResponse(result.error), 500);
-        }
-        utils.writeJson(res, createSuccessResponse(result.data));
+        result = JSON.parse(dataString.trim());
       } catch (parseError) {
+        if (code !== 0) {
+          console.error('Python script error:', errorString);
+          return utils.writeJson(res, createErrorResponse(`Python script failed: ${errorString}`), 500);
+        }
         console.error('JSON parse error:', parseError);
-        utils.writeJson(res, createErrorResponse(`Failed to parse Python output: ${parseError.message}`), 500);
+        return utils.writeJson(res, createErrorResponse(`Failed to parse Python output: ${parseError.message}`), 500);
+      }
+
+      if (result.status === 'error') {
+        return utils.writeJson(res, createErrorResponse(result.error), 500);
       }
+      utils.writeJson(res, createSuccessResponse(result.data));
     });
 
   } catch (error) {
@@ -0,0 +1,108 @@
+'use strict';
+
+/**
+ * Jobs Controller
+ * Handles HTTP requests for asynchronous long-running computations
+ * Following Backend_Xsigma structure pattern
+ *
+ * @module JobsController
+ * @version 2.1.0
+ */
+
+const utils = require('../utils/writer.js');
+const JobService = require('../service/JobService.js');
+
+/**
+ * Generic error handler for all controller methods
+ * @param {Error} error - The error object
+ * @param {Object} res - Express response object
+ * @returns {Object} JSON response with error details
+ */
+const handleError = (error, res) => {
+  console.error('Jobs Controller error:', error);
+  const status = error.status || 500;
+  const errorResponse = {
+    status: 'error',
+    error: error.message || 'Internal Server Error',
+    errorType: error.name || 'GeneralError',
+    service: 'Jobs',
+    timestamp: new Date().toISOString()
+  };
+
+  // Estimate and budget of a request rejected by the cost model
+  if (error.cost) {
+    errorResponse.cost = error.cost;
+  }
+
+  // Include detailed error info in development mode
+  if (process.env.NODE_ENV === 'development') {
+    errorResponse.details = {
+      stack: error.stack,
+      code: error.code
+    };
+  }
+
+  return utils.writeJson(res, errorResponse, status);
+};
+
+/**
+ * Controller for job submission
+ * Handles /api/jobs POST requests
+ */
+module.exports.submitJob = async function submitJob(req, res, next) {
+  console.log('Submitting job with body:', JSON.stringify(req.body, null, 2));
+  try {
+    await JobService.submitJob(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
+/**
+ * Controller for job listing
+ * Handles /api/jobs GET requests
+ */
+module.exports.listJobs = async function listJobs(req, res, next) {
+  try {
+    await JobService.listJobs(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
+/**
+ * Controller for job status
+ * Handles /api/jobs/:jobId GET requests
+ */
+module.exports.getJob = async function getJob(req, res, next) {
+  try {
+    await JobService.getJob(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
+/**
+ * Controller for job results
+ * Handles /api/jobs/:jobId/result GET requests
+ */
+module.exports.getJobResult = async function getJobResult(req, res, next) {
+  try {
+    await JobService.getJobResult(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
+/**
+ * Controller for job cancellation
+ * Handles /api/jobs/:jobId DELETE requests
+ */
+module.exports.cancelJob = async function cancelJob(req, res, next) {
+  console.log('Cancelling job:', req.params.jobId);
+  try {
+    await JobService.cancelJob(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
@@ -29,6 +29,11 @@ const handleError = (error, res) => {
     timestamp: new Date().toISOString()
   };
   
+  // Estimate and budget of a request rejected by the cost model
+  if (error.cost) {
+    errorResponse.cost = error.cost;
+  }
+
   // Include detailed error info in development mode
   if (process.env.NODE_ENV === 'development') {
     errorResponse.details = {
@@ -94,6 +99,19 @@ module.exports.getSimulation = async function getSimulation(req, res, next) {
   }
 };
 
+/**
+ * Controller for Simulation Checkpoint endpoint
+ * Handles /api/test-hjm/checkpoint/:jobId GET requests
+ */
+module.exports.getSimulationCheckpoint = async function getSimulationCheckpoint(req, res, next) {
+  console.log('Retrieving HJM simulation checkpoint:', req.params.jobId);
+  try {
+    await TestHJMService.getSimulationCheckpoint(req, res);
+  } catch (error) {
+    return handleError(error, res);
+  }
+};
+
 /**
  * Controller for Test Cases endpoint
  * Handles /api/test-hjm/test-cases GET requests
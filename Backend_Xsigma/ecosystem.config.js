@@ -24,7 +24,8 @@ module.exports = {
       NODE_ENV: 'production',
       PORT: 5005,
       API_VERSION: '1.0.0',
-      LOG_LEVEL: 'info'
+      LOG_LEVEL: 'info',
+      XSIGMA_MEMORY_LIMIT_MB: 2048     // Per-request ceiling of the Python services (max_memory_restart only covers Node)
     },
     
     // Development Environment (use with --env development)
@@ -22,6 +22,10 @@ const path = require('path');
 
 // Import route configuration
 const configureRoutes = require('./routes');
+const metricsRegistry = require('./service/utils/metrics');
+const cacheService = require('./service/utils/cacheService');
+const jobManager = require('./service/utils/jobManager');
+const pythonExecutor = require('./service/utils/pythonExecutor');
 
 // Initialize Express app
 const app = express();
@@ -204,13 +208,32 @@ app.get('/health', (req, res) => {
   res.json(healthStatus);
 });
 
-// Metrics endpoint
+// Metrics endpoint: Prometheus text format (?format=json for the summary)
 app.get('/metrics', (req, res) => {
-  res.json({
-    ...metrics,
-    uptime: Date.now() - metrics.startTime,
-    timestamp: new Date().toISOString()
-  });
+  if (req.query.format === 'json') {
+    return res.json({
+      ...metrics,
+      uptime: Date.now() - metrics.startTime,
+      timestamp: new Date().toISOString()
+    });
+  }
+
+  const cacheStats = cacheService.getStats();
+  const jobStats = jobManager.getStats();
+  const text = metricsRegistry.render([
+    { name: 'xsigma_http_requests_total', type: 'counter', help: 'HTTP requests served', value: metrics.requests },
+    { name: 'xsigma_http_errors_total', type: 'counter', help: 'HTTP responses with status >= 400', value: metrics.errors },
+    { name: 'xsigma_uptime_seconds', help: 'Seconds since the API server started', value: (Date.now() - metrics.startTime) / 1000 },
+    { name: 'xsigma_node_rss_bytes', help: 'Resident set size of the Node process', value: process.memoryUsage().rss },
+    { name: 'xsigma_response_cache_hits_total', type: 'counter', help: 'Response cache hits', value: cacheStats.hits },
+    { name: 'xsigma_response_cache_misses_total', type: 'counter', help: 'Response cache misses', value: cacheStats.misses },
+    { name: 'xsigma_response_cache_entries', help: 'Entries in the response cache', value: cacheStats.size },
+    { name: 'xsigma_jobs_queued', help: 'Jobs waiting for a Python worker', value: jobStats.queued },
+    { name: 'xsigma_jobs_running', help: 'Jobs running in Python workers', value: jobStats.running },
+    { name: 'xsigma_jobs_max_workers', help: 'Python worker slots of the job manager', value: jobStats.maxWorkers },
+    { name: 'xsigma_python_in_flight', help: 'Distinct Python computations running (identical requests share one)', value: pythonExecutor.inFlight.size }
+  ]);
+  res.set('Content-Type', 'text/plain; version=0.0.4; charset=utf-8').send(text);
 });
 
 // ===== ERROR HANDLING =====
@@ -234,8 +257,16 @@ app.use('*', (req, res) => {
       'GET /api/fx-volatility/atm-curve',
       'GET /api/fx-volatility/models-comparison',
       'GET /api/fx-volatility/market-data',
+      'GET /api/fx-volatility/calibration',
       'GET /api/fx-volatility/health',
-      'POST /api/AnalyticalSigmaVolatilityCalibration'
+      'POST /api/AnalyticalSigmaVolatilityCalibration',
+      'GET /api/fx-rates-hybrid',
+      'POST /api/curve-calibration',
+      'POST /api/curve-calibration/quotes',
+      'POST /api/curve-calibration/market',
+      'POST /api/jobs',
+      'GET /api/jobs/:jobId',
+      'GET /api/jobs/:jobId/result'
     ],
     timestamp: new Date().toISOString()
   });
@@ -14,7 +14,10 @@ const FXVolatilityController = require('./controllers/FXVolatilityController');
 const CalibrationController = require('./controllers/CalibrationController');
 const HartmanWatsonController = require('./controllers/HartmanWatsonController');
 const TestHJMController = require('./controllers/TestHJMController');
+const FXRatesHybridController = require('./controllers/FXRatesHybridController');
+const CurveCalibrationController = require('./controllers/CurveCalibrationController');
 const ZabrVariablesImpactController = require('./controllers/ZabrVariablesImpactController');
+const JobsController = require('./controllers/JobsController');
 
 /**
  * Configure all API routes
@@ -45,6 +48,9 @@ module.exports = function configureRoutes(app) {
   // GET /api/fx-volatility/market-data
   router.get('/api/fx-volatility/market-data', FXVolatilityController.getMarketData);
   
+  // GET /api/fx-volatility/calibration
+  router.get('/api/fx-volatility/calibration', FXVolatilityController.getSurfaceCalibration);
+
   // GET /api/fx-volatility/health
   router.get('/api/fx-volatility/health', FXVolatilityController.getFXHealth);
 
@@ -73,12 +79,43 @@ module.exports = function configureRoutes(app) {
   // GET /api/test-hjm/simulation
   router.get('/api/test-hjm/simulation', TestHJMController.getSimulation);
 
+  // GET /api/test-hjm/checkpoint/:jobId
+  router.get('/api/test-hjm/checkpoint/:jobId', TestHJMController.getSimulationCheckpoint);
+
   // GET /api/test-hjm/test-cases
   router.get('/api/test-hjm/test-cases', TestHJMController.getTestCases);
 
   // GET /api/test-hjm/health
   router.get('/api/test-hjm/health', TestHJMController.getHJMHealth);
 
+  // ===== FX-RATES HYBRID ROUTES =====
+
+  // GET /api/fx-rates-hybrid
+  router.get('/api/fx-rates-hybrid', FXRatesHybridController.getHybridSimulation);
+
+  // POST /api/fx-rates-hybrid
+  router.post('/api/fx-rates-hybrid', FXRatesHybridController.postHybridSimulation);
+
+  // GET /api/fx-rates-hybrid/health
+  router.get('/api/fx-rates-hybrid/health', FXRatesHybridController.getHybridHealth);
+
+  // ===== CURVE CALIBRATION ROUTES =====
+
+  // POST /api/curve-calibration
+  router.post('/api/curve-calibration', CurveCalibrationController.postCalibration);
+
+  // POST /api/curve-calibration/quotes
+  router.post('/api/curve-calibration/quotes', CurveCalibrationController.postQuotes);
+
+  // POST /api/curve-calibration/market
+  router.post('/api/curve-calibration/market', CurveCalibrationController.postMarketCalibration);
+
+  // GET /api/curve-calibration/curves
+  router.get('/api/curve-calibration/curves', CurveCalibrationController.getCurves);
+
+  // GET /api/curve-calibration/health
+  router.get('/api/curve-calibration/health', CurveCalibrationController.getHealth);
+
   // ===== ZABR VARIABLES IMPACT ROUTES =====
 
   // GET /api/zabr-variables-impact
@@ -104,6 +141,23 @@ module.exports = function configureRoutes(app) {
   // POST /api/AnalyticalSigmaVolatilityCalibration (Legacy endpoint)
   router.post('/api/AnalyticalSigmaVolatilityCalibration', CalibrationController.volatilityCalibrationPOST);
 
+  // ===== JOB ROUTES =====
+
+  // POST /api/jobs
+  router.post('/api/jobs', JobsController.submitJob);
+
+  // GET /api/jobs
+  router.get('/api/jobs', JobsController.listJobs);
+
+  // GET /api/jobs/:jobId
+  router.get('/api/jobs/:jobId', JobsController.getJob);
+
+  // GET /api/jobs/:jobId/result
+  router.get('/api/jobs/:jobId/result', JobsController.getJobResult);
+
+  // DELETE /api/jobs/:jobId
+  router.delete('/api/jobs/:jobId', JobsController.cancelJob);
+
   // ===== SYSTEM ROUTES =====
   
   // GET /doc - Redirect to Sphinx documentation
@@ -122,8 +176,11 @@ module.exports = function configureRoutes(app) {
         fx_volatility: '/api/fx-volatility',
         hartman_watson: '/api/hartman-watson',
         test_hjm: '/api/test-hjm',
+        fx_rates_hybrid: '/api/fx-rates-hybrid',
+        curve_calibration: '/api/curve-calibration',
         zabr_variables_impact: '/api/zabr-variables-impact',
         calibration: '/api/AnalyticalSigmaVolatilityCalibration',
+        jobs: '/api/jobs',
         documentation: '/api-docs',
         sphinx_documentation: '/sphinx-doc/xsigma-1.1-3/index.html',
         doc_redirect: '/doc',
@@ -145,6 +202,7 @@ module.exports = function configureRoutes(app) {
   console.log('   GET  /api/fx-volatility/atm-curve');
   console.log('   GET  /api/fx-volatility/models-comparison');
   console.log('   GET  /api/fx-volatility/market-data');
+  console.log('   GET  /api/fx-volatility/calibration');
   console.log('   GET  /api/fx-volatility/health');
   console.log('   GET  /api/hartman-watson');
   console.log('   POST /api/hartman-watson');
@@ -153,8 +211,17 @@ module.exports = function configureRoutes(app) {
   console.log('   POST /api/test-hjm');
   console.log('   GET  /api/test-hjm/calibration');
   console.log('   GET  /api/test-hjm/simulation');
+  console.log('   GET  /api/test-hjm/checkpoint/:jobId');
   console.log('   GET  /api/test-hjm/test-cases');
   console.log('   GET  /api/test-hjm/health');
+  console.log('   GET  /api/fx-rates-hybrid');
+  console.log('   POST /api/fx-rates-hybrid');
+  console.log('   GET  /api/fx-rates-hybrid/health');
+  console.log('   POST /api/curve-calibration');
+  console.log('   POST /api/curve-calibration/quotes');
+  console.log('   POST /api/curve-calibration/market');
+  console.log('   GET  /api/curve-calibration/curves');
+  console.log('   GET  /api/curve-calibration/health');
   console.log('   GET  /api/zabr-variables-impact');
   console.log('   POST /api/zabr-variables-impact');
   console.log('   GET  /api/zabr-variables-impact/models');
@@ -162,4 +229,9 @@ module.exports = function configureRoutes(app) {
   console.log('   POST /api/zabr-variables-impact/calculate');
   console.log('   GET  /api/zabr-variables-impact/health');
   console.log('   POST /api/AnalyticalSigmaVolatilityCalibration');
+  console.log('   POST /api/jobs');
+  console.log('   GET  /api/jobs');
+  console.log('   GET  /api/jobs/:jobId');
+  console.log('   GET  /api/jobs/:jobId/result');
+  console.log('   DELETE /api/jobs/:jobId');
 };
@@ -11,6 +11,8 @@
 
 const { createSuccessResponse } = require('./utils/errorHandler');
 const pythonExecutor = require('./utils/pythonExecutor');
+const { extractDiagnostics } = require('./utils/diagnostics');
+const costModel = require('./utils/costModel');
 const cacheService = require('./utils/cacheService');
 
 // Test case configurations
@@ -59,6 +61,9 @@ function extractParameters(query) {
     }
   }
 
+  // Timings, profile and memory diagnostics in the response
+  Object.assign(params, extractDiagnostics(query));
+
   return params;
 }
 
@@ -87,8 +92,11 @@ module.exports.calculateAnalyticalSigma = async function calculateAnalyticalSigm
     }
   }
 
-  // Execute Python service
-  const result = await pythonExecutor.execute('analytical_sigma', 'calculate', parameters);
+  // Reject requests over budget before spawning
+  const cost = costModel.check('analytical_sigma', parameters);
+  const result = await pythonExecutor.execute('analytical_sigma', 'calculate', parameters, {
+    timeout: costModel.timeout(cost, { min: pythonExecutor.timeout })
+  });
 
   // Cache the result
   cacheService.set(cacheKey, result, 300); // 5 minutes
@@ -98,7 +106,12 @@ module.exports.calculateAnalyticalSigma = async function calculateAnalyticalSigm
     testCase: parameters.test ? TEST_CASES[parameters.test] : null,
     parameters,
     responseTime: Date.now() - req.startTime,
-    executionTime: result.meta.executionTime
+    executionTime: result.meta.executionTime,
+    coalesced: Boolean(result.meta.coalesced),
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory,
+    cost
   }));
 };
 
@@ -11,8 +11,74 @@
 
 const { createSuccessResponse } = require('./utils/errorHandler');
 const pythonExecutor = require('./utils/pythonExecutor');
+const { extractDiagnostics } = require('./utils/diagnostics');
+const costModel = require('./utils/costModel');
 const cacheService = require('./utils/cacheService');
 
+const SPREAD_MODELS = ['uniform', 'constant', 'proportional'];
+
+/**
+ * Validate the calibration market data options
+ * @param {Object} body - Request body
+ * @returns {Object} Parameters with a normalized sample_data block
+ */
+function extractParameters(body = {}) {
+  const params = { ...body };
+
+  if (body.quotes_file !== undefined) {
+    params.quotes_file = String(body.quotes_file);
+    if (!/^[\w.-]+\.(json|csv)$/.test(params.quotes_file)) {
+      throw new Error('quotes_file must be a .json or .csv file name in the market data directories');
+    }
+  }
+
+  if (body.solver !== undefined) {
+    params.solver = String(body.solver);
+    if (!/^(ceres|lm|race|best|nlopt(:[A-Za-z0-9_]+)?)$/.test(params.solver)) {
+      throw new Error('solver must be ceres, lm, nlopt:<algo>, race or best');
+    }
+  }
+
+  if (body.target_residual !== undefined && body.target_residual !== null) {
+    params.target_residual = parseFloat(body.target_residual);
+    if (!Number.isFinite(params.target_residual) || params.target_residual <= 0) {
+      throw new Error('target_residual must be a positive number');
+    }
+  }
+
+  // Timings, profile and memory diagnostics in the response
+  Object.assign(params, extractDiagnostics(body));
+
+  if (body.sample_data !== undefined) {
+    const sample = body.sample_data || {};
+    const sampleData = {};
+    for (const name of ['num_points', 'seed']) {
+      if (sample[name] !== undefined) {
+        sampleData[name] = parseInt(sample[name]);
+        if (isNaN(sampleData[name])) throw new Error(`sample_data.${name} must be an integer`);
+      }
+    }
+    for (const name of ['strike_min', 'strike_max', 'spread']) {
+      if (sample[name] !== undefined) {
+        sampleData[name] = parseFloat(sample[name]);
+        if (!Number.isFinite(sampleData[name])) throw new Error(`sample_data.${name} must be a number`);
+      }
+    }
+    if (sample.spread_model !== undefined) {
+      if (!SPREAD_MODELS.includes(sample.spread_model)) {
+        throw new Error(`sample_data.spread_model must be one of ${SPREAD_MODELS.join(', ')}`);
+      }
+      sampleData.spread_model = sample.spread_model;
+    }
+    if (sampleData.num_points !== undefined && (sampleData.num_points < 5 || sampleData.num_points > 2000)) {
+      throw new Error('sample_data.num_points must be between 5 and 2000');
+    }
+    params.sample_data = sampleData;
+  }
+
+  return params;
+}
+
 /**
  * Perform volatility model calibration
  * @param {Object} req - Express request object
@@ -20,7 +86,7 @@ const cacheService = require('./utils/cacheService');
  */
 module.exports.performCalibration = async function performCalibration(req, res) {
   const { refresh = false } = req.body;
-  const parameters = req.body;
+  const parameters = extractParameters(req.body);
   
   // Generate cache key based on parameters
   const cacheKey = cacheService.generateKey('analytical_sigma_calibration', parameters);
@@ -38,8 +104,11 @@ module.exports.performCalibration = async function performCalibration(req, res)
     }
   }
 
-  // Execute Python service
-  const result = await pythonExecutor.execute('analytical_sigma_calibration', 'calibrate', parameters);
+  // Reject calibrations over budget before spawning
+  const cost = costModel.check('analytical_sigma_calibration', parameters);
+  const result = await pythonExecutor.execute('analytical_sigma_calibration', 'calibrate', parameters, {
+    timeout: costModel.timeout(cost, { min: pythonExecutor.timeout })
+  });
 
   // Cache the result
   cacheService.set(cacheKey, result, 600); // 10 minutes
@@ -49,6 +118,14 @@ module.exports.performCalibration = async function performCalibration(req, res)
     computationType: parameters.computationType,
     legacy: true,
     responseTime: Date.now() - Date.now(),
-    executionTime: result.meta.executionTime
+    executionTime: result.meta.executionTime,
+    coalesced: Boolean(result.meta.coalesced),
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory,
+    cost
   }));
 };
+
+// Shared with the asynchronous job API
+module.exports.extractParameters = extractParameters;
@@ -0,0 +1,228 @@
+'use strict';
+
+/**
+ * Curve Calibration Service
+ * Business logic for rates, cross-currency and inflation curve calibration
+ * Following Backend_Xsigma structure pattern
+ *
+ * Calibrated curves are kept resident in a persistent Python worker, so quote
+ * updates only recalibrate the curves they affect.
+ *
+ * @module CurveCalibrationService
+ * @version 1.0.0
+ */
+
+const { createSuccessResponse } = require('./utils/errorHandler');
+const pythonExecutor = require('./utils/pythonExecutor');
+const { extractDiagnostics } = require('./utils/diagnostics');
+const { PersistentPythonWorker } = require('./utils/pythonWorker');
+
+const worker = new PersistentPythonWorker('curve_calibration', {
+  timeout: parseInt(process.env.CURVE_CALIBRATION_TIMEOUT) || 120000
+});
+
+/**
+ * Extract and validate calibration options
+ * @param {Object} body - Request body
+ * @returns {Object} Validated parameters
+ */
+function extractParameters(body = {}) {
+  const params = {};
+
+  for (const name of ['use_bootstrapping', 'use_ceres', 'use_aad']) {
+    if (body[name] !== undefined) {
+      params[name] = body[name] === true || body[name] === 'true';
+    }
+  }
+
+  if (body.quotes !== undefined) {
+    params.quotes = validateQuotes(body.quotes);
+  }
+
+  if (body.curve_quotes !== undefined) {
+    if (!body.curve_quotes || typeof body.curve_quotes !== 'object' || Array.isArray(body.curve_quotes)) {
+      throw new Error('curve_quotes must map curve names to {instrument: {tenors, values}}');
+    }
+    params.curve_quotes = body.curve_quotes;
+  }
+
+  if (body.synthetic_quotes !== undefined) {
+    params.synthetic_quotes = body.synthetic_quotes === true || body.synthetic_quotes === 'true';
+  }
+
+  if (body.currencies !== undefined) {
+    const currencies = Array.isArray(body.currencies) ? body.currencies : String(body.currencies).split(',');
+    params.currencies = currencies.map(ccy => String(ccy).trim().toUpperCase()).filter(Boolean);
+    if (params.currencies.some(ccy => !/^[A-Z]{3}$/.test(ccy))) {
+      throw new Error('currencies must be 3-letter currency codes');
+    }
+  }
+
+  if (body.base_currency !== undefined) {
+    params.base_currency = String(body.base_currency).toUpperCase();
+    if (!/^[A-Z]{3}$/.test(params.base_currency)) {
+      throw new Error('base_currency must be a 3-letter currency code');
+    }
+  }
+
+  if (body.workers !== undefined) {
+    params.workers = parseInt(body.workers);
+    if (isNaN(params.workers) || params.workers < 1 || params.workers > 64) {
+      throw new Error('workers must be between 1 and 64');
+    }
+  }
+
+  if (body.curves !== undefined) {
+    params.curves = Array.isArray(body.curves) ? body.curves : String(body.curves).split(',');
+  }
+
+  // Timings, profile and memory diagnostics in the response
+  Object.assign(params, extractDiagnostics(body));
+
+  return params;
+}
+
+/**
+ * Validate quote changes
+ * @param {Array} quotes - [{curve, instrument, tenor, value}]
+ * @returns {Array} Validated quotes
+ */
+function validateQuotes(quotes) {
+  if (!Array.isArray(quotes)) {
+    throw new Error('quotes must be an array of {curve, instrument, tenor, value}');
+  }
+
+  return quotes.map((quote, index) => {
+    if (!quote || !quote.curve || !quote.instrument || quote.tenor === undefined) {
+      throw new Error(`quotes[${index}] must have curve, instrument and tenor`);
+    }
+    const value = parseFloat(quote.value);
+    if (!Number.isFinite(value)) {
+      throw new Error(`quotes[${index}].value must be a number`);
+    }
+    return { curve: quote.curve, instrument: quote.instrument, tenor: String(quote.tenor), value };
+  });
+}
+
+/**
+ * Timeout for a multi-currency build
+ * @param {Object} parameters - Validated parameters
+ * @param {number} maxTimeout - Upper bound in milliseconds
+ * @returns {number} Timeout in milliseconds
+ */
+function marketTimeout(parameters, maxTimeout = 300000) {
+  const currencies = (parameters.currencies || []).length || 2;
+  // Overnight and cross-currency curve per currency, before parallelism
+  return Math.min(60000 + currencies * 2 * 30000, maxTimeout);
+}
+
+/**
+ * Full calibration of all curves (replaces the resident session)
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.calibrateCurves = async function calibrateCurves(req, res) {
+  const parameters = extractParameters(req.body);
+  const result = await worker.request('calibrate', parameters);
+
+  res.json(createSuccessResponse(result.data, 'Curve calibration completed successfully', {
+    parameters,
+    responseTime: Date.now() - req.startTime,
+    executionTime: result.executionTime,
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory
+  }));
+};
+
+/**
+ * Apply quote changes and recalibrate the affected curves
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.updateQuotes = async function updateQuotes(req, res) {
+  const parameters = extractParameters(req.body);
+  if (!parameters.quotes || parameters.quotes.length === 0) {
+    const error = new Error('quotes must contain at least one quote change');
+    error.status = 400;
+    throw error;
+  }
+
+  const result = await worker.request('update_quotes', parameters);
+
+  res.json(createSuccessResponse(result.data, `Curves updated (${result.data.mode})`, {
+    responseTime: Date.now() - req.startTime,
+    executionTime: result.executionTime,
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory
+  }));
+};
+
+/**
+ * Multi-currency overnight and cross-currency curve build on a process pool
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.calibrateMarket = async function calibrateMarket(req, res) {
+  const parameters = extractParameters(req.body);
+  const result = await pythonExecutor.execute('curve_calibration', 'calibrate_market', parameters, {
+    timeout: marketTimeout(parameters)
+  });
+
+  res.json(createSuccessResponse(result.data, 'Multi-currency curve calibration completed', {
+    parameters,
+    responseTime: Date.now() - req.startTime,
+    executionTime: result.meta.executionTime,
+    coalesced: Boolean(result.meta.coalesced),
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory
+  }));
+};
+
+/**
+ * Get the resident calibrated curves
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.getCurves = async function getCurves(req, res) {
+  const parameters = extractParameters(req.query);
+  const result = await worker.request('curves', parameters);
+
+  res.json(createSuccessResponse(result.data, 'Curves retrieved successfully', {
+    responseTime: Date.now() - req.startTime
+  }));
+};
+
+/**
+ * Health check for the curve calibration worker
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.getCurveCalibrationHealth = async function getCurveCalibrationHealth(req, res) {
+  try {
+    const result = await worker.request('health_check', {}, { timeout: 30000 });
+
+    res.json(createSuccessResponse({
+      service: 'CurveCalibration',
+      status: 'healthy',
+      python_service: result.data,
+      worker: worker.getStatus(),
+      timestamp: new Date().toISOString()
+    }, 'Curve calibration service is healthy'));
+
+  } catch (error) {
+    res.status(503).json({
+      status: 'error',
+      service: 'CurveCalibration',
+      error: error.message,
+      worker: worker.getStatus(),
+      timestamp: new Date().toISOString()
+    });
+  }
+};
+
+// Shared with the asynchronous job API
+module.exports.extractParameters = extractParameters;
+module.exports.marketTimeout = marketTimeout;
@@ -0,0 +1,161 @@
+'use strict';
+
+/**
+ * FX-Rates Hybrid Service
+ * Business logic for the lognormal FX with Markovian HJM rates hybrid simulation
+ * Following Backend_Xsigma structure pattern
+ *
+ * @module FXRatesHybridService
+ * @version 1.0.0
+ */
+
+const { createSuccessResponse } = require('./utils/errorHandler');
+const pythonExecutor = require('./utils/pythonExecutor');
+const { extractDiagnostics } = require('./utils/diagnostics');
+const costModel = require('./utils/costModel');
+const cacheService = require('./utils/cacheService');
+
+// Default parameters (notebook settings)
+const DEFAULT_PARAMS = {
+  num_paths: 524288,
+  volatility: 0.3,
+  simulation_steps: 120
+};
+
+/**
+ * Extract and validate parameters from request
+ * @param {Object} query - Request query parameters
+ * @returns {Object} Validated parameters
+ */
+function extractParameters(query) {
+  const params = { ...DEFAULT_PARAMS };
+
+  if (query.num_paths !== undefined) {
+    params.num_paths = parseInt(query.num_paths);
+    if (!(params.num_paths >= 1000 && params.num_paths <= 10000000)) {
+      throw new Error('num_paths must be between 1,000 and 10,000,000');
+    }
+  }
+
+  if (query.volatility !== undefined) {
+    params.volatility = parseFloat(query.volatility);
+    if (!(params.volatility > 0 && params.volatility < 5)) {
+      throw new Error('volatility must be between 0 and 5');
+    }
+  }
+
+  if (query.seed !== undefined) {
+    params.seed = parseInt(query.seed);
+    if (!Number.isInteger(params.seed) || params.seed < 0) {
+      throw new Error('seed must be a non-negative integer');
+    }
+  }
+
+  if (query.simulation_steps !== undefined) {
+    params.simulation_steps = parseInt(query.simulation_steps);
+    if (!(params.simulation_steps >= 1 && params.simulation_steps <= 480)) {
+      throw new Error('simulation_steps must be between 1 and 480');
+    }
+  }
+
+  // Sharded simulation
+  for (const name of ['workers', 'shards']) {
+    if (query[name] !== undefined) {
+      params[name] = parseInt(query[name]);
+      if (!(params[name] >= 1 && params[name] <= 256)) {
+        throw new Error(`${name} must be between 1 and 256`);
+      }
+    }
+  }
+
+  // Timings, profile and memory diagnostics in the response
+  Object.assign(params, extractDiagnostics(query));
+
+  return params;
+}
+
+/**
+ * Python timeout for a hybrid simulation from its cost estimate (paths scaled
+ * by the number of simulation steps relative to the notebook's 120)
+ * @param {Object} parameters - Validated parameters
+ * @param {number} maxTimeout - Upper bound in milliseconds
+ * @returns {number} Timeout in milliseconds
+ */
+function simulationTimeout(parameters, maxTimeout = 300000) {
+  return costModel.timeout(costModel.estimate('fx_rates_hybrid', parameters), { max: maxTimeout });
+}
+
+/**
+ * Run the FX-rates hybrid simulation
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.runHybridSimulation = async function runHybridSimulation(req, res) {
+  const { refresh = false } = req.query;
+  const parameters = extractParameters(req.query);
+
+  const cacheKey = cacheService.generateKey('fx_rates_hybrid', parameters);
+
+  if (!refresh) {
+    const cachedResult = cacheService.get(cacheKey);
+    if (cachedResult) {
+      return res.json(createSuccessResponse(cachedResult.data, 'Results retrieved from cache', {
+        cached: true,
+        parameters,
+        responseTime: Date.now() - req.startTime
+      }));
+    }
+  }
+
+  // Reject simulations over budget before spawning, and size the timeout from the estimate
+  const cost = costModel.check('fx_rates_hybrid', parameters);
+  const totalTimeout = simulationTimeout(parameters);
+  console.log(`🕐 FX-rates hybrid timeout set to ${totalTimeout}ms for ${parameters.num_paths} paths (estimated ${cost.seconds}s)`);
+
+  const result = await pythonExecutor.execute('fx_rates_hybrid', 'calculate', parameters, { timeout: totalTimeout });
+
+  cacheService.set(cacheKey, result, 600); // 10 minutes
+
+  res.json(createSuccessResponse(result.data, 'FX-rates hybrid simulation completed successfully', {
+    cached: false,
+    parameters,
+    responseTime: Date.now() - req.startTime,
+    executionTime: result.meta.executionTime,
+    coalesced: Boolean(result.meta.coalesced),
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory,
+    cost
+  }));
+};
+
+/**
+ * Health check for the FX-rates hybrid service
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.getHybridHealth = async function getHybridHealth(req, res) {
+  try {
+    const result = await pythonExecutor.execute('fx_rates_hybrid', 'health_check', {});
+
+    res.json(createSuccessResponse({
+      service: 'FXRatesHybrid',
+      status: 'healthy',
+      python_service: result.data || result,
+      cache_stats: cacheService.getStats(),
+      timestamp: new Date().toISOString()
+    }, 'FX-rates hybrid service is healthy'));
+
+  } catch (error) {
+    res.status(503).json({
+      status: 'error',
+      service: 'FXRatesHybrid',
+      error: error.message,
+      timestamp: new Date().toISOString()
+    });
+  }
+};
+
+// Shared with the asynchronous job API
+module.exports.extractParameters = extractParameters;
+module.exports.simulationTimeout = simulationTimeout;
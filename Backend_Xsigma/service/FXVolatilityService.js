@@ -4,14 +4,63 @@
  * FX Volatility Service
  * Business logic for FX volatility calculations
  * Following Backend_Xsigma structure pattern
- * 
+ *
+ * The volatility surface objects are loaded once by a persistent Python worker
+ * and served from memory on every request.
+ *
  * @module FXVolatilityService
  * @version 2.1.0
  */
 
 const { createSuccessResponse } = require('./utils/errorHandler');
-const pythonExecutor = require('./utils/pythonExecutor');
 const cacheService = require('./utils/cacheService');
+const { PersistentPythonWorker } = require('./utils/pythonWorker');
+const { extractDiagnostics } = require('./utils/diagnostics');
+
+const worker = new PersistentPythonWorker('fx_volatility', {
+  timeout: parseInt(process.env.FX_VOLATILITY_TIMEOUT) || 60000
+});
+
+/**
+ * Extract and validate models comparison parameters
+ * @param {Object} query - Request query parameters
+ * @returns {Object} Validated parameters
+ */
+function extractComparisonParameters(query) {
+  const { expiry = 1.0, num_strikes, strike_min, strike_max } = query;
+  const parameters = {};
+
+  // Expiry in years, or as a tenor such as "7m"
+  if (/^\d+[dwmy]$/i.test(String(expiry))) {
+    parameters.expiry = String(expiry).toLowerCase();
+  } else {
+    parameters.expiry = parseFloat(expiry);
+    if (isNaN(parameters.expiry) || parameters.expiry <= 0 || parameters.expiry > 30) {
+      throw new Error('expiry must be a positive number of years (max 30) or a tenor such as 7m');
+    }
+  }
+
+  if (num_strikes !== undefined) {
+    parameters.num_strikes = parseInt(num_strikes);
+    if (isNaN(parameters.num_strikes) || parameters.num_strikes < 2 || parameters.num_strikes > 2048) {
+      throw new Error('num_strikes must be between 2 and 2048');
+    }
+  }
+
+  for (const [name, value] of [['strike_min', strike_min], ['strike_max', strike_max]]) {
+    if (value !== undefined) {
+      parameters[name] = parseFloat(value);
+      if (isNaN(parameters[name]) || parameters[name] <= 0) {
+        throw new Error(`${name} must be a positive strike ratio`);
+      }
+    }
+  }
+
+  // Timings, profile and memory diagnostics in the response
+  Object.assign(parameters, extractDiagnostics(query));
+
+  return parameters;
+}
 
 /**
  * Get ATM volatility curve
@@ -35,8 +84,8 @@ module.exports.getATMVolatilityCurve = async function getATMVolatilityCurve(req,
     }
   }
 
-  // Execute Python service
-  const result = await pythonExecutor.execute('fx_volatility', 'atm_curve', {});
+  // Served by the persistent worker
+  const result = await worker.request('atm_curve', {});
 
   // Cache the result
   cacheService.set(cacheKey, result, 300); // 5 minutes
@@ -44,7 +93,10 @@ module.exports.getATMVolatilityCurve = async function getATMVolatilityCurve(req,
   res.json(createSuccessResponse(result.data, 'ATM curve calculated successfully', {
     cached: false,
     responseTime: Date.now() - req.startTime,
-    executionTime: result.meta.executionTime
+    executionTime: result.executionTime,
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory
   }));
 };
 
@@ -54,8 +106,8 @@ module.exports.getATMVolatilityCurve = async function getATMVolatilityCurve(req,
  * @param {Object} res - Express response object
  */
 module.exports.getModelsComparison = async function getModelsComparison(req, res) {
-  const { refresh = false, expiry = 1.0 } = req.query;
-  const parameters = { expiry: parseFloat(expiry) };
+  const { refresh = false } = req.query;
+  const parameters = extractComparisonParameters(req.query);
   
   // Generate cache key
   const cacheKey = cacheService.generateKey('fx_volatility_models_comparison', parameters);
@@ -72,8 +124,8 @@ module.exports.getModelsComparison = async function getModelsComparison(req, res
     }
   }
 
-  // Execute Python service
-  const result = await pythonExecutor.execute('fx_volatility', 'models_comparison', parameters);
+  // Served by the persistent worker
+  const result = await worker.request('models_comparison', parameters);
 
   // Cache the result
   cacheService.set(cacheKey, result, 300); // 5 minutes
@@ -82,7 +134,85 @@ module.exports.getModelsComparison = async function getModelsComparison(req, res
     cached: false,
     parameters,
     responseTime: Date.now() - req.startTime,
-    executionTime: result.meta.executionTime
+    executionTime: result.executionTime,
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory
+  }));
+};
+
+/**
+ * Extract and validate surface calibration parameters
+ * @param {Object} query - Request query parameters
+ * @returns {Object} Validated parameters
+ */
+function extractCalibrationParameters(query) {
+  const { model = 'svi', workers, query_expiries } = query;
+  const parameters = { model };
+
+  if (!['svi', 'quadratic'].includes(model)) {
+    throw new Error('model must be svi or quadratic');
+  }
+
+  if (workers !== undefined) {
+    parameters.workers = parseInt(workers);
+    if (isNaN(parameters.workers) || parameters.workers < 1 || parameters.workers > 64) {
+      throw new Error('workers must be between 1 and 64');
+    }
+  }
+
+  if (query_expiries !== undefined) {
+    const expiries = Array.isArray(query_expiries) ? query_expiries : String(query_expiries).split(',');
+    parameters.query_expiries = expiries.map(parseFloat);
+    if (parameters.query_expiries.some(t => isNaN(t) || t <= 0)) {
+      throw new Error('query_expiries must be positive year fractions');
+    }
+  }
+
+  // Timings, profile and memory diagnostics in the response
+  Object.assign(parameters, extractDiagnostics(query));
+
+  return parameters;
+}
+
+/**
+ * Calibrate every tenor's smile in parallel and assemble the surface
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.getSurfaceCalibration = async function getSurfaceCalibration(req, res) {
+  const { refresh = false } = req.query;
+  const parameters = extractCalibrationParameters(req.query);
+
+  // Generate cache key
+  const cacheKey = cacheService.generateKey('fx_volatility_surface_calibration', parameters);
+
+  // Check cache unless refresh is requested
+  if (!refresh) {
+    const cachedResult = cacheService.get(cacheKey);
+    if (cachedResult) {
+      return res.json(createSuccessResponse(cachedResult.data, 'Surface calibration retrieved from cache', {
+        cached: true,
+        parameters,
+        responseTime: Date.now() - req.startTime
+      }));
+    }
+  }
+
+  // Served by the persistent worker, which fans the tenors out to a process pool
+  const result = await worker.request('calibrate_surface', parameters, { timeout: 180000 });
+
+  // Cache the result
+  cacheService.set(cacheKey, result, 300); // 5 minutes
+
+  res.json(createSuccessResponse(result.data, 'Surface calibration completed successfully', {
+    cached: false,
+    parameters,
+    responseTime: Date.now() - req.startTime,
+    executionTime: result.executionTime,
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory
   }));
 };
 
@@ -92,13 +222,16 @@ module.exports.getModelsComparison = async function getModelsComparison(req, res
  * @param {Object} res - Express response object
  */
 module.exports.getMarketData = async function getMarketData(req, res) {
-  // Execute Python service
-  const result = await pythonExecutor.execute('fx_volatility', 'market_data', {});
+  // Served by the persistent worker
+  const result = await worker.request('market_data', {});
 
   res.json(createSuccessResponse(result.data, 'Market data retrieved successfully', {
     cached: false,
     responseTime: Date.now() - req.startTime,
-    executionTime: result.meta.executionTime
+    executionTime: result.executionTime,
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory
   }));
 };
 
@@ -110,12 +243,16 @@ module.exports.getMarketData = async function getMarketData(req, res) {
 module.exports.getHealthCheck = async function getHealthCheck(req, res) {
   try {
     // Execute Python service health check
-    const result = await pythonExecutor.execute('fx_volatility', 'health_check', {});
+    const result = await worker.request('health_check', {}, { timeout: 30000 });
 
     res.json(createSuccessResponse(result.data, 'FX Volatility service is healthy', {
       service: 'fx_volatility',
+      worker: worker.getStatus(),
       responseTime: Date.now() - req.startTime,
-      executionTime: result.meta.executionTime
+      executionTime: result.executionTime,
+      timings: result.timings,
+      profile: result.profile,
+      memory: result.memory
     }));
   } catch (error) {
     res.status(503).json({
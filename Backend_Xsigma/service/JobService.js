@@ -0,0 +1,216 @@
+'use strict';
+
+/**
+ * Job Service
+ * Business logic for asynchronous execution of long-running computations
+ * Following Backend_Xsigma structure pattern
+ *
+ * @module JobService
+ * @version 2.1.0
+ */
+
+const crypto = require('crypto');
+const { createSuccessResponse } = require('./utils/errorHandler');
+const jobManager = require('./utils/jobManager');
+const costModel = require('./utils/costModel');
+const TestHJMService = require('./TestHJMService');
+const FXRatesHybridService = require('./FXRatesHybridService');
+const CurveCalibrationService = require('./CurveCalibrationService');
+const CalibrationService = require('./CalibrationService');
+
+// Jobs are not bound to an HTTP connection, so they may run longer than the synchronous endpoints
+const MAX_JOB_TIMEOUT = parseInt(process.env.JOB_MAX_TIMEOUT) || 30 * 60 * 1000; // 30 minutes
+
+// Services that can run as jobs
+const JOB_TYPES = {
+  test_hjm: {
+    operation: 'calculate',
+    description: 'HJM calibration comparison or Monte Carlo simulation',
+    prepare: (parameters) => TestHJMService.extractParameters(parameters),
+    timeout: (parameters) => TestHJMService.simulationTimeout(parameters, MAX_JOB_TIMEOUT)
+  },
+  fx_rates_hybrid: {
+    operation: 'calculate',
+    description: 'Lognormal FX with Markovian HJM rates hybrid simulation',
+    prepare: (parameters) => FXRatesHybridService.extractParameters(parameters),
+    timeout: (parameters) => FXRatesHybridService.simulationTimeout(parameters, MAX_JOB_TIMEOUT)
+  },
+  curve_calibration: {
+    operation: 'calibrate_market',
+    description: 'Multi-currency overnight and cross-currency curve build',
+    prepare: (parameters) => CurveCalibrationService.extractParameters(parameters),
+    timeout: (parameters) => CurveCalibrationService.marketTimeout(parameters, MAX_JOB_TIMEOUT)
+  },
+  analytical_sigma_calibration: {
+    operation: 'calibrate',
+    description: 'Analytical sigma volatility model calibration',
+    prepare: (parameters) => CalibrationService.extractParameters(parameters),
+    timeout: (parameters) => costModel.timeout(costModel.estimate('analytical_sigma_calibration', parameters),
+      { min: 120000, max: MAX_JOB_TIMEOUT })
+  }
+};
+
+/**
+ * Create an error carrying an HTTP status
+ * @param {string} message - Error message
+ * @param {number} status - HTTP status code
+ * @returns {Error} Error with status
+ */
+function httpError(message, status) {
+  const error = new Error(message);
+  error.status = status;
+  return error;
+}
+
+/**
+ * Look up a job or throw a 404
+ * @param {string} jobId - Job id
+ * @returns {Object} Job view
+ */
+function requireJob(jobId) {
+  const job = jobManager.get(jobId);
+  if (!job) {
+    throw httpError(`Job not found: ${jobId}`, 404);
+  }
+  return job;
+}
+
+/**
+ * Submit a job
+ * Body: { service, parameters, priority }
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.submitJob = async function submitJob(req, res) {
+  const { service, parameters = {}, priority = 'normal' } = req.body || {};
+
+  const jobType = JOB_TYPES[service];
+  if (!jobType) {
+    throw httpError(`Unsupported job service: ${service}. Valid options: ${Object.keys(JOB_TYPES).join(', ')}`, 400);
+  }
+
+  let prepared;
+  try {
+    prepared = jobType.prepare(parameters);
+  } catch (error) {
+    throw httpError(error.message, 400);
+  }
+
+  // Jobs over the job budget are rejected before they are queued
+  const cost = costModel.check(service, prepared, { job: true });
+
+  // Checkpointed HJM simulations use the job id as checkpoint id, so a job
+  // resubmitted after a worker restart resumes where it stopped
+  let jobId;
+  if (service === 'test_hjm' && prepared.checkpoint) {
+    jobId = prepared.job_id || crypto.randomUUID().replace(/-/g, '');
+    prepared.job_id = jobId;
+  }
+
+  let job;
+  try {
+    job = jobManager.submit(service, jobType.operation, prepared, {
+      priority,
+      jobId,
+      timeout: jobType.timeout(prepared)
+    });
+  } catch (error) {
+    throw httpError(error.message, error.status || 400);
+  }
+
+  const message = job.coalesced ? 'Attached to an identical job already in progress' : 'Job submitted successfully';
+  res.status(202).json(createSuccessResponse(job, message, {
+    links: {
+      status: `/api/jobs/${job.jobId}`,
+      result: `/api/jobs/${job.jobId}/result`,
+      cancel: `/api/jobs/${job.jobId}?cancelToken=${job.cancelToken}`
+    },
+    cost,
+    responseTime: Date.now() - req.startTime
+  }));
+};
+
+/**
+ * Get job status and progress
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.getJob = async function getJob(req, res) {
+  const job = requireJob(req.params.jobId);
+
+  res.json(createSuccessResponse(job, 'Job status retrieved successfully', {
+    responseTime: Date.now() - req.startTime
+  }));
+};
+
+/**
+ * Get the result of a completed job
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.getJobResult = async function getJobResult(req, res) {
+  const job = requireJob(req.params.jobId);
+
+  if (job.status !== 'completed') {
+    throw httpError(`Job ${job.jobId} is ${job.status}; no result available`, job.status === 'failed' ? 500 : 409);
+  }
+
+  const result = jobManager.getResult(job.jobId);
+  if (!result) {
+    throw httpError(`Result of job ${job.jobId} is no longer available`, 410);
+  }
+
+  res.json(createSuccessResponse(result.data, 'Job result retrieved successfully', {
+    jobId: job.jobId,
+    service: job.service,
+    parameters: job.parameters,
+    executionTime: job.executionTime,
+    responseTime: Date.now() - req.startTime
+  }));
+};
+
+/**
+ * Cancel a queued or running job, or release one submission of a shared job
+ * (`cancelToken` query parameter, as returned on submission)
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.cancelJob = async function cancelJob(req, res) {
+  let job;
+  try {
+    job = jobManager.cancel(req.params.jobId, req.query.cancelToken);
+  } catch (error) {
+    throw httpError(error.message, error.status || 400);
+  }
+  if (!job) {
+    throw httpError(`Job not found: ${req.params.jobId}`, 404);
+  }
+
+  let message = `Job ${job.status === 'cancelled' ? 'cancelled' : 'already finished'}`;
+  if (job.detached) {
+    message = `Submission released; job still ${job.status} for ${job.submitters} other submission(s)`;
+  }
+
+  res.json(createSuccessResponse(job, message, {
+    responseTime: Date.now() - req.startTime
+  }));
+};
+
+/**
+ * List jobs and worker pool statistics
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.listJobs = async function listJobs(req, res) {
+  res.json(createSuccessResponse({
+    jobs: jobManager.list(),
+    stats: jobManager.getStats(),
+    services: Object.keys(JOB_TYPES).map(name => ({
+      service: name,
+      operation: JOB_TYPES[name].operation,
+      description: JOB_TYPES[name].description
+    }))
+  }, 'Jobs retrieved successfully', {
+    responseTime: Date.now() - req.startTime
+  }));
+};
@@ -18,6 +18,9 @@ from typing import Dict, List, Any, Optional
 # Add the notebook directory to Python path for xsigmamodules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../'))
 
+from service_framework import Service, Param
+from service_timing import timer
+
 try:
     from xsigmamodules.Util import (
         blackScholes,
@@ -93,14 +96,16 @@ def calculate_volatility_surface(params: Dict[str, Any]) -> Dict[str, Any]:
     vols0.fill(atm)
     
     # Create volatility model and calculate implied volatilities
-    obj = volatilityModelExtendedSvi(fwd, ctrl_p, ctrl_c, atm, skew, smile, put, call)
-    obj.implied_volatility(
-        numpyToXsigma(vols),
-        numpyToXsigma(strikes),
-        fwd,
-        time,
-        implied_volatility_enum.LOG_NORMAL,
-    )
+    with timer.span('model'):
+        obj = volatilityModelExtendedSvi(fwd, ctrl_p, ctrl_c, atm, skew, smile, put, call)
+    with timer.span('evaluate', n=n):
+        obj.implied_volatility(
+            numpyToXsigma(vols),
+            numpyToXsigma(strikes),
+            fwd,
+            time,
+            implied_volatility_enum.LOG_NORMAL,
+        )
     
     # Base result
     result = {
@@ -122,25 +127,26 @@ def calculate_volatility_surface(params: Dict[str, Any]) -> Dict[str, Any]:
         vols_plus = np.zeros(n)
         vols_minus = np.zeros(n)
 
-        # Plus scenario (original ctrl_c)
-        obj_plus = volatilityModelExtendedSvi(fwd, ctrl_p, ctrl_c, atm, skew, smile, put, call)
-        obj_plus.implied_volatility(
-            numpyToXsigma(vols_plus),
-            numpyToXsigma(strikes_sens),
-            fwd,
-            time,
-            implied_volatility_enum.LOG_NORMAL,
-        )
+        with timer.span('evaluate', scenario='ctrl_c'):
+            # Plus scenario (original ctrl_c)
+            obj_plus = volatilityModelExtendedSvi(fwd, ctrl_p, ctrl_c, atm, skew, smile, put, call)
+            obj_plus.implied_volatility(
+                numpyToXsigma(vols_plus),
+                numpyToXsigma(strikes_sens),
+                fwd,
+                time,
+                implied_volatility_enum.LOG_NORMAL,
+            )
 
-        # Minus scenario (modified ctrl_c = 4.0)
-        obj_minus = volatilityModelExtendedSvi(fwd, ctrl_p, 4.0, atm, skew, smile, put, call)
-        obj_minus.implied_volatility(
-            numpyToXsigma(vols_minus),
-            numpyToXsigma(strikes_sens),
-            fwd,
-            time,
-            implied_volatility_enum.LOG_NORMAL,
-        )
+            # Minus scenario (modified ctrl_c = 4.0)
+            obj_minus = volatilityModelExtendedSvi(fwd, ctrl_p, 4.0, atm, skew, smile, put, call)
+            obj_minus.implied_volatility(
+                numpyToXsigma(vols_minus),
+                numpyToXsigma(strikes_sens),
+                fwd,
+                time,
+                implied_volatility_enum.LOG_NORMAL,
+            )
 
         result.update({
             'strikes_sensitivity': strikes_sens.tolist(),
@@ -154,81 +160,83 @@ def calculate_volatility_surface(params: Dict[str, Any]) -> Dict[str, Any]:
         # Cases 3-4: Calculate density and probability using sensitivities (from notebook cellules 6-7)
 
         # First, calculate sensitivities using the same strikes as main calculation
-        vols_sens = np.zeros(n)
-        atm_sensitivity = np.zeros(n)
-        skew_sensitivity = np.zeros(n)
-        smile_sensitivity = np.zeros(n)
-        put_sensitivity = np.zeros(n)
-        call_sensitivity = np.zeros(n)
-        strike_sensitivity = np.zeros(n)
-        ref_sensitivity = np.zeros(n)
-        atm2_sensitivity = np.zeros(n)
-        ref2_sensitivity = np.zeros(n)
-        strike2_sensitivity = np.zeros(n)
-
-        obj_sens = volatilityModelExtendedSvi(fwd, ctrl_p, ctrl_c, atm, skew, smile, put, call)
-        obj_sens.sensitivities(
-            time,
-            numpyToXsigma(strikes),
-            numpyToXsigma(vols_sens),
-            numpyToXsigma(atm_sensitivity),
-            numpyToXsigma(skew_sensitivity),
-            numpyToXsigma(smile_sensitivity),
-            numpyToXsigma(put_sensitivity),
-            numpyToXsigma(call_sensitivity),
-            numpyToXsigma(strike_sensitivity),
-            numpyToXsigma(ref_sensitivity),
-            numpyToXsigma(atm2_sensitivity),
-            numpyToXsigma(ref2_sensitivity),
-            numpyToXsigma(strike2_sensitivity),
-        )
-
-        # Calculate density and probability using blackScholes functions
-        density = []
-        probability = []
-
-        for i in range(len(strikes)):
-            # Case 3: Density calculation (cellule 7)
-            density_value = blackScholes.density(
-                fwd, strikes[i], time, vols_sens[i], strike_sensitivity[i], strike2_sensitivity[i]
-            )
-            density.append(density_value)
-
-            # Case 4: Probability calculation (cellule 7)
-            proba_value = blackScholes.probability(
-                fwd, strikes[i], time, vols_sens[i], strike_sensitivity[i]
+        with timer.span('density'):
+            vols_sens = np.zeros(n)
+            atm_sensitivity = np.zeros(n)
+            skew_sensitivity = np.zeros(n)
+            smile_sensitivity = np.zeros(n)
+            put_sensitivity = np.zeros(n)
+            call_sensitivity = np.zeros(n)
+            strike_sensitivity = np.zeros(n)
+            ref_sensitivity = np.zeros(n)
+            atm2_sensitivity = np.zeros(n)
+            ref2_sensitivity = np.zeros(n)
+            strike2_sensitivity = np.zeros(n)
+
+            obj_sens = volatilityModelExtendedSvi(fwd, ctrl_p, ctrl_c, atm, skew, smile, put, call)
+            obj_sens.sensitivities(
+                time,
+                numpyToXsigma(strikes),
+                numpyToXsigma(vols_sens),
+                numpyToXsigma(atm_sensitivity),
+                numpyToXsigma(skew_sensitivity),
+                numpyToXsigma(smile_sensitivity),
+                numpyToXsigma(put_sensitivity),
+                numpyToXsigma(call_sensitivity),
+                numpyToXsigma(strike_sensitivity),
+                numpyToXsigma(ref_sensitivity),
+                numpyToXsigma(atm2_sensitivity),
+                numpyToXsigma(ref2_sensitivity),
+                numpyToXsigma(strike2_sensitivity),
             )
-            probability.append(proba_value)
 
-        density = np.array(density)
-        probability = np.array(probability)
+            # Calculate density and probability using blackScholes functions
+            density = []
+            probability = []
 
-        # Calculate density_bump and probability_bump (cellule 8)
-        density_bump = []
-        probability_bump = []
-        bump = 0.000001
-
-        for i in range(len(strikes)):
-            strikes_tmp = np.array([strikes[i] - bump, strikes[i], strikes[i] + bump])
-            vols_tmp = np.zeros(3)
-            obj_bump = volatilityModelExtendedSvi(fwd, ctrl_p, ctrl_c, atm, skew, smile, put, call)
-            obj_bump.implied_volatility(
-                numpyToXsigma(vols_tmp),
-                numpyToXsigma(strikes_tmp),
-                fwd,
-                time,
-                implied_volatility_enum.LOG_NORMAL,
-            )
+            for i in range(len(strikes)):
+                # Case 3: Density calculation (cellule 7)
+                density_value = blackScholes.density(
+                    fwd, strikes[i], time, vols_sens[i], strike_sensitivity[i], strike2_sensitivity[i]
+                )
+                density.append(density_value)
 
-            value_down = blackScholes.price(fwd, strikes[i] - bump, time, vols_tmp[0], 1.0, 1.0)
-            value = blackScholes.price(fwd, strikes[i], time, vols_tmp[1], 1.0, 1.0)
-            value_up = blackScholes.price(fwd, strikes[i] + bump, time, vols_tmp[2], 1.0, 1.0)
+                # Case 4: Probability calculation (cellule 7)
+                proba_value = blackScholes.probability(
+                    fwd, strikes[i], time, vols_sens[i], strike_sensitivity[i]
+                )
+                probability.append(proba_value)
 
-            density_bump.append((value_up + value_down - 2 * value) / (bump * bump))
-            probability_bump.append(1 + (value_up - value_down) / (2.0 * bump))
+            density = np.array(density)
+            probability = np.array(probability)
 
-        density_bump = np.array(density_bump)
-        probability_bump = np.array(probability_bump)
+        # Calculate density_bump and probability_bump (cellule 8)
+        with timer.span('density', method='bump'):
+            density_bump = []
+            probability_bump = []
+            bump = 0.000001
+
+            for i in range(len(strikes)):
+                strikes_tmp = np.array([strikes[i] - bump, strikes[i], strikes[i] + bump])
+                vols_tmp = np.zeros(3)
+                obj_bump = volatilityModelExtendedSvi(fwd, ctrl_p, ctrl_c, atm, skew, smile, put, call)
+                obj_bump.implied_volatility(
+                    numpyToXsigma(vols_tmp),
+                    numpyToXsigma(strikes_tmp),
+                    fwd,
+                    time,
+                    implied_volatility_enum.LOG_NORMAL,
+                )
+
+                value_down = blackScholes.price(fwd, strikes[i] - bump, time, vols_tmp[0], 1.0, 1.0)
+                value = blackScholes.price(fwd, strikes[i], time, vols_tmp[1], 1.0, 1.0)
+                value_up = blackScholes.price(fwd, strikes[i] + bump, time, vols_tmp[2], 1.0, 1.0)
+
+                density_bump.append((value_up + value_down - 2 * value) / (bump * bump))
+                probability_bump.append(1 + (value_up - value_down) / (2.0 * bump))
+
+            density_bump = np.array(density_bump)
+            probability_bump = np.array(probability_bump)
 
         result.update({
             'density': density.tolist(),
@@ -239,79 +247,13 @@ def calculate_volatility_surface(params: Dict[str, Any]) -> Dict[str, Any]:
     
     return result
 
-def main():
-    """Main function to handle command line execution"""
-    # Check if this is called with the new API interface (operation + JSON)
-    if len(sys.argv) >= 2 and sys.argv[1] in ['calculate', 'health_check']:
-        operation = sys.argv[1]
-
-        if operation == 'health_check':
-            # Health check operation
-            health_result = {
-                'status': 'healthy',
-                'service': 'AnalyticalSigmaVolatility',
-                'version': '2.1.0',
-                'timestamp': str(np.datetime64('now')),
-                'checks': {
-                    'xsigmamodules': 'available',
-                    'numpy': 'available',
-                    'matplotlib': 'available'
-                }
-            }
-            print(json.dumps(health_result))
-            return
-
-        elif operation == 'calculate':
-            # Parse JSON parameters if provided
-            if len(sys.argv) >= 3:
-                try:
-                    params = json.loads(sys.argv[2])
-                except json.JSONDecodeError:
-                    error_result = {
-                        'status': 'error',
-                        'error': 'Invalid JSON parameters'
-                    }
-                    print(json.dumps(error_result))
-                    sys.exit(1)
-            else:
-                # Use default parameters
-                params = {}
-
-            # Map test case to output_type if provided
-            if 'test' in params:
-                test_case = params['test']
-                if test_case == 1:
-                    params['output_type'] = 'volatility_surface'
-                elif test_case == 2:
-                    params['output_type'] = 'vols_plus_minus'
-                elif test_case == 3:
-                    params['output_type'] = 'density'
-                elif test_case == 4:
-                    params['output_type'] = 'probability'
-
-            try:
-                # Calculate volatility surface
-                result = calculate_volatility_surface(params)
-
-                # Wrap result in API format
-                api_result = {
-                    'status': 'success',
-                    'data': result,
-                    'timestamp': str(np.datetime64('now'))
-                }
-                print(json.dumps(api_result))
-                return
-
-            except Exception as e:
-                error_result = {
-                    'status': 'error',
-                    'error': str(e),
-                    'timestamp': str(np.datetime64('now'))
-                }
-                print(json.dumps(error_result))
-                sys.exit(1)
-
-    # Fallback to original argparse interface for backward compatibility
+OUTPUT_TYPES = ['volatility_surface', 'vols_plus_minus', 'sensitivity', 'density', 'probability', 'all']
+
+# Test cases of the API mapped to their output type
+TEST_OUTPUT_TYPES = {1: 'volatility_surface', 2: 'vols_plus_minus', 3: 'density', 4: 'probability'}
+
+def legacy_main(argv):
+    """Original argparse interface, kept for backward compatibility"""
     parser = argparse.ArgumentParser(description='Calculate Analytical Sigma Volatility')
     parser.add_argument('--n', type=int, default=200, help='Number of calculation points')
     parser.add_argument('--fwd', type=float, default=2245.0656707892695, help='Forward price')
@@ -330,7 +272,7 @@ def main():
                        help='Output format')
     parser.add_argument('--plot', action='store_true', help='Generate plot')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Convert args to parameters dictionary
     params = {
@@ -412,5 +354,20 @@ def main():
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
+service = Service('AnalyticalSigmaVolatility', version='2.1.0', legacy=legacy_main,
+                  health=lambda: {'xsigmamodules': 'available', 'numpy': 'available',
+                                  'matplotlib': 'available'})
+
+@service.operation('calculate', schema={
+    'n': Param(int, 200, minimum=1),
+    'test': Param(int, choices=list(TEST_OUTPUT_TYPES)),
+    'output_type': Param(str, choices=OUTPUT_TYPES),
+})
+def calculate(params):
+    """Volatility surface and the analyses of its output type"""
+    if params.get('test') is not None:
+        params['output_type'] = TEST_OUTPUT_TYPES[params['test']]
+    return calculate_volatility_surface(params)
+
 if __name__ == "__main__":
-    main()
+    service.run()
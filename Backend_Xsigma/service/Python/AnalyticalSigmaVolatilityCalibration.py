@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
 
+import io
+import multiprocessing
+import os
+import queue
+import shutil
 import sys
 import json
+import tempfile
 import time
 import numpy as np
+from service_metrics import metrics
+from service_framework import Service, Param, Response
+from service_timing import timer
 from xsigmamodules.Util import (
     blackScholes,
     sigmaVolatilityInspired,
@@ -18,53 +27,328 @@ from xsigmamodules.Math import (
     nlopt_algo_name
 )
 
-# Cache for sample data to avoid regenerating for repeated calls
-_sample_data_cache = None
+from market_store import MarketStore
 
-def generate_sample_data(num_points=39, strike_range=(1800, 2700)):
+# Real market volatility data from the notebook, quoted on an even strike grid
+NOTEBOOK_VOLS = (
+    np.array([
+        140.00, 136.62, 133.02, 129.02, 124.96, 120.55, 115.67, 110.16, 106.32, 102.75,
+        96.93, 91.39, 85.85, 79.70, 73.11, 68.25, 62.71, 57.30, 49.97, 44.55,
+        41.58, 43.20, 47.41, 51.92, 56.99, 60.46, 64.68, 68.47, 72.31, 76.14,
+        79.63, 83.10, 86.15, 89.14, 91.85, 94.70, 97.06, 99.70, 101.03
+    ]) / 100.0
+)
+
+SAMPLE_DATA_DEFAULTS = {
+    'num_points': 39,
+    'strike_min': 1800.0,
+    'strike_max': 2700.0,
+    'spread_model': 'uniform',
+    'spread': 0.01,
+    'seed': 42,
+}
+SPREAD_MODELS = ('uniform', 'constant', 'proportional')
+
+# Sample sets already generated by this process, keyed by their specification
+_sample_data_cache = {}
+
+def sample_data_spec(params=None):
+    """
+    Normalized sample data specification of a request
+
+    Args:
+        params (dict): Request parameters; ``sample_data`` overrides SAMPLE_DATA_DEFAULTS
+            and ``quotes_file`` selects a quote file instead of generated data
+
+    Returns:
+        dict: Specification used both to build and to cache the data
+    """
+    params = params or {}
+    if params.get('quotes_file'):
+        name = str(params['quotes_file'])
+        if os.path.basename(name) != name:
+            raise ValueError("quotes_file must be a file name in the market data directories")
+        return {'quotes_file': name}
+
+    spec = dict(SAMPLE_DATA_DEFAULTS)
+    spec.update({k: v for k, v in (params.get('sample_data') or {}).items() if v is not None})
+    spec['num_points'] = int(spec['num_points'])
+    spec['strike_min'] = float(spec['strike_min'])
+    spec['strike_max'] = float(spec['strike_max'])
+    spec['spread'] = float(spec['spread'])
+    spec['seed'] = int(spec['seed'])
+
+    if spec['num_points'] < 5:
+        raise ValueError("sample_data.num_points must be at least 5")
+    if not 0 < spec['strike_min'] < spec['strike_max']:
+        raise ValueError("sample_data strike range must satisfy 0 < strike_min < strike_max")
+    if spec['spread_model'] not in SPREAD_MODELS:
+        raise ValueError(f"sample_data.spread_model must be one of {', '.join(SPREAD_MODELS)}")
+    if spec['spread'] < 0:
+        raise ValueError("sample_data.spread must be non-negative")
+    return spec
+
+def generate_sample_data(num_points=39, strike_range=(1800, 2700), spread_model='uniform',
+                         spread=0.01, seed=42):
     """
     Generate sample market data for calibration based on real market data
 
     Args:
         num_points (int): Number of data points
         strike_range (tuple): Range of strikes (min, max)
+        spread_model (str): 'uniform' (random half-spread up to ``spread``), 'constant'
+            (half-spread ``spread``) or 'proportional' (half-spread ``spread`` times the vol)
+        spread (float): Half-spread scale in volatility units
+        seed (int): Seed of the spread generator, so identical requests get identical quotes
 
     Returns:
         tuple: (calibration_strikes, bid_values, ask_values, mid_values)
     """
-    # Real market volatility data from the notebook
-    y_values = (
-        np.array([
-            140.00, 136.62, 133.02, 129.02, 124.96, 120.55, 115.67, 110.16, 106.32, 102.75,
-            96.93, 91.39, 85.85, 79.70, 73.11, 68.25, 62.71, 57.30, 49.97, 44.55,
-            41.58, 43.20, 47.41, 51.92, 56.99, 60.46, 64.68, 68.47, 72.31, 76.14,
-            79.63, 83.10, 86.15, 89.14, 91.85, 94.70, 97.06, 99.70, 101.03
-        ]) / 100.0
-    )
-
     strikes = np.linspace(strike_range[0], strike_range[1], num_points)
-    spread = np.random.uniform(0, 0.01, num_points)
-    bid_values = (
-        np.interp(strikes, np.linspace(strike_range[0], strike_range[1], num_points), y_values) - spread
-    )
-    ask_values = (
-        np.interp(strikes, np.linspace(strike_range[0], strike_range[1], num_points), y_values) + spread
+    # The notebook quotes span the strike range on their own grid
+    vols = np.interp(
+        strikes, np.linspace(strike_range[0], strike_range[1], len(NOTEBOOK_VOLS)), NOTEBOOK_VOLS
     )
+
+    rng = np.random.default_rng(seed)
+    if spread_model == 'uniform':
+        half_spread = rng.uniform(0, spread, num_points)
+    elif spread_model == 'constant':
+        half_spread = np.full(num_points, spread)
+    elif spread_model == 'proportional':
+        half_spread = spread * vols
+    else:
+        raise ValueError(f"Unknown spread model: {spread_model}")
+
+    bid_values = vols - half_spread
+    ask_values = vols + half_spread
     mid_values = 0.5 * (bid_values + ask_values)
 
     return strikes, bid_values, ask_values, mid_values
 
-def get_sample_data():
+def load_quotes_file(name):
+    """
+    Quotes of a market data file (JSON ``{strikes, bid, ask[, mid]}`` or CSV ``strike,bid,ask``)
+
+    Returns:
+        tuple: (calibration_strikes, bid_values, ask_values, mid_values)
+    """
+    store = MarketStore()
+    if name.lower().endswith('.csv'):
+        table = np.loadtxt(io.BytesIO(store.blob(name)['data']), delimiter=',', skiprows=1, ndmin=2)
+        strikes, bid_values, ask_values = table[:, 0], table[:, 1], table[:, 2]
+        mid_values = 0.5 * (bid_values + ask_values)
+    else:
+        document = store.get_document(name)
+        strikes = np.asarray(document['strikes'], dtype=float)
+        bid_values = np.asarray(document['bid'], dtype=float)
+        ask_values = np.asarray(document['ask'], dtype=float)
+        mid_values = (np.asarray(document['mid'], dtype=float) if 'mid' in document
+                      else 0.5 * (bid_values + ask_values))
+
+    if not len(strikes) == len(bid_values) == len(ask_values) == len(mid_values) or len(strikes) < 5:
+        raise ValueError(f"{name} must hold at least 5 quotes with strikes, bid and ask")
+    order = np.argsort(strikes)
+    return strikes[order], bid_values[order], ask_values[order], mid_values[order]
+
+def get_sample_data(params=None):
     """
     Get or generate sample market data with caching
-    
+
+    Generated sets are cached in the process by specification (generating one is
+    cheaper than reading it back from disk); quote files are cached by the market
+    store on their content.
+
+    Args:
+        params (dict): Request parameters (see sample_data_spec)
+
     Returns:
         tuple: (calibration_strikes, bid_values, ask_values, mid_values)
     """
-    global _sample_data_cache
-    if _sample_data_cache is None:
-        _sample_data_cache = generate_sample_data()
-    return _sample_data_cache
+    spec = sample_data_spec(params)
+    if 'quotes_file' in spec:
+        return load_quotes_file(spec['quotes_file'])
+
+    key = json.dumps(spec, sort_keys=True)
+    metrics.record_cache('sample_data', key in _sample_data_cache)
+    if key not in _sample_data_cache:
+        _sample_data_cache[key] = generate_sample_data(
+            spec['num_points'], (spec['strike_min'], spec['strike_max']),
+            spec['spread_model'], spec['spread'], spec['seed']
+        )
+    return _sample_data_cache[key]
+
+# Iterations and function/gradient/parameter tolerances of every solver
+SOLVER_TOLERANCES = (500, 1e-14, 1e-14, 1e-14)
+DEFAULT_NLOPT_ALGO = 'AUGMENTED_LAGRANGIAN_WITH_BOBYQA'
+# Solvers launched by the 'race' and 'best' strategies
+RACE_SOLVERS = ('ceres', 'lm', f'nlopt:{DEFAULT_NLOPT_ALGO}')
+SOLVER_STRATEGIES = ('ceres', 'lm', 'nlopt:<algo>', 'race', 'best')
+# Calibrations that use the extended SVI model (the others never read it)
+ASV_COMPUTATIONS = ('volatility_asv', 'density')
+
+def solver_options(solver, tolerances=SOLVER_TOLERANCES):
+    """
+    Solver options of a single solver name
+
+    Args:
+        solver (str): 'ceres', 'lm' or 'nlopt:<algo>' (an nlopt_algo_name member)
+        tolerances (tuple): (max iterations, function, gradient, parameter tolerance)
+    """
+    if solver == 'ceres':
+        return solverOptionsCeres(*tolerances)
+    if solver == 'lm':
+        return solverOptionsLm(*tolerances)
+    if solver.startswith('nlopt'):
+        algo = solver.partition(':')[2].upper() or DEFAULT_NLOPT_ALGO
+        if not hasattr(nlopt_algo_name, algo):
+            raise ValueError(f"Unknown NLopt algorithm: {algo}")
+        return solverOptionsNlopt(getattr(nlopt_algo_name, algo), *tolerances)
+    raise ValueError(f"Unknown solver '{solver}'. Choose one of {', '.join(SOLVER_STRATEGIES)}")
+
+def calibration_residual(obj, strikes, mid_values, expiry):
+    """Root-mean-square volatility error of a calibrated model on the quotes."""
+    vols = np.zeros(len(strikes))
+    obj.implied_volatility(
+        numpyToXsigma(vols), numpyToXsigma(strikes), 1.0, expiry, implied_volatility_enum.LOG_NORMAL
+    )
+    return float(np.sqrt(np.mean((vols - mid_values) ** 2)))
+
+def calibrate_with_solver(solver, strikes, mid_values, params, tolerances=SOLVER_TOLERANCES):
+    """
+    Calibrate the extended SVI model with one solver
+
+    Returns:
+        tuple: (calibrated model, report with solver, residual, iteration budget and wall time)
+    """
+    options = solver_options(solver, tolerances)
+    start_time = time.perf_counter()
+    with timer.span('model'):
+        initial_guess_obj = volatilityModelExtendedSvi(
+            params['spot'], 0.2, params['volvol'], params['beta'],
+            params['rho'], params['r'], params['q'], 0.00006
+        )
+    with timer.span('solve', solver=solver):
+        calibrated_obj = volatilityModelExtendedSvi.calibrate(
+            numpyToXsigma(strikes),
+            numpyToXsigma(mid_values),
+            params['spot'],
+            params['expiry'],
+            options,
+            1,
+            1,
+            initial_guess_obj
+        )
+    wall_time = time.perf_counter() - start_time
+    return calibrated_obj, {
+        'solver': solver,
+        'residual': calibration_residual(calibrated_obj, strikes, mid_values, params['expiry']),
+        # The solver bindings do not report the iterations used, only the budget given
+        'max_iterations': tolerances[0],
+        'wall_time_ms': round(wall_time * 1000, 2),
+    }
+
+def _solver_worker(solver, strikes, mid_values, params, model_path, results):
+    """Process body of one raced solver: calibrate, hand the model over as JSON, report."""
+    try:
+        calibrated_obj, report = calibrate_with_solver(solver, strikes, mid_values, params)
+        tmp_path = f"{model_path}.tmp"
+        volatilityModelExtendedSvi.write_to_json(tmp_path, calibrated_obj)
+        os.replace(tmp_path, model_path)
+        report['model_path'] = model_path
+    except Exception as e:
+        report = {'solver': solver, 'error': str(e)}
+    report['pid'] = os.getpid()
+    results.put(report)
+
+def calibrate_model(strikes, mid_values, params):
+    """
+    Calibrate the extended SVI model with the requested solver strategy
+
+    ``params['solver']`` is 'ceres' (default), 'lm', 'nlopt:<algo>', 'race' or 'best'.
+    'race' runs RACE_SOLVERS in parallel processes and keeps the first one whose
+    residual reaches ``target_residual`` (any successful one when unset), terminating
+    the others; 'best' waits for all of them and keeps the lowest residual.
+
+    Returns:
+        tuple: (calibrated model, solver report)
+    """
+    strategy = str(params.get('solver') or 'ceres')
+    if strategy not in ('race', 'best'):
+        try:
+            calibrated_obj, report = calibrate_with_solver(strategy, strikes, mid_values, params)
+        except Exception:
+            metrics.record_calibration('extended_svi', strategy, None, ok=False)
+            raise
+        metrics.record_calibration('extended_svi', strategy, report['wall_time_ms'] / 1000)
+        return calibrated_obj, {'strategy': strategy, 'selected': strategy, 'solvers': [report]}
+
+    target = params.get('target_residual')
+    timeout = float(params.get('solver_timeout', 120))
+    for solver in RACE_SOLVERS:
+        solver_options(solver)
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    work_dir = tempfile.mkdtemp(prefix='xsigma_solver_race_')
+    processes = {}
+    reports = []
+    winner = None
+    try:
+        for solver in RACE_SOLVERS:
+            model_path = os.path.join(work_dir, solver.replace(':', '_') + '.json')
+            process = context.Process(
+                target=_solver_worker, args=(solver, strikes, mid_values, params, model_path, results),
+                daemon=True,
+            )
+            process.start()
+            processes[solver] = process
+
+        deadline = time.perf_counter() + timeout
+        while len(reports) < len(processes):
+            try:
+                report = results.get(timeout=max(deadline - time.perf_counter(), 0.01))
+            except queue.Empty:
+                break
+            reports.append(report)
+            print(f"PROGRESS: Solver {report['solver']} finished "
+                  f"({report.get('residual', report.get('error'))})", file=sys.stderr)
+            if strategy == 'race' and 'error' not in report and (
+                target is None or report['residual'] <= float(target)
+            ):
+                winner = report
+                break
+
+        for solver, process in processes.items():
+            if process.is_alive():
+                process.terminate()
+                if not any(report['solver'] == solver for report in reports):
+                    reports.append({'solver': solver, 'cancelled': True})
+            process.join()
+
+        if winner is None:
+            converged = [report for report in reports if 'residual' in report]
+            if not converged:
+                errors = '; '.join(f"{r['solver']}: {r.get('error', 'timed out')}" for r in reports)
+                raise RuntimeError(f"No solver converged ({errors})")
+            winner = min(converged, key=lambda report: report['residual'])
+
+        calibrated_obj = volatilityModelExtendedSvi.read_from_json(winner['model_path'])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for report in reports:
+        report.pop('model_path', None)
+        if 'residual' in report:
+            metrics.record_calibration('extended_svi', report['solver'], report['wall_time_ms'] / 1000)
+        elif 'error' in report:
+            metrics.record_calibration('extended_svi', report['solver'], None, ok=False)
+    return calibrated_obj, {
+        'strategy': strategy,
+        'selected': winner['solver'],
+        'target_residual': target,
+        'solvers': reports,
+    }
 
 def validate_params(params):
     """
@@ -236,52 +520,35 @@ def calculate_vols_and_density(params, computation_type):
         # Validate parameters
         validate_params(params)
         
-        # Get sample data (using cache)
-        calibration_strikes, bid_values, ask_values, mid_values = get_sample_data()
+        # Get sample data (seeded and cached by specification) or the requested quotes
+        with timer.span('market_load'):
+            calibration_strikes, bid_values, ask_values, mid_values = get_sample_data(params)
         
-        # Create initial guess for model parameters
-        try:
-            initial_guess_obj = volatilityModelExtendedSvi(
-                params['spot'], 0.2, params['volvol'], params['beta'], 
-                params['rho'], params['r'], params['q'], 0.00006
-            )
-        except Exception as e:
-            return {
-                "status": "error",
-                "error": f"Failed to create initial model: {str(e)}"
-            }
-
-        # Calibrate with Ceres solver
-        try:
-            options_ceres = solverOptionsCeres(500, 1e-14, 1e-14, 1e-14)
-            calibrated_obj_ceres = volatilityModelExtendedSvi.calibrate(
-                numpyToXsigma(calibration_strikes),
-                numpyToXsigma(mid_values),
-                params['spot'],
-                params['expiry'],
-                options_ceres,
-                1,
-                1,
-                initial_guess_obj
-            )
-        except Exception as e:
-            return {
-                "status": "error",
-                "error": f"Model calibration failed: {str(e)}"
-            }
+        # Calibrate the extended SVI model with the requested solver strategy
+        calibrated_obj, solver_report = None, None
+        if computation_type in ASV_COMPUTATIONS:
+            try:
+                with timer.span('calibrate', strategy=str(params.get('solver') or 'ceres')):
+                    calibrated_obj, solver_report = calibrate_model(calibration_strikes, mid_values, params)
+            except Exception as e:
+                return {
+                    "status": "error",
+                    "error": f"Model calibration failed: {str(e)}"
+                }
 
-        strikes = np.linspace(1800, 2700, params['n'])
+        strikes = np.linspace(calibration_strikes[0], calibration_strikes[-1], params['n'])
 
         if computation_type == "volatility_asv":
             try:
-                vols = np.zeros(params['n'])
-                calibrated_obj_ceres.implied_volatility(
-                    numpyToXsigma(vols),
-                    numpyToXsigma(strikes),
-                    1.0,
-                    params['expiry'],
-                    implied_volatility_enum.LOG_NORMAL
-                )
+                with timer.span('evaluate', n=params['n']):
+                    vols = np.zeros(params['n'])
+                    calibrated_obj.implied_volatility(
+                        numpyToXsigma(vols),
+                        numpyToXsigma(strikes),
+                        1.0,
+                        params['expiry'],
+                        implied_volatility_enum.LOG_NORMAL
+                    )
                 
                 # Calculate performance metrics
                 execution_time = time.time() - start_time
@@ -298,7 +565,8 @@ def calculate_vols_and_density(params, computation_type):
                         "vols": vols.tolist()
                     },
                     "performance": {
-                        "execution_time_ms": round(execution_time * 1000, 2)
+                        "execution_time_ms": round(execution_time * 1000, 2),
+                        "solver": solver_report
                     }
                 }
             except Exception as e:
@@ -309,7 +577,8 @@ def calculate_vols_and_density(params, computation_type):
 
         elif computation_type == "density":
             try:
-                density = density_new(calibrated_obj_ceres, strikes, params['spot'], params['expiry'])
+                with timer.span('density', n=params['n']):
+                    density = density_new(calibrated_obj, strikes, params['spot'], params['expiry'])
                 
                 # Calculate performance metrics
                 execution_time = time.time() - start_time
@@ -322,7 +591,8 @@ def calculate_vols_and_density(params, computation_type):
                         "density": density
                     },
                     "performance": {
-                        "execution_time_ms": round(execution_time * 1000, 2)
+                        "execution_time_ms": round(execution_time * 1000, 2),
+                        "solver": solver_report
                     }
                 }
             except Exception as e:
@@ -341,19 +611,23 @@ def calculate_vols_and_density(params, computation_type):
                     "sigma": 0.4
                 }
 
-                obj_svi = sigmaVolatilityInspired(
-                    params['spot'],
-                    initial_values["b"],
-                    initial_values["m"],
-                    initial_values["sigma"]
-                )
-                obj_svi.calibrate(
-                    numpyToXsigma(mid_values),
-                    numpyToXsigma(calibration_strikes)
-                )
-
-                vols = np.zeros(params['n'])
-                obj_svi.svi(numpyToXsigma(vols), numpyToXsigma(strikes))
+                svi_start = time.perf_counter()
+                with timer.span('calibrate', model='svi'):
+                    obj_svi = sigmaVolatilityInspired(
+                        params['spot'],
+                        initial_values["b"],
+                        initial_values["m"],
+                        initial_values["sigma"]
+                    )
+                    obj_svi.calibrate(
+                        numpyToXsigma(mid_values),
+                        numpyToXsigma(calibration_strikes)
+                    )
+                metrics.record_calibration('svi', 'builtin', time.perf_counter() - svi_start)
+
+                with timer.span('evaluate', n=params['n']):
+                    vols = np.zeros(params['n'])
+                    obj_svi.svi(numpyToXsigma(vols), numpyToXsigma(strikes))
 
                 # Calculate performance metrics
                 execution_time = time.time() - start_time
@@ -394,7 +668,8 @@ def calculate_vols_and_density(params, computation_type):
                     "call": params.get('call', 0.00006),
                 }
 
-                result_data = calculate_dynamic_vols_and_density(dynamic_params, "asv")
+                with timer.span('evaluate', model='asv'):
+                    result_data = calculate_dynamic_vols_and_density(dynamic_params, "asv")
 
                 # Calculate performance metrics
                 execution_time = time.time() - start_time
@@ -431,7 +706,8 @@ def calculate_vols_and_density(params, computation_type):
                     "sigma": params.get('sigma', 0.4),
                 }
 
-                result_data = calculate_dynamic_vols_and_density(dynamic_params, "svi")
+                with timer.span('evaluate', model='svi'):
+                    result_data = calculate_dynamic_vols_and_density(dynamic_params, "svi")
 
                 # Calculate performance metrics
                 execution_time = time.time() - start_time
@@ -468,135 +744,64 @@ def calculate_vols_and_density(params, computation_type):
             "error": str(e)
         }
 
-def main():
+COMPUTATION_TYPES = ['volatility_asv', 'density', 'volatility_svi', 'dynamic_asv', 'dynamic_svi']
+
+def legacy_main(argv):
     """
-    Main entry point for the script
-    Supports both new API interface (operation + JSON) and legacy interface
+    Positional interface, kept for backward compatibility:
+    n spot expiry r q beta rho volvol computationType ['<json>' | fwd time ctrl_p ctrl_c atm skew smile put call]
     """
-    # Check if this is called with the new API interface (operation + JSON)
-    if len(sys.argv) >= 2 and sys.argv[1] in ['calibrate', 'health_check']:
-        operation = sys.argv[1]
-
-        if operation == 'health_check':
-            # Health check operation
-            health_result = {
-                'status': 'healthy',
-                'service': 'AnalyticalSigmaVolatilityCalibration',
-                'version': '2.1.0',
-                'timestamp': str(np.datetime64('now')),
-                'checks': {
-                    'xsigmamodules': 'available',
-                    'numpy': 'available',
-                    'solvers': 'available'
-                }
-            }
-            print(json.dumps(health_result))
-            return
-
-        elif operation == 'calibrate':
-            # Parse JSON parameters if provided
-            if len(sys.argv) >= 3:
-                try:
-                    params = json.loads(sys.argv[2])
-                except json.JSONDecodeError:
-                    error_result = {
-                        'status': 'error',
-                        'error': 'Invalid JSON parameters'
-                    }
-                    print(json.dumps(error_result))
-                    sys.exit(1)
-            else:
-                # Use default parameters
-                params = {
-                    'n': 200,
-                    'spot': 2245.0656,
-                    'expiry': 1.0,
-                    'r': 0.003,
-                    'q': 0.0022,
-                    'beta': 0.4158,
-                    'rho': 0.2256,
-                    'volvol': 0.2256,
-                    'computationType': 'volatility_asv'
-                }
-
-            try:
-                # Extract computation type
-                computation_type = params.get('computationType', 'volatility_asv')
-
-                # Calculate volatility and density
-                result = calculate_vols_and_density(params, computation_type)
-
-                # Wrap result in API format if not already wrapped
-                if 'status' not in result:
-                    api_result = {
-                        'status': 'success',
-                        'data': result,
-                        'timestamp': str(np.datetime64('now'))
-                    }
-                else:
-                    api_result = result
-
-                print(json.dumps(api_result))
-                return
-
-            except Exception as e:
-                error_result = {
-                    'status': 'error',
-                    'error': str(e),
-                    'timestamp': str(np.datetime64('now'))
-                }
-                print(json.dumps(error_result))
-                sys.exit(1)
-
-    # Fallback to legacy interface for backward compatibility
-    try:
-        if len(sys.argv) < 10:
-            raise ValueError("Insufficient arguments")
-
-        # Parse basic command line arguments
-        params = {
-            'n': int(sys.argv[1]),
-            'spot': float(sys.argv[2]),
-            'expiry': float(sys.argv[3]),
-            'r': float(sys.argv[4]),
-            'q': float(sys.argv[5]),
-            'beta': float(sys.argv[6]),
-            'rho': float(sys.argv[7]),
-            'volvol': float(sys.argv[8])
-        }
-        computation_type = sys.argv[9]
-
-        # Parse additional dynamic parameters if provided
-        if len(sys.argv) > 10:
-            try:
-                # Parse JSON string with additional parameters
-                additional_params = json.loads(sys.argv[10])
-                params.update(additional_params)
-            except (json.JSONDecodeError, IndexError):
-                # If JSON parsing fails, try individual parameters
-                if len(sys.argv) >= 19:  # All dynamic parameters provided
-                    params.update({
-                        'fwd': float(sys.argv[10]),
-                        'time': float(sys.argv[11]),
-                        'ctrl_p': float(sys.argv[12]),
-                        'ctrl_c': float(sys.argv[13]),
-                        'atm': float(sys.argv[14]),
-                        'skew': float(sys.argv[15]),
-                        'smile': float(sys.argv[16]),
-                        'put': float(sys.argv[17]),
-                        'call': float(sys.argv[18])
-                    })
-
-        # Perform calculation and print result as JSON
-        result = calculate_vols_and_density(params, computation_type)
-        print(json.dumps(result))
+    if len(argv) < 9:
+        raise ValueError("Insufficient arguments")
+
+    # Parse basic command line arguments
+    params = {
+        'n': int(argv[0]),
+        'spot': float(argv[1]),
+        'expiry': float(argv[2]),
+        'r': float(argv[3]),
+        'q': float(argv[4]),
+        'beta': float(argv[5]),
+        'rho': float(argv[6]),
+        'volvol': float(argv[7]),
+        'computationType': argv[8]
+    }
 
-    except Exception as e:
-        print(json.dumps({
-            "status": "error",
-            "error": str(e)
-        }))
-        sys.exit(1)
+    # Parse additional dynamic parameters if provided
+    if len(argv) > 9:
+        try:
+            # Parse JSON string with additional parameters
+            params.update(json.loads(argv[9]))
+        except json.JSONDecodeError:
+            # If JSON parsing fails, try individual parameters
+            if len(argv) >= 18:  # All dynamic parameters provided
+                params.update(zip(
+                    ['fwd', 'time', 'ctrl_p', 'ctrl_c', 'atm', 'skew', 'smile', 'put', 'call'],
+                    map(float, argv[9:18])))
+    return 'calibrate', params
+
+service = Service('AnalyticalSigmaVolatilityCalibration', version='2.1.0', legacy=legacy_main,
+                  health=lambda: {'xsigmamodules': 'available', 'numpy': 'available',
+                                  'solvers': 'available'})
+
+@service.operation('calibrate', schema={
+    'n': Param(int, 200, minimum=1),
+    'spot': Param(float, 2245.0656),
+    'expiry': Param(float, 1.0),
+    'r': Param(float, 0.003),
+    'q': Param(float, 0.0022),
+    'beta': Param(float, 0.4158, minimum=0, maximum=1),
+    'rho': Param(float, 0.2256, minimum=-1, maximum=1),
+    'volvol': Param(float, 0.2256),
+    'computationType': Param(str, 'volatility_asv', choices=COMPUTATION_TYPES),
+})
+def calibrate(params):
+    """Calibrated volatility or density of the requested computation type"""
+    result = calculate_vols_and_density(params, params['computationType'])
+    if result.get('status') == 'error':
+        raise RuntimeError(result['error'])
+    extra = {key: value for key, value in result.items() if key not in ('status', 'data')}
+    return Response(result['data'], **extra)
 
 if __name__ == "__main__":
-    main()
+    service.run()
@@ -0,0 +1,745 @@
+#!/usr/bin/env python3
+"""
+CurveCalibration - Rates, Cross-Currency and Inflation Curve Calibration
+Converted from CurveCalibration.ipynb
+
+This script calibrates the notebook's curve set (SOFR/ESTR overnight curves, SOFR 3M,
+the EUR cross-currency curve and the US CPI inflation curve) with curveCalibration.
+Besides the one-shot `calculate` operation it can run as a persistent worker (`serve`)
+that keeps the calibrated curves resident and, when quotes change, recalibrates only
+the curves that use those quotes and the curves that depend on them.
+
+The `calibrate_market` operation builds many currencies at once: overnight curves of
+independent currencies run in parallel on a process pool and each cross-currency
+curve starts as soon as the two overnight curves it depends on are calibrated.
+Curves outside the notebook set need their own quotes (`curve_quotes`); with
+`synthetic_quotes` they borrow the notebook's and are reported as synthetic.
+"""
+
+import copy
+import time
+import uuid
+import shutil
+import functools
+import multiprocessing
+import json
+import sys
+import os
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Any, Optional, Tuple
+from service_metrics import metrics
+from service_framework import Service, ConfigurationError
+from service_timing import timer
+from curve_plan import (
+    CURVES,
+    dependents_of,
+    apply_quote_changes,
+    market_quotes,
+    plan_levels,
+    critical_path,
+)
+
+# Add the notebook directory to Python path for xsigmamodules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../'))
+
+try:
+    from xsigmamodules.Engine import (
+        curveCalibrationDataRatesId,
+        curveCalibrationDataInflationId,
+        curveCalibrationData,
+        curveCalibrationDataArray,
+        curveCalibrationConfigId,
+        curveCalibrationConfig,
+        curveCalibrationDatesConfigId,
+        curveCalibrationDatesConfig,
+        calibration_grid_enum,
+    )
+    from xsigmamodules.Math import interpolation_enum
+    from xsigmamodules.Market import (
+        currencyMappingConfig,
+        discountDefinition,
+        forecastCurveId,
+        forecastCurve,
+        inflationCurveId,
+        inflationCurve,
+        swapDefaultConventionConfig,
+        swapDefaultConventionConfigId,
+        futureDefaultConventionConfigId,
+        xccyDefaultConventionConfigId,
+        calendarId,
+        currencyCalendarMappingId,
+        currencyRfrMappingId,
+        currencyIborMappingId,
+        fxSpot,
+        fxSpotId,
+        anyContainer,
+        anyId,
+        anyObject,
+        valuationDatetime,
+        valuationDatetimeId,
+        inflationDefaultConventionConfig,
+        inflationDefaultConventionConfigId,
+        inflationFixing,
+        inflationFixingId,
+        inflationSeasonality,
+        inflationSeasonalityId,
+    )
+    from xsigmamodules.Util import (
+        currency,
+        day_count_convention_enum,
+        yearMonthDay,
+        business_day_convention_enum,
+    )
+    from xsigmamodules.TestingUtil import TestingDataSerializer
+    from xsigmamodules.util.misc import xsigmaGetDataRoot, xsigmaGetTempDir
+    from xsigmamodules.market import market_data
+except ImportError as e:
+    print(f"Error importing xsigmamodules: {e}", file=sys.stderr)
+    sys.exit(1)
+
+# Initialize XSIGMA data root
+XSIGMA_DATA_ROOT = xsigmaGetDataRoot()
+XSIGMA_TEST_ROOT = xsigmaGetTempDir()
+
+# Notebook valuation date
+VALUATION_YEAR, VALUATION_MONTH, VALUATION_DAY = 2025, 2, 18
+
+# Tenors (in months) at which calibrated forecast curves are reported
+REPORT_TENORS_MONTHS = [1, 3, 6, 12, 24, 36, 60, 84, 120, 180, 240, 360]
+
+_SWAP_TENORS = ["1y", "2y", "3y", "4y", "5y", "6y", "7y", "8y", "9y", "10y", "11y", "12y",
+                "15y", "20y", "25y", "30y", "35y", "40y", "50y", "60y", "70y"]
+_SWAP_PAR = [4.2199, 4.0944, 4.0508, 4.0349, 4.0309, 4.0365, 4.0448, 4.0536, 4.0633, 4.0744,
+             4.0869, 4.1002, 4.1322, 4.1317, 4.0663, 3.9819, 3.8831, 3.7869, 3.6019, 3.4620,
+             3.3604]
+_FUTURE_MONTHS = ["Mar25", "Apr25", "May25", "Jun25", "Jul25", "Aug25", "Sep25", "Oct25", "Nov25",
+                  "Dec25", "Jan26", "Feb26", "Mar26", "Apr26", "May26", "Jun26", "Jul26", "Aug26",
+                  "Sep26", "Oct26", "Nov26", "Dec26", "Jan27", "Feb27", "Mar27", "Apr27", "May27",
+                  "Jun27", "Jul27"]
+_FUTURE_PRICES = [95.4296, 95.4672, 95.5208, 95.5579, 95.5936, 95.6411, 95.6836, 95.7145,
+                  95.7495, 95.7680, 95.7887, 95.8024, 95.8132, 95.8212, 95.8295, 95.8362,
+                  95.8399, 95.8443, 95.8481, 95.8492, 95.8492, 95.8499, 95.8479, 95.8461,
+                  95.8461, 95.8308, 95.8493, 95.8493, 95.8378]
+_CCBS_TENORS = ["1y", "2y", "3y", "4y", "5y", "6y", "7y", "8y"]
+_CCBS_RATES = [2.2966, 2.3700, 2.1825, 2.1900, 2.2375, 2.1938, 2.1888, 2.0800]
+_INFLATION_TENORS = ["1y", "2y", "3y", "4y", "5y", "6y", "7y", "8y", "9y", "10y", "12y", "15y",
+                     "20y", "25y", "30y"]
+_INFLATION_RATES = [2.2966, 2.3700, 2.1825, 2.1900, 2.2375, 2.1938, 2.1888, 2.0800, 2.1588,
+                    2.2738, 2.0913, 2.1578, 1.9063, 1.8713, 1.8812]
+
+# Notebook market quotes (decimals) per curve type: instrument -> (tenors, quotes)
+DEFAULT_QUOTES = {
+    'rates': {
+        'DEPOSIT_RFR': (
+            ["DEPOSIT_1b", "DEPOSIT_1m", "DEPOSIT_2m", "DEPOSIT_3m", "DEPOSIT_6m", "DEPOSIT_12m"],
+            [v / 100.0 for v in [4.3077, 4.4294, 4.5083, 4.5878, 4.7241, 4.9393]],
+        ),
+        'FUTURE_RFR_1M': (["FUTURE_" + t for t in _FUTURE_MONTHS], list(_FUTURE_PRICES)),
+        'IRSWAP_RFR_3M': (["IRSWAP_" + t for t in _SWAP_TENORS], [v / 100.0 for v in _SWAP_PAR]),
+        'IRBASISSWAP_RFR_3M_IBOR3M_3M': (
+            ["IRBASISSWAP_" + t for t in _SWAP_TENORS], [v / 10000.0 for v in _SWAP_PAR],
+        ),
+    },
+    'xccy': {
+        'CROSSCURRENCYBASISSWAP_RFR_3M_RFR_3M': (
+            ["CROSSCURRENCYBASISSWAP_" + t for t in _CCBS_TENORS], [v / 10000.0 for v in _CCBS_RATES],
+        ),
+    },
+    'inflation': {
+        'INFLATIONZEROCOUPONSWAP_RFR_3M': (
+            ["INFLATIONZEROCOUPONSWAP_" + t for t in _INFLATION_TENORS],
+            [v / 100.0 for v in _INFLATION_RATES],
+        ),
+    },
+}
+
+# Multi-currency build defaults (the notebook curve set); cross-currency curves are
+# quoted against the base currency
+DEFAULT_MARKET_CURRENCIES = ['USD', 'EUR']
+DEFAULT_BASE_CURRENCY = 'USD'
+
+# Calibrated curves are handed between scheduler workers through this directory
+CURVE_WORK_DIR = os.environ.get(
+    'XSIGMA_CURVE_WORK_DIR', os.path.join(XSIGMA_TEST_ROOT, 'curve_calibration')
+)
+
+# OIS meeting dates of the calibration dates config
+OIS_DATES = ["19Mar2025", "07May2025", "18Jun2025", "30Jul2025", "17Sep2025", "29Oct2025",
+             "10Dec2025", "28Jan2026", "18Mar2026", "29Apr2026", "17Jun2026", "29Jul2026",
+             "16Sep2026", "28Oct2026", "09Dec2026", "27Jan2027", "17Mar2027", "28Apr2027",
+             "16Jun2027", "28Jul2027", "15Sep2027", "27Oct2027", "15Dec2027"]
+
+def valuation_datetime():
+    return yearMonthDay(VALUATION_YEAR, VALUATION_MONTH, VALUATION_DAY).to_datetime()
+
+def add_months(months: int):
+    """Valuation date shifted by a whole number of months."""
+    month_index = VALUATION_MONTH - 1 + months
+    return yearMonthDay(
+        VALUATION_YEAR + month_index // 12, month_index % 12 + 1, VALUATION_DAY
+    ).to_datetime()
+
+def curve_id(name: str, spec: Optional[Dict[str, Any]] = None):
+    """xsigma curve id of a curve in CURVES (or of an explicit curve spec)."""
+    spec = spec or CURVES[name]
+    ccy = currency(spec['ccy'])
+    if spec['type'] == 'inflation':
+        return inflationCurveId(ccy, spec['index'])
+    if spec['type'] == 'xccy':
+        return forecastCurveId(ccy, discountDefinition.xccy_discount_definition(spec['index']), spec['tenor'])
+    return forecastCurveId(ccy, spec['index'], spec['tenor'])
+
+@functools.lru_cache(maxsize=None)
+def _swap_convention(ccy: str, index: str):
+    return swapDefaultConventionConfig.read_from_json(
+        XSIGMA_DATA_ROOT + "/Data/swapDefaultConvention_" + ccy + "_" + index + ".json"
+    )
+
+def calibration_config(use_bootstrapping: bool, use_ceres: bool, use_aad: bool,
+                       interpolation=None):
+    """Notebook curveCalibrationConfig."""
+    return curveCalibrationConfig(
+        2.0,
+        0.0001,
+        1.0e-8,
+        1.0e-8,
+        1.0e-8,
+        -3.0,
+        3.0,
+        6.0e-02,
+        0.2,
+        1.0e-8,
+        500,
+        use_ceres,
+        use_aad,
+        calibration_grid_enum.INSTRUMENT,
+        interpolation if interpolation is not None else interpolation_enum.LINEAR,
+        interpolation_enum.CUBIC_SPLINE,
+        use_bootstrapping,
+    )
+
+def instruments_market(quotes: Dict[str, tuple]):
+    """curveCalibrationDataArray from one curve's quotes."""
+    instruments = [
+        curveCalibrationData(instrument, list(tenors), list(values))
+        for instrument, (tenors, values) in quotes.items()
+    ]
+    return curveCalibrationDataArray(valuation_datetime(), instruments)
+
+def _insert_rates_inputs(container, name: str, quotes: Dict[str, tuple], options: Dict[str, bool],
+                         spec: Optional[Dict[str, Any]] = None) -> None:
+    """Insert the calibration inputs of a rates or cross-currency curve (notebook calibrate_rates)."""
+    spec = spec or CURVES[name]
+    cid = curve_id(name, spec)
+    ccy = currency(spec['ccy'])
+    ccy_base = currency(spec['base'])
+    valuation_date = valuation_datetime()
+
+    if spec['ccy'] != spec['base']:
+        container.insert(
+            anyId(fxSpotId(ccy_base.ccy(), ccy.ccy())),
+            anyObject(fxSpot(valuation_date, 1.1)),
+        )
+    container.insert(anyId(curveCalibrationDataRatesId(cid, ccy_base)), anyObject(instruments_market(quotes)))
+    container.insert(
+        anyId(curveCalibrationConfigId(ccy, cid.index_name())),
+        anyObject(calibration_config(options['use_bootstrapping'], options['use_ceres'], options['use_aad'])),
+    )
+    market_data.marketContainer(container, [cid])
+    container.insert(anyId(valuationDatetimeId()), anyObject(valuationDatetime(valuation_date)))
+
+    market_data.marketContainer(container, [
+        anyId(currencyCalendarMappingId()),
+        anyId(currencyRfrMappingId()),
+        anyId(currencyIborMappingId()),
+    ])
+    calendars = currencyMappingConfig.static_cast(container.get(anyId(currencyCalendarMappingId())))
+    market_data.marketContainer(container, [
+        anyId(calendarId(calendars.value(spec['ccy']))),
+        anyId(calendarId(calendars.value(spec['base']))),
+    ])
+
+    container.insert(
+        anyId(curveCalibrationDatesConfigId(ccy)),
+        anyObject(curveCalibrationDatesConfig(OIS_DATES, [0.0] * len(OIS_DATES))),
+    )
+    for conv_ccy in {spec['ccy'], spec['base']}:
+        container.insert(
+            anyId(swapDefaultConventionConfigId(currency(conv_ccy))),
+            anyObject(_swap_convention(conv_ccy, "IBOR" if conv_ccy == "EUR" else "RFR")),
+        )
+
+    rfr = TestingDataSerializer.currencyRFRMapping().value(spec['ccy'])
+    market_data.marketContainer(container, [
+        anyId(xccyDefaultConventionConfigId(ccy)),
+        anyId(xccyDefaultConventionConfigId(ccy_base)),
+        anyId(futureDefaultConventionConfigId(ccy, rfr, "1m")),
+        anyId(futureDefaultConventionConfigId(ccy, rfr, "3m")),
+    ])
+
+def _insert_inflation_inputs(container, name: str, quotes: Dict[str, tuple], options: Dict[str, bool]) -> None:
+    """Insert the calibration inputs of an inflation curve (notebook calibrate_inflation)."""
+    cid = curve_id(name)
+    valuation_date = valuation_datetime()
+    container.insert(
+        anyId(inflationDefaultConventionConfigId(cid)),
+        anyObject(inflationDefaultConventionConfig(
+            "1M",
+            business_day_convention_enum.MODIFIED_FOLLOWING,
+            day_count_convention_enum.ACT_360,
+            2,
+            interpolation_enum.LINEAR,
+        )),
+    )
+    container.insert(anyId(inflationFixingId(cid)), anyObject(inflationFixing(valuation_date, [valuation_date], [1.0])))
+    container.insert(anyId(inflationSeasonalityId(cid)), anyObject(inflationSeasonality([1.0] * 12)))
+    container.insert(anyId(curveCalibrationDataInflationId(cid, cid.ccy())), anyObject(instruments_market(quotes)))
+    container.insert(
+        anyId(curveCalibrationConfigId(cid.ccy(), cid.index_name())),
+        anyObject(calibration_config(options['use_bootstrapping'], options['use_ceres'], options['use_aad'],
+                                     interpolation_enum.LINEAR_EXPONENTIAL)),
+    )
+
+class CurveCalibrationSession:
+    """
+    Calibrated curve set kept resident between requests.
+
+    Quote updates recalibrate only the curves whose quotes changed and the curves
+    that depend on them; the other curves are carried over already calibrated.
+    """
+
+    def __init__(self, use_bootstrapping: bool = True, use_ceres: bool = True, use_aad: bool = True):
+        self.options = {
+            'use_bootstrapping': bool(use_bootstrapping),
+            'use_ceres': bool(use_ceres),
+            'use_aad': bool(use_aad),
+        }
+        self.quotes = {name: copy.deepcopy(DEFAULT_QUOTES[spec['type']]) for name, spec in CURVES.items()}
+        self.curves: Dict[str, Any] = {}      # name -> calibrated anyObject
+        self.timings: Dict[str, float] = {}   # name -> last calibration time
+        self.calibrated_at: Optional[str] = None
+
+    def _calibrate(self, names: List[str], quotes: Dict[str, Dict[str, tuple]]) -> Dict[str, float]:
+        """
+        Calibrate ``names`` (in order) from ``quotes`` on top of the resident curves.
+
+        The session's quotes and curves are replaced only once every curve has
+        calibrated, so a failure leaves the previous consistent state resident.
+        """
+        container = anyContainer()
+        container.insert(anyId(valuationDatetimeId()), anyObject(valuationDatetime(valuation_datetime())))
+        for name, curve in self.curves.items():
+            if name not in names:
+                container.insert(anyId(curve_id(name)), curve)
+
+        curves = dict(self.curves)
+        timings = {}
+        for name in names:
+            print(f"PROGRESS: Calibrating {name}", file=sys.stderr)
+            start_time = time.time()
+            with timer.span('calibrate', curve=name):
+                if CURVES[name]['type'] == 'inflation':
+                    _insert_inflation_inputs(container, name, quotes[name], self.options)
+                else:
+                    _insert_rates_inputs(container, name, quotes[name], self.options)
+                # Getting the curve triggers the calibration
+                curves[name] = container.get(anyId(curve_id(name)))
+            timings[name] = time.time() - start_time
+            metrics.record_calibration(f"{CURVES[name]['type']}_curve", 'builtin', timings[name])
+
+        self.quotes, self.curves = quotes, curves
+        self.timings.update(timings)
+        self.calibrated_at = str(np.datetime64('now'))
+        return timings
+
+    def calibrate_all(self, quotes: Optional[Dict[str, Dict[str, tuple]]] = None) -> Dict[str, Any]:
+        """Full build of every curve (from ``quotes``, default the session's)."""
+        start_time = time.time()
+        timings = self._calibrate(list(CURVES), self.quotes if quotes is None else quotes)
+        return {
+            'mode': 'full',
+            'recalibrated': list(timings),
+            'timings': timings,
+            'total_time': time.time() - start_time,
+        }
+
+    def set_quotes(self, changes: List[Dict[str, Any]]) -> List[str]:
+        """Apply quote changes without calibrating; returns the curves whose quotes changed."""
+        self.quotes, changed = apply_quote_changes(self.quotes, changes)
+        return changed
+
+    def update_quotes(self, changes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply quote changes and recalibrate only the affected curves. The changes are
+        kept only if the recalibration succeeds; an invalid change or an engine
+        failure leaves the session's quotes and curves as they were.
+        """
+        start_time = time.time()
+        quotes, changed = apply_quote_changes(self.quotes, changes)
+
+        if not self.curves:
+            result = self.calibrate_all(quotes)
+        elif changed:
+            affected = dependents_of(changed)
+            timings = self._calibrate(affected, quotes)
+            result = {
+                'mode': 'incremental',
+                'recalibrated': affected,
+                'timings': timings,
+                'total_time': time.time() - start_time,
+            }
+        else:
+            result = {'mode': 'unchanged', 'recalibrated': [], 'timings': {}, 'total_time': time.time() - start_time}
+
+        result['changes_applied'] = len(changes)
+        result['curves_changed'] = changed
+        return result
+
+    @timer.timed('evaluate')
+    def curve_summary(self, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Forward rates of the resident forecast curves at the report tenors."""
+        valuation_date = valuation_datetime()
+        summary = {}
+        for name in names or list(self.curves):
+            if name not in self.curves:
+                raise ConfigurationError(f"Curve {name} is not calibrated")
+            entry = {
+                'type': CURVES[name]['type'],
+                'depends_on': CURVES[name]['depends_on'],
+                'calibration_time': self.timings.get(name),
+            }
+            if CURVES[name]['type'] != 'inflation':
+                curve = forecastCurve.static_cast(self.curves[name])
+                entry['tenors_months'] = REPORT_TENORS_MONTHS
+                entry['rates'] = [float(curve.rate(valuation_date, add_months(m))) for m in REPORT_TENORS_MONTHS]
+            else:
+                inflationCurve.static_cast(self.curves[name])
+                entry['rates'] = None
+            summary[name] = entry
+        return summary
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            'calibrated': list(self.curves),
+            'options': self.options,
+            'calibrated_at': self.calibrated_at,
+            'quotes': {
+                name: {instrument: {'tenors': t, 'values': v} for instrument, (t, v) in quotes.items()}
+                for name, quotes in self.quotes.items()
+            },
+        }
+
+def _session_options(params: Dict[str, Any]) -> Dict[str, bool]:
+    return {
+        'use_bootstrapping': params.get('use_bootstrapping', True),
+        'use_ceres': params.get('use_ceres', True),
+        'use_aad': params.get('use_aad', True),
+    }
+
+def run_calibration(params: Dict[str, Any]) -> Dict[str, Any]:
+    """One-shot full calibration, with optional quote overrides."""
+    try:
+        session = CurveCalibrationSession(**_session_options(params))
+        session.set_quotes(params.get('quotes', []))
+        result = session.calibrate_all()
+        result['curves'] = session.curve_summary(params.get('curves'))
+        return result
+    except ConfigurationError:
+        raise
+    except Exception as e:
+        raise ConfigurationError(f"Error in curve calibration: {str(e)}")
+
+# ---------------------------------------------------------------------------
+# Multi-currency build
+# ---------------------------------------------------------------------------
+
+def build_market_dag(currencies: List[str], base: str = DEFAULT_BASE_CURRENCY) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Curve nodes of a multi-currency build, in dependency order.
+
+    Every currency gets an overnight curve on the index given by the currency RFR
+    mapping. Every non-base currency with an xccy convention also gets a
+    cross-currency curve against ``base``, which depends on both overnight curves.
+
+    Returns:
+        (nodes in the CURVES spec format, currencies skipped for lack of an xccy convention)
+    """
+    container = anyContainer()
+    market_data.marketContainer(container, [anyId(currencyRfrMappingId())])
+    rfr_mapping = currencyMappingConfig.static_cast(container.get(anyId(currencyRfrMappingId())))
+
+    currencies = list(dict.fromkeys([base] + [ccy.strip().upper() for ccy in currencies if ccy.strip()]))
+    rfr = {}
+    for ccy in currencies:
+        try:
+            rfr[ccy] = rfr_mapping.value(ccy)
+        except Exception:
+            raise ConfigurationError(f"No RFR index mapped for currency {ccy}")
+    ois = {ccy: f"{ccy}.{rfr[ccy]}.1b" for ccy in currencies}
+
+    nodes = {
+        ois[ccy]: {
+            'type': 'rates', 'ccy': ccy, 'index': rfr[ccy], 'tenor': '1b', 'base': ccy,
+            'depends_on': [],
+        }
+        for ccy in currencies
+    }
+
+    skipped = []
+    for ccy in currencies:
+        if ccy == base:
+            continue
+        try:
+            market_data.marketContainer(container, [anyId(xccyDefaultConventionConfigId(currency(ccy)))])
+        except Exception:
+            skipped.append(ccy)
+            continue
+        nodes[f"{ccy}.XCCY.{ois[base]}"] = {
+            'type': 'xccy', 'ccy': ccy, 'index': ois[base], 'tenor': '1b', 'base': base,
+            'depends_on': [ois[base], ois[ccy]],
+        }
+    return nodes, skipped
+
+def _calibrate_market_node(name: str, spec: Dict[str, Any], quotes: Dict[str, tuple],
+                           options: Dict[str, bool], dependencies: Dict[str, tuple],
+                           build_dir: str) -> Dict[str, Any]:
+    """
+    Process-pool task: calibrate one curve on top of its calibrated dependencies.
+
+    Dependencies arrive as {name: (spec, json path)} because xsigma objects do not
+    pickle; the calibrated curve is written back the same way.
+    """
+    start_time = time.time()
+    container = anyContainer()
+    container.insert(anyId(valuationDatetimeId()), anyObject(valuationDatetime(valuation_datetime())))
+    for dep_name, (dep_spec, path) in dependencies.items():
+        container.insert(anyId(curve_id(dep_name, dep_spec)), anyObject(forecastCurve.read_from_json(path)))
+
+    _insert_rates_inputs(container, name, quotes, options, spec)
+    curve = forecastCurve.static_cast(container.get(anyId(curve_id(name, spec))))
+    end_time = time.time()
+
+    tmp_path = os.path.join(build_dir, f"{name}.{os.getpid()}.tmp.json")
+    path = os.path.join(build_dir, f"{name}.json")
+    forecastCurve.write_to_json(tmp_path, curve)
+    os.replace(tmp_path, path)
+
+    valuation_date = valuation_datetime()
+    return {
+        'path': path,
+        'started_at': start_time,
+        'finished_at': end_time,
+        'worker_pid': os.getpid(),
+        'rates': [float(curve.rate(valuation_date, add_months(m))) for m in REPORT_TENORS_MONTHS],
+    }
+
+@timer.timed('calibrate')
+def run_market_calibration(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calibrate the overnight and cross-currency curves of many currencies.
+
+    Nodes are submitted to a process pool as soon as their dependencies are
+    calibrated, so independent currencies run concurrently. A failed curve marks
+    its dependents as skipped instead of aborting the build.
+
+    Args:
+        params: currencies (list or comma string), base_currency, workers,
+            use_bootstrapping/use_ceres/use_aad, curve_quotes
+            {curve: {instrument: {tenors, values}}} (required for the curves
+            outside the notebook set unless synthetic_quotes is set) and quotes
+            overrides [{curve, instrument, tenor, value}]
+    """
+    try:
+        currencies = params.get('currencies') or DEFAULT_MARKET_CURRENCIES
+        if isinstance(currencies, str):
+            currencies = currencies.split(',')
+        base = str(params.get('base_currency') or DEFAULT_BASE_CURRENCY).upper()
+        options = {k: bool(v) for k, v in _session_options(params).items()}
+
+        nodes, skipped = build_market_dag(currencies, base)
+        levels = plan_levels(nodes)
+        quotes, sources = market_quotes(nodes, params.get('curve_quotes'), DEFAULT_QUOTES,
+                                        synthetic=params.get('synthetic_quotes') in (True, 'true'))
+        quotes, _ = apply_quote_changes(quotes, params.get('quotes', []))
+        synthetic = [name for name, source in sources.items() if source == 'synthetic']
+        if synthetic:
+            print(f"PROGRESS: Synthetic (notebook) quotes for {', '.join(synthetic)}", file=sys.stderr)
+
+        workers = max(1, min(int(params.get('workers') or os.cpu_count() or 1), len(nodes)))
+        print(f"PROGRESS: Calibrating {len(nodes)} curves in {len(levels)} levels on {workers} workers",
+              file=sys.stderr)
+
+        build_dir = os.path.join(CURVE_WORK_DIR, uuid.uuid4().hex)
+        os.makedirs(build_dir, exist_ok=True)
+        start_time = time.time()
+        results: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        ready_at: Dict[str, float] = {}
+        remaining = list(nodes)
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                pending = {}
+
+                def submit_ready():
+                    # ``remaining`` is in dependency order, so failures cascade in one pass
+                    for name in list(remaining):
+                        deps = nodes[name]['depends_on']
+                        failed_deps = [dep for dep in deps if dep in errors]
+                        if failed_deps:
+                            errors[name] = f"Skipped: dependency {', '.join(failed_deps)} failed"
+                            remaining.remove(name)
+                        elif all(dep in results for dep in deps):
+                            dependencies = {dep: (nodes[dep], results[dep]['path']) for dep in deps}
+                            future = pool.submit(_calibrate_market_node, name, nodes[name], quotes[name],
+                                                 options, dependencies, build_dir)
+                            pending[future] = name
+                            ready_at[name] = time.time()
+                            remaining.remove(name)
+
+                submit_ready()
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = pending.pop(future)
+                        try:
+                            results[name] = future.result()
+                            elapsed = results[name]['finished_at'] - results[name]['started_at']
+                            print(f"PROGRESS: Calibrated {name} in {elapsed:.2f}s "
+                                  f"({len(results)}/{len(nodes)})", file=sys.stderr)
+                        except Exception as e:
+                            errors[name] = str(e)
+                            print(f"PROGRESS: Failed {name}: {e}", file=sys.stderr)
+                    submit_ready()
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+        wall_clock_time = time.time() - start_time
+
+        timings = {}
+        curves = {}
+        for name, spec in nodes.items():
+            entry = {'type': spec['type'], 'depends_on': spec['depends_on'], 'quotes': sources[name],
+                     'status': 'failed', 'error': errors.get(name)}
+            if name in results:
+                result = results[name]
+                entry.update({
+                    'status': 'calibrated',
+                    'ready_at': ready_at[name] - start_time,
+                    'started_at': result['started_at'] - start_time,
+                    'finished_at': result['finished_at'] - start_time,
+                    'queue_wait': result['started_at'] - ready_at[name],
+                    'calibration_time': result['finished_at'] - result['started_at'],
+                    'worker_pid': result['worker_pid'],
+                })
+                curves[name] = {'tenors_months': REPORT_TENORS_MONTHS, 'rates': result['rates']}
+            timings[name] = entry
+
+        serial_time = sum(entry.get('calibration_time') or 0.0 for entry in timings.values())
+        return {
+            'currencies': sorted({spec['ccy'] for spec in nodes.values()}),
+            'base_currency': base,
+            'levels': levels,
+            'workers': workers,
+            'nodes': timings,
+            'curves': curves,
+            'calibrated': len(results),
+            'failed': len(errors),
+            'xccy_skipped': skipped,
+            'synthetic_curves': synthetic,
+            'wall_clock_time': wall_clock_time,
+            'serial_time': serial_time,
+            'parallel_speedup': serial_time / wall_clock_time if wall_clock_time > 0 else None,
+            'critical_path': critical_path(nodes, timings),
+        }
+    except ConfigurationError:
+        raise
+    except Exception as e:
+        raise ConfigurationError(f"Error in multi-currency curve calibration: {str(e)}")
+
+class CurveCalibrationWorker:
+    """
+    State of the persistent worker.
+
+    The session is created by the first ``calibrate`` request (or lazily by
+    ``update_quotes``) and then kept resident for the life of the process.
+    """
+
+    def __init__(self):
+        self.session: Optional[CurveCalibrationSession] = None
+
+    def calibrate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        # The resident session is replaced only by a successful build
+        session = CurveCalibrationSession(**_session_options(params))
+        session.set_quotes(params.get('quotes', []))
+        result = session.calibrate_all()
+        self.session = session
+        result['curves'] = self.session.curve_summary(params.get('curves'))
+        return result
+
+    def update_quotes(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self.session is None:
+            self.session = CurveCalibrationSession(**_session_options(params))
+        result = self.session.update_quotes(params.get('quotes', []))
+        result['curves'] = self.session.curve_summary(params.get('curves'))
+        return result
+
+    def curves(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self.session is None or not self.session.curves:
+            raise ConfigurationError("No curves calibrated yet; send a calibrate request first")
+        return {'curves': self.session.curve_summary(params.get('curves')), **self.session.state()}
+
+worker = CurveCalibrationWorker()
+
+def legacy_main(argv):
+    """Original argparse interface"""
+    parser = argparse.ArgumentParser(description='Calibrate the notebook curve set')
+    parser.add_argument('--no_bootstrapping', action='store_true',
+                       help='Solve all instruments globally instead of bootstrapping')
+    parser.add_argument('--no_ceres', action='store_true',
+                       help='Do not use the Ceres solver')
+    parser.add_argument('--no_aad', action='store_true',
+                       help='Do not use AAD gradients')
+    parser.add_argument('--currencies', type=str, default=None,
+                       help='Comma-separated currencies for a multi-currency build (e.g. USD,EUR,GBP)')
+    parser.add_argument('--base_currency', type=str, default=DEFAULT_BASE_CURRENCY,
+                       help='Base currency of the cross-currency curves')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker processes for a multi-currency build (default: CPU count)')
+
+    args = parser.parse_args(argv)
+    params = {
+        'use_bootstrapping': not args.no_bootstrapping,
+        'use_ceres': not args.no_ceres,
+        'use_aad': not args.no_aad
+    }
+
+    try:
+        if args.currencies:
+            params.update({'currencies': args.currencies, 'base_currency': args.base_currency,
+                           'workers': args.workers})
+            print(json.dumps(run_market_calibration(params), indent=2))
+        else:
+            print(json.dumps(run_calibration(params), indent=2))
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+service = Service('CurveCalibration', version='1.0.0', legacy=legacy_main,
+                  health=lambda: {'xsigmamodules': 'available', 'data_root': XSIGMA_DATA_ROOT,
+                                  'curves': list(CURVES),
+                                  'calibrated': list(worker.session.curves) if worker.session else []})
+
+# One-shot operations
+service.operation('calculate')(run_calibration)
+service.operation('calibrate_market')(run_market_calibration)
+
+# Persistent worker operations (`serve`), sharing the resident session
+service.operation('calibrate')(worker.calibrate)
+service.operation('update_quotes')(worker.update_quotes)
+service.operation('curves')(worker.curves)
+
+if __name__ == "__main__":
+    service.run()
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+FXRatesHybrid - Lognormal FX with Markovian HJM Rates
+Converted from TestLognormalFXWithMHJMRates.ipynb
+
+This script calibrates a lognormal FX diffusion on top of domestic and foreign
+Markovian HJM rate diffusions (lognormalFxWithMhjmIr), simulates the joint model
+and reports martingale checks and at-the-money FX implied volatilities.
+The simulation is split into path shards that run in separate worker processes.
+"""
+
+import time
+import hashlib
+import functools
+import multiprocessing
+import numpy as np
+import json
+import sys
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional
+from service_metrics import metrics
+from service_framework import Service, Param, ConfigurationError
+from service_timing import timer
+from fx_hybrid_plan import SHARD_SUMS, market_variance_targets, plan_shards
+
+# Add the notebook directory to Python path for xsigmamodules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../'))
+
+try:
+    from xsigmamodules.Random import random_enum
+    from xsigmamodules.Analytics import (
+        correlationManager,
+        correlationManagerId,
+        dynamicInstructionIrId,
+        dynamicInstructionIrMarkovianHjm,
+        dynamicInstructionFxId,
+        dynamicInstructionFxLognormal,
+        simulatedMarketDataIrId,
+        simulatedMarketDataFxId,
+        simulationManager,
+        parameterMarkovianHjmId,
+        parameterMarkovianHjm,
+        parameterLognormal,
+        parameterLognormalId,
+        measureId,
+        measure,
+        randomConfig,
+        randomConfigId,
+        lognormalFxWithMhjmIr,
+    )
+    from xsigmamodules.Market import (
+        discountCurveInterpolated,
+        discountCurveId,
+        fxForward,
+        fxForwardId,
+        anyId,
+        anyContainer,
+        anyObject,
+    )
+    from xsigmamodules.Util import dayCountConvention, blackScholes
+    from xsigmamodules.util.numpy_support import numpyToXsigma
+    from xsigmamodules.common import helper
+    from xsigmamodules.util.misc import xsigmaGetDataRoot, xsigmaGetTempDir
+except ImportError as e:
+    print(f"Error importing xsigmamodules: {e}", file=sys.stderr)
+    sys.exit(1)
+
+# Initialize XSIGMA data root
+XSIGMA_DATA_ROOT = xsigmaGetDataRoot()
+XSIGMA_TEST_ROOT = xsigmaGetTempDir()
+
+# Notebook defaults
+DEFAULT_RANDOM_SEED = 542897
+DEFAULT_NUM_PATHS = 262144 * 2
+DEFAULT_FX_VOLATILITY = 0.3
+DEFAULT_SIMULATION_FREQUENCY = '3M'
+DEFAULT_SIMULATION_STEPS = 120
+
+DOMESTIC_PARAMETER_FILE = "/Data/parameterMarkovianHjmLIBOR.3M.USD_USD.json"
+FOREIGN_PARAMETER_FILE = "/Data/parameterMarkovianHjmLIBOR.3M.USD_EUR.json"
+
+# Calibrated FX parameters are handed to shard workers through this directory
+HYBRID_WORK_DIR = os.environ.get(
+    'XSIGMA_HYBRID_WORK_DIR', os.path.join(XSIGMA_TEST_ROOT, 'fx_rates_hybrid')
+)
+
+@functools.lru_cache(maxsize=None)
+def _read_parameter_markovian_hjm(path: str, mtime: float):
+    return parameterMarkovianHjm.read_from_json(path)
+
+def load_parameter_markovian_hjm(path: str):
+    """Load a Markovian HJM parameter file once per process (reloaded if the file changes)."""
+    return _read_parameter_markovian_hjm(path, os.path.getmtime(path))
+
+@timer.timed('market_load')
+def build_hybrid_context(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Load market data and the domestic/foreign HJM parameters of the hybrid model."""
+    try:
+        dom_ir_id = discountCurveId("USD", "LIBOR.3M.USD")
+        diffusion_dom_id = simulatedMarketDataIrId(dom_ir_id)
+
+        for_ir_id = discountCurveId("EUR", "LIBOR.3M.USD")
+        diffusion_for_id = simulatedMarketDataIrId(for_ir_id)
+
+        fx_forward_id = fxForwardId(dom_ir_id, for_ir_id)
+        diffusion_fx_id = simulatedMarketDataFxId(fx_forward_id)
+
+        params_dom = load_parameter_markovian_hjm(XSIGMA_DATA_ROOT + DOMESTIC_PARAMETER_FILE)
+        params_for = load_parameter_markovian_hjm(XSIGMA_DATA_ROOT + FOREIGN_PARAMETER_FILE)
+
+        discount_curve = discountCurveInterpolated.read_from_json(
+            XSIGMA_DATA_ROOT + "/Data/discountCurve.json"
+        )
+        fx_forward = fxForward(
+            discount_curve.valuation_date(), 1, discount_curve, discount_curve
+        )
+        correlation_mgr = correlationManager.read_from_json(
+            XSIGMA_DATA_ROOT + "/Data/correlationManager.json"
+        )
+    except Exception as e:
+        raise ConfigurationError(f"Error loading market data: {str(e)}")
+
+    simulated_ids = [diffusion_dom_id, diffusion_for_id, diffusion_fx_id]
+    valuation_date = correlation_mgr.valuation_date()
+    convention = dayCountConvention()
+
+    frequency = params.get('simulation_frequency') or DEFAULT_SIMULATION_FREQUENCY
+    steps = int(params.get('simulation_steps', DEFAULT_SIMULATION_STEPS))
+    if steps < 1:
+        raise ConfigurationError("simulation_steps must be positive")
+    calibration_dates = helper.simulation_dates(valuation_date, frequency, steps)
+    expiry_fraction = np.asarray(
+        helper.convert_dates_to_fraction(valuation_date, calibration_dates, convention),
+        dtype=float,
+    )
+
+    return {
+        'dom_ir_id': dom_ir_id,
+        'for_ir_id': for_ir_id,
+        'fx_forward_id': fx_forward_id,
+        'diffusion_dom_id': diffusion_dom_id,
+        'diffusion_for_id': diffusion_for_id,
+        'diffusion_fx_id': diffusion_fx_id,
+        'simulated_ids': simulated_ids,
+        'params_dom': params_dom,
+        'params_for': params_for,
+        'discount_curve': discount_curve,
+        'fx_forward': fx_forward,
+        'correlation_mgr': correlation_mgr,
+        'valuation_date': valuation_date,
+        'convention': convention,
+        'calibration_dates': calibration_dates,
+        'expiry_fraction': expiry_fraction,
+        'maturity': max(calibration_dates),
+    }
+
+@timer.timed('calibrate')
+def calibrate_fx(context: Dict[str, Any], volatility) -> tuple:
+    """
+    Calibrate the lognormal FX parameter to the market variance targets.
+
+    Returns:
+        Tuple (params_fx, market_variance)
+    """
+    correlation = context['correlation_mgr'].pair_correlation_matrix(
+        context['simulated_ids'], context['simulated_ids']
+    )
+    calibrator = lognormalFxWithMhjmIr(
+        context['valuation_date'], correlation, context['params_dom'], context['params_for']
+    )
+    market_variance = market_variance_targets(context['expiry_fraction'], volatility)
+    params_fx = calibrator.calibrate(
+        context['calibration_dates'], market_variance.tolist(), context['convention']
+    )
+    return params_fx, market_variance
+
+@timer.timed('model')
+def build_market(context: Dict[str, Any], params_fx, num_paths: int, seed: int):
+    """Assemble the market container of the hybrid simulation."""
+    anyids = [anyId(dynamicInstructionIrId(context['diffusion_dom_id']))]
+    anyobject = [anyObject(dynamicInstructionIrMarkovianHjm())]
+
+    anyids.append(anyId(dynamicInstructionIrId(context['diffusion_for_id'])))
+    anyobject.append(anyObject(dynamicInstructionIrMarkovianHjm()))
+
+    anyids.append(anyId(dynamicInstructionFxId(context['diffusion_fx_id'])))
+    anyobject.append(anyObject(dynamicInstructionFxLognormal()))
+
+    anyids.append(anyId(parameterMarkovianHjmId(context['diffusion_dom_id'])))
+    anyobject.append(anyObject(context['params_dom']))
+
+    anyids.append(anyId(parameterMarkovianHjmId(context['diffusion_for_id'])))
+    anyobject.append(anyObject(context['params_for']))
+
+    anyids.append(anyId(context['dom_ir_id']))
+    anyobject.append(anyObject(context['discount_curve']))
+
+    anyids.append(anyId(context['for_ir_id']))
+    anyobject.append(anyObject(context['discount_curve']))
+
+    anyids.append(anyId(context['fx_forward_id']))
+    anyobject.append(anyObject(context['fx_forward']))
+
+    anyids.append(anyId(correlationManagerId()))
+    anyobject.append(anyObject(context['correlation_mgr']))
+
+    anyids.append(anyId(parameterLognormalId(context['diffusion_fx_id'])))
+    anyobject.append(anyObject(params_fx))
+
+    anyids.append(anyId(measureId()))
+    anyobject.append(anyObject(measure(context['dom_ir_id'])))
+
+    config = randomConfig(random_enum.SOBOL_BROWNIAN_BRIDGE, seed, num_paths)
+    anyids.append(anyId(randomConfigId()))
+    anyobject.append(anyObject(config))
+
+    return anyContainer(anyids, anyobject)
+
+@timer.timed('simulate')
+def simulate_shard(context: Dict[str, Any], params_fx, num_paths: int, seed: int) -> Dict[str, np.ndarray]:
+    """
+    Simulate ``num_paths`` paths and return the per-date path sums listed in SHARD_SUMS.
+    """
+    calibration_dates = context['calibration_dates']
+    market = build_market(context, params_fx, num_paths, seed)
+    simulation_mgr = simulationManager(context['simulated_ids'], market, calibration_dates)
+
+    diffusion_curve_domestic = simulation_mgr.discount_curve(context['diffusion_dom_id'])
+    diffusion_curve_foreign = simulation_mgr.discount_curve(context['diffusion_for_id'])
+    diffusion_fx = simulation_mgr.fx_forward(context['diffusion_fx_id'])
+    fx_forward = context['fx_forward']
+    maturity = context['maturity']
+
+    mm_dom = np.zeros(num_paths)
+    mm_for = np.zeros(num_paths)
+    spot_fx_fwd = np.zeros(num_paths)
+    log_discount_factor = np.zeros(num_paths)
+
+    mm_dom_ = numpyToXsigma(mm_dom)
+    mm_for_ = numpyToXsigma(mm_for)
+    spot_fx_fwd_ = numpyToXsigma(spot_fx_fwd)
+    log_discount_factor_ = numpyToXsigma(log_discount_factor)
+
+    # Scratch buffer reused for every weighted payoff
+    weighted = np.empty(num_paths)
+
+    num_steps = len(calibration_dates) - 1
+    sums = {name: np.zeros(num_steps) for name in SHARD_SUMS}
+
+    simulation_mgr.states_initialize(0)
+    for t in range(1, len(calibration_dates)):
+        conditional_date = calibration_dates[t]
+        simulation_mgr.propagate(t)
+
+        diffusion_curve_domestic.discounting(mm_dom_, conditional_date)
+        diffusion_curve_foreign.discounting(mm_for_, conditional_date)
+        diffusion_curve_foreign.log_df(log_discount_factor_, conditional_date, maturity)
+        diffusion_fx.forward(spot_fx_fwd_, conditional_date)
+
+        i = t - 1
+        fwd = fx_forward.forward(conditional_date)
+
+        sums['mm_dom'][i] = mm_dom.sum()
+        np.multiply(mm_dom, spot_fx_fwd, out=weighted)
+        sums['mm_dom_fx'][i] = weighted.sum()
+        sums['mm_ratio_fx'][i] = np.divide(weighted, mm_for).sum()
+        sums['mm_dom_df_for_fx'][i] = np.dot(weighted, np.exp(log_discount_factor))
+
+        np.subtract(spot_fx_fwd, fwd, out=weighted)
+        np.maximum(weighted, 0.0, out=weighted)
+        sums['call'][i] = np.dot(mm_dom, weighted)
+        np.subtract(fwd, spot_fx_fwd, out=weighted)
+        np.maximum(weighted, 0.0, out=weighted)
+        sums['put'][i] = np.dot(mm_dom, weighted)
+
+    return sums
+
+# Per-worker state for sharded runs
+_WORKER_CONTEXT = None
+_WORKER_PARAMS_FX = None
+
+def _init_shard_worker(params: Dict[str, Any], params_fx_path: str) -> None:
+    """Load market data and the calibrated FX parameter once per worker process."""
+    global _WORKER_CONTEXT, _WORKER_PARAMS_FX
+    _WORKER_CONTEXT = build_hybrid_context(params)
+    _WORKER_PARAMS_FX = parameterLognormal.read_from_json(params_fx_path)
+
+def _run_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker process entry point: simulate one shard."""
+    start_time = time.time()
+    sums = simulate_shard(_WORKER_CONTEXT, _WORKER_PARAMS_FX, task['num_paths'], task['seed'])
+    return {
+        'shard': task['shard'],
+        'num_paths': task['num_paths'],
+        'seed': task['seed'],
+        'sums': sums,
+        'time': time.time() - start_time,
+        'pid': os.getpid(),
+    }
+
+def _save_params_fx(params_fx) -> str:
+    """Write the calibrated FX parameter where shard workers can read it."""
+    os.makedirs(HYBRID_WORK_DIR, exist_ok=True)
+    tmp_path = os.path.join(HYBRID_WORK_DIR, f"parameterLognormal.{os.getpid()}.tmp.json")
+    parameterLognormal.write_to_json(tmp_path, params_fx)
+    with open(tmp_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    path = os.path.join(HYBRID_WORK_DIR, f"parameterLognormal.{digest}.json")
+    os.replace(tmp_path, path)
+    return path
+
+def _implied_volatility(fwd: float, expiry: float, price: float, df: float, sign: float) -> float:
+    try:
+        return float(blackScholes.implied_volatility(fwd, fwd, expiry, price, df, sign))
+    except Exception:
+        return float('nan')
+
+def _finite_list(values: np.ndarray) -> List[Optional[float]]:
+    """JSON-safe list (NaN/inf become None)."""
+    return [float(v) if np.isfinite(v) else None for v in values]
+
+def run_hybrid_simulation(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calibrate the FX diffusion and simulate the hybrid model in path shards.
+
+    Each shard uses its own Sobol seed (seed + shard index) and returns per-date path
+    sums, so merged averages are exact path-weighted means over all shards.
+    """
+    num_paths = int(params.get('num_paths', DEFAULT_NUM_PATHS))
+    seed = int(params.get('seed', DEFAULT_RANDOM_SEED))
+    volatility = params.get('volatility', DEFAULT_FX_VOLATILITY)
+    workers = int(params.get('workers') or os.cpu_count() or 1)
+    num_shards = int(params.get('shards') or workers)
+    if num_paths < 1:
+        raise ConfigurationError("num_paths must be positive")
+
+    try:
+        wall_clock_start = time.time()
+        context = build_hybrid_context(params)
+
+        print("PROGRESS: Calibrating lognormal FX with Markovian HJM rates", file=sys.stderr)
+        start_time = time.time()
+        params_fx, market_variance = calibrate_fx(context, volatility)
+        calibration_time = time.time() - start_time
+        metrics.record_calibration('lognormal_fx', 'builtin', calibration_time)
+        print(f"PROGRESS: FX calibration completed in {calibration_time:.6f} seconds", file=sys.stderr)
+
+        shard_sizes = plan_shards(num_paths, num_shards)
+        tasks = [
+            {'shard': i, 'num_paths': size, 'seed': seed + i}
+            for i, size in enumerate(shard_sizes)
+        ]
+
+        print(f"PROGRESS: Simulating {num_paths} paths in {len(tasks)} shards", file=sys.stderr)
+        start_time = time.time()
+        if len(tasks) == 1:
+            # Single shard: no worker process, reuse the calibrated objects in place
+            sums = simulate_shard(context, params_fx, num_paths, seed)
+            shard_results = [{
+                **tasks[0],
+                'sums': sums,
+                'time': time.time() - start_time,
+                'pid': os.getpid(),
+            }]
+        else:
+            params_fx_path = _save_params_fx(params_fx)
+            shard_results = []
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(tasks)),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_shard_worker,
+                initargs=(params, params_fx_path),
+            ) as pool:
+                for shard in pool.map(_run_shard, tasks):
+                    shard_results.append(shard)
+                    print(f"PROGRESS: Shard {shard['shard'] + 1}/{len(tasks)} done "
+                          f"({shard['num_paths']} paths, {shard['time']:.2f}s)", file=sys.stderr)
+        simulation_time = time.time() - start_time
+        metrics.record_paths(num_paths, simulation_time)
+
+        # Merge shard sums into path averages
+        totals = {name: sum(shard['sums'][name] for shard in shard_results) for name in SHARD_SUMS}
+        averages = {name: totals[name] / num_paths for name in SHARD_SUMS}
+
+        valuation_date = context['valuation_date']
+        calibration_dates = context['calibration_dates']
+        discount_curve = context['discount_curve']
+        fx_forward = context['fx_forward']
+        expiry = context['expiry_fraction'][1:]
+        dates = calibration_dates[1:]
+
+        fwds = np.array([fx_forward.forward(d) for d in dates])
+        df_dom_market = np.array([discount_curve.df(valuation_date, d) for d in dates])
+        df_for_maturity = discount_curve.df(valuation_date, context['maturity'])
+
+        # Martingale checks: both are zero in the exact model
+        results_mm = averages['mm_ratio_fx'] - 1.0
+        results_df = averages['mm_dom_df_for_fx'] / df_for_maturity - 1.0
+        strikes = averages['mm_dom_fx'] / averages['mm_dom'] - 1.0
+        straddle = averages['mm_dom_fx'] - fwds * averages['mm_dom']
+
+        model_vol = np.array([
+            0.5 * (_implied_volatility(fwds[i], expiry[i], averages['call'][i], df_dom_market[i], 1.0)
+                   + _implied_volatility(fwds[i], expiry[i], averages['put'][i], df_dom_market[i], -1.0))
+            for i in range(len(dates))
+        ])
+        market_vol = np.sqrt(market_variance[1:] / expiry)
+
+        return {
+            'simulation_successful': True,
+            'num_paths': num_paths,
+            'valuation_date': str(valuation_date),
+            'maturity': str(context['maturity']),
+            'expiry_fraction': expiry.tolist(),
+            'fx_volatility': {
+                'model': _finite_list(model_vol),
+                'market': market_vol.tolist(),
+                'error_bps': _finite_list((model_vol - market_vol) * 10000),
+            },
+            'martingale_tests': {
+                'money_market': results_mm.tolist(),
+                'discount_factor': results_df.tolist(),
+            },
+            'forwards': fwds.tolist(),
+            'strikes': strikes.tolist(),
+            'straddle': straddle.tolist(),
+            'shard_timings': {
+                'calibration_time': calibration_time,
+                'simulation_time': simulation_time,
+                'wall_clock_time': time.time() - wall_clock_start,
+                'shards': [
+                    {key: shard[key] for key in ('shard', 'num_paths', 'seed', 'time', 'pid')}
+                    for shard in shard_results
+                ],
+            },
+            'parameters': {
+                'num_paths': num_paths,
+                'seed': seed,
+                'volatility': volatility,
+                'shards': len(shard_results),
+                'workers': min(workers, len(shard_results)),
+                'simulation_frequency': params.get('simulation_frequency') or DEFAULT_SIMULATION_FREQUENCY,
+                'simulation_steps': len(calibration_dates) - 1,
+            },
+            'message': 'FX-rates hybrid simulation completed successfully.',
+        }
+
+    except ConfigurationError:
+        raise
+    except Exception as e:
+        print(f"PROGRESS: Hybrid simulation failed with error: {str(e)}", file=sys.stderr)
+        raise ConfigurationError(f"Error in hybrid simulation: {str(e)}")
+
+def legacy_main(argv):
+    """Original argparse interface"""
+    parser = argparse.ArgumentParser(description='Simulate lognormal FX with Markovian HJM rates')
+    parser.add_argument('--num_paths', type=int, default=DEFAULT_NUM_PATHS,
+                       help='Number of Monte Carlo paths')
+    parser.add_argument('--volatility', type=float, default=DEFAULT_FX_VOLATILITY,
+                       help='Flat FX volatility used for the calibration targets')
+    parser.add_argument('--seed', type=int, default=DEFAULT_RANDOM_SEED,
+                       help='Sobol seed of the first shard')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker processes (default: CPU count)')
+    parser.add_argument('--shards', type=int, default=None,
+                       help='Number of path shards (default: one per worker)')
+    parser.add_argument('--simulation_steps', type=int, default=DEFAULT_SIMULATION_STEPS,
+                       help='Number of simulation dates after the valuation date')
+
+    args = parser.parse_args(argv)
+    params = {
+        'num_paths': args.num_paths,
+        'volatility': args.volatility,
+        'seed': args.seed,
+        'workers': args.workers,
+        'shards': args.shards,
+        'simulation_steps': args.simulation_steps
+    }
+
+    try:
+        print(json.dumps(run_hybrid_simulation(params), indent=2))
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+service = Service('FXRatesHybrid', version='1.0.0', legacy=legacy_main,
+                  health=lambda: {'xsigmamodules': 'available', 'numpy': 'available',
+                                  'data_root': XSIGMA_DATA_ROOT, 'cpu_count': os.cpu_count()})
+
+@service.operation('calculate', schema={
+    'num_paths': Param(int, minimum=1),
+    'simulation_steps': Param(int, minimum=1),
+    'workers': Param(int, minimum=1),
+    'shards': Param(int, minimum=1),
+})
+def calculate(params):
+    """Hybrid FX/rates Monte Carlo simulation"""
+    return run_hybrid_simulation(params)
+
+if __name__ == "__main__":
+    service.run()
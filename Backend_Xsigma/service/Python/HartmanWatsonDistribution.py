@@ -6,6 +6,9 @@ import numpy as np
 from typing import Dict, Any, List
 from dataclasses import dataclass
 
+from service_framework import Service, Param
+from service_timing import timer
+
 try:
     from xsigmamodules.Math import (
         hartmanWatsonDistribution,
@@ -73,12 +76,13 @@ def calculate_hartman_watson_distribution(params: HartmanWatsonParams) -> Dict[s
     """
     try:
         # Initialize vectors for Gaussian quadrature
-        roots = vector["double"](params.size_roots)
-        w1 = vector["double"](params.size_roots)
-        w2 = vector["double"](params.size_roots)
+        with timer.span('model', size_roots=params.size_roots):
+            roots = vector["double"](params.size_roots)
+            w1 = vector["double"](params.size_roots)
+            w2 = vector["double"](params.size_roots)
         
-        # Calculate Gaussian quadrature weights and roots
-        gaussianQuadrature.gauss_kronrod(params.size_roots, roots, w1, w2)
+            # Calculate Gaussian quadrature weights and roots
+            gaussianQuadrature.gauss_kronrod(params.size_roots, roots, w1, w2)
         
         # Create x-axis points
         x_points = np.linspace(params.x_0, params.x_n, params.n)
@@ -92,8 +96,9 @@ def calculate_hartman_watson_distribution(params: HartmanWatsonParams) -> Dict[s
         dist_type = getattr(hartman_watson_distribution_enum, params.distribution_type, 
                            hartman_watson_distribution_enum.MIXTURE)
         
-        # Calculate distribution
-        hartmanWatsonDistribution.distribution(result, params.t, r, roots, w1, dist_type)
+        with timer.span('evaluate', n=params.n):
+            # Calculate distribution
+            hartmanWatsonDistribution.distribution(result, params.t, r, roots, w1, dist_type)
         
         # Convert result back to numpy
         distribution_values = xsigmaToNumpy(result)
@@ -178,20 +183,29 @@ def get_test_cases() -> Dict[str, Any]:
         ]
     }
 
-def main() -> None:
-    """Main function for command line execution"""
-    try:
-        if len(sys.argv) > 1 and sys.argv[1] == "test_cases":
-            result = get_test_cases()
-            print(json.dumps({"status": "success", "data": result, "error": None}))
-            return
-            
-        params = HartmanWatsonParams.from_argv(sys.argv)
-        result = calculate_hartman_watson_distribution(params)
-        print(json.dumps({"status": "success", "data": result, "error": None}))
-        
-    except Exception as e:
-        print(json.dumps({"status": "error", "data": None, "error": str(e)}))
+def legacy_main(argv: List[str]):
+    """Original interface: '<json params>' or positional n t size_roots x_0 x_n distribution_type"""
+    params = HartmanWatsonParams.from_argv(['HartmanWatsonDistribution.py'] + argv)
+    return 'calculate', vars(params)
+
+service = Service('HartmanWatsonDistribution', version='1.0.0', legacy=legacy_main)
+
+@service.operation('calculate', schema={
+    'n': Param(int, 64, minimum=1),
+    't': Param(float, 0.5),
+    'size_roots': Param(int, 32, minimum=1),
+    'x_0': Param(float, -5.0),
+    'x_n': Param(float, 3.1),
+    'distribution_type': Param(str, 'MIXTURE'),
+})
+def calculate(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Hartman-Watson distribution over the requested grid"""
+    return calculate_hartman_watson_distribution(HartmanWatsonParams.from_dict(params))
+
+@service.operation('test_cases')
+def test_cases(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Predefined test cases"""
+    return get_test_cases()
 
 if __name__ == "__main__":
-    main()
+    service.run()
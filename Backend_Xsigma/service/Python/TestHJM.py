@@ -5,17 +5,45 @@ Converted from TestHJM.ipynb
 
 This script performs HJM interest rate model calibration, simulation, and analysis.
 It supports multiple test cases including calibration performance comparison and Monte Carlo simulation.
+The simulation can also run progressively, in batches, until the error versus market
+volatilities is stable within a requested tolerance.
 """
 
 import time
+import re
+import uuid
+import hashlib
 import numpy as np
 import matplotlib.pyplot as plt
 import json
 import sys
 import os
 import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from typing import Dict, List, Any, Optional
 from itertools import chain
+from service_metrics import metrics
+from service_framework import Service, Param, ConfigurationError
+from service_timing import timer
+from hjm_simulation import (
+    DEFAULT_RANDOM_SEED,
+    DEFAULT_NUM_PATHS,
+    DEFAULT_BATCH_PATHS,
+    SIMULATION_FREQUENCIES,
+    parse_dataset_selection,
+    simulation_grid,
+    BatchMeansAccumulator,
+    checkpoint_fingerprint,
+)
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): parallel calibrations run without core pinning
+    fcntl = None
 
 # Add the notebook directory to Python path for xsigmamodules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../'))
@@ -41,7 +69,7 @@ try:
         simulationManager,
         randomConfigId,
     )
-    from xsigmamodules.Util import dayCountConvention
+    from xsigmamodules.Util import dayCountConvention, datetimeHelper
     from xsigmamodules.Vectorization import vector, matrix, tensor
     from xsigmamodules.util.numpy_support import xsigmaToNumpy, numpyToXsigma
     from xsigmamodules.common import helper
@@ -65,10 +93,33 @@ except ImportError as e:
 XSIGMA_DATA_ROOT = xsigmaGetDataRoot()
 XSIGMA_TEST_ROOT = xsigmaGetTempDir()
 
-class ConfigurationError(Exception):
-    """Custom exception for configuration errors"""
-    pass
+# sequential: AAD then standard in this process (notebook behaviour)
+# parallel:   AAD here, standard in a worker process, each pinned to its own core
+# fast:       AAD only, no speedup comparison
+CALIBRATION_MODES = ('sequential', 'parallel', 'fast')
+
+# Parallel calibrations of concurrent requests claim their cores with a lock file per core
+CORE_LOCK_DIR = os.path.join(XSIGMA_TEST_ROOT, 'hjm_core_locks')
+
+# CMS spread prices depend only on the calibrated parameter and the market data it
+# is priced against, so they are cached on disk across requests, keyed by a hash of
+# the parameter's JSON and of those files
+CMS_MARKET_FILES = (
+    'Data/discountCurve.json',
+    'Data/correlationManager.json',
+    'Data/calibrationIrTargetsConfiguration.json',
+    'Data/irVolatilityData.json',
+)
+# Bump when the pricing call changes, to invalidate the cache
+CMS_CACHE_VERSION = '3'
+CMS_CACHE_DIR = os.environ.get(
+    'XSIGMA_CMS_CACHE_DIR', os.path.join(XSIGMA_TEST_ROOT, 'hjm_cms_cache')
+)
+# Worker processes pricing CMS spreads unless cms_workers says otherwise; each one
+# reloads the market data and rebuilds the calibrator
+DEFAULT_CMS_WORKERS = 4
 
+@timer.timed('market_load')
 def load_market_data() -> tuple:
     """Load all required market data files."""
     try:
@@ -101,6 +152,7 @@ def load_market_data() -> tuple:
     except Exception as e:
         raise ConfigurationError(f"Error loading market data: {str(e)}")
 
+@timer.timed('model')
 def setup_calibration(diffusion_id, correlation_mgr: correlationManager) -> tuple:
     """Setup calibration parameters."""
     diffusion_ids = [diffusion_id]
@@ -139,12 +191,269 @@ def setup_calibration(diffusion_id, correlation_mgr: correlationManager) -> tupl
     
     return diffusion_ids, correlation, calibration_settings, calibration_settings_aad, convention
 
+def _claim_cores(count: int) -> List[tuple]:
+    """
+    Lock ``count`` cores no other process holds, as (core, fd) pairs. The search
+    starts at a pid-dependent offset so concurrent requests rarely contend; the
+    locks are released when the fds are closed or the process dies.
+    """
+    if fcntl is None or not hasattr(os, 'sched_getaffinity'):
+        return []
+    cores = sorted(os.sched_getaffinity(0))
+    offset = os.getpid() % len(cores)
+    held = []
+    try:
+        os.makedirs(CORE_LOCK_DIR, mode=0o700, exist_ok=True)
+        for core in cores[offset:] + cores[:offset]:
+            if len(held) == count:
+                break
+            fd = os.open(os.path.join(CORE_LOCK_DIR, f"core-{core}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                continue
+            held.append((core, fd))
+    except OSError as e:
+        print(f"PROGRESS: Core locks unavailable: {str(e)}", file=sys.stderr)
+    return held
+
+@contextmanager
+def _reserved_cores(count: int):
+    """
+    Distinct cores to pin concurrent calibrations to, held for the block. Yields
+    None for every core when pinning is unavailable or fewer than ``count`` cores
+    are free, so busy hosts run the calibrations without affinity.
+    """
+    held = _claim_cores(count)
+    try:
+        if len(held) == count:
+            yield [core for core, _ in held]
+        else:
+            yield [None] * count
+    finally:
+        for _, fd in held:
+            os.close(fd)
+
+def _pin_to_core(core: Optional[int]) -> Optional[set]:
+    """Pin the current process to one core and return the previous affinity."""
+    if core is None:
+        return None
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, {core})
+    return previous
+
+def _restore_affinity(previous: Optional[set]) -> None:
+    """Undo _pin_to_core."""
+    if previous is not None:
+        os.sched_setaffinity(0, previous)
+
+@timer.timed('calibrate')
+def _timed_calibration(calibrator, diffusion_id, settings, discount_curve,
+                       ir_volatility_surface, correlation_mgr) -> tuple:
+    """Calibrate the HJM parameter and return (parameter, elapsed seconds)."""
+    start_time = time.time()
+    parameter = calibrator.calibrate(
+        parameterMarkovianHjmId(diffusion_id),
+        settings,
+        discount_curve,
+        ir_volatility_surface,
+        correlation_mgr,
+    )
+    elapsed = time.time() - start_time
+    metrics.record_calibration('hjm', 'builtin', elapsed)
+    return parameter, elapsed
+
+def _standard_calibration_worker(core: Optional[int]) -> float:
+    """
+    Worker process entry point for the parallel calibration mode.
+    Market objects do not cross process boundaries, so the worker loads its own
+    copy; only the calibration itself is timed.
+    """
+    _pin_to_core(core)
+    (target_config, discount_curve, ir_volatility_surface,
+     correlation_mgr, valuation_date, discount_id, diffusion_id) = load_market_data()
+    _, _, calibration_settings, _, _ = setup_calibration(diffusion_id, correlation_mgr)
+    calibrator = calibrationIrHjm(valuation_date, target_config)
+    _, elapsed = _timed_calibration(calibrator, diffusion_id, calibration_settings, discount_curve,
+                                    ir_volatility_surface, correlation_mgr)
+    return elapsed
+
+def _market_hash(valuation_date, data_root: str = None) -> str:
+    """Hash of the market data files and the valuation date (hashed in memory)."""
+    digest = hashlib.sha256(f"{CMS_CACHE_VERSION}|{valuation_date}".encode())
+    for name in CMS_MARKET_FILES:
+        with open(os.path.join(data_root or XSIGMA_DATA_ROOT, name), 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def _save_parameter(parameter, work_dir: str) -> tuple:
+    """
+    Write the calibrated parameter into ``work_dir`` for the CMS pricing workers.
+
+    Returns:
+        (path, SHA-256 of the parameter's JSON)
+    """
+    path = os.path.join(work_dir, 'parameterMarkovianHjm.json')
+    parameterMarkovianHjm.write_to_json(path, parameter)
+    with open(path, 'rb') as f:
+        return path, hashlib.sha256(f.read()).hexdigest()
+
+def _load_cms_cache(key: str) -> Optional[List[Dict[str, Any]]]:
+    """Cached per-expiry CMS prices for ``key``, or None."""
+    path = os.path.join(CMS_CACHE_DIR, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _save_cms_cache(key: str, expiries: List[Dict[str, Any]]) -> None:
+    """Atomically store per-expiry CMS prices under ``key``."""
+    path = os.path.join(CMS_CACHE_DIR, f"{key}.json")
+    os.makedirs(CMS_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(expiries, f)
+    os.replace(tmp_path, path)
+
+def _price_cms_expiry(calibrator, valuation_date, expiry_date, parameter, discount_curve,
+                      index: int, expiry_fraction: float) -> Dict[str, Any]:
+    """CMS spread call of one expiry, with its time and error."""
+    entry = {'index': index, 'expiry_fraction': float(expiry_fraction),
+             'value': None, 'time': None, 'error': None}
+    price_start = time.time()
+    try:
+        entry['value'] = float(calibrator.cms_spread_pricing_experimental(
+            valuation_date, expiry_date, parameter, discount_curve
+        ))
+    except Exception as e:
+        entry['error'] = str(e)
+    entry['time'] = time.time() - price_start
+    return entry
+
+# Per-worker state for CMS pricing runs
+_CMS_WORKER = None
+
+def _init_cms_worker(parameter_path: str) -> None:
+    """Rebuild the calibrator and read the calibrated parameter once per worker process."""
+    global _CMS_WORKER
+    (target_config, discount_curve, _, _, valuation_date, _, _) = load_market_data()
+    parameter = parameterMarkovianHjm.read_from_json(parameter_path)
+    _CMS_WORKER = {
+        'calibrator': calibrationIrHjm(valuation_date, target_config),
+        'valuation_date': valuation_date,
+        'discount_curve': discount_curve,
+        'parameter': parameter,
+        'expiry': list(parameter.volatilities_dates()),
+    }
+
+def _price_cms_chunk(task: List[tuple]) -> List[Dict[str, Any]]:
+    """Worker process entry point: price the (index, expiry fraction) pairs of one chunk."""
+    worker = _CMS_WORKER
+    return [
+        _price_cms_expiry(worker['calibrator'], worker['valuation_date'], worker['expiry'][index],
+                          worker['parameter'], worker['discount_curve'], index, fraction)
+        for index, fraction in task
+    ]
+
+@timer.timed('evaluate')
+def price_cms_spreads(calibrator, valuation_date, expiry, expiry_fraction, parameter,
+                      discount_curve, use_cache: bool = True, workers: int = 1) -> Dict[str, Any]:
+    """
+    Price CMS spread calls for all expiries.
+
+    The calibrator is a C++ object that is not safe to call from several threads,
+    so with ``workers`` > 1 the expiries are split across worker processes, each
+    rebuilding the calibrator from the market data and reading the calibrated
+    parameter from JSON written in a temporary directory of this run; otherwise
+    they are priced in turn here. Each expiry reports its value, time and error;
+    fully successful batches are cached by the hash of the calibrated parameter
+    and the market data.
+    """
+    start_time = time.time()
+    expiry = list(expiry)
+    workers = max(1, min(int(workers), len(expiry)))
+
+    # The parameter file only lives as long as this run
+    with tempfile.TemporaryDirectory(prefix='xsigma_hjm_cms_') as work_dir:
+        parameter_path, cache_key = None, None
+        if use_cache or workers > 1:
+            parameter_path, parameter_hash = _save_parameter(parameter, work_dir)
+        if use_cache:
+            try:
+                cache_key = hashlib.sha256(
+                    f"{parameter_hash}|{_market_hash(valuation_date)}".encode()
+                ).hexdigest()
+                cached = _load_cms_cache(cache_key)
+            except Exception as e:
+                print(f"PROGRESS: CMS cache unavailable: {str(e)}", file=sys.stderr)
+                cache_key, cached = None, None
+            metrics.record_cache('cms_spreads', cached is not None and len(cached) == len(expiry))
+            if cached is not None and len(cached) == len(expiry):
+                print("PROGRESS: CMS spread prices loaded from cache", file=sys.stderr)
+                return {
+                    'expiries': cached,
+                    'failed': 0,
+                    'cached': True,
+                    'workers': 0,
+                    'parameter_hash': cache_key,
+                    'total_time': time.time() - start_time,
+                }
+
+        print(f"PROGRESS: Pricing CMS spreads for {len(expiry)} expiries on {workers} workers", file=sys.stderr)
+        if workers == 1:
+            entries = [
+                _price_cms_expiry(calibrator, valuation_date, expiry[index], parameter, discount_curve,
+                                  index, expiry_fraction[index])
+                for index in range(len(expiry))
+            ]
+        else:
+            # Interleaved chunks: pricing time grows with the expiry
+            pairs = [(index, float(expiry_fraction[index])) for index in range(len(expiry))]
+            tasks = [pairs[i::workers] for i in range(workers)]
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_cms_worker,
+                initargs=(parameter_path,),
+            ) as pool:
+                entries = sorted(chain.from_iterable(pool.map(_price_cms_chunk, tasks)),
+                                 key=lambda entry: entry['index'])
+
+        failed = sum(1 for entry in entries if entry['error'] is not None)
+        if failed:
+            print(f"PROGRESS: CMS pricing failed for {failed} of {len(entries)} expiries", file=sys.stderr)
+        elif cache_key is not None:
+            try:
+                _save_cms_cache(cache_key, entries)
+            except OSError as e:
+                print(f"PROGRESS: Could not cache CMS spread prices: {str(e)}", file=sys.stderr)
+
+        return {
+            'expiries': entries,
+            'failed': failed,
+            'cached': False,
+            'workers': workers,
+            'parameter_hash': cache_key,
+            'total_time': time.time() - start_time,
+        }
+
 def run_calibration_comparison(params: Dict[str, Any]) -> Dict[str, Any]:
     """
     Run calibration performance comparison between AAD and standard methods.
     This corresponds to the calibration timing comparison in the notebook.
+
+    calibration_mode selects how the two calibrations run (see CALIBRATION_MODES).
     """
+    calibration_mode = params.get('calibration_mode', 'sequential')
+    if calibration_mode not in CALIBRATION_MODES:
+        raise ConfigurationError(
+            f"Invalid calibration_mode: {calibration_mode}. Valid options: {', '.join(CALIBRATION_MODES)}"
+        )
+
     try:
+        wall_clock_start = time.time()
+
         # Load market data
         (target_config, discount_curve, ir_volatility_surface, 
          correlation_mgr, valuation_date, discount_id, diffusion_id) = load_market_data()
@@ -155,35 +464,52 @@ def run_calibration_comparison(params: Dict[str, Any]) -> Dict[str, Any]:
         
         # Create calibrator
         calibrator = calibrationIrHjm(valuation_date, target_config)
-        
-        # Run AAD calibration
-        print("PROGRESS: Starting AAD calibration", file=sys.stderr)
-        start_time = time.time()
-        parameter_aad = calibrator.calibrate(
-            parameterMarkovianHjmId(diffusion_id),
-            calibration_settings_aad,
-            discount_curve,
-            ir_volatility_surface,
-            correlation_mgr,
-        )
-        aad_time = time.time() - start_time
-        print(f"PROGRESS: AAD calibration completed in {aad_time:.6f} seconds", file=sys.stderr)
 
-        # Run standard calibration
-        print("PROGRESS: Starting standard calibration", file=sys.stderr)
-        start_time = time.time()
-        parameter_standard = calibrator.calibrate(
-            parameterMarkovianHjmId(diffusion_id),
-            calibration_settings,
-            discount_curve,
-            ir_volatility_surface,
-            correlation_mgr,
-        )
-        standard_time = time.time() - start_time
-        print(f"PROGRESS: Standard calibration completed in {standard_time:.6f} seconds", file=sys.stderr)
+        standard_time = None
+        cores = [None, None]
+
+        if calibration_mode == 'parallel':
+            # Standard calibration in a worker process while AAD runs here
+            with _reserved_cores(2) as cores, \
+                    ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                print(f"PROGRESS: Starting AAD and standard calibrations in parallel (cores {cores})", file=sys.stderr)
+                standard_future = pool.submit(_standard_calibration_worker, cores[1])
+                previous_affinity = _pin_to_core(cores[0])
+                try:
+                    parameter_aad, aad_time = _timed_calibration(
+                        calibrator, diffusion_id, calibration_settings_aad, discount_curve,
+                        ir_volatility_surface, correlation_mgr)
+                finally:
+                    _restore_affinity(previous_affinity)
+                print(f"PROGRESS: AAD calibration completed in {aad_time:.6f} seconds", file=sys.stderr)
+                standard_time = standard_future.result()
+                # Recorded here: the worker process's own metrics are not reported
+                metrics.record_calibration('hjm', 'builtin', standard_time)
+            print(f"PROGRESS: Standard calibration completed in {standard_time:.6f} seconds", file=sys.stderr)
+
+        else:
+            # Run AAD calibration
+            print("PROGRESS: Starting AAD calibration", file=sys.stderr)
+            parameter_aad, aad_time = _timed_calibration(
+                calibrator, diffusion_id, calibration_settings_aad, discount_curve,
+                ir_volatility_surface, correlation_mgr)
+            print(f"PROGRESS: AAD calibration completed in {aad_time:.6f} seconds", file=sys.stderr)
+
+            if calibration_mode == 'sequential':
+                # Run standard calibration
+                print("PROGRESS: Starting standard calibration", file=sys.stderr)
+                _, standard_time = _timed_calibration(
+                    calibrator, diffusion_id, calibration_settings, discount_curve,
+                    ir_volatility_surface, correlation_mgr)
+                print(f"PROGRESS: Standard calibration completed in {standard_time:.6f} seconds", file=sys.stderr)
         
         # Calculate performance ratio
-        performance_ratio = standard_time / aad_time if aad_time > 0 else 0
+        if standard_time is None:
+            performance_ratio = None
+            speedup_factor = 'Not measured (fast mode runs AAD only)'
+        else:
+            performance_ratio = standard_time / aad_time if aad_time > 0 else 0
+            speedup_factor = f"{performance_ratio:.2f}x faster with AAD"
 
         # Extract calibration data for frontend (using AAD parameter)
         print("PROGRESS: Extracting calibration data", file=sys.stderr)
@@ -196,28 +522,35 @@ def run_calibration_comparison(params: Dict[str, Any]) -> Dict[str, Any]:
             convention,
         )
 
-        # Calculate CMS spread pricing for different expiry dates
-        cms_calls = []
-        try:
-            for exp_date in expiry:
-                cms_call = calibrator.cms_spread_pricing_experimental(
-                    valuation_date, exp_date, parameter_aad, discount_curve
-                )
-                cms_calls.append(cms_call)
-        except Exception as e:
-            print(f"PROGRESS: CMS pricing calculation failed: {str(e)}", file=sys.stderr)
-            cms_calls = []
+        # Calculate CMS spread pricing for all expiry dates
+        cms_pricing = price_cms_spreads(
+            calibrator, valuation_date, expiry, expiry_fraction, parameter_aad, discount_curve,
+            use_cache=params.get('cms_cache', True),
+            workers=params.get('cms_workers') or min(DEFAULT_CMS_WORKERS, os.cpu_count() or 1),
+        )
+        # As before, cms_calls is empty unless every expiry priced; failures are
+        # listed in cms_errors and the partial values stay in cms_pricing
+        cms_errors = [
+            {'index': entry['index'], 'expiry_fraction': entry['expiry_fraction'], 'error': entry['error']}
+            for entry in cms_pricing['expiries'] if entry['error'] is not None
+        ]
+        cms_calls = [] if cms_errors else [entry['value'] for entry in cms_pricing['expiries']]
 
         result = {
             'aad_calibration_time': aad_time,
             'standard_calibration_time': standard_time,
             'performance_ratio': performance_ratio,
-            'speedup_factor': f"{performance_ratio:.2f}x faster with AAD",
+            'speedup_factor': speedup_factor,
+            'calibration_mode': calibration_mode,
+            'calibration_cores': {'aad': cores[0], 'standard': cores[1]},
+            'wall_clock_time': time.time() - wall_clock_start,
             'calibration_successful': True,
             'valuation_date': str(valuation_date),
             'data_root': XSIGMA_DATA_ROOT,
             'expiry_fraction': expiry_fraction.tolist(),
             'cms_calls': cms_calls,
+            'cms_errors': cms_errors,
+            'cms_pricing': cms_pricing,
             'message': 'Calibration comparison completed with numerical data.'
         }
         
@@ -226,172 +559,574 @@ def run_calibration_comparison(params: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as e:
         raise ConfigurationError(f"Error in calibration comparison: {str(e)}")
 
+def _implied_to_array(implied: Dict[Any, Any], scale: float) -> np.ndarray:
+    """Copy a dict of per-expiry implied volatility rows into one (expiry, tenor) array."""
+    rows = len(implied)
+    if rows == 0:
+        return np.zeros((0, 0))
+    columns = np.size(next(iter(implied.values())))
+    out = np.empty((rows, columns))
+    for i, row in enumerate(implied.values()):
+        out[i] = row
+    out *= scale
+    return out
+
+class SwaptionVolatilityResults:
+    """
+    Model and market swaption implied volatilities (bps) of a simulation.
+
+    Volatilities are held as contiguous (expiry, tenor) arrays; dataset ``dataN`` is
+    tenor column N. The error matrix is computed once, and only the datasets a client
+    asks for are converted to lists.
+    """
+
+    def __init__(self, model: np.ndarray, market: np.ndarray):
+        self.model = np.ascontiguousarray(model, dtype=float)
+        self.market = np.ascontiguousarray(market, dtype=float)
+        if self.model.shape != self.market.shape:
+            raise ConfigurationError(
+                f"Model and market volatility shapes differ: {self.model.shape} vs {self.market.shape}"
+            )
+        self.error = np.subtract(self.model, self.market)
+
+    @classmethod
+    def from_implied(cls, model_implied: Dict[Any, Any], market_implied: Dict[Any, Any],
+                     scale: float = 10000.0) -> 'SwaptionVolatilityResults':
+        """Build from the simulation's ``*_swaption_implied`` dicts (decimal vols)."""
+        return cls(_implied_to_array(model_implied, scale), _implied_to_array(market_implied, scale))
+
+    @property
+    def num_expiries(self) -> int:
+        return self.model.shape[0]
+
+    @property
+    def num_datasets(self) -> int:
+        return self.model.shape[1]
+
+    def columns(self, matrix: np.ndarray, indices: List[int]) -> Dict[str, List[float]]:
+        """``dataN`` lists of the given columns of an (expiry, tenor) matrix, zeros past the end."""
+        zeros = [0.0] * self.num_expiries
+        return {
+            f"data{i + 1}": matrix[:, i].tolist() if i < matrix.shape[1] else zeros
+            for i in indices
+        }
+
+    def datasets(self, selection=None) -> tuple:
+        """
+        Volatilities and errors of the selected datasets, in the data1..dataN layout
+        used by the frontend.
+
+        Returns:
+            Tuple (volatility_data, error_data)
+        """
+        indices = parse_dataset_selection(selection, self.num_datasets)
+        model = self.columns(self.model, indices)
+        market = self.columns(self.market, indices)
+        volatility_data = {key: {'model': model[key], 'market': market[key]} for key in model}
+        return volatility_data, self.columns(self.error, indices)
+
+    def summary(self, selection=None) -> Dict[str, Any]:
+        """Error statistics (bps) per selected dataset and over the whole surface."""
+        indices = parse_dataset_selection(selection, self.num_datasets)
+        abs_error = np.abs(self.error)
+        per_dataset = {}
+        for i in indices:
+            if i >= self.num_datasets:
+                continue
+            column = self.error[:, i]
+            per_dataset[f"data{i + 1}"] = {
+                'mean_error': float(column.mean()),
+                'mean_abs_error': float(abs_error[:, i].mean()),
+                'rmse': float(np.sqrt(np.dot(column, column) / column.size)),
+                'max_abs_error': float(abs_error[:, i].max()),
+            }
+        overall = {}
+        if self.error.size:
+            overall = {
+                'mean_error': float(self.error.mean()),
+                'mean_abs_error': float(abs_error.mean()),
+                'rmse': float(np.sqrt(np.vdot(self.error, self.error) / self.error.size)),
+                'max_abs_error': float(abs_error.max()),
+            }
+        return {
+            'shape': {'expiries': self.num_expiries, 'datasets': self.num_datasets},
+            'datasets': per_dataset,
+            'overall': overall,
+        }
+
+def simulation_expiries(target_config, valuation_date, convention) -> tuple:
+    """
+    Simulated swaption expiries (tenors from the valuation date) and their year
+    fractions, which need not match the calibrated parameter's volatility dates.
+    """
+    expiries = list(target_config.expiries())
+    expiry_fraction = helper.convert_dates_to_fraction(
+        valuation_date,
+        [datetimeHelper.add_tenor(valuation_date, tenor) for tenor in expiries],
+        convention,
+    ).tolist()
+    return expiries, expiry_fraction
+
+@timer.timed('setup')
+def build_simulation_context(params: Dict[str, Any], market: Optional[tuple] = None) -> Dict[str, Any]:
+    """
+    Load market data (unless ``market`` is the output of load_market_data), calibrate
+    the HJM parameter (AAD) and prepare everything a Monte Carlo run needs except
+    the random configuration.
+    """
+    (target_config, discount_curve, ir_volatility_surface,
+     correlation_mgr, valuation_date, discount_id, diffusion_id) = market or load_market_data()
+
+    # Setup calibration
+    (diffusion_ids, correlation, calibration_settings,
+     calibration_settings_aad, convention) = setup_calibration(diffusion_id, correlation_mgr)
+
+    # Create calibrator and run calibration (using AAD for speed)
+    calibrator = calibrationIrHjm(valuation_date, target_config)
+    parameter = calibrator.calibrate(
+        parameterMarkovianHjmId(diffusion_id),
+        calibration_settings_aad,
+        discount_curve,
+        ir_volatility_surface,
+        correlation_mgr,
+    )
+
+    print("PROGRESS: Setting up simulation", file=sys.stderr)
+
+    # Setup market container entries (the random config is added per run)
+    market_ids = [anyId(discount_id)]
+    market_objects = [anyObject(discount_curve)]
+
+    market_ids.append(anyId(correlationManagerId()))
+    market_objects.append(anyObject(correlation_mgr))
+
+    market_ids.append(anyId(parameterMarkovianHjmId(diffusion_id)))
+    market_objects.append(anyObject(parameter))
+
+    market_ids.append(anyId(dynamicInstructionIrId(diffusion_id)))
+    market_objects.append(anyObject(dynamicInstructionIrMarkovianHjm()))
+
+    market_ids.append(anyId(measureId()))
+    market_objects.append(anyObject(measure(discount_id)))
+
+    # Setup simulation dates, only as far as the priced expiries need
+    expiries, expiry_fraction = simulation_expiries(target_config, valuation_date, convention)
+    grid = simulation_grid(params, expiry_fraction)
+    simulation_dates = helper.simulation_dates(valuation_date, grid['frequency'], grid['steps'])
+    expiries = expiries[:grid['num_expiries']]
+
+    # The coterminal swaptions all end on one date; a shorter horizon leaves them out
+    coterminal_date = datetimeHelper.add_tenor(valuation_date, target_config.coterminal())
+    grid['coterminal'] = not coterminal_date > simulation_dates[-1]
+
+    print(f"PROGRESS: Simulation grid {grid['steps']} x {grid['frequency']} "
+          f"({grid['horizon_years']:.2f} years), {grid['num_expiries']} expiries"
+          f"{'' if grid['coterminal'] else ', without coterminal swaptions'}", file=sys.stderr)
+
+    return {
+        'target_config': target_config,
+        'valuation_date': valuation_date,
+        'convention': convention,
+        'diffusion_ids': diffusion_ids,
+        'parameter': parameter,
+        'market_ids': market_ids,
+        'market_objects': market_objects,
+        'simulation_dates': simulation_dates,
+        'maturity': max(simulation_dates),
+        'grid': grid,
+        'expiries': expiries,
+        'expiry_fraction': expiry_fraction[:grid['num_expiries']],
+        'mkt_data_obj': market_data.market_data(XSIGMA_DATA_ROOT),
+    }
+
+class HorizonSimulation(simulation.Simulation):
+    """
+    simulation.Simulation whose swaption grid can leave out the coterminal swaptions,
+    for simulation horizons that end before the coterminal maturity.
+
+    The engine has no public switch for this, so the private grid builder is
+    overridden. Its layout is checked before an instrument is dropped, and an
+    engine whose grid no longer matches raises ConfigurationError instead of
+    silently mislabelling or dropping instruments.
+    """
+
+    def __init__(self, *args, include_coterminal: bool = True, **kwargs):
+        # Read by _create_swaption_grid, which the base constructor calls
+        self.include_coterminal = include_coterminal
+        self._coterminal_removed = False
+        super().__init__(*args, **kwargs)
+        if not include_coterminal and not self._coterminal_removed:
+            raise ConfigurationError(
+                "simulation.Simulation no longer builds its swaption grid through "
+                "_create_swaption_grid; cannot leave out the coterminal swaptions"
+            )
+
+    def _create_swaption_grid(self, simulation_dates, frequency, expiries, cms_tenors, coterminal_tenor):
+        swaptions = super()._create_swaption_grid(
+            simulation_dates, frequency, expiries, cms_tenors, coterminal_tenor
+        )
+        if not self.include_coterminal:
+            # Per expiry: the one-period swaption, the coterminal one, then the CMS tenors
+            expected = 2 + len(list(cms_tenors))
+            if len(swaptions) != len(list(expiries)):
+                raise ConfigurationError(
+                    f"Unexpected swaption grid: {len(swaptions)} expiries, expected {len(list(expiries))}"
+                )
+            for key, swaption_list in swaptions.items():
+                if len(swaption_list) != expected:
+                    raise ConfigurationError(
+                        f"Unexpected swaption grid at expiry {key}: {len(swaption_list)} swaptions, "
+                        f"expected one-period, coterminal and {expected - 2} CMS tenors"
+                    )
+            for swaption_list in swaptions.values():
+                del swaption_list[1]
+            self._coterminal_removed = True
+        return swaptions
+
+@timer.timed('simulate')
+def run_simulation_batch(context: Dict[str, Any], num_paths: int, seed: int) -> tuple:
+    """
+    Run one Monte Carlo simulation of ``num_paths`` paths with the given Sobol seed.
+
+    Returns:
+        SwaptionVolatilityResults with model and market volatilities in basis points.
+    """
+    start_time = time.perf_counter()
+    config = randomConfig(random_enum.SOBOL_BROWNIAN_BRIDGE, seed, num_paths)
+    market = anyContainer(
+        context['market_ids'] + [anyId(randomConfigId())],
+        context['market_objects'] + [anyObject(config)],
+    )
+
+    target_config = context['target_config']
+    sim = HorizonSimulation(
+        context['mkt_data_obj'],
+        num_paths,
+        target_config.frequency(),
+        context['expiries'],
+        target_config.cms_tenors(),
+        target_config.coterminal(),
+        context['maturity'],
+        context['simulation_dates'],
+        include_coterminal=context['grid']['coterminal'],
+    )
+    sim.run_simulation(context['diffusion_ids'], market, context['simulation_dates'])
+    metrics.record_paths(num_paths, time.perf_counter() - start_time)
+
+    return SwaptionVolatilityResults.from_implied(
+        sim.results.model_swaption_implied,
+        sim.results.market_swaption_implied,
+    )
+
 def run_simulation_analysis(params: Dict[str, Any]) -> Dict[str, Any]:
     """
     Run Monte Carlo simulation analysis.
     This corresponds to the simulation section in the notebook.
     """
+    if params.get('progressive') or params.get('job_id') or params.get('checkpoint'):
+        return run_progressive_simulation(params)
+
     try:
-        # Load market data
-        (target_config, discount_curve, ir_volatility_surface, 
-         correlation_mgr, valuation_date, discount_id, diffusion_id) = load_market_data()
-        
-        # Setup calibration
-        (diffusion_ids, correlation, calibration_settings, 
-         calibration_settings_aad, convention) = setup_calibration(diffusion_id, correlation_mgr)
-        
-        # Create calibrator and run calibration (using AAD for speed)
-        calibrator = calibrationIrHjm(valuation_date, target_config)
-        parameter = calibrator.calibrate(
-            parameterMarkovianHjmId(diffusion_id),
-            calibration_settings_aad,
-            discount_curve,
-            ir_volatility_surface,
-            correlation_mgr,
-        )
-        
-        print("PROGRESS: Setting up simulation", file=sys.stderr)
+        context = build_simulation_context(params)
 
-        # Setup market container
-        anyids = [anyId(discount_id)]
-        anyobject = [anyObject(discount_curve)]
-        
-        anyids.append(anyId(correlationManagerId()))
-        anyobject.append(anyObject(correlation_mgr))
-        
-        anyids.append(anyId(parameterMarkovianHjmId(diffusion_id)))
-        anyobject.append(anyObject(parameter))
-        
-        anyids.append(anyId(dynamicInstructionIrId(diffusion_id)))
-        anyobject.append(anyObject(dynamicInstructionIrMarkovianHjm()))
-        
-        anyids.append(anyId(measureId()))
-        anyobject.append(anyObject(measure(discount_id)))
-        
         # Configure simulation parameters
         num_of_paths = int(params.get('num_paths', 262144 * 2))
-        config = randomConfig(random_enum.SOBOL_BROWNIAN_BRIDGE, 12765793, num_of_paths)
-        
-        anyids.append(anyId(randomConfigId()))
-        anyobject.append(anyObject(config))
-        
-        market = anyContainer(anyids, anyobject)
-        
-        # Setup simulation dates
-        simulation_dates = helper.simulation_dates(valuation_date, "3M", 120)
-        maturity = max(simulation_dates)
-        
-        # Create market data object
-        mkt_data_obj = market_data.market_data(XSIGMA_DATA_ROOT)
-        
-        # Create and run simulation
-        sim = simulation.Simulation(
-            mkt_data_obj,
-            num_of_paths,
-            target_config.frequency(),
-            target_config.expiries(),
-            target_config.cms_tenors(),
-            target_config.coterminal(),
-            maturity,
-            simulation_dates,
-        )
-        
+        seed = int(params.get('seed', DEFAULT_RANDOM_SEED))
+
         print("PROGRESS: Running simulation", file=sys.stderr)
-        sim.run_simulation(diffusion_ids, market, simulation_dates)
+        results = run_simulation_batch(context, num_of_paths, seed)
         print("PROGRESS: Simulation completed", file=sys.stderr)
 
         # Extract actual numerical results for frontend
         print("PROGRESS: Processing simulation results", file=sys.stderr)
+        print(f"PROGRESS: Volatility surface shape (expiry, tenor): {results.model.shape}", file=sys.stderr)
+        print(f"PROGRESS: Number of datasets available: {results.num_datasets}", file=sys.stderr)
 
-        # Get model and market volatility data
-        x = list(sim.results.model_swaption_implied.keys())
-        model_vols = np.array(list(sim.results.model_swaption_implied.values())).T * 10000
-        market_vols = np.array(list(sim.results.market_swaption_implied.values())).T * 10000
+        datasets = params.get('datasets')
+        volatility_data, error_data = results.datasets(datasets)
 
-        print(f"PROGRESS: Model volatility shape: {model_vols.shape}", file=sys.stderr)
-        print(f"PROGRESS: Market volatility shape: {market_vols.shape}", file=sys.stderr)
+        simulation_dates = context['simulation_dates']
+        result = {
+            'simulation_successful': True,
+            'num_paths': num_of_paths,
+            'simulation_dates_count': len(simulation_dates),
+            'maturity': str(context['maturity']),
+            'valuation_date': str(context['valuation_date']),
+            'NI_Volatility_Bps': volatility_data,
+            'Error_Bps': error_data,
+            'Error_Summary_Bps': results.summary(datasets),
+            'expiry_fraction': context['expiry_fraction'],
+            'message': 'Simulation completed successfully with numerical data.',
+            'parameters': {
+                'num_paths': num_of_paths,
+                'frequency': context['target_config'].frequency(),
+                'simulation_length': len(simulation_dates),
+                'simulation_frequency': context['grid']['frequency'],
+                'simulation_horizon_years': context['grid']['horizon_years'],
+                'coterminal_included': context['grid']['coterminal']
+            }
+        }
+
+        return result
 
-        # Calculate error matrices
-        error = np.asarray(
-            [model_vols[i] - market_vols[i] for i in range(len(model_vols))]
+    except Exception as e:
+        print(f"PROGRESS: Simulation analysis failed with error: {str(e)}", file=sys.stderr)
+        import traceback
+        print(f"PROGRESS: Full traceback: {traceback.format_exc()}", file=sys.stderr)
+        raise ConfigurationError(f"Error in simulation analysis: {str(e)}")
+
+# Checkpoints of batched simulations live here, one JSON state file per job id
+CHECKPOINT_DIR = os.environ.get(
+    'XSIGMA_CHECKPOINT_DIR', os.path.join(XSIGMA_TEST_ROOT, 'hjm_checkpoints')
+)
+
+_JOB_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+def _checkpoint_path(job_id: str) -> str:
+    """Location of the state file for ``job_id``."""
+    if not _JOB_ID_PATTERN.match(job_id):
+        raise ConfigurationError(
+            "job_id must be 1-64 characters of letters, digits, '-' or '_'"
         )
+    return os.path.join(CHECKPOINT_DIR, f"{job_id}.json")
 
-        # Ensure we have at least 4 datasets by padding with zeros if necessary
-        num_datasets = len(model_vols)
-        print(f"PROGRESS: Number of datasets available: {num_datasets}", file=sys.stderr)
-
-        # Helper function to safely get data or return zeros
-        def safe_get_data(data_array, index, default_size=None):
-            if index < len(data_array):
-                return data_array[index].tolist()
-            else:
-                # Return zeros if dataset doesn't exist
-                if default_size is None and len(data_array) > 0:
-                    default_size = len(data_array[0])
-                elif default_size is None:
-                    default_size = 10  # fallback size
-                return [0.0] * default_size
-
-        # Structure volatility data for frontend (ensure 4 datasets)
-        volatility_data = {
-            "data1": {
-                "model": safe_get_data(model_vols, 0),
-                "market": safe_get_data(market_vols, 0)
-            },
-            "data2": {
-                "model": safe_get_data(model_vols, 1),
-                "market": safe_get_data(market_vols, 1)
-            },
-            "data3": {
-                "model": safe_get_data(model_vols, 2),
-                "market": safe_get_data(market_vols, 2)
-            },
-            "data4": {
-                "model": safe_get_data(model_vols, 3),
-                "market": safe_get_data(market_vols, 3)
+def load_checkpoint(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return the saved state for ``job_id``, or None when there is none."""
+    path = _checkpoint_path(job_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_checkpoint(job_id: str, state: Dict[str, Any]) -> None:
+    """Atomically write the state file for ``job_id``."""
+    path = _checkpoint_path(job_id)
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def get_checkpoint_status(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize the checkpoint of a batched simulation job so clients can poll it."""
+    job_id = params.get('job_id')
+    if not job_id:
+        raise ConfigurationError("job_id is required")
+    state = load_checkpoint(job_id)
+    if state is None:
+        return {'job_id': job_id, 'status': 'unknown'}
+    accumulator = state.get('accumulator', {})
+    summary = {
+        'job_id': job_id,
+        'status': state.get('status', 'running'),
+        'completed_batches': accumulator.get('num_batches', 0),
+        'completed_paths': accumulator.get('num_paths', 0),
+        'requested_paths': state.get('requested_paths'),
+        'updated_at': state.get('updated_at'),
+        'elapsed_seconds': state.get('elapsed_seconds', 0.0),
+    }
+    if state.get('status') == 'completed':
+        summary['result'] = state.get('result')
+    return summary
+
+def run_progressive_simulation(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the Monte Carlo simulation in batches of ``batch_paths`` paths.
+
+    After each batch the running ``NI_Volatility_Bps``/``Error_Bps`` estimates and their
+    standard errors are emitted on stderr as a ``PARTIAL_RESULT:`` JSON line. With
+    ``progressive`` set, the run stops when, after at least ``min_batches`` batches,
+    both the largest standard error and the largest change of the error estimate are
+    within ``tolerance_bps``; it also stops when ``time_budget`` seconds have elapsed
+    or ``num_paths`` paths have been simulated.
+
+    With a ``job_id`` (or ``checkpoint``), the accumulated statistics and the RNG
+    position (next batch index) are written to a state file every
+    ``checkpoint_every`` batches. A later request with the same job id continues from
+    the last checkpoint, or returns the stored result if the job had completed.
+    """
+    try:
+        max_paths = int(params.get('num_paths', DEFAULT_NUM_PATHS))
+        batch_paths = min(int(params.get('batch_paths', DEFAULT_BATCH_PATHS)), max_paths)
+        early_stopping = bool(params.get('progressive'))
+        tolerance_bps = float(params.get('tolerance_bps', 0.1))
+        time_budget = params.get('time_budget')
+        time_budget = float(time_budget) if time_budget is not None else None
+        min_batches = max(2, int(params.get('min_batches', 2)))
+        seed = int(params.get('seed', DEFAULT_RANDOM_SEED))
+        checkpoint_every = max(1, int(params.get('checkpoint_every', 1)))
+        datasets = params.get('datasets')
+
+        if batch_paths <= 0:
+            raise ValueError("batch_paths must be positive")
+        if tolerance_bps <= 0:
+            raise ValueError("tolerance_bps must be positive")
+
+        job_id = params.get('job_id')
+        if job_id is None and params.get('checkpoint'):
+            job_id = uuid.uuid4().hex
+        # The fingerprint covers the resolved grid, which needs the expiries only
+        market = load_market_data()
+        _, expiry_fraction = simulation_expiries(market[0], market[4], dayCountConvention())
+        fingerprint = checkpoint_fingerprint(params, simulation_grid(params, expiry_fraction))
+
+        accumulator = BatchMeansAccumulator()
+        market_vols = None
+        history = []
+        previous_elapsed = 0.0
+        # Error estimate after the previous batch, for the convergence test
+        previous_error = None
+        resumed_from_batch = 0
+        if job_id is not None:
+            state = load_checkpoint(job_id)
+            if state is not None:
+                if state.get('fingerprint') != fingerprint:
+                    raise ConfigurationError(
+                        f"Checkpoint for job {job_id} was created with a different batch_paths, seed or simulation grid"
+                    )
+                if state.get('status') == 'completed':
+                    print(f"PROGRESS: Job {job_id} already completed, returning stored result",
+                          file=sys.stderr)
+                    return state['result']
+                accumulator = BatchMeansAccumulator.from_dict(state['accumulator'])
+                if state.get('market_vols') is not None:
+                    market_vols = np.asarray(state['market_vols'], dtype=float)
+                history = state.get('history', [])
+                if state.get('last_error') is not None:
+                    previous_error = np.asarray(state['last_error'], dtype=float)
+                previous_elapsed = float(state.get('elapsed_seconds', 0.0))
+                resumed_from_batch = accumulator.num_batches
+                print(f"PROGRESS: Resuming job {job_id} from batch {resumed_from_batch} "
+                      f"({accumulator.num_paths} paths)", file=sys.stderr)
+
+        def checkpoint(status: str, result: Optional[Dict[str, Any]] = None) -> None:
+            if job_id is None:
+                return
+            state = {
+                'job_id': job_id,
+                'status': status,
+                'fingerprint': fingerprint,
+                'requested_paths': max_paths,
+                # RNG position: batch k always uses seed + k
+                'base_seed': seed,
+                'next_batch': accumulator.num_batches,
+                'accumulator': accumulator.to_dict(),
+                'market_vols': market_vols.tolist() if market_vols is not None else None,
+                'last_error': previous_error.tolist() if previous_error is not None else None,
+                'history': history,
+                'elapsed_seconds': previous_elapsed + (time.time() - start_time),
+                'updated_at': str(np.datetime64('now')),
             }
-        }
+            if result is not None:
+                state['result'] = result
+            save_checkpoint(job_id, state)
 
-        # Structure error data for frontend (ensure 4 datasets)
-        error_data = {
-            "data1": safe_get_data(error, 0),
-            "data2": safe_get_data(error, 1),
-            "data3": safe_get_data(error, 2),
-            "data4": safe_get_data(error, 3)
-        }
+        context = build_simulation_context(params, market)
+        start_time = time.time()
 
-        # Get expiry fractions for x-axis
-        expiry = parameter.volatilities_dates()
-        expiry_fraction = helper.convert_dates_to_fraction(
-            valuation_date,
-            expiry,
-            convention,
+        stop_reason = 'max_paths'
+
+        while accumulator.num_paths < max_paths:
+            paths = min(batch_paths, max_paths - accumulator.num_paths)
+            batch_seed = seed + accumulator.num_batches
+            batch = run_simulation_batch(context, paths, batch_seed)
+            market_vols = batch.market
+            accumulator.add(batch.model, paths)
+
+            results = SwaptionVolatilityResults(accumulator.mean(), market_vols)
+            error = results.error
+            standard_error = accumulator.standard_error()
+            max_standard_error = float(np.max(standard_error))
+            max_error_change = (float(np.max(np.abs(error - previous_error)))
+                                if previous_error is not None else float('inf'))
+            previous_error = error
+            elapsed = time.time() - start_time
+
+            history.append({
+                'batch': accumulator.num_batches,
+                'paths': paths,
+                'cumulative_paths': accumulator.num_paths,
+                'max_standard_error_bps': max_standard_error if np.isfinite(max_standard_error) else None,
+                'max_error_change_bps': max_error_change if np.isfinite(max_error_change) else None,
+                'elapsed_seconds': previous_elapsed + elapsed,
+            })
+            print(f"PROGRESS: Batch {accumulator.num_batches} done, "
+                  f"{accumulator.num_paths}/{max_paths} paths, "
+                  f"max standard error {max_standard_error:.4f} bps", file=sys.stderr)
+
+            volatility_data, error_data = results.datasets(datasets)
+            print("PARTIAL_RESULT: " + json.dumps({
+                **history[-1],
+                'job_id': job_id,
+                'NI_Volatility_Bps': volatility_data,
+                'Error_Bps': error_data,
+            }), file=sys.stderr)
+
+            if accumulator.num_batches % checkpoint_every == 0:
+                checkpoint('running')
+
+            if (early_stopping
+                    and accumulator.num_batches >= min_batches
+                    and max_standard_error <= tolerance_bps
+                    and max_error_change <= tolerance_bps):
+                stop_reason = 'converged'
+                break
+            if time_budget is not None and elapsed >= time_budget:
+                stop_reason = 'time_budget'
+                break
+
+        print(f"PROGRESS: Batched simulation stopped ({stop_reason})", file=sys.stderr)
+
+        results = SwaptionVolatilityResults(accumulator.mean(), market_vols)
+        standard_error = accumulator.standard_error()
+        volatility_data, error_data = results.datasets(datasets)
+        standard_error_data = results.columns(
+            np.where(np.isfinite(standard_error), standard_error, 0.0),
+            parse_dataset_selection(datasets, results.num_datasets),
         )
 
+        simulation_dates = context['simulation_dates']
         result = {
             'simulation_successful': True,
-            'num_paths': num_of_paths,
+            'num_paths': accumulator.num_paths,
             'simulation_dates_count': len(simulation_dates),
-            'maturity': str(maturity),
-            'valuation_date': str(valuation_date),
+            'maturity': str(context['maturity']),
+            'valuation_date': str(context['valuation_date']),
             'NI_Volatility_Bps': volatility_data,
             'Error_Bps': error_data,
-            'expiry_fraction': expiry_fraction.tolist(),
-            'message': 'Simulation completed successfully with numerical data.',
+            'Standard_Error_Bps': standard_error_data,
+            'Error_Summary_Bps': results.summary(datasets),
+            'expiry_fraction': context['expiry_fraction'],
+            'convergence': {
+                'converged': stop_reason == 'converged',
+                'stop_reason': stop_reason,
+                'tolerance_bps': tolerance_bps,
+                'batches': history,
+                'elapsed_seconds': previous_elapsed + (time.time() - start_time),
+            },
+            'message': f'Batched simulation stopped after {accumulator.num_paths} paths ({stop_reason}).',
             'parameters': {
-                'num_paths': num_of_paths,
-                'frequency': target_config.frequency(),
-                'simulation_length': len(simulation_dates)
+                'num_paths': max_paths,
+                'batch_paths': batch_paths,
+                'frequency': context['target_config'].frequency(),
+                'simulation_length': len(simulation_dates),
+                'simulation_frequency': context['grid']['frequency'],
+                'simulation_horizon_years': context['grid']['horizon_years'],
+                'coterminal_included': context['grid']['coterminal']
             }
         }
-        
+        if job_id is not None:
+            result['job_id'] = job_id
+            result['resumed_from_batch'] = resumed_from_batch
+            # A time-budget stop leaves the job resumable; anything else is final
+            checkpoint('running' if stop_reason == 'time_budget' else 'completed',
+                       None if stop_reason == 'time_budget' else result)
+
         return result
 
     except Exception as e:
-        print(f"PROGRESS: Simulation analysis failed with error: {str(e)}", file=sys.stderr)
-        import traceback
-        print(f"PROGRESS: Full traceback: {traceback.format_exc()}", file=sys.stderr)
-        raise ConfigurationError(f"Error in simulation analysis: {str(e)}")
+        print(f"PROGRESS: Batched simulation failed with error: {str(e)}", file=sys.stderr)
+        raise ConfigurationError(f"Error in batched simulation: {str(e)}")
 
 def calculate_hjm_model(params: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -415,77 +1150,13 @@ def calculate_hjm_model(params: Dict[str, Any]) -> Dict[str, Any]:
         # Default to calibration comparison
         return run_calibration_comparison(params)
 
-def main():
-    """Main function to handle command line execution"""
-    # Check if this is called with the new API interface (operation + JSON)
-    if len(sys.argv) >= 2 and sys.argv[1] in ['calculate', 'health_check']:
-        operation = sys.argv[1]
-
-        if operation == 'health_check':
-            # Health check operation
-            health_result = {
-                'status': 'healthy',
-                'service': 'TestHJM',
-                'version': '1.0.0',
-                'timestamp': str(np.datetime64('now')),
-                'checks': {
-                    'xsigmamodules': 'available',
-                    'numpy': 'available',
-                    'matplotlib': 'available',
-                    'data_root': XSIGMA_DATA_ROOT,
-                    'test_root': XSIGMA_TEST_ROOT
-                }
-            }
-            print(json.dumps(health_result))
-            return
-
-        elif operation == 'calculate':
-            # Parse JSON parameters if provided
-            if len(sys.argv) >= 3:
-                try:
-                    params = json.loads(sys.argv[2])
-                except json.JSONDecodeError:
-                    error_result = {
-                        'status': 'error',
-                        'error': 'Invalid JSON parameters'
-                    }
-                    print(json.dumps(error_result))
-                    sys.exit(1)
-            else:
-                # Use default parameters
-                params = {}
-
-            # Map test case to output_type if provided
-            if 'test' in params:
-                test_case = params['test']
-                if test_case == 1:
-                    params['output_type'] = 'calibration_comparison'
-                elif test_case == 2:
-                    params['output_type'] = 'simulation_analysis'
+OUTPUT_TYPES = ['calibration_comparison', 'simulation_analysis']
 
-            try:
-                # Calculate HJM model
-                result = calculate_hjm_model(params)
-
-                # Wrap result in API format
-                api_result = {
-                    'status': 'success',
-                    'data': result,
-                    'timestamp': str(np.datetime64('now'))
-                }
-                print(json.dumps(api_result))
-                return
+# Test cases of the API mapped to their output type
+TEST_OUTPUT_TYPES = {1: 'calibration_comparison', 2: 'simulation_analysis'}
 
-            except Exception as e:
-                error_result = {
-                    'status': 'error',
-                    'error': str(e),
-                    'timestamp': str(np.datetime64('now'))
-                }
-                print(json.dumps(error_result))
-                sys.exit(1)
-
-    # Fallback to original argparse interface for backward compatibility
+def legacy_main(argv):
+    """Original argparse interface, kept for backward compatibility"""
     parser = argparse.ArgumentParser(description='Calculate TestHJM Interest Rate Model')
     parser.add_argument('--test', type=int, default=1, choices=[1, 2],
                        help='Test case: 1=calibration_comparison, 2=simulation_analysis')
@@ -496,14 +1167,54 @@ def main():
                        help='Type of output to generate')
     parser.add_argument('--format', type=str, default='json', choices=['json'],
                        help='Output format')
+    parser.add_argument('--progressive', action='store_true',
+                       help='Run the simulation in batches with convergence-based early stopping')
+    parser.add_argument('--batch_paths', type=int, default=65536,
+                       help='Paths per batch in progressive mode')
+    parser.add_argument('--tolerance_bps', type=float, default=0.1,
+                       help='Convergence tolerance in basis points for progressive mode')
+    parser.add_argument('--time_budget', type=float, default=None,
+                       help='Time budget in seconds for progressive mode')
+    parser.add_argument('--job_id', type=str, default=None,
+                       help='Checkpoint the batched simulation under this id and resume it if a checkpoint exists')
+    parser.add_argument('--checkpoint_every', type=int, default=1,
+                       help='Number of batches between checkpoints')
+    parser.add_argument('--calibration_mode', type=str, default='sequential', choices=list(CALIBRATION_MODES),
+                       help='How to run the AAD and standard calibrations (test 1)')
+    parser.add_argument('--simulation_frequency', type=str, default=None, choices=list(SIMULATION_FREQUENCIES),
+                       help='Simulation time step (default 3M)')
+    parser.add_argument('--simulation_horizon', type=str, default=None,
+                       help="Simulation horizon in years, or 'auto' to stop at the last priced expiry (default 30)")
+    parser.add_argument('--max_expiry', type=float, default=None,
+                       help='Only price swaption expiries up to this many years')
+    parser.add_argument('--datasets', type=str, default=None,
+                       help="Datasets to return, e.g. '1,3', '1-8' or 'all' (default: data1..data4)")
+    parser.add_argument('--no_cms_cache', action='store_true',
+                       help='Do not read or write the CMS spread price cache')
+    parser.add_argument('--cms_workers', type=int, default=None,
+                       help='Worker processes pricing CMS spreads, 1 to price in this process '
+                            f'(default: {DEFAULT_CMS_WORKERS}, at most the CPU count)')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Convert args to parameters dictionary
     params = {
         'test': args.test,
         'num_paths': args.num_paths,
-        'output_type': args.output_type
+        'output_type': args.output_type,
+        'progressive': args.progressive,
+        'batch_paths': args.batch_paths,
+        'tolerance_bps': args.tolerance_bps,
+        'time_budget': args.time_budget,
+        'job_id': args.job_id,
+        'checkpoint_every': args.checkpoint_every,
+        'calibration_mode': args.calibration_mode,
+        'cms_cache': not args.no_cms_cache,
+        'cms_workers': args.cms_workers,
+        'datasets': args.datasets,
+        'simulation_frequency': args.simulation_frequency,
+        'simulation_horizon': args.simulation_horizon,
+        'max_expiry': args.max_expiry
     }
 
     try:
@@ -518,5 +1229,27 @@ def main():
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
+service = Service('TestHJM', version='1.0.0', legacy=legacy_main,
+                  health=lambda: {'xsigmamodules': 'available', 'numpy': 'available',
+                                  'matplotlib': 'available', 'data_root': XSIGMA_DATA_ROOT,
+                                  'test_root': XSIGMA_TEST_ROOT})
+
+@service.operation('calculate', schema={
+    'test': Param(int, choices=list(TEST_OUTPUT_TYPES)),
+    'num_paths': Param(int, minimum=1),
+    'output_type': Param(str, choices=OUTPUT_TYPES),
+    'cms_workers': Param(int, minimum=1),
+})
+def calculate(params):
+    """Calibration comparison (test 1) or simulation analysis (test 2)"""
+    if params.get('test') is not None:
+        params['output_type'] = TEST_OUTPUT_TYPES[params['test']]
+    return calculate_hjm_model(params)
+
+@service.operation('checkpoint_status')
+def checkpoint_status(params):
+    """Progress of a checkpointed simulation job"""
+    return get_checkpoint_status(params)
+
 if __name__ == "__main__":
-    main()
+    service.run()
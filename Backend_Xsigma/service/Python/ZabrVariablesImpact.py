@@ -9,7 +9,6 @@ import sys
 import os
 import json
 import numpy as np
-from datetime import datetime
 from typing import Dict, List, Any, Tuple
 
 # Add the notebook directory to Python path for xsigmamodules
@@ -17,6 +16,9 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 notebook_dir = os.path.join(os.path.dirname(current_dir), 'NoteBook')
 sys.path.append(notebook_dir)
 
+from service_framework import Service, Param
+from service_timing import timer
+
 try:
     from xsigmamodules.Market import (
         volatilityModelSabr,
@@ -209,60 +211,48 @@ class ZabrVariablesImpactService:
     def calculate_volatility_impact(self, model_type: str, initial_params: Dict[str, Any], 
                                   dynamic_params: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate volatility impact for parameter changes"""
-        try:
-            # Define strike ranges for each model
-            if model_type == "zabr_classic":
-                x_values = np.linspace(0.0, 0.2, 100)
-            elif model_type == "sabr_pde":
-                x_values = np.linspace(0.0, 0.2, 100)
-            elif model_type == "zabr_mixture":
-                x_values = np.linspace(-0.15, 0.3, 401)
-            else:
-                raise ValueError(f"Unknown model type: {model_type}")
-            
-            # Create models
+        # Define strike ranges for each model
+        if model_type == "zabr_classic":
+            x_values = np.linspace(0.0, 0.2, 100)
+        elif model_type == "sabr_pde":
+            x_values = np.linspace(0.0, 0.2, 100)
+        elif model_type == "zabr_mixture":
+            x_values = np.linspace(-0.15, 0.3, 401)
+        else:
+            raise ValueError(f"Unknown model type: {model_type}")
+        
+        # Create models
+        with timer.span('model', model=model_type):
             initial_model = self.create_model(model_type, initial_params)
             dynamic_model = self.create_model(model_type, dynamic_params)
-            
-            # Compute volatility surfaces
+        
+        # Compute volatility surfaces
+        with timer.span('evaluate', strikes=len(x_values)):
             initial_volatility = self.compute_volatility_surface(initial_model, x_values)
             dynamic_volatility = self.compute_volatility_surface(dynamic_model, x_values)
-            
-            # Calculate differences
-            volatility_difference = dynamic_volatility - initial_volatility
-            
-            return {
-                "status": "success",
-                "model_type": model_type,
-                "strikes": x_values.tolist(),
-                "initial_volatility": initial_volatility.tolist(),
-                "dynamic_volatility": dynamic_volatility.tolist(),
-                "volatility_difference": volatility_difference.tolist(),
-                "initial_params": initial_params,
-                "dynamic_params": dynamic_params,
-                "parameter_ranges": self.parameter_ranges,
-                "calculation_successful": True
-            }
-            
-        except Exception as e:
-            return {
-                "status": "error",
-                "error": str(e),
-                "model_type": model_type,
-                "calculation_successful": False
-            }
+        
+        # Calculate differences
+        volatility_difference = dynamic_volatility - initial_volatility
+        
+        return {
+            "model_type": model_type,
+            "strikes": x_values.tolist(),
+            "initial_volatility": initial_volatility.tolist(),
+            "dynamic_volatility": dynamic_volatility.tolist(),
+            "volatility_difference": volatility_difference.tolist(),
+            "initial_params": initial_params,
+            "dynamic_params": dynamic_params,
+            "parameter_ranges": self.parameter_ranges,
+            "calculation_successful": True
+        }
     
     def get_model_info(self, model_type: str) -> Dict[str, Any]:
         """Get model information and default parameters"""
         if model_type not in self.default_params:
-            return {
-                "status": "error",
-                "error": f"Unknown model type: {model_type}",
-                "available_models": list(self.default_params.keys())
-            }
+            raise ValueError(f"Unknown model type: {model_type}. "
+                             f"Available models: {', '.join(self.default_params)}")
         
         return {
-            "status": "success",
             "model_type": model_type,
             "default_parameters": self.default_params[model_type],
             "parameter_ranges": self.parameter_ranges,
@@ -279,106 +269,45 @@ class ZabrVariablesImpactService:
         return descriptions.get(model_type, "Unknown model")
 
 
-def main():
-    """Main function to handle command line execution"""
-    # Check if this is called with the new API interface (operation + JSON)
-    if len(sys.argv) >= 2 and sys.argv[1] in ['calculate', 'get_model_info', 'health_check']:
-        operation = sys.argv[1]
-        service = ZabrVariablesImpactService()
-
-        if operation == 'health_check':
-            # Health check operation
-            health_result = {
-                'status': 'healthy',
-                'service': 'ZABR Variables Impact',
-                'available_models': list(service.default_params.keys()),
-                'python_version': sys.version,
-                'timestamp': datetime.now().isoformat()
-            }
-            print(json.dumps(health_result))
-            return
-
-        elif operation == 'get_model_info':
-            # Parse JSON parameters if provided
-            if len(sys.argv) >= 3:
-                try:
-                    params = json.loads(sys.argv[2])
-                    model_type = params.get('model_type', 'zabr_classic')
-                except json.JSONDecodeError:
-                    error_result = {
-                        'status': 'error',
-                        'error': 'Invalid JSON parameters'
-                    }
-                    print(json.dumps(error_result))
-                    return
-            else:
-                model_type = 'zabr_classic'
-
-            result = service.get_model_info(model_type)
-            print(json.dumps(result))
-            return
+MODEL_TYPES = ['zabr_classic', 'sabr_pde', 'zabr_mixture']
 
-        elif operation == 'calculate':
-            # Parse JSON parameters if provided
-            if len(sys.argv) >= 3:
-                try:
-                    params = json.loads(sys.argv[2])
-                    model_type = params.get('model_type', 'zabr_classic')
-                    parameters = params.get('parameters', {})
+impact = ZabrVariablesImpactService()
 
-                    # Get default parameters and merge with provided parameters
-                    initial_params = service.default_params[model_type]
-                    dynamic_params = {**initial_params, **parameters}
-
-                    result = service.calculate_volatility_impact(model_type, initial_params, dynamic_params)
-                except json.JSONDecodeError:
-                    error_result = {
-                        'status': 'error',
-                        'error': 'Invalid JSON parameters'
-                    }
-                    print(json.dumps(error_result))
-                    return
-                except KeyError as e:
-                    error_result = {
-                        'status': 'error',
-                        'error': f'Unknown model type: {e}'
-                    }
-                    print(json.dumps(error_result))
-                    return
-            else:
-                error_result = {
-                    'status': 'error',
-                    'error': 'Missing parameters for calculate operation'
-                }
-                print(json.dumps(error_result))
-                return
-
-            print(json.dumps(result))
-            return
-
-    # Legacy interface support
-    if len(sys.argv) < 2:
+def legacy_main(argv):
+    """Legacy interface: <model_type> [params_json]"""
+    if not argv:
         print("Usage: python ZabrVariablesImpact.py <model_type> [params_json]")
-        print("Available models: zabr_classic, sabr_pde, zabr_mixture")
-        return
-
-    service = ZabrVariablesImpactService()
-    model_type = sys.argv[1]
-
-    if len(sys.argv) > 2:
+        print(f"Available models: {', '.join(MODEL_TYPES)}")
+        return None
+    if len(argv) > 1:
         try:
-            dynamic_params = json.loads(sys.argv[2])
-            initial_params = service.default_params[model_type]
-            result = service.calculate_volatility_impact(model_type, initial_params, dynamic_params)
+            parameters = json.loads(argv[1])
         except json.JSONDecodeError as e:
-            result = {"status": "error", "error": f"Invalid JSON: {e}"}
-        except KeyError as e:
-            result = {"status": "error", "error": f"Unknown model type: {model_type}"}
-    else:
-        result = service.get_model_info(model_type)
+            raise ValueError(f"Invalid JSON: {e}")
+        return 'calculate', {'model_type': argv[0], 'parameters': parameters}
+    return 'get_model_info', {'model_type': argv[0]}
+
+service = Service('ZabrVariablesImpact', version='2.1.0', legacy=legacy_main,
+                  health=lambda: {'available_models': list(impact.default_params.keys())})
+
+@service.operation('calculate', schema={
+    'model_type': Param(str, 'zabr_classic', choices=MODEL_TYPES),
+    'parameters': Param(dict, {}),
+})
+def calculate(params):
+    """Volatility impact of the parameters against the model defaults"""
+    model_type = params['model_type']
+    initial_params = impact.default_params[model_type]
+    dynamic_params = {**initial_params, **params['parameters']}
+    return impact.calculate_volatility_impact(model_type, initial_params, dynamic_params)
 
-    print(json.dumps(result))
+@service.operation('get_model_info', schema={
+    'model_type': Param(str, 'zabr_classic', choices=MODEL_TYPES),
+})
+def get_model_info(params):
+    """Default parameters, ranges and description of a model"""
+    return impact.get_model_info(params['model_type'])
 
 
 if __name__ == "__main__":
-    main()
+    service.run()
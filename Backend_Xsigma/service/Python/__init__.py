@@ -19,6 +19,8 @@ PACKAGE_INFO = {
         "AnalyticalSigmaVolatility",
         "FXVolatilityService",
         "AnalyticalSigmaVolatilityCalibration",
-        "HartmanWatsonDistribution"
+        "HartmanWatsonDistribution",
+        "FXRatesHybrid",
+        "CurveCalibration"
     ]
 }
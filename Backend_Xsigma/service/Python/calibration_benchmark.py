@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+calibration_benchmark - Benchmark of the Extended SVI and SVI Smile Calibrations
+
+Runs ``volatilityModelExtendedSvi.calibrate`` over a grid of solvers, maximum
+iterations and tolerances, and ``sigmaVolatilityInspired.calibrate`` once per smile,
+on a corpus of synthetic smiles (skewed equity, symmetric FX, wing-heavy) at several
+strike counts plus recorded quote sets (the notebook smile and any quote files).
+
+Every case is repeated and reported with its timing distribution and fit RMSE
+against the mid quotes, under its iteration budget (the solver bindings do not
+report the iterations used), so calibration regressions and the cost of tight
+tolerances show up in the report.
+
+Usage:
+    python calibration_benchmark.py [--solvers ceres lm] [--tolerances 1e-6 1e-14] [--output report.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import numpy as np
+from typing import Dict, List, Any, Optional
+
+try:
+    from xsigmamodules.Util import sigmaVolatilityInspired
+    from xsigmamodules.util.numpy_support import numpyToXsigma
+    from AnalyticalSigmaVolatilityCalibration import (
+        RACE_SOLVERS,
+        calibrate_with_solver,
+        get_sample_data,
+        load_quotes_file,
+    )
+except ImportError as e:
+    print(f"Failed to import xsigmamodules: {e}", file=sys.stderr)
+    sys.exit(1)
+
+# Synthetic smile shapes: total smile as a function of log-moneyness x = log(K/F)
+SHAPES = {
+    # Downside skew with mild curvature
+    'equity_skew': lambda x: 0.22 - 0.25 * x + 0.15 * x ** 2,
+    # Symmetric smile around the forward
+    'fx_symmetric': lambda x: 0.10 + 0.30 * x ** 2,
+    # Flat centre with steep wings
+    'wing_heavy': lambda x: 0.18 + 0.05 * x ** 2 + 2.5 * x ** 4,
+}
+SYNTHETIC_FORWARD = 100.0
+SYNTHETIC_LOG_MONEYNESS = 0.5
+DEFAULT_STRIKE_COUNTS = (9, 21, 39, 81)
+DEFAULT_MAX_ITERATIONS = (50, 500)
+DEFAULT_TOLERANCES = (1e-6, 1e-10, 1e-14)
+DEFAULT_REPEATS = 5
+
+# Initial guess of the extended SVI model (the calibration service defaults)
+MODEL_DEFAULTS = {'expiry': 1.0, 'r': 0.003, 'q': 0.0022, 'beta': 0.4158, 'rho': 0.2256, 'volvol': 0.2256}
+NOTEBOOK_SPOT = 2245.0656
+
+def build_corpus(shapes: List[str], strike_counts: List[int],
+                 quotes_files: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Smiles to calibrate: synthetic shapes at each strike count, then recorded sets."""
+    corpus = []
+    for shape in shapes:
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown smile shape '{shape}'. Choose from {', '.join(SHAPES)}")
+        for count in strike_counts:
+            x = np.linspace(-SYNTHETIC_LOG_MONEYNESS, SYNTHETIC_LOG_MONEYNESS, count)
+            corpus.append({
+                'smile': f"{shape}_{count}",
+                'shape': shape,
+                'strikes': SYNTHETIC_FORWARD * np.exp(x),
+                'mid': SHAPES[shape](x),
+                'spot': SYNTHETIC_FORWARD,
+            })
+
+    strikes, _, _, mid_values = get_sample_data()
+    corpus.append({'smile': 'notebook', 'shape': 'recorded', 'strikes': strikes,
+                   'mid': mid_values, 'spot': NOTEBOOK_SPOT})
+    for name in quotes_files or []:
+        strikes, _, _, mid_values = load_quotes_file(name)
+        corpus.append({'smile': os.path.splitext(name)[0], 'shape': 'recorded', 'strikes': strikes,
+                       'mid': mid_values, 'spot': float(np.median(strikes))})
+    return corpus
+
+def timing_stats(samples: List[float]) -> Dict[str, float]:
+    values = np.array(samples) * 1000
+    return {
+        'min_ms': round(float(values.min()), 3),
+        'median_ms': round(float(np.median(values)), 3),
+        'p90_ms': round(float(np.percentile(values, 90)), 3),
+        'max_ms': round(float(values.max()), 3),
+        'mean_ms': round(float(values.mean()), 3),
+    }
+
+def run_case(smile: Dict[str, Any], solver: str, max_iterations: int, tolerance: float,
+             repeats: int) -> Dict[str, Any]:
+    """Repeated extended SVI calibration of one smile with one solver configuration."""
+    params = {**MODEL_DEFAULTS, 'spot': smile['spot']}
+    tolerances = (max_iterations, tolerance, tolerance, tolerance)
+    case = {'smile': smile['smile'], 'shape': smile['shape'], 'strikes': len(smile['strikes']),
+            'model': 'extended_svi', 'solver': solver, 'max_iterations': max_iterations,
+            'tolerance': tolerance}
+    samples = []
+    try:
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            _, report = calibrate_with_solver(solver, smile['strikes'], smile['mid'], params, tolerances)
+            samples.append(time.perf_counter() - start_time)
+        case.update({'rmse': report['residual'], 'timing': timing_stats(samples)})
+    except Exception as e:
+        case['error'] = str(e)
+    return case
+
+def run_svi_case(smile: Dict[str, Any], repeats: int) -> Dict[str, Any]:
+    """Repeated SVI calibration of one smile (the SVI calibrator has no solver options)."""
+    case = {'smile': smile['smile'], 'shape': smile['shape'], 'strikes': len(smile['strikes']),
+            'model': 'svi', 'solver': 'builtin', 'max_iterations': None, 'tolerance': None}
+    samples = []
+    try:
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            obj = sigmaVolatilityInspired(smile['spot'], 0.1, 0.01, 0.4)
+            obj.calibrate(numpyToXsigma(smile['mid']), numpyToXsigma(smile['strikes']))
+            samples.append(time.perf_counter() - start_time)
+        vols = np.zeros(len(smile['strikes']))
+        obj.svi(numpyToXsigma(vols), numpyToXsigma(smile['strikes']))
+        case.update({'rmse': float(np.sqrt(np.mean((vols - smile['mid']) ** 2))),
+                     'timing': timing_stats(samples)})
+    except Exception as e:
+        case['error'] = str(e)
+    return case
+
+def summarize(cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Median time and RMSE per model, solver and tolerance over all smiles."""
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for case in cases:
+        key = (case['model'], case['solver'], case['max_iterations'], case['tolerance'])
+        groups.setdefault(key, []).append(case)
+
+    summary = []
+    for (model, solver, max_iterations, tolerance), group in groups.items():
+        ok = [case for case in group if 'error' not in case]
+        summary.append({
+            'model': model,
+            'solver': solver,
+            'max_iterations': max_iterations,
+            'tolerance': tolerance,
+            'cases': len(group),
+            'failures': len(group) - len(ok),
+            'median_time_ms': round(float(np.median([c['timing']['median_ms'] for c in ok])), 3) if ok else None,
+            'median_rmse': float(np.median([c['rmse'] for c in ok])) if ok else None,
+            'max_rmse': float(max(c['rmse'] for c in ok)) if ok else None,
+        })
+    return summary
+
+def run_benchmark(solvers: List[str], max_iterations: List[int], tolerances: List[float],
+                  shapes: List[str], strike_counts: List[int], repeats: int,
+                  quotes_files: Optional[List[str]] = None) -> Dict[str, Any]:
+    corpus = build_corpus(shapes, strike_counts, quotes_files)
+    total = len(corpus) * (len(solvers) * len(max_iterations) * len(tolerances) + 1)
+    cases = []
+    start_time = time.time()
+    for smile in corpus:
+        for solver in solvers:
+            for iterations in max_iterations:
+                for tolerance in tolerances:
+                    cases.append(run_case(smile, solver, iterations, tolerance, repeats))
+                    print(f"PROGRESS: {len(cases)}/{total} {smile['smile']} {solver} "
+                          f"{iterations} {tolerance:g}", file=sys.stderr)
+        cases.append(run_svi_case(smile, repeats))
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'grid': {
+            'solvers': solvers,
+            'max_iterations': max_iterations,
+            'tolerances': tolerances,
+            'smiles': [smile['smile'] for smile in corpus],
+            'repeats': repeats,
+        },
+        'summary': summarize(cases),
+        'cases': cases,
+        'total_time_s': round(time.time() - start_time, 3),
+    }
+
+def main():
+    """Main function to handle command line execution"""
+    parser = argparse.ArgumentParser(description='Extended SVI / SVI calibration benchmark')
+    parser.add_argument('--solvers', nargs='+', default=list(RACE_SOLVERS),
+                       help='Solvers: ceres, lm, nlopt:<algo>')
+    parser.add_argument('--max-iterations', nargs='+', type=int, default=list(DEFAULT_MAX_ITERATIONS))
+    parser.add_argument('--tolerances', nargs='+', type=float, default=list(DEFAULT_TOLERANCES),
+                       help='Function, gradient and parameter tolerance')
+    parser.add_argument('--shapes', nargs='+', default=list(SHAPES), help='Synthetic smile shapes')
+    parser.add_argument('--strike-counts', nargs='+', type=int, default=list(DEFAULT_STRIKE_COUNTS))
+    parser.add_argument('--quotes-files', nargs='*', default=[],
+                       help='Recorded quote files in the market data directories')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help='Calibrations per case')
+    parser.add_argument('--output', help='Also write the report to this file')
+    args = parser.parse_args()
+
+    try:
+        report = run_benchmark(args.solvers, args.max_iterations, args.tolerances, args.shapes,
+                               args.strike_counts, args.repeats, args.quotes_files)
+        result = {
+            'status': 'success',
+            'data': report,
+            'timestamp': str(np.datetime64('now'))
+        }
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(result, f, indent=2)
+        print(json.dumps(result, indent=2))
+    except Exception as e:
+        print(json.dumps({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': str(np.datetime64('now'))
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+cost_model - Runtime and Memory Cost Model of the Python Services
+
+Fits, per service and operation, a linear model of the warm latency and of the
+peak RSS against the problem size of the cases of one or more service_benchmark
+reports:
+
+    seconds   = a + b * size
+    memory_mb = c + d * size
+
+The size is the one the benchmark varies: ``n`` for the analytical sigma services,
+``N`` for the SABR PDE (at the default 5 time steps), ``n`` scaled to 32 roots
+(``n * size_roots / 32``) for Hartman-Watson and
+``num_paths`` for TestHJM (at its default 120 simulation steps; the backend scales
+the size of a request by its steps). The Node backend (service/utils/costModel.js)
+loads the fitted file (XSIGMA_COST_MODEL, default ``cost_model.json`` next to this
+script) to estimate each request before running it and to size its timeout;
+operations without a fitted entry fall back to its placeholder coefficients, which
+size the timeout but never reject a request. No fitted file is shipped: the budgets
+only take effect once one is fitted on the target host.
+
+Usage:
+    python cost_model.py fit <report.json> [...] [--output cost_model.json]
+    python cost_model.py estimate <cost_model.json> <Service:operation> <size>
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from typing import Dict, List, Any, Optional
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(SERVICE_DIR, 'cost_model.json')
+
+def _fit_line(sizes: List[float], values: List[float]) -> List[float]:
+    """
+    Least-squares ``[intercept, slope]`` constrained to non-negative coefficients,
+    so that extrapolating to large sizes never predicts less than a small size.
+    """
+    x = np.asarray(sizes, dtype=float)
+    y = np.asarray(values, dtype=float)
+    if len(np.unique(x)) < 2:
+        return [float(y.mean()), 0.0]
+    slope, intercept = np.polyfit(x, y, 1)
+    if slope < 0:
+        slope, intercept = 0.0, y.mean()
+    elif intercept < 0:
+        # Through the origin
+        intercept, slope = 0.0, float(x @ y / (x @ x))
+    return [float(f"{intercept:.6g}"), float(f"{slope:.6g}")]
+
+def fit(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Cost model of the cases of benchmark reports, keyed ``Service:operation``."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for report in reports:
+        for case in report['cases']:
+            # Cases that never succeeded measured an error path
+            if case.get('failures', 0) >= case.get('runs', 1):
+                continue
+            groups.setdefault(f"{case['service']}:{case['label']}", []).append(case)
+
+    models = {}
+    for key, cases in sorted(groups.items()):
+        sizes = [case['size'] or 0 for case in cases]
+        models[key] = {
+            'seconds': _fit_line(sizes, [case['warm']['p50_ms'] / 1000 for case in cases]),
+            'memory_mb': _fit_line(sizes, [case['peak_rss_mb'] for case in cases]),
+            'sizes': [min(sizes), max(sizes)],
+            'samples': len(cases),
+        }
+    return {
+        'environment': reports[0].get('environment', {}) if reports else {},
+        'fitted_at': str(np.datetime64('now')),
+        'models': models,
+    }
+
+def estimate(model: Dict[str, Any], key: str, size: Optional[float]) -> Dict[str, Any]:
+    """Estimated seconds and peak RSS of one entry of a fitted model."""
+    entry = model['models'][key]
+    size = size or 0
+    seconds = entry['seconds'][0] + entry['seconds'][1] * size
+    memory_mb = entry['memory_mb'][0] + entry['memory_mb'][1] * size
+    return {
+        'model': key,
+        'size': size,
+        'seconds': round(seconds, 3),
+        'memory_mb': round(memory_mb, 1),
+        'extrapolated': not entry['sizes'][0] <= size <= entry['sizes'][1],
+    }
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        document = json.load(f)
+    # Reports saved with --save are wrapped in the service envelope
+    return document.get('data', document) if document.get('status') else document
+
+def main():
+    """Main function to handle command line execution"""
+    parser = argparse.ArgumentParser(description='Cost model of the Python services')
+    subparsers = parser.add_subparsers(dest='operation', required=True)
+    fit_parser = subparsers.add_parser('fit', help='Fit the model from service_benchmark reports')
+    fit_parser.add_argument('reports', nargs='+')
+    fit_parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    estimate_parser = subparsers.add_parser('estimate', help='Estimate one request')
+    estimate_parser.add_argument('model')
+    estimate_parser.add_argument('key', help='Service:operation, e.g. TestHJM:test_2')
+    estimate_parser.add_argument('size', type=float)
+    args = parser.parse_args()
+
+    try:
+        if args.operation == 'fit':
+            data = fit([_load(path) for path in args.reports])
+            with open(args.output, 'w') as f:
+                json.dump(data, f, indent=2)
+        else:
+            data = estimate(_load(args.model), args.key, args.size)
+        print(json.dumps({
+            'status': 'success',
+            'data': data,
+            'timestamp': str(np.datetime64('now'))
+        }, indent=2))
+    except Exception as e:
+        print(json.dumps({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': str(np.datetime64('now'))
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
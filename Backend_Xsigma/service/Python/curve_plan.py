@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+curve_plan - Curve Dependencies of the Curve Calibration Service
+
+The notebook curve set with its dependencies, the curves a quote change
+invalidates, and the quotes, levels and critical path of a multi-currency build.
+"""
+
+import copy
+from typing import Dict, List, Any, Tuple
+from service_framework import ConfigurationError
+
+# Curves calibrated by the notebook, in dependency order. ``depends_on`` lists the
+# curves whose calibrated values enter a curve's instruments (discounting or the
+# cross-currency leg), so those must be resident before it is calibrated.
+CURVES = {
+    'USD.SOFR.1b': {
+        'type': 'rates', 'ccy': 'USD', 'index': 'SOFR', 'tenor': '1b', 'base': 'USD',
+        'depends_on': [],
+    },
+    'EUR.ESTR.1b': {
+        'type': 'rates', 'ccy': 'EUR', 'index': 'ESTR', 'tenor': '1b', 'base': 'EUR',
+        'depends_on': [],
+    },
+    'USD.SOFR.3m': {
+        'type': 'rates', 'ccy': 'USD', 'index': 'SOFR', 'tenor': '3m', 'base': 'USD',
+        'depends_on': ['USD.SOFR.1b'],
+    },
+    'EUR.XCCY.USD.SOFR.1b': {
+        'type': 'xccy', 'ccy': 'EUR', 'index': 'USD.SOFR.1b', 'tenor': '1b', 'base': 'USD',
+        'depends_on': ['USD.SOFR.1b', 'EUR.ESTR.1b'],
+    },
+    'USD.US.CPI': {
+        'type': 'inflation', 'ccy': 'USD', 'index': 'US.CPI', 'base': 'USD',
+        'depends_on': ['USD.SOFR.1b'],
+    },
+}
+
+def dependents_of(names: List[str]) -> List[str]:
+    """``names`` plus every curve that depends on them, in calibration order."""
+    affected = set(names)
+    for name, spec in CURVES.items():
+        if any(dep in affected for dep in spec['depends_on']):
+            affected.add(name)
+    return [name for name in CURVES if name in affected]
+
+def apply_quote_changes(quotes: Dict[str, Dict[str, tuple]],
+                        changes: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, tuple]], List[str]]:
+    """
+    Apply quote changes to a copy of per-curve quotes.
+
+    Each change is {'curve', 'instrument', 'tenor', 'value'}; the tenor may be given
+    with or without the instrument prefix (e.g. 'IRSWAP_10y' or '10y'). ``quotes``
+    is left untouched, so a batch with an invalid change applies none of them.
+
+    Returns:
+        (updated quotes, names of the curves whose quotes actually changed)
+    """
+    updated = copy.deepcopy(quotes)
+    changed = []
+    for change in changes:
+        name = change.get('curve')
+        if name not in updated:
+            raise ConfigurationError(f"Unknown curve: {name}. Valid options: {', '.join(updated)}")
+        instrument = change.get('instrument')
+        if instrument not in updated[name]:
+            raise ConfigurationError(
+                f"Unknown instrument {instrument} for {name}. Valid options: {', '.join(updated[name])}"
+            )
+        tenors, values = updated[name][instrument]
+        tenor = str(change.get('tenor'))
+        matches = [i for i, t in enumerate(tenors) if t == tenor or t.split('_', 1)[-1] == tenor]
+        if not matches:
+            raise ConfigurationError(f"Unknown tenor {tenor} for {name} {instrument}")
+        try:
+            value = float(change['value'])
+        except (KeyError, TypeError, ValueError):
+            raise ConfigurationError(f"Invalid value for {name} {instrument} {tenor}: {change.get('value')!r}")
+        if values[matches[0]] != value:
+            values[matches[0]] = value
+            if name not in changed:
+                changed.append(name)
+    return updated, changed
+
+def market_quotes(nodes: Dict[str, Dict[str, Any]], supplied: Any,
+                  defaults: Dict[str, Dict[str, tuple]],
+                  synthetic: bool = False) -> Tuple[Dict[str, Dict[str, tuple]], Dict[str, str]]:
+    """
+    Quotes of every node of a multi-currency build, and where they come from.
+
+    ``supplied`` maps curve names to {instrument: {'tenors': [...], 'values': [...]}}
+    (the shape the ``curves`` operation reports). The notebook curves fall back to
+    the notebook quotes; any other curve without supplied quotes is rejected, unless
+    ``synthetic`` lends it the notebook quotes of its curve type.
+
+    Args:
+        nodes: Build nodes in the CURVES spec format
+        supplied: Per-curve quotes of the request (None for none)
+        defaults: Notebook quotes per curve type
+        synthetic: Whether curves without quotes may use the notebook quotes
+
+    Returns:
+        (quotes per node, source per node: 'request', 'notebook' or 'synthetic')
+    """
+    supplied = supplied or {}
+    if not isinstance(supplied, dict):
+        raise ConfigurationError("curve_quotes must map curve names to {instrument: {tenors, values}}")
+    unknown = [name for name in supplied if name not in nodes]
+    if unknown:
+        raise ConfigurationError(f"curve_quotes for curves outside the build: {', '.join(unknown)}")
+
+    quotes, sources, missing = {}, {}, []
+    for name, spec in nodes.items():
+        if name in supplied:
+            quotes[name] = _parse_curve_quotes(name, supplied[name], defaults[spec['type']])
+            sources[name] = 'request'
+        elif name in CURVES or synthetic:
+            quotes[name] = copy.deepcopy(defaults[spec['type']])
+            sources[name] = 'notebook' if name in CURVES else 'synthetic'
+        else:
+            missing.append(name)
+    if missing:
+        raise ConfigurationError(
+            f"No quotes for {', '.join(missing)}: pass them in curve_quotes, or set "
+            f"synthetic_quotes to calibrate them on the notebook quotes"
+        )
+    return quotes, sources
+
+def _parse_curve_quotes(name: str, instruments: Any, known: Dict[str, tuple]) -> Dict[str, tuple]:
+    """One curve's {instrument: {'tenors', 'values'}} as {instrument: (tenors, values)}."""
+    if not isinstance(instruments, dict) or not instruments:
+        raise ConfigurationError(f"curve_quotes of {name} must map instruments to {{tenors, values}}")
+    parsed = {}
+    for instrument, entry in instruments.items():
+        if instrument not in known:
+            raise ConfigurationError(
+                f"Unknown instrument {instrument} for {name}. Valid options: {', '.join(known)}"
+            )
+        try:
+            tenors = [str(tenor) for tenor in entry['tenors']]
+            values = [float(value) for value in entry['values']]
+        except (KeyError, TypeError, ValueError):
+            raise ConfigurationError(f"curve_quotes of {name} {instrument} need numeric tenors and values")
+        if not tenors or len(tenors) != len(values):
+            raise ConfigurationError(f"curve_quotes of {name} {instrument}: tenors and values differ in length")
+        parsed[instrument] = (tenors, values)
+    return parsed
+
+def plan_levels(nodes: Dict[str, Dict[str, Any]]) -> List[List[str]]:
+    """Group nodes into dependency levels (nodes in one level are independent)."""
+    levels, placed = [], set()
+    while len(placed) < len(nodes):
+        level = [name for name, spec in nodes.items()
+                 if name not in placed and all(dep in placed for dep in spec['depends_on'])]
+        if not level:
+            raise ConfigurationError(f"Curve dependencies are cyclic or missing: {sorted(set(nodes) - placed)}")
+        levels.append(level)
+        placed.update(level)
+    return levels
+
+def critical_path(nodes: Dict[str, Dict[str, Any]], timings: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Longest chain of calibration times through the DAG (the lower bound on wall-clock time)."""
+    longest: Dict[str, tuple] = {}
+    for name, spec in nodes.items():
+        duration = timings[name].get('calibration_time') or 0.0
+        deps = [longest[dep] for dep in spec['depends_on'] if dep in longest]
+        prior_time, prior_path = max(deps, default=(0.0, []))
+        longest[name] = (prior_time + duration, prior_path + [name])
+    total, path = max(longest.values(), default=(0.0, []))
+    return {'curves': path, 'time': total}
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+fx_hybrid_plan - Calibration Targets and Shard Plan of FXRatesHybrid
+
+FX variance targets of the calibration, the split of a run into path shards
+and the layout of the per-shard sums.
+"""
+
+import numpy as np
+from typing import List
+from service_framework import ConfigurationError
+
+# Per-date path sums returned by each shard; averages are formed after merging
+SHARD_SUMS = (
+    'mm_dom',              # domestic money market
+    'mm_dom_fx',           # domestic money market x FX forward
+    'mm_ratio_fx',         # domestic / foreign money market x FX forward
+    'mm_dom_df_for_fx',    # domestic money market x foreign bond to maturity x FX forward
+    'call',                # domestic money market x ATM call payoff
+    'put',                 # domestic money market x ATM put payoff
+)
+
+def market_variance_targets(expiry_fraction: np.ndarray, volatility) -> np.ndarray:
+    """
+    Total variance targets sigma^2 * T for every calibration date.
+
+    ``volatility`` is a flat volatility or one volatility per calibration date.
+    """
+    expiry_fraction = np.asarray(expiry_fraction, dtype=float)
+    volatility = np.asarray(volatility, dtype=float)
+    if volatility.ndim > 0 and volatility.shape != expiry_fraction.shape:
+        raise ConfigurationError(
+            f"volatility must be a number or a list of {expiry_fraction.size} values"
+        )
+    return volatility * volatility * expiry_fraction
+
+def plan_shards(num_paths: int, num_shards: int) -> List[int]:
+    """Split ``num_paths`` into ``num_shards`` nearly equal shard sizes."""
+    num_shards = max(1, min(num_shards, num_paths))
+    base, extra = divmod(num_paths, num_shards)
+    return [base + (1 if i < extra else 0) for i in range(num_shards)]
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+fx_volatility_models - FX Volatility Surface Engine
+Converted from FXVolatilty.ipynb
+
+Loads the notebook's FX volatility objects (quadratic smile, calibration targets and
+interpolation config) from their JSON snapshots once per process and serves the ATM
+curve, the smile models comparison and the market quotes from those resident objects.
+Models are built on first use and smiles are memoized per expiry, so a long-lived
+process (FXVolatilityService.py serve) only pays for construction once.
+
+calibrate_surface calibrates each tenor's smile on its own (the tenors are independent)
+across a process pool and assembles the pillar smiles into a surface.
+"""
+
+import math
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional
+from market_store import MarketStore
+from service_timing import timer
+
+# Add the notebook directory to Python path for xsigmamodules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../'))
+
+from xsigmamodules.Util import (
+    yearMonthDay,
+    dayCountConvention,
+    day_count_convention_enum,
+    events,
+    business_day_convention_enum,
+    calendar,
+    implied_volatility_enum,
+    currency_convention_enum,
+    delta_atm_convention_enum,
+    delta_convention_enum,
+    strangle_convention_enum,
+    businessDayConventionFromConvention,
+)
+from xsigmamodules.Math import interpolation_enum, solverOptionsCeres
+from xsigmamodules.Market import (
+    fxForward,
+    interpolation_wing_time_enum,
+    interpolatorMeanReverting,
+    discountCurveFlat,
+    fxVolatilityQuadraticSmile,
+    interpolatorMeanRevertingConfig,
+    fxVolatilityInterpolationConfig,
+    fxVolatilityCalibrationTargets,
+    wingExtrapolationConfig,
+    fxVolatilityExtendedSvi,
+)
+
+# JSON snapshots written by the notebook
+DATA_DIR = os.environ.get(
+    'XSIGMA_FX_VOLATILITY_DATA_DIR', os.path.join(os.path.dirname(__file__), '..', 'NoteBook')
+)
+SMILE_FILE = 'fxVolatilityQuadraticSmile.json'
+TARGETS_FILE = 'fxVolatilityCalibrationTargets.json'
+INTERPOLATION_CONFIG_FILE = 'fxVolatilityInterpolationConfig.json'
+
+# Notebook market set-up (valuation date, FX forward and curves)
+VALUATION_YEAR, VALUATION_MONTH, VALUATION_DAY = 2020, 1, 21
+FX_SPOT = 1.65
+DOMESTIC_RATE = 0.02
+FOREIGN_RATE = 0.01
+
+CALIBRATION_TENORS = ["1B", "1W", "2W", "3W", "1M", "2M", "3M", "4M", "5M", "6M", "9M",
+                      "1Y", "18M", "2Y", "3Y", "5Y", "7Y", "10Y"]
+
+# Smile models compared by models_comparison
+MODEL_NAMES = ('call_put', 'instrument', 'delta', 'svi')
+
+DEFAULT_ATM_MAX_TENOR = '10Y'
+DEFAULT_ATM_STEP = '1w'
+DEFAULT_COMPARISON_EXPIRY = '7m'
+DEFAULT_NUM_STRIKES = 128
+DEFAULT_STRIKE_RANGE = (0.75, 1.25)
+
+# Notebook Ceres options of the extended SVI calibration (iterations, tolerances)
+SVI_SOLVER_OPTIONS = (500, 1e-14, 1e-14, 1e-14)
+
+# Per-tenor calibration models
+CALIBRATION_MODELS = ('svi', 'quadratic')
+
+# Long-term interpolation schemes of the interpolation config that assemble_surface implements
+SURFACE_INTERPOLATIONS = ('LINEAR',)
+
+def expiry_tenor(expiry) -> str:
+    """Tenor string of an expiry given as a tenor ('7m') or in years (0.5 -> '6m')."""
+    if isinstance(expiry, str):
+        return expiry
+    years = float(expiry)
+    if years <= 0:
+        raise ValueError(f"expiry must be positive, got {expiry}")
+    months = int(round(years * 12))
+    if months >= 1:
+        return f"{months}m"
+    return f"{max(1, int(round(years * 52)))}w"
+
+class FXVolatilityModels:
+    """
+    Resident FX volatility surface objects of the notebook.
+
+    The snapshots are read on first use; the ATM interpolator and each smile model are
+    built once, and per-expiry smiles and ATM grids are memoized.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.data_dir = data_dir
+        self.store = MarketStore([data_dir])
+        self._market = None
+        self._models: Dict[str, Any] = {}
+        self._smiles: Dict[tuple, Any] = {}
+        self._atm_curves: Dict[tuple, Dict[str, Any]] = {}
+        self.load_time: Optional[float] = None
+
+    @timer.timed('market_load')
+    def _load(self) -> Dict[str, Any]:
+        """Read the snapshots and build the shared market objects (once)."""
+        if self._market is not None:
+            return self._market
+
+        start_time = time.time()
+        valuation_date = yearMonthDay(VALUATION_YEAR, VALUATION_MONTH, VALUATION_DAY).to_datetime()
+        holidays = calendar()
+        convention = dayCountConvention(day_count_convention_enum.ACT_365, holidays)
+        adjustment = businessDayConventionFromConvention(business_day_convention_enum.FOLLOWING, holidays)
+        fx_fwd = fxForward(
+            valuation_date,
+            FX_SPOT,
+            discountCurveFlat(valuation_date, DOMESTIC_RATE, convention),
+            discountCurveFlat(valuation_date, FOREIGN_RATE, convention),
+        )
+
+        # Quotes are read from the targets snapshot so market data and the ATM
+        # interpolation always agree with the resident targets object
+        targets_json = self.store.get_document(TARGETS_FILE)['root']
+        quotes = {
+            key: np.array([quote['volatility_'] for quote in targets_json[field]], dtype=float)
+            for key, field in (('atm', 'atm_vols_'), ('rr25', 'rr_1_vols_'), ('rr10', 'rr_2_vols_'),
+                               ('ms25', 'ms_1_vols_'), ('ms10', 'ms_2_vols_'))
+        }
+
+        short_term_config = interpolatorMeanRevertingConfig(
+            events(
+                [
+                    yearMonthDay(2030, 3, 13).to_datetime(),
+                    yearMonthDay(2030, 7, 13).to_datetime(),
+                    yearMonthDay(2030, 1, 13).to_datetime(),
+                ],
+                [1.0, 1.0, 1.0],
+            ),
+            0.15, 0.19, 0.2, 0.99, 0.88, 1.0,
+        )
+
+        dates = [adjustment.advance(valuation_date, t) for t in CALIBRATION_TENORS]
+        expiries = np.array([convention.fraction(valuation_date, d) for d in dates])
+        variances = quotes['atm'] ** 2 * expiries
+
+        self._market = {
+            'valuation_date': valuation_date,
+            'holidays': holidays,
+            'convention': convention,
+            'adjustment': adjustment,
+            'fx_fwd': fx_fwd,
+            'targets': self.store.get_object(fxVolatilityCalibrationTargets, TARGETS_FILE),
+            'interpolation_config': self.store.get_object(fxVolatilityInterpolationConfig,
+                                                          INTERPOLATION_CONFIG_FILE),
+            'extrapolation_config': wingExtrapolationConfig(0.10, 1.5, 2.5),
+            'short_term_config': short_term_config,
+            'quotes': quotes,
+            'dates': dates,
+            'expiries': expiries,
+            'atm_interpolator': interpolatorMeanReverting(
+                valuation_date, dates, variances.tolist(), short_term_config
+            ),
+        }
+        self.load_time = time.time() - start_time
+        return self._market
+
+    def _interpolation_config(self, interpolation, wing):
+        market = self._load()
+        return fxVolatilityInterpolationConfig(
+            market['extrapolation_config'], market['short_term_config'], "2Y", interpolation, wing,
+        )
+
+    def surface_interpolation(self) -> str:
+        """Long-term time interpolation scheme of the interpolation config snapshot."""
+        return self.store.get_document(INTERPOLATION_CONFIG_FILE)['root']['long_term_interpolation_']
+
+    @timer.timed('model')
+    def model(self, name: str):
+        """Smile surface ``name`` (one of MODEL_NAMES), built on first use."""
+        if name not in self._models:
+            market = self._load()
+            args = (market['valuation_date'], market['fx_fwd'], market['targets'])
+            if name == 'instrument':
+                # The notebook snapshot is the instrument-vol surface
+                self._models[name] = self.store.get_object(fxVolatilityQuadraticSmile, SMILE_FILE)
+            elif name == 'delta':
+                # The interpolation config snapshot is the fixed-strike (delta) config
+                self._models[name] = fxVolatilityQuadraticSmile(*args, market['interpolation_config'])
+            elif name == 'call_put':
+                self._models[name] = fxVolatilityQuadraticSmile(
+                    *args,
+                    self._interpolation_config(interpolation_enum.LINEAR,
+                                               interpolation_wing_time_enum.CALL_PUT_VARIANCE),
+                )
+            elif name == 'svi':
+                self._models[name] = fxVolatilityExtendedSvi(
+                    *args,
+                    self._interpolation_config(interpolation_enum.CUBIC_HERMITE,
+                                               interpolation_wing_time_enum.INSTRUMENT_VOL),
+                    solverOptionsCeres(*SVI_SOLVER_OPTIONS),
+                )
+            else:
+                raise ValueError(f"Unknown model: {name}. Valid options: {', '.join(MODEL_NAMES)}")
+        return self._models[name]
+
+    def _smile(self, name: str, tenor: str, expiry_date):
+        key = (name, tenor)
+        if key not in self._smiles:
+            self._smiles[key] = self.model(name).model(expiry_date)
+        return self._smiles[key]
+
+    @timer.timed('evaluate')
+    def get_atm_volatility_curve(self, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """ATM volatility interpolated on a weekly (or ``step``) grid up to ``max_tenor``."""
+        parameters = parameters or {}
+        key = (str(parameters.get('max_tenor', DEFAULT_ATM_MAX_TENOR)), str(parameters.get('step', DEFAULT_ATM_STEP)))
+        if key not in self._atm_curves:
+            market = self._load()
+            valuation_date, adjustment = market['valuation_date'], market['adjustment']
+            max_tenor, step = key
+
+            last_date = adjustment.advance(valuation_date, max_tenor)
+            dates = []
+            current_date = adjustment.advance(valuation_date, step)
+            while current_date <= last_date:
+                dates.append(current_date)
+                current_date = adjustment.advance(current_date, step)
+
+            convention, interpolator = market['convention'], market['atm_interpolator']
+            expiries = np.fromiter((convention.fraction(valuation_date, d) for d in dates), float, len(dates))
+            variances = np.fromiter((interpolator.interpolate(d) for d in dates), float, len(dates))
+
+            self._atm_curves[key] = {
+                'expiries': expiries.tolist(),
+                'interpolated_vols': np.sqrt(variances / expiries).tolist(),
+                'market_expiries': market['expiries'].tolist(),
+                'market_vols': market['quotes']['atm'].tolist(),
+                'max_tenor': max_tenor,
+                'step': step,
+                'success': True,
+            }
+        return self._atm_curves[key]
+
+    @timer.timed('evaluate')
+    def get_volatility_models_comparison(self, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Implied volatilities of the smile models across a strike-ratio grid at one expiry."""
+        parameters = parameters or {}
+        market = self._load()
+        tenor = expiry_tenor(parameters.get('expiry', DEFAULT_COMPARISON_EXPIRY))
+        models = parameters.get('models') or list(MODEL_NAMES)
+        num_strikes = int(parameters.get('num_strikes', DEFAULT_NUM_STRIKES))
+        strike_min = float(parameters.get('strike_min', DEFAULT_STRIKE_RANGE[0]))
+        strike_max = float(parameters.get('strike_max', DEFAULT_STRIKE_RANGE[1]))
+        if num_strikes < 2 or not 0 < strike_min < strike_max:
+            raise ValueError("need num_strikes >= 2 and 0 < strike_min < strike_max")
+
+        expiry_date = market['adjustment'].advance(market['valuation_date'], tenor)
+        T = market['convention'].fraction(market['valuation_date'], expiry_date)
+        forward = market['fx_fwd'].forward(expiry_date)
+        strike_ratio = np.linspace(strike_min, strike_max, num_strikes)
+        strikes = strike_ratio * forward
+        lognormal = implied_volatility_enum.LOG_NORMAL
+
+        result = {'strike_ratio': strike_ratio.tolist()}
+        for name in models:
+            smile = self._smile(name, tenor, expiry_date)
+            # The call/put variance smile is quoted on strike ratios (unit forward)
+            spot, grid = (1.0, strike_ratio) if name == 'call_put' else (forward, strikes)
+            implied_volatility = smile.implied_volatility
+            result[f'vol_{name}'] = np.fromiter(
+                (implied_volatility(spot, k, T, lognormal) for k in grid), float, num_strikes
+            ).tolist()
+
+        result.update({
+            'expiry_tenor': tenor,
+            'expiry_time': T,
+            'forward_rate': forward,
+            'success': True,
+        })
+        return result
+
+    def get_market_data(self) -> Dict[str, Any]:
+        """Calibration quotes of the resident targets."""
+        market = self._load()
+        quotes = market['quotes']
+        return {
+            'calibration_tenors': CALIBRATION_TENORS,
+            'calibration_expiries': market['expiries'].tolist(),
+            'vols_atm_mkt': quotes['atm'].tolist(),
+            'vols_rr25_mkt': quotes['rr25'].tolist(),
+            'vols_rr10_mkt': quotes['rr10'].tolist(),
+            'vols_ms25_mkt': quotes['ms25'].tolist(),
+            'vols_ms10_mkt': quotes['ms10'].tolist(),
+            'spot': FX_SPOT,
+        }
+
+    def tenor_targets(self, index: int):
+        """Calibration targets holding only the quotes of tenor ``index``."""
+        market = self._load()
+        quotes = market['quotes']
+        return fxVolatilityCalibrationTargets(
+            market['valuation_date'],
+            [CALIBRATION_TENORS[index]],
+            market['holidays'],
+            business_day_convention_enum.FOLLOWING,
+            [float(quotes['atm'][index])],
+            [float(quotes['rr25'][index])],
+            [float(quotes['rr10'][index])],
+            [float(quotes['ms25'][index])],
+            [float(quotes['ms10'][index])],
+            currency_convention_enum.DOMESTIC,
+            currency_convention_enum.DOMESTIC,
+            delta_atm_convention_enum.ZERO_DELTA_STRADDLE,
+            delta_convention_enum.FORWARD,
+            strangle_convention_enum.THEORETICAL,
+        )
+
+    @timer.timed('calibrate')
+    def calibrate_tenor(self, index: int, model: str, strike_ratio: np.ndarray) -> Dict[str, Any]:
+        """
+        Calibrate the smile of one tenor from its own quotes and sample it on ``strike_ratio``.
+
+        The fit is checked by repricing the zero-delta straddle ATM quote.
+        """
+        market = self._load()
+        start_time = time.time()
+        args = (market['valuation_date'], market['fx_fwd'], self.tenor_targets(index))
+        if model == 'svi':
+            surface = fxVolatilityExtendedSvi(
+                *args,
+                self._interpolation_config(interpolation_enum.CUBIC_HERMITE,
+                                           interpolation_wing_time_enum.INSTRUMENT_VOL),
+                solverOptionsCeres(*SVI_SOLVER_OPTIONS),
+            )
+        elif model == 'quadratic':
+            surface = fxVolatilityQuadraticSmile(*args, market['interpolation_config'])
+        else:
+            raise ValueError(f"Unknown calibration model: {model}. Valid options: {', '.join(CALIBRATION_MODELS)}")
+
+        expiry_date = market['dates'][index]
+        smile = surface.model(expiry_date)
+        calibration_time = time.time() - start_time
+
+        T = float(market['expiries'][index])
+        forward = market['fx_fwd'].forward(expiry_date)
+        lognormal = implied_volatility_enum.LOG_NORMAL
+        implied_volatility = smile.implied_volatility
+        vols = np.fromiter((implied_volatility(forward, k * forward, T, lognormal) for k in strike_ratio),
+                           float, len(strike_ratio))
+
+        atm_quote = float(market['quotes']['atm'][index])
+        atm_strike = forward * math.exp(0.5 * atm_quote * atm_quote * T)
+        atm_model = implied_volatility(forward, atm_strike, T, lognormal)
+        return {
+            'tenor': CALIBRATION_TENORS[index],
+            'expiry': T,
+            'forward': forward,
+            'implied_vols': vols.tolist(),
+            'atm_quote': atm_quote,
+            'atm_model': atm_model,
+            'atm_error_bps': (atm_model - atm_quote) * 10000.0,
+            'calibration_time': calibration_time,
+            'total_time': time.time() - start_time,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'data_dir': os.path.abspath(self.data_dir),
+            'loaded': self._market is not None,
+            'load_time': self.load_time,
+            'models_built': list(self._models),
+            'cached_smiles': len(self._smiles),
+            'cached_atm_curves': len(self._atm_curves),
+        }
+
+# Process-wide instance used by FXVolatilityService.py
+fx_volatility_models = FXVolatilityModels()
+
+def _calibrate_tenor_chunk(indices: List[int], model: str, strike_ratio: List[float]) -> List[Dict[str, Any]]:
+    """
+    Process-pool task: calibrate a run of neighbouring tenors in order.
+
+    The worker's resident market objects (loaded by the first tenor) are reused by
+    the following ones.
+    """
+    grid = np.asarray(strike_ratio)
+    results = []
+    for index in indices:
+        result = fx_volatility_models.calibrate_tenor(index, model, grid)
+        result['worker_pid'] = os.getpid()
+        results.append(result)
+        print(f"PROGRESS: Calibrated {result['tenor']} smile in {result['calibration_time']:.3f}s",
+              file=sys.stderr)
+    return results
+
+@timer.timed('evaluate')
+def assemble_surface(expiries: np.ndarray, pillar_vols: np.ndarray, query_expiries: List[float],
+                     interpolation: str = 'LINEAR') -> List[List[float]]:
+    """
+    Smiles at ``query_expiries`` from the calibrated pillars.
+
+    Total implied variance is interpolated in time at each strike ratio with the
+    interpolation config's long-term scheme (LINEAR only), with flat volatility
+    outside the pillar range.
+    """
+    if interpolation not in SURFACE_INTERPOLATIONS:
+        raise ValueError(f"Unsupported surface interpolation: {interpolation}. "
+                         f"Valid options: {', '.join(SURFACE_INTERPOLATIONS)}")
+    total_variance = pillar_vols ** 2 * expiries[:, None]
+    smiles = []
+    for t in query_expiries:
+        if t <= expiries[0]:
+            smiles.append(pillar_vols[0].tolist())
+        elif t >= expiries[-1]:
+            smiles.append(pillar_vols[-1].tolist())
+        else:
+            upper = int(np.searchsorted(expiries, t))
+            weight = (t - expiries[upper - 1]) / (expiries[upper] - expiries[upper - 1])
+            variance = (1.0 - weight) * total_variance[upper - 1] + weight * total_variance[upper]
+            smiles.append(np.sqrt(variance / t).tolist())
+    return smiles
+
+def calibrate_surface(parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Calibrate every tenor's smile in parallel and assemble the surface.
+
+    Args:
+        parameters: model ('svi' or 'quadratic'), workers, num_strikes,
+            strike_min/strike_max and query_expiries (years) for the assembled surface
+    """
+    parameters = parameters or {}
+    model = parameters.get('model', 'svi')
+    if model not in CALIBRATION_MODELS:
+        raise ValueError(f"Unknown calibration model: {model}. Valid options: {', '.join(CALIBRATION_MODELS)}")
+    num_strikes = int(parameters.get('num_strikes', DEFAULT_NUM_STRIKES))
+    strike_min = float(parameters.get('strike_min', DEFAULT_STRIKE_RANGE[0]))
+    strike_max = float(parameters.get('strike_max', DEFAULT_STRIKE_RANGE[1]))
+    if num_strikes < 2 or not 0 < strike_min < strike_max:
+        raise ValueError("need num_strikes >= 2 and 0 < strike_min < strike_max")
+    strike_ratio = np.linspace(strike_min, strike_max, num_strikes)
+    # Checked before calibrating: the surface is assembled with the config's scheme
+    interpolation = fx_volatility_models.surface_interpolation()
+    if interpolation not in SURFACE_INTERPOLATIONS:
+        raise ValueError(f"{INTERPOLATION_CONFIG_FILE} interpolates with {interpolation}; "
+                         f"the assembled surface supports {', '.join(SURFACE_INTERPOLATIONS)}")
+
+    num_tenors = len(CALIBRATION_TENORS)
+    workers = max(1, min(int(parameters.get('workers') or os.cpu_count() or 1), num_tenors))
+    # Contiguous chunks keep neighbouring tenors on the same warm worker
+    chunks = [chunk.tolist() for chunk in np.array_split(np.arange(num_tenors), workers) if len(chunk)]
+
+    start_time = time.time()
+    if workers == 1:
+        pillars = _calibrate_tenor_chunk(chunks[0], model, strike_ratio.tolist())
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(_calibrate_tenor_chunk, chunk, model, strike_ratio.tolist()) for chunk in chunks]
+            pillars = [result for future in futures for result in future.result()]
+    wall_clock_time = time.time() - start_time
+
+    expiries = np.array([pillar['expiry'] for pillar in pillars])
+    pillar_vols = np.array([pillar['implied_vols'] for pillar in pillars])
+    query_expiries = [float(t) for t in parameters.get('query_expiries', [])]
+    serial_time = sum(pillar['total_time'] for pillar in pillars)
+
+    return {
+        'model': model,
+        'workers': workers,
+        'strike_ratio': strike_ratio.tolist(),
+        'tenors': [
+            {key: value for key, value in pillar.items() if key != 'implied_vols'}
+            for pillar in pillars
+        ],
+        'surface': {
+            'tenors': CALIBRATION_TENORS,
+            'expiries': expiries.tolist(),
+            'implied_vols': pillar_vols.tolist(),
+            'query_expiries': query_expiries,
+            'interpolation': interpolation,
+            'query_vols': assemble_surface(expiries, pillar_vols, query_expiries, interpolation),
+        },
+        'max_atm_error_bps': float(np.max(np.abs([pillar['atm_error_bps'] for pillar in pillars]))),
+        'wall_clock_time': wall_clock_time,
+        'serial_time': serial_time,
+        'parallel_speedup': serial_time / wall_clock_time if wall_clock_time > 0 else None,
+        # The configured budget: the engine does not report the iterations used
+        'solver': {
+            'max_iterations': SVI_SOLVER_OPTIONS[0] if model == 'svi' else None,
+            'tolerances': list(SVI_SOLVER_OPTIONS[1:]) if model == 'svi' else None,
+        },
+        'success': True,
+    }
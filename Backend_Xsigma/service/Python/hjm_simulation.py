@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+hjm_simulation - Simulation Grid and Monte Carlo Statistics of TestHJM
+
+Plain Python/numpy side of the HJM service: the simulation date grid, the
+dataset selection of the volatility results, the batch-means statistics of
+progressive Monte Carlo runs and the fingerprint that ties a checkpoint to the
+runs it can resume.
+"""
+
+import json
+import math
+import hashlib
+import numpy as np
+from typing import Dict, List, Any
+from service_framework import ConfigurationError
+
+# Sobol seed used by the notebook; progressive runs offset it per batch
+DEFAULT_RANDOM_SEED = 12765793
+
+# Simulation grid: the notebook simulates 30 years on quarterly steps
+SIMULATION_FREQUENCIES = {'1M': 12, '3M': 4, '6M': 2, '1Y': 1}
+DEFAULT_SIMULATION_FREQUENCY = '3M'
+DEFAULT_SIMULATION_HORIZON = 30.0  # years
+
+# Path cap and batch size of progressive runs
+DEFAULT_NUM_PATHS = 524288
+DEFAULT_BATCH_PATHS = 65536
+
+def simulation_grid(params: Dict[str, Any], expiry_fraction: List[float]) -> Dict[str, Any]:
+    """
+    Resolve the simulation date grid and the swaption expiries to price.
+
+    ``max_expiry`` (years) limits the expiries that are priced. ``simulation_horizon``
+    is a number of years or 'auto', which simulates only up to the last priced
+    expiry; swaptions on the Markovian HJM state need no dates past their expiry.
+    Without either, the notebook's 30-year grid is used.
+    """
+    frequency = str(params.get('simulation_frequency') or DEFAULT_SIMULATION_FREQUENCY).upper()
+    if frequency not in SIMULATION_FREQUENCIES:
+        raise ConfigurationError(
+            f"Invalid simulation_frequency: {frequency}. Valid options: {', '.join(SIMULATION_FREQUENCIES)}"
+        )
+
+    num_expiries = len(expiry_fraction)
+    max_expiry = params.get('max_expiry')
+    if max_expiry is not None:
+        max_expiry = float(max_expiry)
+        num_expiries = sum(1 for t in expiry_fraction if t <= max_expiry + 1e-9)
+        if num_expiries == 0:
+            raise ConfigurationError(
+                f"max_expiry {max_expiry} is before the first expiry ({expiry_fraction[0]:.4f} years)"
+            )
+
+    horizon = params.get('simulation_horizon')
+    if horizon is None and max_expiry is not None:
+        horizon = 'auto'
+    if horizon == 'auto':
+        horizon = max(expiry_fraction[:num_expiries])
+    elif horizon is None:
+        horizon = DEFAULT_SIMULATION_HORIZON
+    horizon = float(horizon)
+    if horizon <= 0:
+        raise ConfigurationError("simulation_horizon must be positive")
+
+    last_expiry = max(expiry_fraction[:num_expiries])
+    if horizon < last_expiry - 1e-9:
+        raise ConfigurationError(
+            f"simulation_horizon {horizon} years is shorter than the last priced expiry "
+            f"({last_expiry:.4f} years); lower max_expiry or use simulation_horizon='auto'"
+        )
+
+    # Round up to whole steps so the last expiry is covered
+    steps = max(1, math.ceil(horizon * SIMULATION_FREQUENCIES[frequency] - 1e-9))
+    return {
+        'frequency': frequency,
+        'steps': steps,
+        'horizon_years': steps / SIMULATION_FREQUENCIES[frequency],
+        'num_expiries': num_expiries,
+    }
+
+# The frontend always plots data1..data4; missing datasets are sent as zeros
+DEFAULT_DATASETS = 4
+
+def parse_dataset_selection(selection, num_datasets: int) -> List[int]:
+    """
+    Resolve a ``datasets`` request parameter to 0-based dataset indices.
+
+    Accepts None (data1..data4, zero-padded), 'all', a string such as '1,3,5-7'
+    or a list of 1-based dataset numbers. Only the default selection may go past
+    the available datasets.
+    """
+    if selection is None or selection == 'default':
+        return list(range(DEFAULT_DATASETS))
+    if selection == 'all':
+        return list(range(num_datasets))
+
+    numbers = []
+    items = selection.split(',') if isinstance(selection, str) else selection
+    try:
+        for item in items:
+            item = str(item).strip()
+            if '-' in item:
+                first, last = item.split('-', 1)
+                numbers.extend(range(int(first), int(last) + 1))
+            elif item:
+                numbers.append(int(item))
+    except ValueError:
+        raise ConfigurationError(f"Invalid datasets selection: {selection}")
+
+    invalid = [n for n in numbers if n < 1 or n > num_datasets]
+    if invalid or not numbers:
+        raise ConfigurationError(
+            f"datasets must be between 1 and {num_datasets}, got: {selection}"
+        )
+    return [n - 1 for n in dict.fromkeys(numbers)]
+
+class BatchMeansAccumulator:
+    """
+    Running batch-means statistics for Monte Carlo estimates.
+
+    Each batch is an independent replica of the estimator. Batches are weighted by
+    their path count so a smaller final batch does not bias the mean; the standard
+    error is the usual ratio-estimator formula over batch means.
+    """
+
+    def __init__(self):
+        self.num_batches = 0
+        self.num_paths = 0
+        self.sum_w = 0.0
+        self.sum_w2 = 0.0
+        self.sum_wx = None
+        self.sum_w2x = None
+        self.sum_w2x2 = None
+
+    def add(self, estimate: np.ndarray, paths: int) -> None:
+        """Add the estimate of one batch of ``paths`` paths."""
+        w = float(paths)
+        if self.sum_wx is None:
+            self.sum_wx = np.zeros_like(estimate, dtype=float)
+            self.sum_w2x = np.zeros_like(estimate, dtype=float)
+            self.sum_w2x2 = np.zeros_like(estimate, dtype=float)
+        self.num_batches += 1
+        self.num_paths += paths
+        self.sum_w += w
+        self.sum_w2 += w * w
+        self.sum_wx += w * estimate
+        self.sum_w2x += w * w * estimate
+        self.sum_w2x2 += w * w * estimate * estimate
+
+    def mean(self) -> np.ndarray:
+        return self.sum_wx / self.sum_w
+
+    def standard_error(self) -> np.ndarray:
+        """Standard error of the mean; infinite until two batches are available."""
+        if self.num_batches < 2:
+            return np.full_like(self.sum_wx, np.inf)
+        m = self.mean()
+        ss = self.sum_w2x2 - 2.0 * m * self.sum_w2x + m * m * self.sum_w2
+        n = self.num_batches
+        variance = np.maximum(ss, 0.0) / (self.sum_w * self.sum_w) * n / (n - 1)
+        return np.sqrt(variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable snapshot of the accumulated statistics."""
+        arrays = {}
+        if self.sum_wx is not None:
+            arrays = {
+                'sum_wx': self.sum_wx.tolist(),
+                'sum_w2x': self.sum_w2x.tolist(),
+                'sum_w2x2': self.sum_w2x2.tolist(),
+            }
+        return {
+            'num_batches': self.num_batches,
+            'num_paths': self.num_paths,
+            'sum_w': self.sum_w,
+            'sum_w2': self.sum_w2,
+            **arrays,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'BatchMeansAccumulator':
+        """Rebuild an accumulator from :meth:`to_dict` output."""
+        accumulator = cls()
+        accumulator.num_batches = int(state['num_batches'])
+        accumulator.num_paths = int(state['num_paths'])
+        accumulator.sum_w = float(state['sum_w'])
+        accumulator.sum_w2 = float(state['sum_w2'])
+        if 'sum_wx' in state:
+            accumulator.sum_wx = np.asarray(state['sum_wx'], dtype=float)
+            accumulator.sum_w2x = np.asarray(state['sum_w2x'], dtype=float)
+            accumulator.sum_w2x2 = np.asarray(state['sum_w2x2'], dtype=float)
+        return accumulator
+
+def checkpoint_fingerprint(params: Dict[str, Any], grid: Dict[str, Any]) -> str:
+    """
+    Hash of the parameters a checkpoint's statistics depend on.
+
+    The path cap, time budget and tolerance may change between attempts; the batch
+    size, seed and simulation grid may not, otherwise resumed batches would not be
+    i.i.d. replicas of the same estimate. The batch size is clamped to the path cap
+    and the grid is the one ``simulation_grid`` resolved for the run (frequency,
+    steps and priced expiries), so requests that simulate the same grid resume the
+    same checkpoint however they spelled it.
+    """
+    num_paths = int(params.get('num_paths', DEFAULT_NUM_PATHS))
+    relevant = {
+        'batch_paths': min(int(params.get('batch_paths', DEFAULT_BATCH_PATHS)), num_paths),
+        'seed': int(params.get('seed', DEFAULT_RANDOM_SEED)),
+        # Statistics are stored as (expiry, tenor) arrays
+        'layout': 'expiry_tenor',
+        'grid': {key: grid[key] for key in ('frequency', 'steps', 'num_expiries')},
+    }
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode()).hexdigest()
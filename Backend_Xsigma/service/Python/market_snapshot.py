@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+market_snapshot - Binary Snapshots of xsigma Market Data Files
+
+xsigma market files (volatilityMarketData.json, the FX volatility snapshots, the HJM
+Data/*.json inputs) are verbose, indented JSON. This module converts them into a
+compact binary snapshot keyed by the SHA-256 of the source file:
+
+    MAGIC | source sha256 | payload sha256 | marshal version | payload
+
+where the payload is the marshal-encoded document. marshal decodes the nested dicts
+and float lists in C without tokenizing text, which is several times faster than
+json.loads on these files (an array-backed layout with a numpy block was measured
+slower, since rebuilding the lists happens in Python). A snapshot is only used when
+the source hash, the payload hash and the interpreter's marshal version match;
+anything else falls back to the JSON path.
+
+Snapshots serve parsed documents only (``load_market_dict`` and the shared segments
+of market_store). xsigma objects can only be deserialized by
+``Class.read_from_json(path)``, which parses the JSON itself, so the engine offers no
+faster load path and the services load engine objects from the original files.
+
+Snapshots live in a private directory of the user (XSIGMA_SNAPSHOT_DIR, default
+``$XDG_CACHE_HOME/xsigma/market_snapshots``), created 0700; a directory owned by
+another user or writable by others is not used.
+
+Usage:
+    python market_snapshot.py build <file.json> [...]
+    python market_snapshot.py info <file.json> [...]
+    python market_snapshot.py benchmark <file.json> [...]
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import struct
+import sys
+import time
+import argparse
+import numpy as np
+from typing import Dict, Any, Optional
+
+from service_metrics import metrics
+
+SNAPSHOT_DIR = os.environ.get('XSIGMA_SNAPSHOT_DIR') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'xsigma', 'market_snapshots'
+)
+
+MAGIC = b'XSNAP4\0\0'
+_HEADER = struct.Struct('<8s32s32sI')
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, stale or malformed"""
+    pass
+
+def source_digest(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+def private_dir(path: str) -> str:
+    """
+    Create ``path`` (0700) if missing; raises SnapshotError unless it is owned by
+    this user and not writable by anyone else, since its files are loaded unparsed.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.stat(path)
+    if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o022):
+        raise SnapshotError(f"Snapshot directory {path} is not private to this user")
+    return path
+
+def snapshot_path(json_path: str, digest: bytes) -> str:
+    """Snapshot path of a source file with content ``digest``."""
+    name = f"{os.path.basename(json_path)}.{digest.hex()[:16]}.xsnap"
+    return os.path.join(private_dir(SNAPSHOT_DIR), name)
+
+def _write_atomic(path: str, payload: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+def encode(document: Any, digest: bytes) -> bytes:
+    """Binary snapshot of a parsed JSON document."""
+    body = marshal.dumps(document)
+    return _HEADER.pack(MAGIC, digest, hashlib.sha256(body).digest(), marshal.version) + body
+
+def read_header(payload: bytes, digest: Optional[bytes] = None) -> bytes:
+    """
+    Payload hash of a snapshot header.
+
+    Args:
+        payload: Snapshot bytes (at least the header)
+        digest: Expected source hash; a mismatch raises SnapshotError
+    """
+    if len(payload) < _HEADER.size:
+        raise SnapshotError("Truncated snapshot")
+    magic, source_hash, body_hash, version = _HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise SnapshotError("Not an xsigma market snapshot")
+    if version != marshal.version:
+        raise SnapshotError(f"Snapshot written with marshal version {version}")
+    if digest is not None and source_hash != digest:
+        raise SnapshotError("Snapshot does not match the source file")
+    return body_hash
+
+def decode(payload: bytes, digest: Optional[bytes] = None) -> Any:
+    """
+    Parsed document of a snapshot.
+
+    Args:
+        payload: Snapshot bytes
+        digest: Expected source hash; a mismatch raises SnapshotError
+    """
+    body_hash = read_header(payload, digest)
+    body = payload[_HEADER.size:]
+    # marshal must never see bytes other than the ones encode() wrote
+    if hashlib.sha256(body).digest() != body_hash:
+        raise SnapshotError("Snapshot payload is corrupt")
+    return marshal.loads(body)
+
+def build_snapshot(json_path: str) -> Dict[str, Any]:
+    """Convert one JSON market file; returns the snapshot description."""
+    with open(json_path, 'rb') as f:
+        data = f.read()
+    digest = source_digest(data)
+    document = json.loads(data)
+    path = snapshot_path(json_path, digest)
+    payload = encode(document, digest)
+    _write_atomic(path, payload)
+    return {
+        'source': os.path.abspath(json_path),
+        'sha256': digest.hex(),
+        'snapshot': path,
+        'source_bytes': len(data),
+        'snapshot_bytes': len(payload),
+    }
+
+def load_market_dict(json_path: str, auto_build: bool = True) -> Any:
+    """
+    Parsed JSON market file, served from its snapshot when one matches.
+
+    On a miss the file is parsed as JSON and, with ``auto_build``, its snapshot is
+    written for the next load.
+    """
+    with open(json_path, 'rb') as f:
+        data = f.read()
+    digest = source_digest(data)
+    try:
+        with open(snapshot_path(json_path, digest), 'rb') as f:
+            document = decode(f.read(), digest)
+        metrics.record_cache('market_snapshot', True)
+        return document
+    except (OSError, SnapshotError, ValueError, EOFError):
+        metrics.record_cache('market_snapshot', False)
+
+    document = json.loads(data)
+    if auto_build:
+        try:
+            _write_atomic(snapshot_path(json_path, digest), encode(document, digest))
+        except (OSError, SnapshotError) as e:
+            print(f"PROGRESS: Could not write snapshot of {json_path}: {e}", file=sys.stderr)
+    return document
+
+def snapshot_info(json_path: str) -> Dict[str, Any]:
+    with open(json_path, 'rb') as f:
+        digest = source_digest(f.read())
+    path = snapshot_path(json_path, digest)
+    return {
+        'source': os.path.abspath(json_path),
+        'sha256': digest.hex(),
+        'snapshot': path if os.path.exists(path) else None,
+    }
+
+def benchmark(json_path: str, repeats: int = 20) -> Dict[str, Any]:
+    """Cold-parse timings of the JSON file against its snapshot."""
+    build_snapshot(json_path)
+    timings = {}
+    for name, loader in (
+        ('json', lambda: json.load(open(json_path))),
+        ('snapshot', lambda: load_market_dict(json_path, auto_build=False)),
+    ):
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            loader()
+        timings[name] = (time.perf_counter() - start_time) / repeats
+    return {
+        'source': os.path.abspath(json_path),
+        'timings': timings,
+        'speedup': timings['json'] / timings['snapshot'],
+    }
+
+def main():
+    """Main function to handle command line execution"""
+    parser = argparse.ArgumentParser(description='Binary snapshots of xsigma market data files')
+    parser.add_argument('operation', choices=['build', 'info', 'benchmark'])
+    parser.add_argument('files', nargs='+', help='JSON market data files')
+    parser.add_argument('--repeats', type=int, default=20,
+                       help='Loads per loader for benchmark')
+    args = parser.parse_args()
+
+    try:
+        if args.operation == 'build':
+            result = [build_snapshot(path) for path in args.files]
+        elif args.operation == 'info':
+            result = [snapshot_info(path) for path in args.files]
+        else:
+            result = [benchmark(path, args.repeats) for path in args.files]
+        print(json.dumps({
+            'status': 'success',
+            'data': result,
+            'timestamp': str(np.datetime64('now'))
+        }, indent=2))
+    except Exception as e:
+        print(json.dumps({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': str(np.datetime64('now'))
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+market_store - Content-Addressed Market Data Store
+
+Resolves market data file names (including the legacy snake_case aliases of the
+notebook snapshots) to one canonical file, identifies its content by SHA-256 and
+keeps each distinct blob parsed once:
+
+- documents (parsed JSON) are published in a named shared-memory segment per blob,
+  so other processes on the host (pool workers, other services, the next one-shot
+  request) decode the binary snapshot from shared memory instead of parsing the
+  JSON again. Segments outlive their publisher: they are owned by the host and
+  swept once unused for XSIGMA_MARKET_SHM_TTL seconds (default 3600; each attach
+  renews them). Only segments owned by this user, not writable by others and whose
+  payload hash matches are used. XSIGMA_MARKET_SHM_NAMESPACE gives a run segments
+  of its own;
+- engine objects (``Class.read_from_json``) cannot leave the process that built
+  them, so they are kept resident per process and per blob.
+
+Byte-identical files under different names map to the same blob, so they are only
+parsed and held once.
+
+Usage:
+    python market_store.py resolve <name> [...]
+    python market_store.py publish <name> [...]
+    python market_store.py status
+    python market_store.py sweep [--all]
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Any, Optional
+
+try:
+    import _posixshmem
+except ImportError:
+    # No POSIX shared memory (Windows): documents are only cached per process
+    _posixshmem = None
+
+from market_snapshot import encode, decode, SnapshotError
+from service_metrics import metrics
+
+# Directories searched for market data files, in order
+DEFAULT_ROOTS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'NoteBook'),
+] + [path for path in os.environ.get('XSIGMA_MARKET_DIRS', '').split(os.pathsep) if path]
+
+# Legacy names of the notebook snapshots (the files were byte-identical copies)
+ALIASES = {
+    'fx_volatility_calibration_targets.json': 'fxVolatilityCalibrationTargets.json',
+    'fx_volatility_quadratic_smile.json': 'fxVolatilityQuadraticSmile.json',
+    'fx_volatility_interpolation_config.json': 'fxVolatilityInterpolationConfig.json',
+}
+
+# Shared-memory segment layout: payload length (0 while being written) | snapshot
+_LENGTH = struct.Struct('<Q')
+SEGMENT_PREFIX = 'xsigma_mkt_'
+# Keeps the segments of one run apart from the host's (service_benchmark cases)
+SEGMENT_NAMESPACE = os.environ.get('XSIGMA_MARKET_SHM_NAMESPACE', '')
+
+# Unused segments older than this are removed by the next publisher (or `sweep`)
+SEGMENT_TTL = float(os.environ.get('XSIGMA_MARKET_SHM_TTL') or 3600)
+# Where POSIX shared memory is visible as files (Linux), for the sweep and renewal
+SHM_DIR = '/dev/shm'
+
+# Process-wide, keyed by content digest so every alias and store shares them
+_DOCUMENTS: Dict[str, Any] = {}
+_OBJECTS: Dict[tuple, Any] = {}
+_PUBLISHED: List[str] = []
+
+class MarketStoreError(Exception):
+    """Raised when a market data name cannot be resolved"""
+    pass
+
+class MarketStore:
+    """Name resolution over a list of data directories."""
+
+    def __init__(self, roots: Optional[List[str]] = None):
+        self.roots = [os.path.abspath(root) for root in (roots or DEFAULT_ROOTS)]
+
+    def resolve(self, name: str) -> str:
+        """Canonical path of a market data file name (alias or absolute path)."""
+        if os.path.isabs(name) and os.path.exists(name):
+            return name
+        canonical = ALIASES.get(os.path.basename(name), name)
+        for root in self.roots:
+            path = os.path.join(root, canonical)
+            if os.path.exists(path):
+                return path
+        raise MarketStoreError(f"Market data file not found: {name} (searched {', '.join(self.roots)})")
+
+    def blob(self, name: str) -> Dict[str, Any]:
+        """Canonical path, content digest and raw bytes of ``name``."""
+        path = self.resolve(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        return {'path': path, 'digest': hashlib.sha256(data).digest(), 'data': data}
+
+    def get_document(self, name: str) -> Any:
+        """
+        Parsed JSON document of ``name``, treated as read-only.
+
+        Lookup order: this process, the host's shared-memory segment, then the
+        JSON itself (which also publishes the segment for the other processes).
+        """
+        blob = self.blob(name)
+        key = blob['digest'].hex()
+        metrics.record_cache('market_document', key in _DOCUMENTS)
+        if key in _DOCUMENTS:
+            return _DOCUMENTS[key]
+
+        document = _attach(blob['digest'])
+        metrics.record_cache('market_shared_memory', document is not None)
+        if document is None:
+            document = json.loads(blob['data'])
+            _publish(blob['digest'], document)
+        _DOCUMENTS[key] = document
+        return document
+
+    def get_object(self, cls, name: str):
+        """Engine object ``cls.read_from_json`` of ``name``, built once per process and blob."""
+        blob = self.blob(name)
+        key = (cls.__name__, blob['digest'].hex())
+        metrics.record_cache('market_object', key in _OBJECTS)
+        if key not in _OBJECTS:
+            _OBJECTS[key] = cls.read_from_json(blob['path'])
+        return _OBJECTS[key]
+
+def namespace_prefix(namespace: str = '') -> str:
+    """Name prefix of the segments of ``namespace`` (all segments for '')."""
+    return SEGMENT_PREFIX + (f"{namespace}_" if namespace else '')
+
+def segment_name(digest: bytes) -> str:
+    return namespace_prefix(SEGMENT_NAMESPACE) + digest.hex()[:24]
+
+def _attach(digest: bytes) -> Optional[Any]:
+    """Decode the document published for ``digest`` by another process, if any."""
+    # Mapped read-only without SharedMemory, which would register the segment with
+    # this process's resource tracker (shared with the pool's parent when spawned)
+    if _posixshmem is None:
+        return None
+    try:
+        fd = _posixshmem.shm_open('/' + segment_name(digest), os.O_RDONLY, mode=0o600)
+    except OSError:
+        return None
+    try:
+        # Anyone can create a segment under a predictable name: only ours are trusted
+        st = os.fstat(fd)
+        if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o022):
+            return None
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as buf:
+            (length,) = _LENGTH.unpack_from(buf)
+            if length == 0:
+                return None
+            # decode checks the source digest and the payload hash before unmarshalling
+            document = decode(buf[_LENGTH.size:_LENGTH.size + length], digest)
+    except (SnapshotError, ValueError, EOFError, OSError, struct.error):
+        return None
+    finally:
+        os.close(fd)
+    _renew(segment_name(digest))
+    return document
+
+def _publish(digest: bytes, document: Any) -> None:
+    """Publish a parsed document for the other processes on the host."""
+    if _posixshmem is None:
+        return
+    sweep()
+    payload = encode(document, digest)
+    try:
+        segment = shared_memory.SharedMemory(
+            name=segment_name(digest), create=True, size=_LENGTH.size + len(payload)
+        )
+    except FileExistsError:
+        return
+    except OSError as e:
+        print(f"PROGRESS: Shared memory unavailable for market data ({e})", file=sys.stderr)
+        return
+    # The segment must outlive this process (one-shot services exit after each
+    # request), so it is not left to the resource tracker, which unlinks at exit
+    resource_tracker.unregister(segment._name, 'shared_memory')
+
+    segment.buf[_LENGTH.size:_LENGTH.size + len(payload)] = payload
+    # The length is written last so readers never see a partial payload
+    _LENGTH.pack_into(segment.buf, 0, len(payload))
+    segment.close()
+    _PUBLISHED.append(segment.name)
+
+def _renew(name: str) -> None:
+    """Mark a segment as used, so the sweep keeps it."""
+    try:
+        os.utime(os.path.join(SHM_DIR, name))
+    except OSError:
+        pass
+
+def sweep(ttl: Optional[float] = None, namespace: str = '') -> List[str]:
+    """
+    Remove this user's segments unused for ``ttl`` seconds (default SEGMENT_TTL),
+    only those of ``namespace`` if given; documents already decoded by other
+    processes stay valid.
+    """
+    if _posixshmem is None or not os.path.isdir(SHM_DIR):
+        return []
+    ttl = SEGMENT_TTL if ttl is None else ttl
+    prefix = namespace_prefix(namespace)
+    now = time.time()
+    removed = []
+    for name in os.listdir(SHM_DIR):
+        if not name.startswith(prefix):
+            continue
+        try:
+            st = os.stat(os.path.join(SHM_DIR, name))
+            if (hasattr(os, 'getuid') and st.st_uid != os.getuid()) or now - st.st_mtime < ttl:
+                continue
+            # SharedMemory.unlink would register it with the resource tracker again
+            _posixshmem.shm_unlink('/' + name)
+            removed.append(name)
+        except OSError:
+            pass
+    return removed
+
+def status() -> Dict[str, Any]:
+    return {
+        'documents': sorted(_DOCUMENTS),
+        'objects': sorted(f"{cls}:{digest[:16]}" for cls, digest in _OBJECTS),
+        'published_segments': sorted(_PUBLISHED),
+        'segment_ttl': SEGMENT_TTL,
+    }
+
+# Store over the default data directories
+market_store = MarketStore()
+
+def main():
+    """Main function to handle command line execution"""
+    parser = argparse.ArgumentParser(description='Content-addressed market data store')
+    parser.add_argument('operation', choices=['resolve', 'publish', 'status', 'sweep'])
+    parser.add_argument('names', nargs='*', help='Market data file names or aliases')
+    parser.add_argument('--all', action='store_true', help='sweep: remove every segment, used or not')
+    args = parser.parse_args()
+
+    try:
+        if args.operation == 'sweep':
+            print(json.dumps({
+                'status': 'success',
+                'data': {'removed': sweep(0 if args.all else None)},
+                'timestamp': str(np.datetime64('now'))
+            }, indent=2))
+            return
+        result = []
+        for name in args.names:
+            blob = market_store.blob(name)
+            entry = {'name': name, 'path': os.path.abspath(blob['path']), 'sha256': blob['digest'].hex()}
+            if args.operation == 'publish':
+                market_store.get_document(name)
+                entry['segment'] = segment_name(blob['digest'])
+            result.append(entry)
+        print(json.dumps({
+            'status': 'success',
+            'data': status() if args.operation == 'status' else result,
+            'timestamp': str(np.datetime64('now'))
+        }, indent=2))
+    except Exception as e:
+        print(json.dumps({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': str(np.datetime64('now'))
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+service_benchmark - End-to-End Latency Benchmark of the Python Service Entry Points
+
+Runs every operation of the Python services the way the Node backend does (one
+``python3 <Service>.py ...`` process per request) across problem sizes and reports,
+per case:
+
+- cold latency: the first run, with empty snapshot and CMS price caches and no
+  shared market data segments (each case gets its own, removed afterwards);
+- warm latency: the following runs, as p50/p95/p99 (and min/max);
+- peak RSS and the bytes the service writes to stdout. The RSS covers the whole
+  process tree (the service and the pool workers it spawns: CMS pricing, FX
+  shards, curve builds), summed over the processes from samples of /proc every
+  TREE_SAMPLE_MS, and at least the service process's own peak from wait4;
+  ``rss_scope`` says ``process_tree``, or ``process`` where /proc is missing and
+  only the service process is measured. Pages shared between the processes are
+  counted in each of them.
+
+Reports can be saved as JSON baselines; ``--compare`` flags cases whose warm p50
+(or peak RSS) grew beyond ``--threshold`` relative to a baseline.
+
+Usage:
+    python service_benchmark.py [--services TestHJM ...] [--sizes 100 400] [--save baseline.json]
+    python service_benchmark.py --compare baseline.json [--threshold 0.2]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import uuid
+import numpy as np
+from typing import Dict, List, Any, Optional
+from market_store import sweep
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+PYTHON = sys.executable or 'python3'
+
+DEFAULT_SIZES = (100, 400)
+DEFAULT_PATHS = (1024, 4096)
+DEFAULT_REPEATS = 10
+DEFAULT_THRESHOLD = 0.2
+CASE_TIMEOUT = 600
+TREE_SAMPLE_MS = 20
+
+# Exit status of --compare when regressions are found
+REGRESSION_EXIT_CODE = 2
+
+# Calibration defaults of AnalyticalSigmaVolatilityCalibration.py
+CALIBRATION_DEFAULTS = {
+    'spot': 2245.0656, 'expiry': 1.0, 'r': 0.003, 'q': 0.0022,
+    'beta': 0.4158, 'rho': 0.2256, 'volvol': 0.2256,
+}
+SIGMA_OPERATIONS = ('volatility_surface', 'vols_plus_minus', 'density', 'probability', 'all')
+CALIBRATION_TYPES = ('volatility_asv', 'density', 'volatility_svi', 'dynamic_asv', 'dynamic_svi')
+ZABR_MODELS = ('zabr_classic', 'sabr_pde', 'zabr_mixture')
+HARTMAN_WATSON_TESTS = {
+    1: {'n': 64, 't': 0.5, 'size_roots': 32, 'x_0': -5.0, 'x_n': 3.1},
+    2: {'n': 128, 't': 0.5, 'size_roots': 64, 'x_0': -5.0, 'x_n': 3.1},
+    3: {'n': 64, 't': 0.5, 'size_roots': 32, 'x_0': -8.0, 'x_n': 5.0},
+    4: {'n': 64, 't': 1.0, 'size_roots': 32, 'x_0': -5.0, 'x_n': 3.1},
+}
+# Roots at which the Hartman-Watson size is n itself
+HARTMAN_WATSON_ROOTS = 32
+SERVICES = ('AnalyticalSigmaVolatility', 'AnalyticalSigmaVolatilityCalibration',
+            'ZabrVariablesImpact', 'HartmanWatsonDistribution', 'TestHJM')
+
+def hartman_watson_size(n: int, size_roots: int) -> float:
+    """Cost driver of a Hartman-Watson request, as costModel.js computes it: n scaled to 32 roots."""
+    size = n * size_roots / HARTMAN_WATSON_ROOTS
+    return int(size) if size.is_integer() else size
+
+def build_cases(services: List[str], sizes: List[int], paths: List[int]) -> List[Dict[str, Any]]:
+    """
+    Command lines to benchmark: {service, label, size, argv}.
+
+    ``size`` is the quantity the cost model is fitted against, i.e. the one
+    costModel.js computes from a request's parameters.
+    """
+    cases = []
+
+    def add(service, label, size, *args):
+        if service in services:
+            cases.append({'service': service, 'label': label, 'size': size,
+                          'argv': [f"{service}.py", *args]})
+
+    for size in sizes:
+        for operation in SIGMA_OPERATIONS:
+            add('AnalyticalSigmaVolatility', operation, size,
+                'calculate', json.dumps({'output_type': operation, 'n': size}))
+        for computation_type in CALIBRATION_TYPES:
+            add('AnalyticalSigmaVolatilityCalibration', computation_type, size,
+                'calibrate', json.dumps({**CALIBRATION_DEFAULTS, 'n': size,
+                                         'computationType': computation_type}))
+        # Only the PDE model has a grid size
+        add('ZabrVariablesImpact', 'sabr_pde', size,
+            'calculate', json.dumps({'model_type': 'sabr_pde', 'parameters': {'N': size}}))
+        for test_case, parameters in HARTMAN_WATSON_TESTS.items():
+            n = max(parameters['n'], size)
+            add('HartmanWatsonDistribution', f"test_{test_case}", hartman_watson_size(n, parameters['size_roots']),
+                'calculate', json.dumps({**parameters, 'n': n}))
+
+    for model in ZABR_MODELS:
+        if model != 'sabr_pde':
+            add('ZabrVariablesImpact', model, None,
+                'calculate', json.dumps({'model_type': model, 'parameters': {}}))
+    for num_paths in paths:
+        for test_case in (1, 2):
+            add('TestHJM', f"test_{test_case}", num_paths,
+                'calculate', json.dumps({'test': test_case, 'num_paths': num_paths}))
+    return cases
+
+def _tree_rss_mb(root: int) -> Optional[float]:
+    """Summed RSS of ``root`` and its descendants (None without /proc)."""
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces and parentheses; ppid follows the last ')'
+        fields = stat[stat.rfind(')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    total, found, stack = 0, False, [root]
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+            found = True
+        except (OSError, ValueError, IndexError):
+            continue
+    return total / (1024 * 1024) if found else None
+
+class _TreeSampler(threading.Thread):
+    """Daemon thread tracking the peak RSS of a process tree."""
+
+    def __init__(self, root: int):
+        super().__init__(name='xsigma-benchmark-rss', daemon=True)
+        self.root = root
+        self.peak_mb: Optional[float] = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while True:
+            rss = _tree_rss_mb(self.root)
+            if rss is None:
+                return
+            self.peak_mb = max(self.peak_mb or 0.0, rss)
+            if self._stop_event.wait(TREE_SAMPLE_MS / 1000):
+                return
+
+    def stop(self) -> Optional[float]:
+        self._stop_event.set()
+        self.join()
+        return self.peak_mb
+
+def case_key(case: Dict[str, Any]) -> str:
+    return f"{case['service']}:{case['label']}:{case['size']}"
+
+def run_once(argv: List[str], env: Dict[str, str]) -> Dict[str, Any]:
+    """One service process: wall time, peak RSS of its process tree and output size."""
+    with tempfile.TemporaryFile() as stdout:
+        start_time = time.perf_counter()
+        process = subprocess.Popen([PYTHON, *argv], cwd=SERVICE_DIR, env=env,
+                                   stdout=stdout, stderr=subprocess.DEVNULL)
+        sampler = _TreeSampler(process.pid)
+        sampler.start()
+        deadline = start_time + CASE_TIMEOUT
+        while True:
+            pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                break
+            if time.perf_counter() > deadline:
+                process.kill()
+                pid, status, usage = os.wait4(process.pid, 0)
+                break
+            time.sleep(0.001)
+        wall_time = time.perf_counter() - start_time
+        tree_peak_mb = sampler.stop()
+        # The Popen object must not reap the process a second time
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        stdout.seek(0)
+        output = stdout.read()
+
+    ok = process.returncode == 0
+    if ok:
+        try:
+            ok = json.loads(output.decode('utf-8', 'replace')).get('status') != 'error'
+        except ValueError:
+            ok = False
+    # ru_maxrss is in kilobytes on Linux
+    process_peak_mb = usage.ru_maxrss / 1024
+    return {
+        'wall_ms': wall_time * 1000,
+        'peak_rss_mb': max(process_peak_mb, tree_peak_mb or 0.0),
+        'rss_scope': 'process' if tree_peak_mb is None else 'process_tree',
+        'output_bytes': len(output),
+        'ok': ok,
+    }
+
+def run_case(case: Dict[str, Any], repeats: int) -> Dict[str, Any]:
+    """Cold run with empty caches, then ``repeats`` warm runs reusing them."""
+    cache_dir = tempfile.mkdtemp(prefix='xsigma_service_benchmark_')
+    namespace = f"bench{uuid.uuid4().hex[:8]}"
+    env = dict(
+        os.environ,
+        XSIGMA_SNAPSHOT_DIR=os.path.join(cache_dir, 'snapshots'),
+        XSIGMA_CMS_CACHE_DIR=os.path.join(cache_dir, 'cms'),
+        XSIGMA_MARKET_SHM_NAMESPACE=namespace,
+    )
+    try:
+        cold = run_once(case['argv'], env)
+        warm = [run_once(case['argv'], env) for _ in range(repeats)]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        # The case's shared market data segments, however recently used
+        sweep(0, namespace)
+
+    latencies = np.array([run['wall_ms'] for run in warm])
+    return {
+        'key': case_key(case),
+        'service': case['service'],
+        'label': case['label'],
+        'size': case['size'],
+        'cold_ms': round(cold['wall_ms'], 2),
+        'warm': {
+            'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+            'min_ms': round(float(latencies.min()), 2),
+            'max_ms': round(float(latencies.max()), 2),
+        },
+        'peak_rss_mb': round(max(run['peak_rss_mb'] for run in [cold, *warm]), 1),
+        'rss_scope': 'process_tree' if all(run['rss_scope'] == 'process_tree' for run in [cold, *warm])
+                     else 'process',
+        'output_bytes': warm[-1]['output_bytes'] if warm else cold['output_bytes'],
+        'failures': sum(not run['ok'] for run in [cold, *warm]),
+        'runs': repeats + 1,
+    }
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    """Cases whose warm p50 or peak RSS grew more than ``threshold`` over the baseline."""
+    baseline_cases = {case['key']: case for case in baseline['cases']}
+    regressions, improvements, missing = [], [], []
+    for case in report['cases']:
+        reference = baseline_cases.get(case['key'])
+        if reference is None:
+            missing.append(case['key'])
+            continue
+        for metric, current, previous in (
+            ('warm_p50_ms', case['warm']['p50_ms'], reference['warm']['p50_ms']),
+            ('peak_rss_mb', case['peak_rss_mb'], reference['peak_rss_mb']),
+        ):
+            if not previous:
+                continue
+            change = current / previous - 1
+            entry = {'key': case['key'], 'metric': metric, 'baseline': previous,
+                     'current': current, 'change': round(change, 4)}
+            if change > threshold:
+                regressions.append(entry)
+            elif change < -threshold:
+                improvements.append(entry)
+    return {
+        'threshold': threshold,
+        'regressions': regressions,
+        'improvements': improvements,
+        'not_in_baseline': missing,
+    }
+
+def run_benchmark(services: List[str], sizes: List[int], paths: List[int],
+                  repeats: int) -> Dict[str, Any]:
+    cases = build_cases(services, sizes, paths)
+    results = []
+    start_time = time.time()
+    for index, case in enumerate(cases, 1):
+        print(f"PROGRESS: {index}/{len(cases)} {case_key(case)}", file=sys.stderr)
+        results.append(run_case(case, repeats))
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'sizes': sizes,
+        'paths': paths,
+        'repeats': repeats,
+        'cases': results,
+        'total_time_s': round(time.time() - start_time, 3),
+    }
+
+def main():
+    """Main function to handle command line execution"""
+    parser = argparse.ArgumentParser(description='End-to-end latency benchmark of the Python services')
+    parser.add_argument('--services', nargs='+', default=list(SERVICES), choices=list(SERVICES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                       help='Output sizes n (grid size N for the SABR PDE)')
+    parser.add_argument('--paths', nargs='+', type=int, default=list(DEFAULT_PATHS),
+                       help='Monte Carlo path counts for TestHJM')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help='Warm runs per case')
+    parser.add_argument('--save', help='Write the report as a baseline file')
+    parser.add_argument('--compare', help='Baseline file to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help='Relative growth flagged as a regression (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    try:
+        report = run_benchmark(args.services, args.sizes, args.paths, args.repeats)
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+            report['comparison'] = compare(report, baseline.get('data', baseline), args.threshold)
+
+        result = {
+            'status': 'success',
+            'data': report,
+            'timestamp': str(np.datetime64('now'))
+        }
+        if args.save:
+            with open(args.save, 'w') as f:
+                json.dump(result, f, indent=2)
+        print(json.dumps(result, indent=2))
+    except Exception as e:
+        print(json.dumps({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': str(np.datetime64('now'))
+        }))
+        sys.exit(1)
+
+    if report.get('comparison', {}).get('regressions'):
+        sys.exit(REGRESSION_EXIT_CODE)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+service_framework - Operation Registry, Parameter Schemas and Transports of the Python Services
+
+A service declares its operations once:
+
+    service = Service('TestHJM', version='1.0.0')
+
+    @service.operation('calculate', schema={'num_paths': Param(int, 524288, minimum=1)})
+    def calculate(params):
+        return run_simulation_analysis(params)
+
+    if __name__ == "__main__":
+        service.run()
+
+and every service then behaves the same way:
+
+- one envelope: ``{"status": "success", "operation", "data", "timestamp"}`` or
+  ``{"status": "error", "operation", "error", "error_type", "timestamp"}``, followed
+  by the ``profile``, ``memory``, ``timings`` and (for the Node executors, or with
+  ``"metrics": true``) ``metrics`` blocks (``timer.dumps``);
+- typed parameters: schema entries are defaulted, coerced and range-checked before
+  the handler runs; parameters outside the schema pass through unchanged;
+- a ``health_check`` operation (version, pid, requests served, operations, and the
+  service's own checks);
+- the per-request timing, profiling and memory hooks;
+- three transports sharing the dispatch and serialization:
+
+    python <Service>.py <operation> ['<json params>']       one request per process
+    python <Service>.py serve                               JSON lines on stdin/stdout
+    python <Service>.py serve --socket PATH | --port PORT   JSON lines over a socket
+
+The persistent transports exchange ``{"id", "operation", "params"}`` requests, echo
+the ``id`` and stop on ``{"operation": "shutdown"}`` or after replying to a request
+that went over its memory limit (service_memory); socket requests are served one
+at a time. Command lines that are not an operation go to the service's legacy
+parser, if it has one.
+
+Usage:
+    python service_framework.py describe <Service.py>
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import traceback
+import socketserver
+import importlib.util
+import numpy as np
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from service_memory import memory
+from service_metrics import metrics
+from service_profiling import profiler
+from service_timing import timer
+
+_MISSING = object()
+
+class ParameterError(ValueError):
+    """Invalid or missing request parameter."""
+
+class ConfigurationError(Exception):
+    """Invalid service configuration or request, raised by the services and their helpers."""
+
+class Param:
+    """Typed request parameter with an optional default, choices and bounds."""
+
+    def __init__(self, type: Callable = str, default: Any = _MISSING, choices: Optional[List[Any]] = None,
+                 minimum: Optional[float] = None, maximum: Optional[float] = None,
+                 required: bool = False, help: str = ''):
+        self.type = type
+        self.default = default
+        self.choices = choices
+        self.minimum = minimum
+        self.maximum = maximum
+        self.required = required
+        self.help = help
+
+    def parse(self, name: str, value: Any) -> Any:
+        if self.type is bool:
+            value = value.lower() in ('1', 'true', 'yes', 'on') if isinstance(value, str) else bool(value)
+        else:
+            try:
+                value = self.type(value)
+            except (TypeError, ValueError):
+                raise ParameterError(f"{name} must be of type {self.type.__name__}, got {value!r}")
+        if self.choices is not None and value not in self.choices:
+            raise ParameterError(f"{name} must be one of {', '.join(map(str, self.choices))}")
+        if self.minimum is not None and value < self.minimum:
+            raise ParameterError(f"{name} must be at least {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ParameterError(f"{name} must be at most {self.maximum}")
+        return value
+
+    def describe(self) -> Dict[str, Any]:
+        description = {'type': self.type.__name__}
+        for key in ('choices', 'minimum', 'maximum', 'help'):
+            if getattr(self, key) not in (None, ''):
+                description[key] = getattr(self, key)
+        if self.default is not _MISSING:
+            description['default'] = self.default
+        if self.required:
+            description['required'] = True
+        return description
+
+def parse_params(schema: Dict[str, Param], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Request parameters with the schema entries defaulted and validated."""
+    parsed = dict(params)
+    for name, param in schema.items():
+        value = params.get(name)
+        if value is None:
+            if param.required:
+                raise ParameterError(f"{name} is required")
+            if param.default is not _MISSING:
+                parsed[name] = param.default
+        else:
+            parsed[name] = param.parse(name, value)
+    return parsed
+
+class Response:
+    """Handler result with top-level envelope fields besides ``data``."""
+
+    def __init__(self, data: Any, **extra):
+        self.data = data
+        self.extra = extra
+
+class Operation:
+    def __init__(self, name: str, handler: Callable[[Dict[str, Any]], Any], schema: Dict[str, Param]):
+        self.name = name
+        self.handler = handler
+        self.schema = schema
+
+    def describe(self) -> Dict[str, Any]:
+        doc = (self.handler.__doc__ or '').strip().splitlines()
+        return {
+            'description': doc[0] if doc else '',
+            'parameters': {name: param.describe() for name, param in self.schema.items()},
+        }
+
+def error_response(operation: Optional[str], message: str, error_type: str = 'ServiceError') -> Dict[str, Any]:
+    return {'status': 'error', 'operation': operation, 'error': message, 'error_type': error_type,
+            'timestamp': str(np.datetime64('now'))}
+
+class Service:
+    """Operation registry and request dispatch of one Python service."""
+
+    def __init__(self, name: str, version: str = '1.0.0',
+                 health: Optional[Callable[[], Dict[str, Any]]] = None,
+                 legacy: Optional[Callable[[List[str]], Optional[Tuple[str, Dict[str, Any]]]]] = None):
+        """
+        Args:
+            name: Service name (responses, diagnostics, generated profile ids)
+            version: Reported by health_check
+            health: Service-specific checks added to health_check
+            legacy: Parser of command lines that are not an operation; returns the
+                (operation, params) to run, or None once it has handled them itself
+        """
+        self.name = name
+        self.version = version
+        self.health = health
+        self.legacy = legacy
+        self.operations: Dict[str, Operation] = {}
+        self.started_at = str(np.datetime64('now'))
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.operation('health_check')(self._health_check)
+
+    def operation(self, name: str, schema: Optional[Dict[str, Param]] = None):
+        """Decorator registering the handler of an operation."""
+        def register(handler: Callable[[Dict[str, Any]], Any]):
+            self.operations[name] = Operation(name, handler, schema or {})
+            return handler
+        return register
+
+    def _health_check(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Service status"""
+        data = {
+            'status': 'healthy',
+            'service': self.name,
+            'version': self.version,
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'requests': self.requests,
+            'python_version': platform.python_version(),
+            'operations': sorted(self.operations),
+        }
+        if self.health is not None:
+            data['checks'] = self.health()
+        return data
+
+    def handle(self, operation: str, params: Dict[str, Any], request_id: Any = None,
+               persistent: bool = False) -> Dict[str, Any]:
+        """
+        Run one request under the diagnostics hooks; returns its envelope, to be
+        serialized with ``timer.dumps`` (which ends the hooks).
+        """
+        params = params if isinstance(params, dict) else {}
+        self.requests += 1
+        # One-shot processes measure from the process start so the import is included
+        since_process_start = not persistent and self.requests == 1
+        timer.start(self.name, params.get('timings'), since_process_start=since_process_start)
+        profiler.start(self.name, params.get('profile'), params.get('request_id'))
+        memory.start(self.name, params, request_id, persistent=persistent)
+        metrics.start(params.get('metrics'))
+        if since_process_start:
+            timer.record_import()
+
+        try:
+            # The memory watchdog of a persistent worker may interrupt this block only
+            memory.arm()
+            try:
+                entry = self.operations.get(operation)
+                if entry is None:
+                    raise ParameterError(f"Unknown operation: {operation}. "
+                                         f"Available operations: {', '.join(sorted(self.operations))}")
+                result = entry.handler(parse_params(entry.schema, params))
+                extra = {}
+                if isinstance(result, Response):
+                    result, extra = result.data, result.extra
+                response = {'status': 'success', 'operation': operation, 'data': result, **extra}
+            finally:
+                memory.disarm()
+        except Exception as e:
+            print(f"PROGRESS: {self.name}.{operation} failed: {e}", file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+            response = {'status': 'error', 'operation': operation, 'error': str(e),
+                        'error_type': type(e).__name__}
+        if memory.exceeded:
+            # Whatever the handler made of the watchdog's exception, the request failed
+            response = {'status': 'error', 'operation': operation, 'error': memory.exceeded,
+                        'error_type': 'MemoryLimitExceeded'}
+        response['timestamp'] = str(np.datetime64('now'))
+        return response
+
+    def cli(self, operation: str, params: Dict[str, Any]) -> int:
+        """One request of a one-shot process; returns the exit status."""
+        response = self.handle(operation, params)
+        print(timer.dumps(response))
+        return 0 if response['status'] == 'success' else 1
+
+    def _reply(self, line: str) -> Optional[Tuple[str, bool]]:
+        """Response line of a persistent request line, and whether to stop."""
+        line = line.strip()
+        if not line:
+            return None
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            operation = str(request.get('operation', ''))
+        except (ValueError, AttributeError) as e:
+            return json.dumps({'id': request_id, **error_response(None, f"Invalid request: {e}")}), False
+        if operation == 'shutdown':
+            return json.dumps({'id': request_id, 'status': 'success', 'data': {'shutdown': True}}), True
+
+        with self._lock:
+            start_time = time.time()
+            response = self.handle(operation, request.get('params') or {}, request_id, persistent=True)
+            # After a memory ceiling the worker's memory and resident state cannot be trusted
+            stop = response.get('error_type') == 'MemoryLimitExceeded'
+            response = {'id': request_id, **response, 'executionTime': time.time() - start_time}
+            return timer.dumps(response), stop
+
+    def serve(self) -> None:
+        """Persistent worker: one JSON request per stdin line, one response per stdout line."""
+        print(f"PROGRESS: {self.name} worker ready", file=sys.stderr, flush=True)
+        for line in sys.stdin:
+            reply = self._reply(line)
+            if reply is None:
+                continue
+            text, stop = reply
+            sys.stdout.write(text + '\n')
+            sys.stdout.flush()
+            if stop:
+                return
+
+    def serve_socket(self, path: Optional[str] = None, port: Optional[int] = None) -> None:
+        """Persistent worker on a Unix socket (``path``) or a localhost TCP ``port``."""
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw in self.rfile:
+                    reply = service._reply(raw.decode('utf-8', 'replace'))
+                    if reply is None:
+                        continue
+                    text, stop = reply
+                    self.wfile.write((text + '\n').encode('utf-8'))
+                    self.wfile.flush()
+                    if stop:
+                        threading.Thread(target=self.server.shutdown, daemon=True).start()
+                        return
+
+        if path:
+            server_class = getattr(socketserver, 'ThreadingUnixStreamServer', None)
+            if server_class is None:
+                raise RuntimeError("Unix sockets are not available on this platform; use --port")
+            if os.path.exists(path):
+                os.unlink(path)
+            server = server_class(path, Handler)
+            address = path
+        else:
+            server = socketserver.ThreadingTCPServer(('127.0.0.1', port), Handler)
+            address = f"127.0.0.1:{server.server_address[1]}"
+        server.daemon_threads = True
+
+        print(f"PROGRESS: {self.name} worker listening on {address}", file=sys.stderr, flush=True)
+        try:
+            with server:
+                server.serve_forever()
+        finally:
+            if path and os.path.exists(path):
+                os.unlink(path)
+
+    def run(self, argv: Optional[List[str]] = None) -> None:
+        """Entry point: dispatch a command line to its transport."""
+        argv = sys.argv[1:] if argv is None else argv
+
+        if argv and argv[0] == 'serve':
+            parser = argparse.ArgumentParser(prog=f"{self.name}.py serve",
+                                             description=f"Persistent {self.name} worker")
+            transport = parser.add_mutually_exclusive_group()
+            transport.add_argument('--socket', help='Unix socket path (default: stdin/stdout)')
+            transport.add_argument('--port', type=int, help='Localhost TCP port (0 picks a free one)')
+            args = parser.parse_args(argv[1:])
+            if args.socket or args.port is not None:
+                self.serve_socket(args.socket, args.port)
+            else:
+                self.serve()
+            return
+
+        request = None
+        if argv and argv[0] in self.operations:
+            try:
+                request = (argv[0], json.loads(argv[1]) if len(argv) > 1 else {})
+            except json.JSONDecodeError:
+                print(json.dumps(error_response(argv[0], 'Invalid JSON parameters', 'ParameterError')))
+                sys.exit(1)
+        elif self.legacy is not None:
+            try:
+                request = self.legacy(argv)
+            except (ValueError, IndexError) as e:
+                print(json.dumps(error_response(None, str(e), 'ParameterError')))
+                sys.exit(1)
+            if request is None:
+                return
+        else:
+            response = error_response(argv[0] if argv else None, 'Missing or unknown operation', 'ParameterError')
+            response['usage'] = f"python {self.name}.py <operation> ['<json params>'] | serve"
+            response['available_operations'] = sorted(self.operations)
+            print(json.dumps(response))
+            sys.exit(1)
+
+        sys.exit(self.cli(*request))
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'service': self.name,
+            'version': self.version,
+            'operations': {name: entry.describe() for name, entry in sorted(self.operations.items())},
+        }
+
+def load_service(path: str) -> Service:
+    """The ``service`` registry of a service script (imported, not run)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    service = getattr(module, 'service', None)
+    # Compared with the imported module's class (this file may be running as __main__)
+    import service_framework
+    if not isinstance(service, service_framework.Service):
+        raise ValueError(f"{path} does not define a service registry")
+    return service
+
+def main():
+    """Main function to handle command line execution"""
+    parser = argparse.ArgumentParser(description='Operations and parameter schemas of a Python service')
+    parser.add_argument('operation', choices=['describe'])
+    parser.add_argument('service', help='Service script, e.g. TestHJM.py')
+    args = parser.parse_args()
+
+    try:
+        print(json.dumps({
+            'status': 'success',
+            'data': load_service(args.service).describe(),
+            'timestamp': str(np.datetime64('now'))
+        }, indent=2, default=str))
+    except Exception as e:
+        print(json.dumps({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': str(np.datetime64('now'))
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
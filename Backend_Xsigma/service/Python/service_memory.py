@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+service_memory - Per-Request Memory Accounting and Ceiling
+
+Each request reports its memory in the response's ``memory`` block:
+
+- ``peak_rss_mb``: peak resident set size during the request (the kernel
+  high-water mark is reset at the start of the request on Linux; elsewhere it is
+  the process peak and ``peak_scope`` says so);
+- ``top_allocations``: with ``"memory_profile": true``, the traced peak and the
+  largest Python-side allocations still live at response time, by source line
+  (tracemalloc; numpy buffers are included, memory allocated inside the engine
+  is not).
+
+A memory ceiling (``"memory_limit_mb"`` per request, capped by
+XSIGMA_MEMORY_LIMIT_MB) is enforced by a watchdog thread polling the RSS every
+XSIGMA_MEMORY_POLL_MS, instead of letting the host swap. A one-shot process is held
+to its RSS; a persistent worker to the request's growth over ``rss_start_mb``, so
+engine state kept between requests does not count (``limit_scope``). When it is
+exceeded:
+
+- a one-shot process writes the error response on stdout (its transport) and exits
+  with MEMORY_EXIT_CODE, which frees the memory at once;
+- a persistent worker (stdin or socket) fails the offending request: the watchdog
+  raises MemoryLimitExceeded in the request's thread, the error goes back through
+  the transport like any other, and the worker then exits. Freed memory is seldom
+  returned to the OS and the exception may have left resident state half-updated,
+  so its supervisor (pythonWorker.js) starts a fresh one.
+
+The watchdog needs the GIL, and an exception raised in another thread is only
+delivered between bytecodes, so engine calls holding the GIL are checked when
+they return.
+
+Usage:
+    python service_memory.py status
+"""
+
+import os
+import sys
+import json
+import ctypes
+import argparse
+import threading
+import tracemalloc
+import numpy as np
+from typing import Dict, List, Any, Optional, Callable
+
+ENV_LIMIT_MB = float(os.environ.get('XSIGMA_MEMORY_LIMIT_MB') or 0)
+POLL_INTERVAL_MS = float(os.environ.get('XSIGMA_MEMORY_POLL_MS') or 50)
+TOP_ALLOCATIONS = 15
+
+# Exit status of a process stopped by its memory ceiling
+MEMORY_EXIT_CODE = 3
+
+MB = 1024 * 1024
+
+class MemoryLimitExceeded(MemoryError):
+    """Raised in a persistent worker's request thread once its RSS goes over the limit."""
+
+class _Disarmed(BaseException):
+    """Replaces a pending MemoryLimitExceeded and is caught at once by disarm()."""
+
+def _async_raise(thread_id: int, exception: type) -> None:
+    """Raise ``exception`` in another thread at its next bytecode (replacing a pending one)."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(exception))
+
+def _checkpoint() -> None:
+    """A Python call: pending asynchronous exceptions are delivered on entry."""
+
+def _status_kb(field: str) -> Optional[int]:
+    """A ``kB`` field of /proc/self/status (None where unavailable)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def current_rss_mb() -> Optional[float]:
+    rss = _status_kb('VmRSS')
+    return None if rss is None else rss / 1024
+
+def _reset_peak() -> bool:
+    """Reset the kernel RSS high-water mark (Linux 4.0+)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_mb() -> Optional[float]:
+    peak = _status_kb('VmHWM')
+    if peak is not None:
+        return peak / 1024
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == 'darwin' else peak / 1024
+
+class _Watchdog(threading.Thread):
+    """Daemon thread failing the request once the RSS goes over the limit."""
+
+    def __init__(self, limit_mb: float, on_exceeded: Callable[[float], None]):
+        super().__init__(name='xsigma-memory-watchdog', daemon=True)
+        self.limit_mb = limit_mb
+        self.on_exceeded = on_exceeded
+        self.max_rss_mb = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(POLL_INTERVAL_MS / 1000):
+            rss = current_rss_mb()
+            if rss is None:
+                return
+            self.max_rss_mb = max(self.max_rss_mb, rss)
+            if rss > self.limit_mb:
+                self.on_exceeded(rss)
+                return
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+class MemoryTracker:
+    """Memory accounting of the current request (one request at a time per process)."""
+
+    def __init__(self):
+        self._active = False
+        self._watchdog: Optional[_Watchdog] = None
+        self._tracing = False
+        # Orders the watchdog's interruption against arm/disarm
+        self._guard = threading.Lock()
+        self._armed = False
+        self.exceeded: Optional[str] = None
+
+    def start(self, service: str, params: Optional[Dict[str, Any]] = None,
+              request_id: Any = None, persistent: bool = False) -> None:
+        """
+        Begin accounting a request.
+
+        Args:
+            service: Service name, used in the error message
+            params: Request parameters (``memory_profile``, ``memory_limit_mb``)
+            request_id: Id echoed in the error response of a persistent worker
+            persistent: Whether the process serves further requests after this one
+        """
+        self.stop()
+        params = params or {}
+        self.service = service
+        self.request_id = request_id
+        self.persistent = persistent
+        self.exceeded = None
+        self._armed = False
+        self._thread_id = threading.get_ident()
+        try:
+            self.limit_mb = request_limit_mb(params.get('memory_limit_mb'))
+        except ValueError as e:
+            print(f"PROGRESS: Ignoring memory_limit_mb: {e}", file=sys.stderr)
+            self.limit_mb = ENV_LIMIT_MB
+        self.rss_start_mb = current_rss_mb()
+        self.peak_scope = 'request' if _reset_peak() else 'process'
+        # Persistent workers are held to the request's growth, one-shot runs to their RSS
+        self.limit_scope = 'request' if persistent and self.rss_start_mb is not None else 'process'
+        self._baseline_mb = self.rss_start_mb if self.limit_scope == 'request' else 0.0
+        self._active = True
+
+        self._tracing = params.get('memory_profile') in (True, 'true')
+        if self._tracing:
+            tracemalloc.start()
+
+        if self.limit_mb:
+            self._watchdog = _Watchdog(self._baseline_mb + self.limit_mb, self._exceeded)
+            self._watchdog.start()
+
+    def arm(self) -> None:
+        """
+        Let the watchdog interrupt the request thread; called first thing in the
+        block that turns exceptions into error responses.
+        """
+        with self._guard:
+            self._armed = True
+            if self.exceeded:
+                raise MemoryLimitExceeded(self.exceeded)
+
+    def disarm(self) -> None:
+        """End of that block: no interruption past here, and a pending one is cleared."""
+        with self._guard:
+            if self._armed and self.exceeded:
+                # Clearing with NULL would leave CPython's pending flag set (3.11), which
+                # then hangs the next traced call (cProfile); delivering a marker resets it
+                try:
+                    _async_raise(self._thread_id, _Disarmed)
+                    _checkpoint()
+                except _Disarmed:
+                    pass
+            self._armed = False
+
+    def _exceeded(self, rss_mb: float) -> None:
+        """Watchdog callback: fail the request (and stop a one-shot process)."""
+        if self.limit_scope == 'request':
+            usage = f"RSS grew {rss_mb - self._baseline_mb:.0f} MB to {rss_mb:.0f} MB"
+        else:
+            usage = f"RSS {rss_mb:.0f} MB"
+        message = f"{self.service}: memory limit exceeded ({usage} > {self.limit_mb:.0f} MB); request aborted"
+        print(f"PROGRESS: {message}", file=sys.stderr, flush=True)
+        if not self.persistent:
+            response = {'status': 'error', 'error': message, 'error_type': 'MemoryLimitExceeded',
+                        'timestamp': str(np.datetime64('now'))}
+            sys.stdout.write(json.dumps(response) + '\n')
+            sys.stdout.flush()
+            os._exit(MEMORY_EXIT_CODE)
+        with self._guard:
+            self.exceeded = message
+            if self._armed:
+                _async_raise(self._thread_id, MemoryLimitExceeded)
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """End accounting; returns the response's ``memory`` block (None when not started)."""
+        if not self._active:
+            return None
+        self._active = False
+        if self._watchdog is not None:
+            self._watchdog.stop()
+
+        peak = _peak_rss_mb()
+        if self._watchdog is not None and peak is not None:
+            peak = max(peak, self._watchdog.max_rss_mb)
+        self._watchdog = None
+        end = current_rss_mb()
+        block = {
+            'peak_rss_mb': None if peak is None else round(peak, 1),
+            'peak_scope': self.peak_scope,
+            'rss_start_mb': None if self.rss_start_mb is None else round(self.rss_start_mb, 1),
+            'rss_end_mb': None if end is None else round(end, 1),
+            'limit_mb': self.limit_mb or None,
+            'limit_scope': self.limit_scope,
+            'limit_exceeded': self.exceeded is not None,
+        }
+
+        if self._tracing:
+            snapshot = tracemalloc.take_snapshot()
+            _, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._tracing = False
+            block['traced_peak_mb'] = round(traced_peak / MB, 3)
+            block['top_allocations'] = top_allocations(snapshot)
+        return block
+
+def request_limit_mb(value: Any) -> float:
+    """Memory ceiling of a request: its ``memory_limit_mb``, capped by XSIGMA_MEMORY_LIMIT_MB."""
+    limit = ENV_LIMIT_MB
+    if value not in (None, ''):
+        requested = float(value)
+        if requested <= 0:
+            raise ValueError("memory_limit_mb must be positive")
+        limit = min(requested, limit) if limit else requested
+    return limit
+
+def top_allocations(snapshot: tracemalloc.Snapshot, limit: int = TOP_ALLOCATIONS) -> List[Dict[str, Any]]:
+    """Largest live allocations of a tracemalloc snapshot, by source line."""
+    statistics = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]).statistics('lineno')
+    return [{
+        'location': f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+        'size_mb': round(stat.size / MB, 3),
+        'blocks': stat.count,
+    } for stat in statistics[:limit]]
+
+# Tracker of this process
+memory = MemoryTracker()
+
+def main():
+    """Main function to handle command line execution"""
+    parser = argparse.ArgumentParser(description='Memory accounting of the Python services')
+    parser.add_argument('operation', choices=['status'])
+    args = parser.parse_args()
+
+    try:
+        print(json.dumps({
+            'status': 'success',
+            'data': {
+                'rss_mb': current_rss_mb(),
+                'peak_reset_supported': _reset_peak(),
+                'limit_mb': ENV_LIMIT_MB or None,
+                'poll_interval_ms': POLL_INTERVAL_MS,
+            },
+            'timestamp': str(np.datetime64('now'))
+        }, indent=2))
+    except Exception as e:
+        print(json.dumps({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': str(np.datetime64('now'))
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
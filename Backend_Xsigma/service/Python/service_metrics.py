@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+service_metrics - Counters and Histograms of the Python Compute Layer
+
+Services record what only the Python side can see: calibrations (duration,
+iterations when the engine reports them), Monte Carlo throughput, hits and misses
+of the Python caches and the worker's memory:
+
+    from service_metrics import metrics
+    metrics.record_calibration('extended_svi', 'ceres', elapsed)
+    metrics.record_paths(num_paths, elapsed)
+
+The samples recorded since the last response are drained with every response and
+the registry starts over. They are returned as the response's ``metrics`` block
+(by ``service_timing.Timer.dumps``) only when asked for: the Node executors set
+XSIGMA_METRICS=1, merge the block into the /metrics endpoint (labelled with the
+service and operation of the request) and strip it, so API clients never see it.
+A single request can ask with ``"metrics": true``.
+
+Usage:
+    python service_metrics.py render <response.json> [...]
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from typing import Dict, List, Any, Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows: no getrusage, the peak RSS is not reported
+    resource = None
+
+REPORTED_BY_ENV = os.environ.get('XSIGMA_METRICS', '').lower() in ('1', 'true', 'yes')
+
+# Histogram bucket upper bounds (the +Inf bucket is implicit)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+ITERATION_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 5000)
+RSS_BUCKETS = tuple(float(2 ** power) * 1024 * 1024 for power in range(5, 15))  # 32 MiB .. 16 GiB
+
+FAMILIES = {
+    'xsigma_python_calibrations_total': ('counter', 'Calibrations run, by model, solver and outcome'),
+    'xsigma_python_calibration_duration_seconds': ('histogram', 'Calibration wall time', DURATION_BUCKETS),
+    'xsigma_python_calibration_iterations': ('histogram', 'Solver iterations per calibration', ITERATION_BUCKETS),
+    'xsigma_python_mc_paths_total': ('counter', 'Monte Carlo paths simulated'),
+    'xsigma_python_mc_simulation_seconds_total': ('counter', 'Wall time spent simulating Monte Carlo paths'),
+    'xsigma_python_mc_paths_per_second': ('gauge', 'Monte Carlo throughput of the last simulation'),
+    'xsigma_python_cache_requests_total': ('counter', 'Python cache lookups, by cache and result'),
+    'xsigma_python_rss_bytes': ('histogram', 'Resident set size of the service process at response time',
+                                RSS_BUCKETS),
+    'xsigma_python_peak_rss_bytes': ('gauge', 'Peak resident set size of the latest service process'),
+}
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes (None where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _label_key(labels: Dict[str, Any]) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+class Metrics:
+    """Per-process registry of the samples recorded since the last ``drain``."""
+
+    def __init__(self):
+        self._samples: Dict[str, Dict[tuple, Any]] = {}
+        self.reported = REPORTED_BY_ENV
+
+    def start(self, requested: Any = None) -> None:
+        """Begin a request: its ``metrics`` block is returned with XSIGMA_METRICS or on request."""
+        self.reported = REPORTED_BY_ENV or requested in (True, 'true')
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        samples = self._family(name, 'counter')
+        key = _label_key(labels)
+        samples[key] = samples.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        self._family(name, 'gauge')[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        samples = self._family(name, 'histogram')
+        key = _label_key(labels)
+        if key not in samples:
+            samples[key] = {'counts': [0] * (len(FAMILIES[name][2]) + 1), 'sum': 0.0, 'count': 0}
+        sample = samples[key]
+        index = next((i for i, bound in enumerate(FAMILIES[name][2]) if value <= bound),
+                     len(FAMILIES[name][2]))
+        sample['counts'][index] += 1
+        sample['sum'] += value
+        sample['count'] += 1
+
+    def _family(self, name: str, kind: str) -> Dict[tuple, Any]:
+        if FAMILIES[name][0] != kind:
+            raise ValueError(f"{name} is a {FAMILIES[name][0]}, not a {kind}")
+        return self._samples.setdefault(name, {})
+
+    def record_calibration(self, model: str, solver: str, seconds: Optional[float],
+                           iterations: Optional[int] = None, ok: bool = True) -> None:
+        self.inc('xsigma_python_calibrations_total', model=model, solver=solver,
+                 outcome='success' if ok else 'error')
+        if seconds is not None:
+            self.observe('xsigma_python_calibration_duration_seconds', seconds, model=model, solver=solver)
+        if iterations is not None:
+            self.observe('xsigma_python_calibration_iterations', iterations, model=model, solver=solver)
+
+    def record_paths(self, num_paths: int, seconds: float) -> None:
+        self.inc('xsigma_python_mc_paths_total', num_paths)
+        self.inc('xsigma_python_mc_simulation_seconds_total', seconds)
+        if seconds > 0:
+            self.set('xsigma_python_mc_paths_per_second', num_paths / seconds)
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        self.inc('xsigma_python_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+    def drain(self) -> Dict[str, Any]:
+        """
+        ``metrics`` block of the samples recorded since the last call, with the
+        process memory at this point; the registry is cleared.
+        """
+        rss = current_rss()
+        if rss is not None:
+            self.observe('xsigma_python_rss_bytes', rss)
+        peak = peak_rss()
+        if peak is not None:
+            self.set('xsigma_python_peak_rss_bytes', peak)
+
+        block = {}
+        for name, samples in self._samples.items():
+            kind, help_text = FAMILIES[name][:2]
+            family = {'type': kind, 'help': help_text, 'samples': []}
+            if kind == 'histogram':
+                family['buckets'] = list(FAMILIES[name][2])
+            for key, value in samples.items():
+                sample = {'labels': dict(key)}
+                sample.update(value if kind == 'histogram' else {'value': value})
+                family['samples'].append(sample)
+            block[name] = family
+        self._samples = {}
+        return block
+
+# Registry of this process
+metrics = Metrics()
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def render(block: Dict[str, Any]) -> str:
+    """Prometheus text exposition (version 0.0.4) of a ``metrics`` block."""
+    lines: List[str] = []
+    for name, family in sorted(block.items()):
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for sample in family['samples']:
+            labels = sample['labels']
+            if family['type'] != 'histogram':
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(sample['value'])}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*family['buckets'], '+Inf'], sample['counts']):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(sample['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {sample['count']}")
+    return '\n'.join(lines) + '\n'
+
+def main():
+    """Main function to handle command line execution"""
+    parser = argparse.ArgumentParser(description='Metrics of the Python services')
+    parser.add_argument('operation', choices=['render'])
+    parser.add_argument('responses', nargs='+', help='Service responses (JSON) with a metrics block')
+    args = parser.parse_args()
+
+    try:
+        for path in args.responses:
+            with open(path) as f:
+                sys.stdout.write(render(json.load(f).get('metrics', {})))
+    except Exception as e:
+        print(json.dumps({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': str(np.datetime64('now'))
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
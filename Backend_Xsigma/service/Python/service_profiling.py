@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+service_profiling - On-Demand Profiling of Service Requests
+
+A request runs under a profiler when it asks for one with ``"profile"``:
+
+- ``true`` / ``"cprofile"``: deterministic cProfile, stored as a pstats file;
+- ``"sampling"``: a sampling thread records the request thread's stack every
+  XSIGMA_PROFILE_INTERVAL_MS (default 5 ms), stored as collapsed stacks
+  (flamegraph.pl, speedscope).
+
+With XSIGMA_PROFILE_SLOW_MS set, every request is sampled and its profile is kept
+only when it took longer than the threshold, so slow production requests can be
+explained after the fact. Otherwise nothing is started and the hooks are no-ops.
+
+Profiles are written to XSIGMA_PROFILE_DIR as ``<request id>.pstats`` or
+``<request id>.collapsed``; the response's ``profile`` block names the file. Request
+ids other than 1-64 letters, digits, '-' or '_' are replaced by a generated one.
+Only the request thread is profiled (not the service's pool worker processes).
+
+Usage:
+    python service_profiling.py top <profile> [--limit 25]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import pstats
+import cProfile
+import argparse
+import tempfile
+import threading
+import numpy as np
+from collections import Counter
+from typing import Dict, List, Any, Optional
+
+PROFILE_DIR = os.environ.get('XSIGMA_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'xsigma_profiles'))
+SLOW_THRESHOLD_MS = float(os.environ.get('XSIGMA_PROFILE_SLOW_MS') or 0)
+SAMPLE_INTERVAL_MS = float(os.environ.get('XSIGMA_PROFILE_INTERVAL_MS') or 5)
+
+MODES = ('cprofile', 'sampling')
+
+# Client request ids name profile files, so only plain names are used as given
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+def profile_mode(value: Any) -> Optional[str]:
+    """Profiler requested by a ``profile`` parameter (None when off)."""
+    if value in (None, False, '', 'false', 'off'):
+        return None
+    if value in (True, 'true', 'on'):
+        return 'cprofile'
+    if value not in MODES:
+        raise ValueError(f"profile must be true or one of {', '.join(MODES)}")
+    return value
+
+class _Sampler(threading.Thread):
+    """Daemon thread counting the collapsed stacks of one thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name='xsigma-profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+class Profiler:
+    """Profiler of the current request (one request at a time per process)."""
+
+    def __init__(self):
+        self._mode: Optional[str] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_Sampler] = None
+        self._request_id: Optional[str] = None
+        self._requested = False
+        self._start = 0.0
+        self._sequence = 0
+
+    def start(self, service: str, profile: Any = None, request_id: Any = None) -> None:
+        """
+        Begin profiling a request if it asks for it or a slow threshold is set.
+
+        Args:
+            service: Service name, used in generated request ids
+            profile: The request's ``profile`` parameter
+            request_id: Id of the request (generated when missing or not 1-64
+                letters, digits, '-' or '_')
+        """
+        self.stop()
+        try:
+            mode = profile_mode(profile)
+        except ValueError as e:
+            print(f"PROGRESS: Request not profiled: {e}", file=sys.stderr)
+            mode = None
+        if mode is None and not SLOW_THRESHOLD_MS:
+            return
+
+        self._sequence += 1
+        request_id = str(request_id) if request_id is not None else ''
+        if not _REQUEST_ID_PATTERN.match(request_id):
+            request_id = f"{service}_{time.strftime('%Y%m%dT%H%M%S')}_{os.getpid()}_{self._sequence}"
+        self._request_id = request_id
+        self._mode = mode or 'sampling'
+        self._start = time.perf_counter()
+        if self._mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = _Sampler(threading.get_ident(), SAMPLE_INTERVAL_MS / 1000)
+            self._sampler.start()
+        # Requested profiles are always kept; threshold-only ones when slow
+        self._requested = mode is not None
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """
+        End profiling; returns the response's ``profile`` block, or None when the
+        request was not profiled (or was not slow enough to keep).
+        """
+        if self._mode is None:
+            return None
+        duration_ms = (time.perf_counter() - self._start) * 1000
+        mode, self._mode = self._mode, None
+        if mode == 'cprofile':
+            self._profile.disable()
+            result, self._profile = self._profile, None
+        else:
+            result, self._sampler = self._sampler.stop(), None
+
+        slow = bool(SLOW_THRESHOLD_MS) and duration_ms >= SLOW_THRESHOLD_MS
+        if not (self._requested or slow):
+            return None
+
+        block = {
+            'request_id': self._request_id,
+            'mode': mode,
+            'duration_ms': round(duration_ms, 3),
+            'slow': slow,
+            'file': self._write(mode, result),
+        }
+        if mode == 'sampling':
+            block['samples'] = sum(result.values())
+            block['interval_ms'] = SAMPLE_INTERVAL_MS
+        print(f"PROGRESS: Profile of request {self._request_id} written to {block['file']}", file=sys.stderr)
+        return block
+
+    def _write(self, mode: str, result) -> Optional[str]:
+        extension = 'pstats' if mode == 'cprofile' else 'collapsed'
+        directory = os.path.realpath(PROFILE_DIR)
+        path = os.path.realpath(os.path.join(directory, f"{self._request_id}.{extension}"))
+        if os.path.dirname(path) != directory:
+            print(f"PROGRESS: Profile path {path} is outside {directory}, not written", file=sys.stderr)
+            return None
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            if mode == 'cprofile':
+                result.dump_stats(path)
+            else:
+                with open(path, 'w') as f:
+                    f.writelines(f"{stack} {count}\n" for stack, count in result.most_common())
+            return path
+        except OSError as e:
+            print(f"PROGRESS: Could not write profile {path}: {e}", file=sys.stderr)
+            return None
+
+# Profiler of this process
+profiler = Profiler()
+
+def top_functions(path: str, limit: int = 25) -> List[Dict[str, Any]]:
+    """Functions with the most time (pstats) or samples (collapsed stacks)."""
+    if path.endswith('.collapsed'):
+        total, own = Counter(), Counter()
+        with open(path) as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                frames = stack.split(';')
+                own[frames[-1]] += int(count)
+                for name in set(frames):
+                    total[name] += int(count)
+        samples = sum(own.values()) or 1
+        return [{'function': name, 'total_share': round(count / samples, 4),
+                 'self_share': round(own[name] / samples, 4)}
+                for name, count in total.most_common(limit)]
+
+    stats = pstats.Stats(path).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{'function': f"{name} ({os.path.basename(filename)}:{line})", 'calls': calls,
+             'total_s': round(cumulative, 6), 'self_s': round(own, 6)}
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows]
+
+def main():
+    """Main function to handle command line execution"""
+    parser = argparse.ArgumentParser(description='Request profiles of the Python services')
+    parser.add_argument('operation', choices=['top'])
+    parser.add_argument('profile', help='.pstats or .collapsed file')
+    parser.add_argument('--limit', type=int, default=25)
+    args = parser.parse_args()
+
+    try:
+        print(json.dumps({
+            'status': 'success',
+            'data': top_functions(args.profile, args.limit),
+            'timestamp': str(np.datetime64('now'))
+        }, indent=2))
+    except Exception as e:
+        print(json.dumps({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': str(np.datetime64('now'))
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
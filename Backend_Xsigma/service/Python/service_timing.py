@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+service_timing - Nested Stage Timers for the Python Services
+
+Services wrap their stages (import, market load, model construction, calibrate,
+evaluate, density, serialize) in spans:
+
+    from service_timing import timer
+    with timer.span('calibrate', solver='ceres'):
+        ...
+
+Spans nest and are collected per request. When timing is disabled ``span`` returns
+one shared no-op context manager, so instrumented code costs a method call.
+
+Timing is enabled for every request by the XSIGMA_TIMINGS environment variable, or
+per request with ``"timings": true``; the collected spans are returned in the
+response's ``timings`` block. With XSIGMA_TRACE_DIR set, each request is also written
+there as a Chrome trace (chrome://tracing, Perfetto). ``dumps`` also adds the
+``memory`` block of service_memory to every response, the ``profile`` block of
+service_profiling to profiled ones and, when reported, the ``metrics`` block of
+service_metrics.
+
+Usage:
+    python service_timing.py summary <trace.json> [...]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import functools
+import threading
+import numpy as np
+from typing import Dict, List, Any, Optional
+
+from service_memory import memory
+from service_metrics import metrics
+from service_profiling import profiler
+
+# Process start, taken when the service first imports this module (before its
+# engine imports), so the import stage can be recorded afterwards
+PROCESS_START = time.perf_counter()
+
+ENABLED_BY_ENV = os.environ.get('XSIGMA_TIMINGS', '').lower() in ('1', 'true', 'yes')
+TRACE_DIR = os.environ.get('XSIGMA_TRACE_DIR')
+
+class _NullSpan:
+    """Context manager of a disabled timer."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+# Stands for the ``timings`` block in ``dumps`` until the encoder reaches it
+_TIMINGS = object()
+
+class _Span:
+    __slots__ = ('timer', 'name', 'args', 'start', 'depth')
+
+    def __init__(self, timer: 'Timer', name: str, args: Dict[str, Any]):
+        self.timer = timer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.depth = len(self.timer._stack)
+        self.timer._stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.timer._stack.pop()
+        self.timer._add(self.name, self.start, end, self.depth, self.args)
+        return False
+
+class Timer:
+    """Per-request span collector (one request at a time per process)."""
+
+    def __init__(self, service: str = 'xsigma'):
+        self.service = service
+        self.enabled = ENABLED_BY_ENV
+        self._spans: List[Dict[str, Any]] = []
+        self._stack: List[str] = []
+        self._origin = PROCESS_START
+
+    def start(self, service: Optional[str] = None, enabled: Optional[bool] = None,
+              since_process_start: bool = False) -> None:
+        """
+        Begin collecting a request.
+
+        Args:
+            service: Service name used in the trace
+            enabled: Request override of XSIGMA_TIMINGS
+            since_process_start: Measure from the process start (one-shot processes,
+                so the import stage is included) instead of from now
+        """
+        if service:
+            self.service = service
+        self.enabled = ENABLED_BY_ENV or bool(enabled)
+        self._spans = []
+        self._stack = []
+        self._origin = PROCESS_START if since_process_start else time.perf_counter()
+
+    def span(self, name: str, **args):
+        """Context manager timing one stage."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def timed(self, name: str):
+        """Decorator timing every call of a function as a ``name`` span."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Span(self, name, {}):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name: str, start: float, end: Optional[float] = None, **args) -> None:
+        """Add an already measured stage (perf_counter ``start``/``end``)."""
+        if self.enabled:
+            self._add(name, start, time.perf_counter() if end is None else end, len(self._stack), args)
+
+    def record_import(self) -> None:
+        """Record the process start up to now as the import stage."""
+        self.record('import', PROCESS_START)
+
+    def _add(self, name, start, end, depth, args) -> None:
+        self._spans.append({
+            'name': name,
+            'start_ms': round((start - self._origin) * 1000, 3),
+            'duration_ms': round((end - start) * 1000, 3),
+            'depth': depth,
+            **({'args': args} if args else {}),
+        })
+
+    def report(self) -> Optional[Dict[str, Any]]:
+        """``timings`` block of the response (None when disabled)."""
+        if not self.enabled:
+            return None
+        spans = sorted(self._spans, key=lambda span: (span['start_ms'], span['depth']))
+        totals: Dict[str, float] = {}
+        for span in spans:
+            totals[span['name']] = round(totals.get(span['name'], 0.0) + span['duration_ms'], 3)
+        top_level = [span for span in spans if span['depth'] == 0]
+        report = {
+            'total_ms': round(max((s['start_ms'] + s['duration_ms'] for s in top_level), default=0.0), 3),
+            'stages': totals,
+            'spans': spans,
+        }
+        if TRACE_DIR:
+            report['trace_file'] = self.write_trace(spans)
+        return report
+
+    def attach(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the ``timings`` block to a response envelope when timing is enabled."""
+        report = self.report()
+        if report is not None:
+            response['timings'] = report
+        return response
+
+    def dumps(self, response: Dict[str, Any], **kwargs) -> str:
+        """
+        Serialize a response envelope with the ``profile``, ``memory`` and
+        ``metrics`` blocks of the request and its ``timings`` added to it (a block
+        replaces a key of the same name). The timings are taken when the encoder
+        reaches them, last, so they include the 'serialize' span of the rest.
+        """
+        # Drained either way, so an unreported block does not grow across requests
+        drained = metrics.drain()
+        blocks = {'profile': profiler.stop(), 'memory': memory.stop(),
+                  'metrics': drained if metrics.reported else None}
+        envelope = dict(response)
+        envelope.update((key, value) for key, value in blocks.items() if value)
+        if not self.enabled:
+            return json.dumps(envelope, **kwargs)
+
+        serialize = self.span('serialize')
+        serialize.__enter__()
+        open_span = [serialize]
+
+        def report(value):
+            if value is not _TIMINGS:
+                raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+            open_span.pop().__exit__(None, None, None)
+            return self.report() or {}
+
+        envelope.pop('timings', None)
+        envelope['timings'] = _TIMINGS
+        try:
+            return json.dumps(envelope, default=report, **kwargs)
+        finally:
+            # Serialization failed before reaching the timings
+            if open_span:
+                open_span.pop().__exit__(None, None, None)
+
+    def write_trace(self, spans: List[Dict[str, Any]]) -> Optional[str]:
+        """Write the spans as Chrome trace events; returns the file path."""
+        pid = os.getpid()
+        tid = threading.get_ident() % 2 ** 31
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.service}}]
+        events += [{
+            'name': span['name'],
+            'cat': self.service,
+            'ph': 'X',
+            'ts': span['start_ms'] * 1000,
+            'dur': span['duration_ms'] * 1000,
+            'pid': pid,
+            'tid': tid,
+            'args': span.get('args', {}),
+        } for span in spans]
+        path = os.path.join(TRACE_DIR, f"{self.service}_{pid}_{time.time_ns()}.json")
+        try:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+            return path
+        except OSError as e:
+            print(f"PROGRESS: Could not write trace {path}: {e}", file=sys.stderr)
+            return None
+
+# Timer of this process
+timer = Timer()
+
+def summarize_trace(path: str) -> Dict[str, Any]:
+    """Per-stage totals of a Chrome trace written by ``write_trace``."""
+    with open(path) as f:
+        events = [event for event in json.load(f)['traceEvents'] if event.get('ph') == 'X']
+    totals: Dict[str, float] = {}
+    for event in events:
+        totals[event['name']] = totals.get(event['name'], 0.0) + event['dur'] / 1000
+    return {'trace': path, 'stages': {name: round(ms, 3) for name, ms in totals.items()}}
+
+def main():
+    """Main function to handle command line execution"""
+    parser = argparse.ArgumentParser(description='Stage timings of the Python services')
+    parser.add_argument('operation', choices=['summary'])
+    parser.add_argument('traces', nargs='+', help='Chrome trace files')
+    args = parser.parse_args()
+
+    try:
+        print(json.dumps({
+            'status': 'success',
+            'data': [summarize_trace(path) for path in args.traces],
+            'timestamp': str(np.datetime64('now'))
+        }, indent=2))
+    except Exception as e:
+        print(json.dumps({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': str(np.datetime64('now'))
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
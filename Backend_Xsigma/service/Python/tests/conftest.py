@@ -0,0 +1,6 @@
+"""Shared setup of the Python service tests: the service modules import each other by name."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,46 @@
+"""Fitting the cost model from service_benchmark reports."""
+
+import json
+
+import pytest
+
+import cost_model
+import service_benchmark
+
+def case(label, size, seconds, memory_mb, failures=0):
+    return {'service': 'TestHJM', 'label': label, 'size': size, 'runs': 3, 'failures': failures,
+            'warm': {'p50_ms': seconds * 1000}, 'peak_rss_mb': memory_mb}
+
+def test_fit_recovers_a_linear_cost():
+    report = {'cases': [case('test_2', size, 2 + 0.001 * size, 100 + 0.01 * size)
+                        for size in (1000, 2000, 4000)]}
+    entry = cost_model.fit([report])['models']['TestHJM:test_2']
+    assert entry['seconds'] == pytest.approx([2, 0.001])
+    assert entry['memory_mb'] == pytest.approx([100, 0.01])
+    assert entry['sizes'] == [1000, 4000]
+    assert entry['samples'] == 3
+
+def test_fit_never_extrapolates_below_small_sizes():
+    # A decreasing runtime is fitted as flat, a negative intercept through the origin
+    decreasing = cost_model._fit_line([1, 2, 3], [3.0, 2.0, 1.0])
+    assert decreasing == [2.0, 0.0]
+    intercept, slope = cost_model._fit_line([1, 2, 3], [1.0, 3.0, 5.0])
+    assert intercept == 0.0 and slope > 0
+
+def test_failed_cases_are_skipped():
+    report = {'cases': [case('test_1', 0, 20, 300), case('test_2', 1000, 99, 999, failures=3)]}
+    assert list(cost_model.fit([report])['models']) == ['TestHJM:test_1']
+
+def test_estimate_flags_extrapolation():
+    model = {'models': {'TestHJM:test_2': {'seconds': [2, 0.001], 'memory_mb': [100, 0.01],
+                                            'sizes': [1000, 4000]}}}
+    assert cost_model.estimate(model, 'TestHJM:test_2', 2000) == {
+        'model': 'TestHJM:test_2', 'size': 2000, 'seconds': 4.0, 'memory_mb': 120.0,
+        'extrapolated': False}
+    assert cost_model.estimate(model, 'TestHJM:test_2', 8000)['extrapolated'] is True
+
+def test_hartman_watson_cases_record_the_backend_driver():
+    for benchmark_case in service_benchmark.build_cases(['HartmanWatsonDistribution'], [100], []):
+        parameters = json.loads(benchmark_case['argv'][2])
+        # costModel.js: n * size_roots / 32
+        assert benchmark_case['size'] == parameters['n'] * parameters['size_roots'] / 32
@@ -0,0 +1,136 @@
+"""Curve dependencies, quote changes and multi-currency build plan of the curve calibration service."""
+
+import pytest
+
+from service_framework import ConfigurationError
+from curve_plan import (
+    CURVES, apply_quote_changes, critical_path, dependents_of, market_quotes, plan_levels,
+)
+
+def test_curves_are_listed_after_their_dependencies():
+    seen = set()
+    for name, spec in CURVES.items():
+        assert set(spec['depends_on']) <= seen
+        seen.add(name)
+
+def test_overnight_change_invalidates_its_dependents():
+    assert dependents_of(['USD.SOFR.1b']) == [
+        'USD.SOFR.1b', 'USD.SOFR.3m', 'EUR.XCCY.USD.SOFR.1b', 'USD.US.CPI',
+    ]
+
+@pytest.mark.parametrize('names,expected', [
+    (['EUR.ESTR.1b'], ['EUR.ESTR.1b', 'EUR.XCCY.USD.SOFR.1b']),
+    (['USD.US.CPI'], ['USD.US.CPI']),
+    (['USD.US.CPI', 'USD.SOFR.3m'], ['USD.SOFR.3m', 'USD.US.CPI']),
+    ([], []),
+])
+def test_dependents_are_returned_in_calibration_order(names, expected):
+    assert dependents_of(names) == expected
+
+@pytest.fixture
+def quotes():
+    return {
+        'USD.SOFR.1b': {'IRSWAP_RFR_3M': (['IRSWAP_1y', 'IRSWAP_2y'], [0.042, 0.041])},
+        'EUR.ESTR.1b': {'IRSWAP_RFR_3M': (['IRSWAP_1y', 'IRSWAP_2y'], [0.025, 0.024])},
+    }
+
+def test_quote_change_accepts_tenor_with_or_without_prefix(quotes):
+    updated, changed = apply_quote_changes(quotes, [
+        {'curve': 'USD.SOFR.1b', 'instrument': 'IRSWAP_RFR_3M', 'tenor': '2y', 'value': 0.05},
+        {'curve': 'EUR.ESTR.1b', 'instrument': 'IRSWAP_RFR_3M', 'tenor': 'IRSWAP_1y', 'value': '0.03'},
+        {'curve': 'USD.SOFR.1b', 'instrument': 'IRSWAP_RFR_3M', 'tenor': '1y', 'value': 0.043},
+    ])
+    assert changed == ['USD.SOFR.1b', 'EUR.ESTR.1b']
+    assert updated['USD.SOFR.1b']['IRSWAP_RFR_3M'][1] == [0.043, 0.05]
+    assert updated['EUR.ESTR.1b']['IRSWAP_RFR_3M'][1] == [0.03, 0.024]
+    assert quotes['USD.SOFR.1b']['IRSWAP_RFR_3M'][1] == [0.042, 0.041]
+
+def test_unchanged_quote_is_not_reported(quotes):
+    change = {'curve': 'USD.SOFR.1b', 'instrument': 'IRSWAP_RFR_3M', 'tenor': '1y', 'value': 0.042}
+    assert apply_quote_changes(quotes, [change])[1] == []
+
+@pytest.mark.parametrize('change', [
+    {'curve': 'GBP.SONIA.1b', 'instrument': 'IRSWAP_RFR_3M', 'tenor': '1y', 'value': 0.04},
+    {'curve': 'USD.SOFR.1b', 'instrument': 'DEPOSIT_RFR', 'tenor': '1y', 'value': 0.04},
+    {'curve': 'USD.SOFR.1b', 'instrument': 'IRSWAP_RFR_3M', 'tenor': '30y', 'value': 0.04},
+    {'curve': 'USD.SOFR.1b', 'instrument': 'IRSWAP_RFR_3M', 'tenor': '1y', 'value': 'high'},
+    {'curve': 'USD.SOFR.1b', 'instrument': 'IRSWAP_RFR_3M', 'tenor': '1y'},
+])
+def test_invalid_quote_change_is_rejected(quotes, change):
+    with pytest.raises(ConfigurationError):
+        apply_quote_changes(quotes, [change])
+
+def test_batch_with_a_later_invalid_change_applies_nothing(quotes):
+    valid = {'curve': 'USD.SOFR.1b', 'instrument': 'IRSWAP_RFR_3M', 'tenor': '2y', 'value': 0.05}
+    invalid = {'curve': 'USD.SOFR.1b', 'instrument': 'IRSWAP_RFR_3M', 'tenor': '30y', 'value': 0.04}
+    with pytest.raises(ConfigurationError):
+        apply_quote_changes(quotes, [valid, invalid])
+    assert quotes['USD.SOFR.1b']['IRSWAP_RFR_3M'][1] == [0.042, 0.041]
+    # A retry of the valid change still sees it as a change
+    assert apply_quote_changes(quotes, [valid])[1] == ['USD.SOFR.1b']
+
+def test_plan_levels_of_the_notebook_curves():
+    assert plan_levels(CURVES) == [
+        ['USD.SOFR.1b', 'EUR.ESTR.1b'],
+        ['USD.SOFR.3m', 'EUR.XCCY.USD.SOFR.1b', 'USD.US.CPI'],
+    ]
+
+@pytest.mark.parametrize('nodes', [
+    {'A': {'depends_on': ['B']}, 'B': {'depends_on': ['A']}},
+    {'A': {'depends_on': ['missing']}},
+])
+def test_plan_levels_rejects_cyclic_or_missing_dependencies(nodes):
+    with pytest.raises(ConfigurationError):
+        plan_levels(nodes)
+
+def test_critical_path_follows_the_slowest_chain():
+    nodes = {
+        'USD': {'depends_on': []},
+        'EUR': {'depends_on': []},
+        'GBP': {'depends_on': []},
+        'EUR.XCCY': {'depends_on': ['USD', 'EUR']},
+        'GBP.XCCY': {'depends_on': ['USD', 'GBP']},
+    }
+    timings = {
+        'USD': {'calibration_time': 1.0},
+        'EUR': {'calibration_time': 3.0},
+        'GBP': {'calibration_time': 0.5},
+        'EUR.XCCY': {'calibration_time': 2.0},
+        'GBP.XCCY': {'calibration_time': None},
+    }
+    assert critical_path(nodes, timings) == {'curves': ['EUR', 'EUR.XCCY'], 'time': 5.0}
+
+def test_critical_path_of_no_curves():
+    assert critical_path({}, {}) == {'curves': [], 'time': 0.0}
+
+@pytest.fixture
+def market_nodes():
+    return {
+        'USD.SOFR.1b': CURVES['USD.SOFR.1b'],
+        'GBP.SONIA.1b': {'type': 'rates', 'ccy': 'GBP', 'index': 'SONIA', 'tenor': '1b', 'base': 'GBP',
+                         'depends_on': []},
+    }
+
+def test_market_quotes_reject_a_curve_without_quotes(quotes, market_nodes):
+    with pytest.raises(ConfigurationError, match='GBP.SONIA.1b'):
+        market_quotes(market_nodes, None, {'rates': quotes['USD.SOFR.1b']})
+
+def test_market_quotes_tag_borrowed_quotes_as_synthetic(quotes, market_nodes):
+    _, sources = market_quotes(market_nodes, None, {'rates': quotes['USD.SOFR.1b']}, synthetic=True)
+    assert sources == {'USD.SOFR.1b': 'notebook', 'GBP.SONIA.1b': 'synthetic'}
+
+def test_market_quotes_use_the_supplied_quotes(quotes, market_nodes):
+    supplied = {'GBP.SONIA.1b': {'IRSWAP_RFR_3M': {'tenors': ['IRSWAP_1y'], 'values': ['0.039']}}}
+    built, sources = market_quotes(market_nodes, supplied, {'rates': quotes['USD.SOFR.1b']})
+    assert sources['GBP.SONIA.1b'] == 'request'
+    assert built['GBP.SONIA.1b'] == {'IRSWAP_RFR_3M': (['IRSWAP_1y'], [0.039])}
+
+@pytest.mark.parametrize('supplied', [
+    {'JPY.TONA.1b': {'IRSWAP_RFR_3M': {'tenors': ['IRSWAP_1y'], 'values': [0.01]}}},
+    {'GBP.SONIA.1b': {'FRA': {'tenors': ['FRA_1y'], 'values': [0.01]}}},
+    {'GBP.SONIA.1b': {'IRSWAP_RFR_3M': {'tenors': ['IRSWAP_1y', 'IRSWAP_2y'], 'values': [0.01]}}},
+    {'GBP.SONIA.1b': {'IRSWAP_RFR_3M': {'tenors': ['IRSWAP_1y']}}},
+])
+def test_market_quotes_reject_malformed_supplied_quotes(quotes, market_nodes, supplied):
+    with pytest.raises(ConfigurationError):
+        market_quotes(market_nodes, supplied, {'rates': quotes['USD.SOFR.1b']})
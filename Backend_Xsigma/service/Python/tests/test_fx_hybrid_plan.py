@@ -0,0 +1,34 @@
+"""Path shard plan and FX variance targets of the FX-rates hybrid service."""
+
+import numpy as np
+import pytest
+
+from service_framework import ConfigurationError
+from fx_hybrid_plan import market_variance_targets, plan_shards
+
+@pytest.mark.parametrize('num_paths,num_shards,expected', [
+    (8, 4, [2, 2, 2, 2]),
+    (10, 4, [3, 3, 2, 2]),
+    (3, 8, [1, 1, 1]),
+    (5, 0, [5]),
+    (5, -2, [5]),
+])
+def test_plan_shards(num_paths, num_shards, expected):
+    assert plan_shards(num_paths, num_shards) == expected
+
+def test_plan_shards_covers_every_path():
+    sizes = plan_shards(524288 + 7, 12)
+    assert sum(sizes) == 524288 + 7
+    assert max(sizes) - min(sizes) <= 1
+
+def test_flat_volatility_targets():
+    targets = market_variance_targets([0.0, 0.5, 2.0], 0.2)
+    np.testing.assert_allclose(targets, [0.0, 0.02, 0.08])
+
+def test_per_date_volatility_targets():
+    targets = market_variance_targets([1.0, 2.0], [0.1, 0.3])
+    np.testing.assert_allclose(targets, [0.01, 0.18])
+
+def test_volatility_list_must_match_the_dates():
+    with pytest.raises(ConfigurationError):
+        market_variance_targets([0.5, 1.0, 2.0], [0.2, 0.3])
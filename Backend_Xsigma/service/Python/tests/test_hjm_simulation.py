@@ -0,0 +1,145 @@
+"""Simulation grid, dataset selection, batch-means statistics and checkpoint fingerprints
+of the HJM service."""
+
+import numpy as np
+import pytest
+
+from service_framework import ConfigurationError
+from hjm_simulation import (
+    DEFAULT_RANDOM_SEED,
+    BatchMeansAccumulator,
+    checkpoint_fingerprint,
+    parse_dataset_selection,
+    simulation_grid,
+)
+
+EXPIRIES = [1.0, 2.0, 5.0, 10.0, 20.0]
+
+def test_default_grid_is_the_notebook_grid():
+    assert simulation_grid({}, EXPIRIES) == {
+        'frequency': '3M', 'steps': 120, 'horizon_years': 30.0, 'num_expiries': 5,
+    }
+
+def test_max_expiry_implies_an_auto_horizon():
+    grid = simulation_grid({'max_expiry': 5, 'simulation_frequency': '1m'}, EXPIRIES)
+    assert grid == {'frequency': '1M', 'steps': 60, 'horizon_years': 5.0, 'num_expiries': 3}
+
+def test_horizon_rounds_up_to_whole_steps():
+    grid = simulation_grid({'simulation_horizon': 20.1, 'simulation_frequency': '1Y'}, EXPIRIES)
+    assert grid['steps'] == 21
+    assert grid['horizon_years'] == 21.0
+
+def test_auto_horizon_covers_every_expiry():
+    grid = simulation_grid({'simulation_horizon': 'auto', 'simulation_frequency': '6M'}, [0.25, 1.3])
+    assert grid['steps'] == 3
+    assert grid['num_expiries'] == 2
+
+@pytest.mark.parametrize('params', [
+    {'simulation_frequency': '2W'},
+    {'max_expiry': 0.5},
+    {'simulation_horizon': 0},
+    {'simulation_horizon': 10},
+    {'max_expiry': 10, 'simulation_horizon': 5},
+])
+def test_invalid_grid_is_rejected(params):
+    with pytest.raises(ConfigurationError):
+        simulation_grid(params, EXPIRIES)
+
+@pytest.mark.parametrize('selection', [None, 'default'])
+def test_default_selection_is_zero_padded(selection):
+    assert parse_dataset_selection(selection, 2) == [0, 1, 2, 3]
+
+def test_all_selects_every_dataset():
+    assert parse_dataset_selection('all', 6) == [0, 1, 2, 3, 4, 5]
+
+def test_string_selection_with_ranges():
+    assert parse_dataset_selection(' 1, 3,5-7 ', 8) == [0, 2, 4, 5, 6]
+
+def test_list_selection_drops_duplicates_in_order():
+    assert parse_dataset_selection([3, '1', 3], 4) == [2, 0]
+
+@pytest.mark.parametrize('selection', ['0', '5', '2-5', [1, 9], '', 'one', '1-x'])
+def test_invalid_selection_is_rejected(selection):
+    with pytest.raises(ConfigurationError):
+        parse_dataset_selection(selection, 4)
+
+def test_mean_is_weighted_by_paths():
+    accumulator = BatchMeansAccumulator()
+    accumulator.add(np.array([1.0, 2.0]), 300)
+    accumulator.add(np.array([3.0, 6.0]), 100)
+    assert accumulator.num_batches == 2
+    assert accumulator.num_paths == 400
+    np.testing.assert_allclose(accumulator.mean(), [1.5, 3.0])
+
+def test_standard_error_is_infinite_before_two_batches():
+    accumulator = BatchMeansAccumulator()
+    accumulator.add(np.array([1.0, 2.0]), 100)
+    assert np.all(np.isinf(accumulator.standard_error()))
+
+def test_standard_error_of_equal_batches():
+    estimates = [0.5, 1.5, 1.0, 2.0]
+    accumulator = BatchMeansAccumulator()
+    for x in estimates:
+        accumulator.add(np.array([x]), 50)
+    expected = np.std(estimates, ddof=1) / np.sqrt(len(estimates))
+    np.testing.assert_allclose(accumulator.standard_error(), [expected])
+
+def test_identical_batches_have_zero_error():
+    accumulator = BatchMeansAccumulator()
+    for paths in (100, 100, 40):
+        accumulator.add(np.array([[0.2, 0.3]]), paths)
+    np.testing.assert_allclose(accumulator.standard_error(), [[0.0, 0.0]], atol=1e-6)
+
+def test_round_trip_through_dict():
+    accumulator = BatchMeansAccumulator()
+    accumulator.add(np.array([[1.0, 2.0], [3.0, 4.0]]), 64)
+    accumulator.add(np.array([[1.5, 2.5], [2.0, 5.0]]), 32)
+    restored = BatchMeansAccumulator.from_dict(accumulator.to_dict())
+    assert restored.num_batches == 2 and restored.num_paths == 96
+    np.testing.assert_allclose(restored.mean(), accumulator.mean())
+    np.testing.assert_allclose(restored.standard_error(), accumulator.standard_error())
+
+def test_empty_accumulator_round_trip():
+    restored = BatchMeansAccumulator.from_dict(BatchMeansAccumulator().to_dict())
+    assert restored.num_batches == 0
+    assert restored.sum_wx is None
+    restored.add(np.array([1.0]), 10)
+    assert restored.mean() == pytest.approx([1.0])
+
+def fingerprint(params):
+    return checkpoint_fingerprint(params, simulation_grid(params, EXPIRIES))
+
+def test_fingerprint_ignores_stopping_parameters():
+    params = {'batch_paths': 4096, 'seed': 7, 'simulation_frequency': '1M'}
+    resumed = dict(params, max_paths=1 << 20, time_budget=30, tolerance=0.05)
+    assert fingerprint(resumed) == fingerprint(params)
+
+@pytest.mark.parametrize('change', [
+    {'batch_paths': 8192},
+    {'seed': 8},
+    {'simulation_frequency': '6M'},
+    {'simulation_horizon': 'auto'},
+    {'max_expiry': 10},
+])
+def test_fingerprint_changes_with_the_estimate(change):
+    params = {'batch_paths': 4096, 'seed': 7, 'simulation_frequency': '1M'}
+    assert fingerprint(dict(params, **change)) != fingerprint(params)
+
+@pytest.mark.parametrize('params,equivalent', [
+    ({'batch_paths': 65536, 'num_paths': 4096}, {'batch_paths': 4096, 'num_paths': 4096}),
+    ({'simulation_frequency': '1m'}, {'simulation_frequency': '1M'}),
+    ({}, {'simulation_frequency': '3M'}),
+    ({'simulation_horizon': '10', 'max_expiry': 5}, {'simulation_horizon': 10.0, 'max_expiry': 5.0}),
+    # Spellings of one resolved grid
+    ({}, {'simulation_horizon': 30}),
+    ({'max_expiry': 5}, {'max_expiry': 5, 'simulation_horizon': 'auto'}),
+    ({'max_expiry': 5}, {'max_expiry': 6, 'simulation_horizon': 5}),
+    ({'simulation_horizon': 'auto'}, {'simulation_horizon': 20}),
+])
+def test_fingerprint_normalises_equivalent_requests(params, equivalent):
+    assert fingerprint(params) == fingerprint(equivalent)
+
+def test_fingerprint_applies_defaults():
+    explicit = {'batch_paths': 65536, 'seed': DEFAULT_RANDOM_SEED}
+    assert fingerprint({}) == fingerprint(explicit)
+    assert fingerprint({'seed': str(DEFAULT_RANDOM_SEED)}) == fingerprint({})
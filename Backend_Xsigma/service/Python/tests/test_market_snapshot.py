@@ -0,0 +1,49 @@
+"""Snapshot round trip, integrity checks and the private snapshot directory."""
+
+import json
+import os
+
+import pytest
+
+import market_snapshot
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.setattr(market_snapshot, 'SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
+    path = tmp_path / 'market.json'
+    path.write_text(json.dumps({'dates': [0.5, 1.0], 'curve': {'rate': 0.03}}, indent=2))
+    return str(path)
+
+def digest_of(path):
+    with open(path, 'rb') as f:
+        return market_snapshot.source_digest(f.read())
+
+def test_document_round_trip(source):
+    info = market_snapshot.build_snapshot(source)
+    assert oct(os.stat(os.path.dirname(info['snapshot'])).st_mode & 0o777) == '0o700'
+    assert market_snapshot.load_market_dict(source, auto_build=False) == {
+        'dates': [0.5, 1.0], 'curve': {'rate': 0.03}}
+
+def test_corrupt_payload_is_rejected(source):
+    info = market_snapshot.build_snapshot(source)
+    with open(info['snapshot'], 'rb') as f:
+        payload = bytearray(f.read())
+    payload[-2] ^= 0xFF
+    with pytest.raises(market_snapshot.SnapshotError):
+        market_snapshot.decode(bytes(payload), digest_of(source))
+
+def test_snapshot_of_another_source_is_rejected(source):
+    info = market_snapshot.build_snapshot(source)
+    with open(info['snapshot'], 'rb') as f:
+        payload = f.read()
+    with pytest.raises(market_snapshot.SnapshotError):
+        market_snapshot.decode(payload, b'\1' * 32)
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='POSIX permissions')
+def test_shared_directory_is_not_used(source):
+    os.makedirs(market_snapshot.SNAPSHOT_DIR)
+    os.chmod(market_snapshot.SNAPSHOT_DIR, 0o777)
+    with pytest.raises(market_snapshot.SnapshotError):
+        market_snapshot.snapshot_path(source, digest_of(source))
+    # Loads still work, from the JSON
+    assert market_snapshot.load_market_dict(source)['curve'] == {'rate': 0.03}
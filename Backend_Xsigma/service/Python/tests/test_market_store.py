@@ -0,0 +1,82 @@
+"""Shared-memory publication of market documents across processes."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import market_store
+
+pytestmark = pytest.mark.skipif(
+    market_store._posixshmem is None or not os.path.isdir(market_store.SHM_DIR),
+    reason='POSIX shared memory not available')
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def market(tmp_path, monkeypatch):
+    # A unique document per test, so segments never collide between runs
+    path = tmp_path / 'market.json'
+    path.write_text(json.dumps({'test': str(tmp_path), 'rates': [0.01, 0.02]}))
+    monkeypatch.setattr(market_store, '_DOCUMENTS', {})
+    store = market_store.MarketStore(roots=[str(tmp_path)])
+    yield store
+    market_store.sweep(0)
+
+def load_in_subprocess(root):
+    script = (
+        'import json, sys, market_store\n'
+        'store = market_store.MarketStore(roots=[sys.argv[1]])\n'
+        'digest = store.blob("market.json")["digest"]\n'
+        'print(json.dumps(market_store._attach(digest)))\n'
+    )
+    out = subprocess.run([sys.executable, '-c', script, root], cwd=HERE,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+def segment_path(store):
+    return os.path.join(market_store.SHM_DIR, market_store.segment_name(store.blob('market.json')['digest']))
+
+def test_segment_outlives_publisher(market):
+    root = market.roots[0]
+    script = (
+        'import sys, market_store\n'
+        'market_store.MarketStore(roots=[sys.argv[1]]).get_document("market.json")\n'
+    )
+    subprocess.run([sys.executable, '-c', script, root], cwd=HERE, check=True)
+    assert load_in_subprocess(root)['rates'] == [0.01, 0.02]
+
+def test_tampered_segment_is_ignored(market):
+    market.get_document('market.json')
+    with open(segment_path(market), 'r+b') as f:
+        data = bytearray(f.read())
+        data[-2] ^= 0xFF
+        f.seek(0)
+        f.write(data)
+    assert market_store._attach(market.blob('market.json')['digest']) is None
+
+def test_writable_segment_is_ignored(market):
+    market.get_document('market.json')
+    os.chmod(segment_path(market), 0o622)
+    assert market_store._attach(market.blob('market.json')['digest']) is None
+
+def test_sweep_removes_unused_segments(market):
+    market.get_document('market.json')
+    path = segment_path(market)
+    assert os.path.basename(path) not in market_store.sweep()
+    os.utime(path, (0, 0))
+    assert os.path.basename(path) in market_store.sweep()
+    assert not os.path.exists(path)
+
+def test_namespaced_segments_are_swept_apart(market, monkeypatch):
+    market.get_document('market.json')
+    shared = segment_path(market)
+    monkeypatch.setattr(market_store, 'SEGMENT_NAMESPACE', 'benchtest')
+    monkeypatch.setattr(market_store, '_DOCUMENTS', {})
+    market.get_document('market.json')
+    namespaced = segment_path(market)
+    assert namespaced != shared
+    assert market_store.sweep(0, 'benchtest') == [os.path.basename(namespaced)]
+    assert os.path.exists(shared)
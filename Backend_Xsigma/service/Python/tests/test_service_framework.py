@@ -0,0 +1,100 @@
+"""Parameter schemas and request dispatch of the shared service framework."""
+
+import json
+
+import pytest
+
+from service_framework import Param, ParameterError, Response, Service, parse_params
+
+SCHEMA = {
+    'n': Param(int, default=200, minimum=1, maximum=1000),
+    'model': Param(str, default='svi', choices=['svi', 'extended_svi']),
+    'use_aad': Param(bool, default=True),
+    'volatility': Param(float),
+}
+
+def test_defaults_fill_missing_and_null_parameters():
+    parsed = parse_params(SCHEMA, {'model': None, 'extra': 'kept'})
+    assert parsed == {'n': 200, 'model': 'svi', 'use_aad': True, 'extra': 'kept'}
+
+def test_values_are_converted_to_the_schema_types():
+    parsed = parse_params(SCHEMA, {'n': '50', 'use_aad': 'off', 'volatility': '0.25'})
+    assert parsed['n'] == 50
+    assert parsed['use_aad'] is False
+    assert parsed['volatility'] == 0.25
+
+@pytest.mark.parametrize('value,expected', [
+    ('1', True), ('TRUE', True), ('yes', True), ('on', True),
+    ('0', False), ('false', False), ('', False), (1, True), (0, False),
+])
+def test_bool_parsing(value, expected):
+    assert Param(bool).parse('flag', value) is expected
+
+@pytest.mark.parametrize('params,message', [
+    ({'n': 'many'}, 'n must be of type int'),
+    ({'n': 0}, 'n must be at least 1'),
+    ({'n': 1001}, 'n must be at most 1000'),
+    ({'model': 'sabr'}, 'model must be one of svi, extended_svi'),
+])
+def test_invalid_parameters_are_rejected(params, message):
+    with pytest.raises(ParameterError, match=message):
+        parse_params(SCHEMA, params)
+
+def test_required_parameter():
+    schema = {'curve': Param(str, required=True)}
+    with pytest.raises(ParameterError, match='curve is required'):
+        parse_params(schema, {})
+    assert parse_params(schema, {'curve': 'USD.SOFR.1b'}) == {'curve': 'USD.SOFR.1b'}
+
+def test_param_description():
+    assert SCHEMA['n'].describe() == {'type': 'int', 'minimum': 1, 'maximum': 1000, 'default': 200}
+    assert Param(str, required=True, help='Curve name').describe() == {
+        'type': 'str', 'help': 'Curve name', 'required': True,
+    }
+
+service = Service('FrameworkTest')
+
+@service.operation('scale', schema={'x': Param(float, required=True), 'factor': Param(float, default=2.0)})
+def scale(params):
+    """Multiply x by factor"""
+    return Response({'value': params['x'] * params['factor']}, cache_hit=False)
+
+def request(operation, **params):
+    text, stop = service._reply(json.dumps({'id': 3, 'operation': operation, 'params': params}))
+    assert not stop
+    return json.loads(text)
+
+def test_handler_receives_parsed_parameters():
+    response = request('scale', x='1.5')
+    assert response['id'] == 3
+    assert response['status'] == 'success'
+    assert response['data'] == {'value': 3.0}
+    assert response['cache_hit'] is False
+
+def test_parameter_error_fails_the_request():
+    response = request('scale', x=1, factor='double')
+    assert response['status'] == 'error'
+    assert response['error_type'] == 'ParameterError'
+    assert 'factor must be of type float' in response['error']
+
+def test_unknown_operation():
+    response = request('rotate')
+    assert response['error_type'] == 'ParameterError'
+    assert 'Available operations: health_check, scale' in response['error']
+
+def test_health_check_and_description():
+    assert request('health_check')['data']['operations'] == ['health_check', 'scale']
+    description = service.describe()
+    assert description['operations']['scale'] == {
+        'description': 'Multiply x by factor',
+        'parameters': {'x': {'type': 'float', 'required': True}, 'factor': {'type': 'float', 'default': 2.0}},
+    }
+
+def test_invalid_request_line_and_shutdown():
+    text, stop = service._reply('not json')
+    assert not stop
+    assert json.loads(text)['status'] == 'error'
+    assert service._reply('   ') is None
+    text, stop = service._reply(json.dumps({'id': 9, 'operation': 'shutdown'}))
+    assert stop
+    assert json.loads(text) == {'id': 9, 'status': 'success', 'data': {'shutdown': True}}
@@ -0,0 +1,61 @@
+"""Memory ceiling of a persistent worker: the offending request fails, then the worker stops."""
+
+import json
+import time
+import cProfile
+
+import pytest
+
+from service_framework import Service
+from service_memory import current_rss_mb
+
+pytestmark = pytest.mark.skipif(current_rss_mb() is None, reason='RSS not available')
+
+service = Service('MemoryTest')
+
+@service.operation('allocate')
+def allocate(params):
+    """Grow the RSS by up to ``mb`` megabytes"""
+    blocks = []
+    for _ in range(int(params['mb'])):
+        blocks.append(bytearray(1024 * 1024))
+        time.sleep(0.002)
+    return {'allocated_mb': len(blocks)}
+
+@service.operation('swallow')
+def swallow(params):
+    """Catch every exception of the allocation, as some handlers do"""
+    try:
+        return allocate(params)
+    except Exception:
+        return {'allocated_mb': 0}
+
+def request(operation, **params):
+    text, stop = service._reply(json.dumps({'id': 7, 'operation': operation, 'params': params}))
+    response = json.loads(text)
+    assert stop == (response.get('error_type') == 'MemoryLimitExceeded')
+    return response
+
+@pytest.mark.parametrize('operation', ['allocate', 'swallow'])
+def test_over_limit_request_fails_and_stops_the_worker(operation):
+    response = request(operation, mb=512, memory_limit_mb=64)
+    assert response['id'] == 7
+    assert response['status'] == 'error'
+    assert response['error_type'] == 'MemoryLimitExceeded'
+    assert response['memory']['limit_exceeded'] is True
+    assert response['memory']['limit_scope'] == 'request'
+
+def test_limit_counts_growth_over_the_request_start():
+    resident = [bytearray(1024 * 1024) for _ in range(96)]
+    response = request('allocate', mb=16, memory_limit_mb=64)
+    assert response['status'] == 'success'
+    assert response['memory']['limit_exceeded'] is False
+    assert len(resident) == 96
+
+def test_profiling_after_an_interrupted_request():
+    request('allocate', mb=512, memory_limit_mb=64)
+    profile = cProfile.Profile()
+    profile.enable()
+    response = request('allocate', mb=1)
+    profile.disable()
+    assert response['status'] == 'success'
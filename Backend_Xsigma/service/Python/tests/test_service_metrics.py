@@ -0,0 +1,43 @@
+"""Metrics registry, its Prometheus rendering and when responses carry it."""
+
+import json
+
+import pytest
+
+from service_metrics import Metrics, metrics, render
+from service_timing import Timer
+
+def test_render_counters_gauges_and_histograms():
+    registry = Metrics()
+    registry.record_calibration('hjm', 'builtin', 0.3, iterations=40)
+    registry.record_calibration('hjm', 'builtin', 7.0, ok=False)
+    registry.record_paths(1000, 2.0)
+    block = registry.drain()
+    text = render(block)
+
+    assert 'xsigma_python_calibrations_total{model="hjm",outcome="success",solver="builtin"} 1' in text
+    assert 'xsigma_python_mc_paths_per_second 500' in text
+    # Histogram buckets are cumulative and end with +Inf
+    assert 'xsigma_python_calibration_duration_seconds_bucket{model="hjm",solver="builtin",le="0.25"} 0' in text
+    assert 'xsigma_python_calibration_duration_seconds_bucket{model="hjm",solver="builtin",le="0.5"} 1' in text
+    assert 'xsigma_python_calibration_duration_seconds_bucket{model="hjm",solver="builtin",le="+Inf"} 2' in text
+    assert 'xsigma_python_calibration_duration_seconds_count{model="hjm",solver="builtin"} 2' in text
+    assert '# TYPE xsigma_python_calibration_iterations histogram' in text
+    # The registry starts over after a drain
+    assert 'xsigma_python_calibrations_total' not in registry.drain()
+
+def test_kind_mismatch_is_rejected():
+    with pytest.raises(ValueError):
+        Metrics().set('xsigma_python_mc_paths_total', 1)
+
+@pytest.mark.parametrize('requested, reported', [(None, False), (True, True), ('true', True)])
+def test_metrics_block_only_when_asked_for(monkeypatch, requested, reported):
+    monkeypatch.setattr('service_metrics.REPORTED_BY_ENV', False)
+    timer = Timer()
+    timer.start('MetricsTest', False)
+    metrics.start(requested)
+    metrics.record_cache('test', True)
+    response = json.loads(timer.dumps({'status': 'success', 'data': None}))
+    assert ('metrics' in response) is reported
+    # Drained either way
+    assert 'xsigma_python_cache_requests_total' not in metrics.drain()
@@ -0,0 +1,41 @@
+"""Profile files of profiled requests stay inside the profile directory."""
+
+import os
+
+import pytest
+
+import service_profiling
+from service_profiling import Profiler
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'profiles'
+    monkeypatch.setattr(service_profiling, 'PROFILE_DIR', str(directory))
+    return directory
+
+def profile(request_id, mode='cprofile'):
+    profiler = Profiler()
+    profiler.start('ProfileTest', mode, request_id)
+    sum(range(1000))
+    return profiler.stop()
+
+@pytest.mark.parametrize('mode,extension', [('cprofile', 'pstats'), ('sampling', 'collapsed')])
+def test_plain_request_id_names_the_file(profile_dir, mode, extension):
+    block = profile('calibration-42_a', mode)
+    assert block['request_id'] == 'calibration-42_a'
+    assert block['file'] == os.path.join(os.path.realpath(profile_dir), f'calibration-42_a.{extension}')
+    assert os.path.exists(block['file'])
+
+@pytest.mark.parametrize('request_id', ['../../x', '/tmp/x', 'a/b', '..', 'x' * 65, '', 'id with spaces'])
+def test_unsafe_request_id_is_replaced(profile_dir, tmp_path, request_id):
+    block = profile(request_id)
+    assert block['request_id'].startswith('ProfileTest_')
+    assert os.path.dirname(block['file']) == os.path.realpath(profile_dir)
+    assert sorted(os.listdir(tmp_path)) == ['profiles']
+
+def test_missing_request_id_is_generated(profile_dir):
+    first = Profiler()
+    first.start('ProfileTest', True)
+    block = first.stop()
+    assert block['request_id'].startswith('ProfileTest_')
+    assert os.path.exists(block['file'])
@@ -0,0 +1,37 @@
+"""Serialization of a response envelope with its diagnostics blocks."""
+
+import json
+
+import pytest
+
+from service_metrics import metrics
+from service_timing import Timer
+
+@pytest.fixture
+def timer():
+    timer = Timer()
+    timer.start('TimingTest', True)
+    metrics.start(True)
+    return timer
+
+def test_blocks_are_added_once(timer):
+    with timer.span('evaluate'):
+        pass
+    text = timer.dumps({'status': 'success', 'data': [1, 2], 'timings': 'stale', 'metrics': 'stale'})
+    response = json.loads(text)
+    assert text.count('"timings"') == 1 and text.count('"metrics"') == 1
+    assert response['data'] == [1, 2]
+    assert response['metrics'] != 'stale'
+    # The timings are serialized last, so they cover the serialization of the rest
+    assert list(response)[-1] == 'timings'
+    assert set(response['timings']['stages']) == {'evaluate', 'serialize'}
+
+def test_disabled_timer_adds_no_timings():
+    timer = Timer()
+    timer.start('TimingTest', False)
+    assert 'timings' not in json.loads(timer.dumps({'status': 'success', 'data': None}))
+
+def test_unserializable_data_still_raises(timer):
+    with pytest.raises(TypeError):
+        timer.dumps({'status': 'success', 'data': object()})
+    assert timer._stack == []
@@ -11,6 +11,8 @@
 
 const { createSuccessResponse } = require('./utils/errorHandler');
 const pythonExecutor = require('./utils/pythonExecutor');
+const { extractDiagnostics } = require('./utils/diagnostics');
+const costModel = require('./utils/costModel');
 const cacheService = require('./utils/cacheService');
 
 // Test case configurations
@@ -34,6 +36,12 @@ const TEST_CASES = {
   }
 };
 
+// Simulation time steps supported by the Python service
+const SIMULATION_FREQUENCIES = ['1M', '3M', '6M', '1Y'];
+
+// How the AAD and standard calibrations of test 1 are run
+const CALIBRATION_MODES = ['sequential', 'parallel', 'fast'];
+
 // Default parameters
 const DEFAULT_PARAMS = {
   test: 1,
@@ -70,9 +78,142 @@ function extractParameters(query) {
     }
   }
 
+  if (query.calibration_mode !== undefined) {
+    if (!CALIBRATION_MODES.includes(query.calibration_mode)) {
+      throw new Error(`Invalid calibration_mode: ${query.calibration_mode}. Valid options: ${CALIBRATION_MODES.join(', ')}`);
+    }
+    params.calibration_mode = query.calibration_mode;
+  }
+
+  // Simulation date grid (test 2)
+  if (query.simulation_frequency !== undefined) {
+    params.simulation_frequency = String(query.simulation_frequency).toUpperCase();
+    if (!SIMULATION_FREQUENCIES.includes(params.simulation_frequency)) {
+      throw new Error(`Invalid simulation_frequency: ${query.simulation_frequency}. Valid options: ${SIMULATION_FREQUENCIES.join(', ')}`);
+    }
+  }
+
+  if (query.simulation_horizon !== undefined) {
+    if (query.simulation_horizon === 'auto') {
+      params.simulation_horizon = 'auto';
+    } else {
+      params.simulation_horizon = parseFloat(query.simulation_horizon);
+      if (!(params.simulation_horizon > 0 && params.simulation_horizon <= 100)) {
+        throw new Error("simulation_horizon must be 'auto' or a number of years between 0 and 100");
+      }
+    }
+  }
+
+  if (query.max_expiry !== undefined) {
+    params.max_expiry = parseFloat(query.max_expiry);
+    if (!(params.max_expiry > 0)) {
+      throw new Error('max_expiry must be a positive number of years');
+    }
+  }
+
+  // Subset of volatility datasets to return (test 2)
+  if (query.datasets !== undefined) {
+    params.datasets = String(query.datasets);
+    if (params.datasets !== 'all' && !/^\d+(-\d+)?(,\d+(-\d+)?)*$/.test(params.datasets)) {
+      throw new Error("datasets must be 'all' or a list such as '1,3' or '1-8'");
+    }
+  }
+
+  // CMS spread price cache (test 1)
+  if (query.cms_cache !== undefined) {
+    params.cms_cache = !(query.cms_cache === false || query.cms_cache === 'false');
+  }
+
+  if (query.cms_workers !== undefined) {
+    params.cms_workers = parseInt(query.cms_workers);
+    if (!(params.cms_workers >= 1)) {
+      throw new Error('cms_workers must be at least 1');
+    }
+  }
+
+  // Progressive simulation (batches with convergence-based early stopping)
+  if (query.progressive !== undefined) {
+    params.progressive = query.progressive === true || query.progressive === 'true';
+  }
+
+  if (query.batch_paths !== undefined) {
+    params.batch_paths = parseInt(query.batch_paths);
+    if (!(params.batch_paths >= 1000)) {
+      throw new Error('batch_paths must be at least 1,000');
+    }
+  }
+
+  if (query.tolerance_bps !== undefined) {
+    params.tolerance_bps = parseFloat(query.tolerance_bps);
+    if (!(params.tolerance_bps > 0)) {
+      throw new Error('tolerance_bps must be positive');
+    }
+  }
+
+  if (query.time_budget !== undefined) {
+    params.time_budget = parseFloat(query.time_budget);
+    if (!(params.time_budget > 0)) {
+      throw new Error('time_budget must be a positive number of seconds');
+    }
+  }
+
+  // Checkpoint/resume of batched simulations
+  if (query.job_id !== undefined) {
+    params.job_id = validateJobId(query.job_id);
+  }
+
+  if (query.checkpoint !== undefined) {
+    params.checkpoint = query.checkpoint === true || query.checkpoint === 'true';
+  }
+
+  if (query.checkpoint_every !== undefined) {
+    params.checkpoint_every = parseInt(query.checkpoint_every);
+    if (!(params.checkpoint_every >= 1)) {
+      throw new Error('checkpoint_every must be a positive integer');
+    }
+  }
+
+  // Timings, profile and memory diagnostics in the response
+  Object.assign(params, extractDiagnostics(query));
+
   return params;
 }
 
+/**
+ * Validate a simulation job id (it names a checkpoint file on the Python side)
+ * @param {string} jobId - Job id from the request
+ * @returns {string} Validated job id
+ */
+function validateJobId(jobId) {
+  const value = String(jobId);
+  if (!/^[A-Za-z0-9_-]{1,64}$/.test(value)) {
+    throw new Error('job_id must be 1-64 characters of letters, digits, "-" or "_"');
+  }
+  return value;
+}
+
+/**
+ * Whether a request runs as a checkpointed job. Such results are not cached,
+ * since a time-budget stop returns a partial result the client can resume.
+ * @param {Object} parameters - Validated parameters
+ * @returns {boolean} True for checkpointed jobs
+ */
+function isCheckpointedJob(parameters) {
+  return Boolean(parameters.job_id || parameters.checkpoint);
+}
+
+/**
+ * Compute the Python execution timeout of a request from its cost estimate
+ * (runtime times the safety factor, at least 1 minute, capped at 5 minutes by
+ * default); runs with a time budget are estimated at the budget plus setup.
+ * @param {Object} parameters - Validated parameters
+ * @param {number} maxTimeout - Upper bound in milliseconds
+ * @returns {number} Timeout in milliseconds
+ */
+function simulationTimeout(parameters, maxTimeout = 300000) {
+  return costModel.timeout(costModel.estimate('test_hjm', parameters), { max: maxTimeout });
+}
+
 /**
  * Calculate TestHJM model
  * @param {Object} req - Express request object
@@ -86,7 +227,7 @@ module.exports.calculateTestHJM = async function calculateTestHJM(req, res) {
   const cacheKey = cacheService.generateKey('test_hjm', parameters);
 
   // Check cache unless refresh is requested
-  if (!refresh) {
+  if (!refresh && !isCheckpointedJob(parameters)) {
     const cachedResult = cacheService.get(cacheKey);
     if (cachedResult) {
       return res.json(createSuccessResponse(cachedResult.data, 'Results retrieved from cache', {
@@ -98,25 +239,30 @@ module.exports.calculateTestHJM = async function calculateTestHJM(req, res) {
     }
   }
 
-  // Execute Python service with extended timeout for HJM calculations
-  // Timeout based on number of paths: base 60s + 30s per 100k paths
-  const baseTimeout = 60000; // 1 minute base
-  const pathTimeout = Math.ceil(parameters.num_paths / 100000) * 30000; // 30s per 100k paths
-  const totalTimeout = Math.min(baseTimeout + pathTimeout, 300000); // Max 5 minutes
+  // Reject requests over budget before spawning, and size the timeout from the estimate
+  const cost = costModel.check('test_hjm', parameters);
+  const totalTimeout = simulationTimeout(parameters);
 
-  console.log(`🕐 TestHJM timeout set to ${totalTimeout}ms for ${parameters.num_paths} paths`);
+  console.log(`🕐 TestHJM timeout set to ${totalTimeout}ms for ${parameters.num_paths} paths (estimated ${cost.seconds}s)`);
 
   const result = await pythonExecutor.execute('test_hjm', 'calculate', parameters, { timeout: totalTimeout });
 
   // Cache the result (longer cache time for expensive HJM calculations)
-  cacheService.set(cacheKey, result, 600); // 10 minutes
+  if (!isCheckpointedJob(parameters)) {
+    cacheService.set(cacheKey, result, 600); // 10 minutes
+  }
 
   res.json(createSuccessResponse(result.data, 'HJM calculation completed successfully', {
     cached: false,
     testCase: parameters.test ? TEST_CASES[parameters.test] : null,
     parameters,
     responseTime: Date.now() - req.startTime,
-    executionTime: result.meta.executionTime
+    executionTime: result.meta.executionTime,
+    coalesced: Boolean(result.meta.coalesced),
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory,
+    cost
   }));
 };
 
@@ -145,8 +291,11 @@ module.exports.runCalibrationComparison = async function runCalibrationCompariso
     }));
   }
 
-  // Execute Python service with standard timeout for calibration
-  const result = await pythonExecutor.execute('test_hjm', 'calculate', parameters, { timeout: 60000 });
+  // Execute Python service with the timeout of its cost estimate
+  const cost = costModel.check('test_hjm', parameters);
+  const result = await pythonExecutor.execute('test_hjm', 'calculate', parameters, {
+    timeout: simulationTimeout(parameters)
+  });
 
   // Cache the result
   cacheService.set(cacheKey, result, 600); // 10 minutes
@@ -155,7 +304,12 @@ module.exports.runCalibrationComparison = async function runCalibrationCompariso
     cached: false,
     parameters,
     responseTime: Date.now() - req.startTime,
-    executionTime: result.meta.executionTime
+    executionTime: result.meta.executionTime,
+    coalesced: Boolean(result.meta.coalesced),
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory,
+    cost
   }));
 };
 
@@ -175,7 +329,7 @@ module.exports.runSimulationAnalysis = async function runSimulationAnalysis(req,
   const cacheKey = cacheService.generateKey('test_hjm_simulation', parameters);
   
   // Check cache
-  const cachedResult = cacheService.get(cacheKey);
+  const cachedResult = isCheckpointedJob(parameters) ? null : cacheService.get(cacheKey);
   if (cachedResult) {
     return res.json(createSuccessResponse(cachedResult.data, 'Simulation results retrieved from cache', {
       cached: true,
@@ -184,24 +338,50 @@ module.exports.runSimulationAnalysis = async function runSimulationAnalysis(req,
     }));
   }
 
-  // Execute Python service with extended timeout for simulation
-  // Timeout based on number of paths: base 60s + 30s per 100k paths
-  const baseTimeout = 60000; // 1 minute base
-  const pathTimeout = Math.ceil(parameters.num_paths / 100000) * 30000; // 30s per 100k paths
-  const totalTimeout = Math.min(baseTimeout + pathTimeout, 300000); // Max 5 minutes
+  // Reject simulations over budget before spawning, and size the timeout from the estimate
+  const cost = costModel.check('test_hjm', parameters);
+  const totalTimeout = simulationTimeout(parameters);
 
-  console.log(`🕐 TestHJM simulation timeout set to ${totalTimeout}ms for ${parameters.num_paths} paths`);
+  console.log(`🕐 TestHJM simulation timeout set to ${totalTimeout}ms for ${parameters.num_paths} paths (estimated ${cost.seconds}s)`);
 
   const result = await pythonExecutor.execute('test_hjm', 'calculate', parameters, { timeout: totalTimeout });
 
   // Cache the result
-  cacheService.set(cacheKey, result, 900); // 15 minutes for simulation
+  if (!isCheckpointedJob(parameters)) {
+    cacheService.set(cacheKey, result, 900); // 15 minutes for simulation
+  }
 
   res.json(createSuccessResponse(result.data, 'HJM simulation analysis completed successfully', {
     cached: false,
     parameters,
     responseTime: Date.now() - req.startTime,
-    executionTime: result.meta.executionTime
+    executionTime: result.meta.executionTime,
+    coalesced: Boolean(result.meta.coalesced),
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory,
+    cost
+  }));
+};
+
+/**
+ * Get the checkpoint status of a batched simulation job
+ * @param {Object} req - Express request object
+ * @param {Object} res - Express response object
+ */
+module.exports.getSimulationCheckpoint = async function getSimulationCheckpoint(req, res) {
+  const jobId = validateJobId(req.params.jobId);
+
+  const result = await pythonExecutor.execute('test_hjm', 'checkpoint_status', { job_id: jobId });
+
+  res.json(createSuccessResponse(result.data, 'Simulation checkpoint retrieved successfully', {
+    jobId,
+    responseTime: Date.now() - req.startTime,
+    executionTime: result.meta.executionTime,
+    coalesced: Boolean(result.meta.coalesced),
+    timings: result.timings,
+    profile: result.profile,
+    memory: result.memory
   }));
 };
 
@@ -225,7 +405,12 @@ module.exports.getTestCases = async function getTestCases(req, res) {
       calibration: '/api/test-hjm?test=1',
       simulation: '/api/test-hjm?test=2&num_paths=1000000',
       calibration_endpoint: '/api/test-hjm/calibration',
-      simulation_endpoint: '/api/test-hjm/simulation?num_paths=500000'
+      parallel_calibration: '/api/test-hjm/calibration?calibration_mode=parallel',
+      simulation_endpoint: '/api/test-hjm/simulation?num_paths=500000',
+      short_dated_simulation: '/api/test-hjm/simulation?num_paths=500000&max_expiry=5',
+      progressive_simulation: '/api/test-hjm/simulation?num_paths=1000000&progressive=true&tolerance_bps=0.1',
+      checkpointed_simulation: '/api/test-hjm/simulation?num_paths=1000000&job_id=eod-run-1&time_budget=120',
+      checkpoint_status: '/api/test-hjm/checkpoint/eod-run-1'
     },
     documentation: {
       description: 'Heath-Jarrow-Morton Interest Rate Model API',
@@ -236,7 +421,21 @@ module.exports.getTestCases = async function getTestCases(req, res) {
       parameters: {
         test: 'Test case number (1 or 2)',
         num_paths: 'Number of Monte Carlo paths (1000-10000000)',
-        output_type: 'Type of analysis to perform'
+        output_type: 'Type of analysis to perform',
+        calibration_mode: 'sequential (default), parallel (AAD and standard concurrently on separate cores) or fast (AAD only) (test 1)',
+        cms_cache: 'Reuse CMS spread prices cached for the same calibrated parameter (test 1, default true)',
+        cms_workers: 'Worker processes pricing CMS spreads across expiries, 1 to price in turn (test 1, default 4, at most the CPU count)',
+        simulation_frequency: 'Simulation time step: 1M, 3M (default), 6M or 1Y (test 2)',
+        simulation_horizon: "Simulated years, or 'auto' to stop at the last priced expiry (test 2, default 30)",
+        max_expiry: 'Only price swaption expiries up to this many years; implies simulation_horizon=auto (test 2)',
+        datasets: "Volatility datasets to return, e.g. '1,3', '1-8' or 'all' (test 2, default data1..data4)",
+        progressive: 'Run the simulation in batches and stop once the error is stable (test 2)',
+        batch_paths: 'Paths per batch in progressive mode (default 65536)',
+        tolerance_bps: 'Convergence tolerance in basis points (default 0.1)',
+        time_budget: 'Maximum simulation time in seconds for progressive mode',
+        job_id: 'Checkpoint the batched simulation under this id; resubmitting resumes it',
+        checkpoint: 'Checkpoint under a generated job id (returned as data.job_id)',
+        checkpoint_every: 'Number of batches between checkpoints (default 1)'
       }
     }
   }, 'Test cases retrieved successfully'));
@@ -270,3 +469,7 @@ module.exports.getHJMHealth = async function getHJMHealth(req, res) {
     });
   }
 };
+
+// Shared with the asynchronous job API
+module.exports.extractParameters = extractParameters;
+module.exports.simulationTimeout = simulationTimeout;
@@ -12,6 +12,7 @@
 const { createSuccessResponse } = require('./utils/errorHandler');
 const pythonExecutor = require('./utils/pythonExecutor');
 const cacheService = require('./utils/cacheService');
+const costModel = require('./utils/costModel');
 
 // Model configurations
 const MODEL_TYPES = {
@@ -88,9 +89,9 @@ module.exports.getModelInfo = async function getModelInfo(req, res) {
     const result = await pythonExecutor.execute('zabr_variables_impact', 'get_model_info', { model_type: modelType });
 
     // Cache the result (model info doesn't change often)
-    cacheService.set(cacheKey, result, 3600); // 1 hour
+    cacheService.set(cacheKey, result.data, 3600); // 1 hour
 
-    res.json(createSuccessResponse(result, 'Model information retrieved successfully', {
+    res.json(createSuccessResponse(result.data, 'Model information retrieved successfully', {
       cached: false,
       modelType,
       modelConfig: MODEL_TYPES[modelType],
@@ -131,30 +132,35 @@ module.exports.calculateVolatilityImpact = async function calculateVolatilityImp
       }
     }
     
-    // Execute Python service with model-specific timeout
-    const timeout = MODEL_TYPES[model_type].timeout;
+    // Reject requests over budget (PDE grid N x timesteps) before spawning; the
+    // model-specific timeout is raised for grids estimated to need longer
+    const cost = costModel.check('zabr_variables_impact', { model_type, parameters });
+    const timeout = costModel.timeout(cost, { min: MODEL_TYPES[model_type].timeout });
     const result = await pythonExecutor.execute('zabr_variables_impact', 'calculate', {
       model_type,
       parameters
     }, { timeout });
 
     // Cache successful results
-    if (use_cache && result && result.calculation_successful) {
-      cacheService.set(cacheKey, result, 600); // 10 minutes
+    if (use_cache && result.data && result.data.calculation_successful) {
+      cacheService.set(cacheKey, result.data, 600); // 10 minutes
     }
 
-    res.json(createSuccessResponse(result, 'ZABR calculation completed successfully', {
+    res.json(createSuccessResponse(result.data, 'ZABR calculation completed successfully', {
       cached: false,
       model_type,
       modelConfig: MODEL_TYPES[model_type],
       responseTime: Date.now() - req.startTime,
-      executionTime: result.meta ? result.meta.executionTime : undefined
+      executionTime: result.meta ? result.meta.executionTime : undefined,
+      coalesced: Boolean(result.meta && result.meta.coalesced),
+      cost
     }));
     
   } catch (error) {
-    res.status(400).json({
+    res.status(error.status || 400).json({
       status: 'error',
       error: error.message,
+      cost: error.cost,
       available_models: Object.keys(MODEL_TYPES),
       timestamp: new Date().toISOString()
     });
@@ -179,7 +185,7 @@ module.exports.getAvailableModels = async function getAvailableModels(req, res)
       if (!info) {
         try {
           const result = await pythonExecutor.execute('zabr_variables_impact', 'get_model_info', { model_type: model });
-          info = result;
+          info = result.data;
           cacheService.set(cacheKey, info, 3600); // 1 hour
         } catch (error) {
           info = {
@@ -236,7 +242,7 @@ module.exports.getZabrHealth = async function getZabrHealth(req, res) {
     res.json(createSuccessResponse({
       service: 'ZABR Variables Impact',
       status: 'healthy',
-      python_service: result,
+      python_service: result.data,
       cache_stats: cacheService.getStats(),
       available_models: Object.keys(MODEL_TYPES),
       model_configs: MODEL_TYPES,
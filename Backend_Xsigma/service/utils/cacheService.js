@@ -264,6 +264,6 @@ const cacheService = new CacheService();
 // Periodic cleanup every 5 minutes
 setInterval(() => {
   cacheService.cleanup();
-}, 5 * 60 * 1000);
+}, 5 * 60 * 1000).unref();
 
 module.exports = cacheService;
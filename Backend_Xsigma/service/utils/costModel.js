@@ -0,0 +1,245 @@
+'use strict';
+
+/**
+ * Cost Model
+ * Runtime and memory estimate of a Python request before it runs
+ * Following Backend_Xsigma structure pattern
+ *
+ * Each service operation has a linear model of its warm latency and peak RSS
+ * against its problem size (see service/Python/cost_model.py, fitted from the
+ * service_benchmark reports). Requests whose fitted estimate exceeds the budget
+ * are rejected with 413 before a process is spawned: synchronous requests get the
+ * COST_MAX_SECONDS budget, jobs (/api/jobs) the larger COST_MAX_JOB_SECONDS.
+ * Operations without a fitted entry use placeholder coefficients, which size the
+ * timeout and are reported but never reject a request. The estimate is returned
+ * in the response meta (`cost`, with `budget_enforced`) and sizes the Python
+ * timeout instead of static per-path formulas.
+ *
+ * No fitted model ships with the repository, so out of the box the budgets are
+ * INACTIVE: nothing is rejected or redirected to /api/jobs until a model is fitted
+ * on the target host (service_benchmark.py, then cost_model.py fit) and
+ * cost_model.json is in place. A warning is logged at startup while it is missing.
+ *
+ * @module CostModel
+ * @version 2.1.0
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+const MODEL_FILE = process.env.XSIGMA_COST_MODEL || path.join(__dirname, '..', 'Python', 'cost_model.json');
+
+// PLACEHOLDERS, not measurements: rough coefficients that only size timeouts until
+// cost_model.py fits the operation (they never reject a request):
+// {seconds: [intercept, per size unit], memory_mb: [intercept, per size unit]}
+const PLACEHOLDER_MODELS = {
+  'AnalyticalSigmaVolatility:*': { seconds: [1.0, 0.00005], memory_mb: [120, 0.02] },
+  'AnalyticalSigmaVolatilityCalibration:*': { seconds: [3.0, 0.002], memory_mb: [150, 0.05] },
+  'ZabrVariablesImpact:sabr_pde': { seconds: [2.0, 0.001], memory_mb: [150, 0.01] },
+  'ZabrVariablesImpact:*': { seconds: [2.0, 0], memory_mb: [150, 0] },
+  'HartmanWatsonDistribution:*': { seconds: [1.0, 0.0005], memory_mb: [120, 0.01] },
+  'TestHJM:test_1': { seconds: [20, 0], memory_mb: [300, 0] },
+  'TestHJM:test_2': { seconds: [20, 0.0002], memory_mb: [300, 0.0001] },
+  'FXRatesHybrid:*': { seconds: [20, 0.0002], memory_mb: [300, 0.0001] }
+};
+
+// TestHJM simulation steps per year (TestHJM.SIMULATION_FREQUENCIES); 120 steps by default
+const HJM_FREQUENCIES = { '1M': 12, '3M': 4, '6M': 2, '1Y': 1 };
+
+/**
+ * Simulated steps of a TestHJM request ('auto' horizons are bounded by max_expiry or 30 years)
+ * @param {Object} p - Validated parameters
+ * @returns {number} Number of simulation steps
+ */
+function hjmSteps(p) {
+  const perYear = HJM_FREQUENCIES[String(p.simulation_frequency || '3M').toUpperCase()] || 4;
+  const horizon = parseFloat(p.simulation_horizon) || p.max_expiry || 30;
+  return Math.max(1, Math.ceil(horizon * perYear - 1e-9));
+}
+
+const ANALYTICAL_SIGMA_TESTS = { 1: 'volatility_surface', 2: 'vols_plus_minus', 3: 'density', 4: 'probability' };
+
+// Python service -> benchmark service name, operation label and size driver
+const SERVICES = {
+  analytical_sigma: {
+    model: 'AnalyticalSigmaVolatility',
+    label: (p) => p.output_type || ANALYTICAL_SIGMA_TESTS[p.test] || 'volatility_surface',
+    size: (p) => p.n || 200
+  },
+  analytical_sigma_calibration: {
+    model: 'AnalyticalSigmaVolatilityCalibration',
+    label: (p) => p.computationType || 'volatility_asv',
+    size: (p) => p.n || 200
+  },
+  zabr_variables_impact: {
+    model: 'ZabrVariablesImpact',
+    label: (p) => p.model_type,
+    // The PDE is benchmarked over N at its default 5 time steps
+    size: (p) => (p.model_type === 'sabr_pde'
+      ? ((p.parameters || {}).N || 100) * ((p.parameters || {}).timesteps || 5) / 5
+      : 0)
+  },
+  hartman_watson: {
+    model: 'HartmanWatsonDistribution',
+    label: () => 'test_1',
+    // n scaled to 32 roots, as service_benchmark.py records it (hartman_watson_size)
+    size: (p) => (p.n || 64) * (p.size_roots || 32) / 32
+  },
+  test_hjm: {
+    model: 'TestHJM',
+    label: (p) => (p.test === 2 || p.output_type === 'simulation_analysis' ? 'test_2' : 'test_1'),
+    // Paths at the default 120 quarterly steps
+    size: (p) => (p.num_paths || 524288) * hjmSteps(p) / 120
+  },
+  fx_rates_hybrid: {
+    model: 'FXRatesHybrid',
+    label: () => 'calculate',
+    // Paths at the default 120 quarterly ('3M') steps
+    size: (p) => (p.num_paths || 524288) * (p.simulation_steps || 120) / 120
+  }
+};
+
+/**
+ * Create the error of a request over its budget
+ * @param {string} message - Error message
+ * @param {Object} cost - Estimate and budget
+ * @returns {Error} Error with status 413
+ */
+function budgetError(message, cost) {
+  const error = new Error(message);
+  error.name = 'CostBudgetExceeded';
+  error.status = 413;
+  error.cost = cost;
+  return error;
+}
+
+class CostModel {
+  constructor() {
+    this.maxSeconds = parseFloat(process.env.COST_MAX_SECONDS) || 300;
+    this.maxJobSeconds = parseFloat(process.env.COST_MAX_JOB_SECONDS) || 30 * 60;
+    // The memory ceiling of the Python services doubles as the memory budget
+    this.maxMemoryMb = parseFloat(process.env.COST_MAX_MEMORY_MB || process.env.XSIGMA_MEMORY_LIMIT_MB) || 0;
+    this.timeoutFactor = parseFloat(process.env.COST_TIMEOUT_FACTOR) || 2;
+    this.fitted = this.load(MODEL_FILE);
+    if (Object.keys(this.fitted).length === 0) {
+      console.warn(`⚠️ No fitted cost model at ${MODEL_FILE}: cost budgets are inactive, ` +
+        'requests are estimated but never rejected or sent to /api/jobs. Fit one with ' +
+        'service/Python/service_benchmark.py and cost_model.py fit.');
+    }
+  }
+
+  /**
+   * Load a model fitted by cost_model.py (missing file: placeholder coefficients only)
+   * @param {string} file - Path of the fitted model
+   * @returns {Object} Fitted entries keyed Service:operation
+   */
+  load(file) {
+    try {
+      const models = JSON.parse(fs.readFileSync(file, 'utf8')).models || {};
+      console.log(`📐 Cost model loaded from ${file} (${Object.keys(models).length} operations)`);
+      return models;
+    } catch (error) {
+      if (error.code !== 'ENOENT') {
+        console.warn(`Cost model ${file} ignored: ${error.message}`);
+      }
+      return {};
+    }
+  }
+
+  /**
+   * Estimate the runtime and peak memory of a request
+   * @param {string} service - Python service name
+   * @param {Object} parameters - Validated parameters
+   * @returns {Object|null} {model, size, seconds, memory_mb, source, budget_enforced, extrapolated},
+   *   null when not modelled
+   */
+  estimate(service, parameters = {}) {
+    const driver = SERVICES[service];
+    if (!driver) {
+      return null;
+    }
+    const key = `${driver.model}:${driver.label(parameters)}`;
+    const size = driver.size(parameters);
+
+    let entry = this.fitted[key];
+    let source = 'fitted';
+    if (!entry) {
+      entry = PLACEHOLDER_MODELS[key] || PLACEHOLDER_MODELS[`${driver.model}:*`];
+      source = 'placeholder';
+    }
+    if (!entry) {
+      return null;
+    }
+
+    let seconds = entry.seconds[0] + entry.seconds[1] * size;
+    if (parameters.time_budget) {
+      // Progressive and checkpointed simulations stop at their time budget
+      seconds = Math.min(seconds, entry.seconds[0] + parameters.time_budget);
+    }
+
+    return {
+      model: key,
+      size,
+      seconds: Math.round(seconds * 1000) / 1000,
+      memory_mb: Math.round((entry.memory_mb[0] + entry.memory_mb[1] * size) * 10) / 10,
+      source,
+      // Only fitted estimates are held to the budgets (see check)
+      budget_enforced: source === 'fitted',
+      extrapolated: Array.isArray(entry.sizes) ? !(size >= entry.sizes[0] && size <= entry.sizes[1]) : false
+    };
+  }
+
+  /**
+   * Estimate a request and reject it when its fitted estimate is over budget
+   * @param {string} service - Python service name
+   * @param {Object} parameters - Validated parameters
+   * @param {Object} [options]
+   * @param {boolean} [options.job] - Whether the request runs as a job
+   * @returns {Object|null} Estimate
+   * @throws {Error} 413 error carrying the estimate and budget
+   */
+  check(service, parameters, options = {}) {
+    const estimate = this.estimate(service, parameters);
+    if (!estimate || !estimate.budget_enforced) {
+      // Placeholder coefficients are guesses: they may size the timeout, not reject
+      return estimate;
+    }
+    const budget = {
+      seconds: options.job ? this.maxJobSeconds : this.maxSeconds,
+      memory_mb: this.maxMemoryMb || null
+    };
+
+    if (budget.memory_mb && estimate.memory_mb > budget.memory_mb) {
+      throw budgetError(
+        `Estimated peak memory ${estimate.memory_mb} MB exceeds the ${budget.memory_mb} MB budget; reduce the problem size`,
+        { estimate, budget });
+    }
+    if (estimate.seconds > budget.seconds) {
+      const hint = options.job ? 'reduce the problem size' : 'submit it as a job to /api/jobs or reduce the problem size';
+      throw budgetError(
+        `Estimated runtime ${estimate.seconds}s exceeds the ${budget.seconds}s budget; ${hint}`,
+        { estimate, budget, ...(options.job ? {} : { queue: '/api/jobs' }) });
+    }
+    return estimate;
+  }
+
+  /**
+   * Python timeout of an estimated request: the estimate times the safety factor
+   * @param {Object|null} estimate - Estimate of the request
+   * @param {Object} [bounds]
+   * @param {number} [bounds.min=60000] - Lower bound in milliseconds
+   * @param {number} [bounds.max=300000] - Upper bound in milliseconds
+   * @returns {number} Timeout in milliseconds
+   */
+  timeout(estimate, { min = 60000, max = 300000 } = {}) {
+    if (!estimate) {
+      return Math.min(min, max);
+    }
+    return Math.min(Math.max(Math.ceil(estimate.seconds * this.timeoutFactor * 1000), min), max);
+  }
+}
+
+// Create singleton instance
+const costModel = new CostModel();
+
+module.exports = costModel;
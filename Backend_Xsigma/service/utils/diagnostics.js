@@ -0,0 +1,56 @@
+'use strict';
+
+/**
+ * Diagnostic Request Options
+ * Validation of the per-request diagnostics forwarded to the Python services
+ * Following Backend_Xsigma structure pattern
+ *
+ * - timings: stage timings in the response (service_timing.py)
+ * - profile: true/cprofile or sampling request profile (service_profiling.py)
+ * - memory_profile: tracemalloc top allocations (service_memory.py)
+ * - memory_limit_mb: per-request memory ceiling (service_memory.py)
+ *
+ * @module Diagnostics
+ * @version 2.1.0
+ */
+
+const PROFILE_MODES = ['cprofile', 'sampling'];
+
+function isEnabled(value) {
+  return value === true || value === 'true';
+}
+
+/**
+ * Extract and validate the diagnostic options of a request
+ * @param {Object} source - Query or body of the request
+ * @returns {Object} Options to merge into the Python parameters
+ */
+function extractDiagnostics(source = {}) {
+  const options = {};
+
+  if (isEnabled(source.timings)) {
+    options.timings = true;
+  }
+
+  if (source.profile !== undefined && source.profile !== false && source.profile !== 'false') {
+    options.profile = isEnabled(source.profile) ? 'cprofile' : String(source.profile);
+    if (!PROFILE_MODES.includes(options.profile)) {
+      throw new Error('profile must be true, cprofile or sampling');
+    }
+  }
+
+  if (isEnabled(source.memory_profile)) {
+    options.memory_profile = true;
+  }
+
+  if (source.memory_limit_mb !== undefined) {
+    options.memory_limit_mb = parseFloat(source.memory_limit_mb);
+    if (!Number.isFinite(options.memory_limit_mb) || options.memory_limit_mb <= 0) {
+      throw new Error('memory_limit_mb must be a positive number');
+    }
+  }
+
+  return options;
+}
+
+module.exports = { extractDiagnostics };
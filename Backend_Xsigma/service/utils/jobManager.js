@@ -0,0 +1,505 @@
+'use strict';
+
+/**
+ * Job Manager
+ * Asynchronous execution of long-running Python computations
+ * Following Backend_Xsigma structure pattern
+ *
+ * Jobs are queued by priority and executed in a bounded pool of Python worker
+ * processes. Status and progress are kept in memory; results are written to a
+ * local result store and expire after a TTL.
+ *
+ * Submissions identical to a queued or running job (same service, operation and
+ * canonical parameter hash) attach to it instead of running a second time: the
+ * submitter receives the existing job (`coalesced: true`), and a higher priority
+ * moves a queued job up. Every submission gets its own `cancelToken`: cancelling
+ * with it releases that submission only, and the job is stopped once no
+ * submission holds it.
+ *
+ * @module JobManager
+ * @version 2.1.0
+ */
+
+const crypto = require('crypto');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const pythonExecutor = require('./pythonExecutor');
+const cacheService = require('./cacheService');
+
+// Lower value runs first
+const PRIORITIES = {
+  high: 0,
+  normal: 1,
+  low: 2
+};
+
+const PROGRESS_PREFIX = 'PROGRESS:';
+const PARTIAL_RESULT_PREFIX = 'PARTIAL_RESULT:';
+
+/**
+ * Priority job queue with a bounded Python worker pool
+ */
+class JobManager {
+  constructor() {
+    this.maxWorkers = parseInt(process.env.PYTHON_MAX_WORKERS) || Math.max(1, os.cpus().length - 1);
+    this.resultTtl = parseInt(process.env.JOB_RESULT_TTL) || 3600; // seconds
+    this.resultDir = process.env.JOB_RESULT_DIR || path.join(os.tmpdir(), 'xsigma-job-results');
+
+    this.jobs = new Map();
+    this.queue = [];
+    this.running = 0;
+    this.sequence = 0;
+    this.stats = {
+      submitted: 0,
+      completed: 0,
+      failed: 0,
+      cancelled: 0,
+      coalesced: 0
+    };
+
+    fs.mkdirSync(this.resultDir, { recursive: true });
+  }
+
+  /**
+   * Submit a job for asynchronous execution
+   * @param {string} serviceName - Name of the Python service
+   * @param {string} operation - Operation to perform
+   * @param {Object} parameters - Parameters to pass to the service
+   * @param {Object} options - Job options
+   * @param {string} [options.priority='normal'] - high, normal or low
+   * @param {number} [options.timeout] - Python execution timeout in milliseconds
+   * @param {string} [options.jobId] - Use this id instead of generating one; a finished
+   *   job with the same id is replaced (a checkpointed run resubmitted to resume)
+   * @returns {Object} Public view of the queued job, or of the identical job already
+   *   queued or running (`coalesced: true`), with this submission's `cancelToken`
+   * @throws {Error} 409 error when a job with the id is still queued or running
+   */
+  submit(serviceName, operation, parameters = {}, options = {}) {
+    const priority = options.priority || 'normal';
+    if (PRIORITIES[priority] === undefined) {
+      throw new Error(`Invalid priority: ${priority}. Valid options: ${Object.keys(PRIORITIES).join(', ')}`);
+    }
+
+    const jobId = options.jobId || crypto.randomUUID().replace(/-/g, '');
+    const existing = this._getJob(jobId);
+    if (existing) {
+      if (existing.status === 'queued' || existing.status === 'running') {
+        const error = new Error(`Job already ${existing.status}: ${jobId}`);
+        error.status = 409;
+        throw error;
+      }
+      // Failed, cancelled, timed out or completed: the new submission replaces it
+      this._removeResult(existing);
+      this.jobs.delete(jobId);
+    }
+
+    const key = cacheService.generateKey(`${serviceName}.${operation}`, parameters);
+    const cancelToken = crypto.randomUUID();
+    const identical = this._findActive(key);
+    if (identical) {
+      if (identical.status === 'queued' && PRIORITIES[priority] < PRIORITIES[identical.priority]) {
+        this.queue = this.queue.filter(queued => queued !== identical);
+        identical.priority = priority;
+        this._enqueue(identical);
+      }
+      identical.submissions.add(cancelToken);
+      this.stats.coalesced++;
+      console.log(`🔗 Job attached: ${identical.jobId} (${serviceName}.${operation} already ${identical.status})`);
+      return { ...this._publicView(identical), coalesced: true, cancelToken };
+    }
+
+    const job = {
+      jobId,
+      key,
+      service: serviceName,
+      operation,
+      parameters,
+      priority,
+      timeout: options.timeout,
+      // Cancel tokens of the submissions holding the job, and of those released
+      submissions: new Set([cancelToken]),
+      released: new Set(),
+      sequence: this.sequence++,
+      status: 'queued',
+      progress: null,
+      error: null,
+      submittedAt: new Date().toISOString(),
+      startedAt: null,
+      finishedAt: null,
+      executionTime: null,
+      expiresAt: null,
+      resultPath: null,
+      process: null
+    };
+
+    this.jobs.set(jobId, job);
+    this._enqueue(job);
+    this.stats.submitted++;
+    console.log(`📥 Job queued: ${jobId} (${serviceName}.${operation}, priority ${priority})`);
+
+    this._schedule();
+    return { ...this._publicView(job), cancelToken };
+  }
+
+  /**
+   * Get the public view of a job
+   * @param {string} jobId - Job id
+   * @returns {Object|null} Job view or null if unknown or expired
+   */
+  get(jobId) {
+    const job = this._getJob(jobId);
+    return job ? this._publicView(job) : null;
+  }
+
+  /**
+   * Read the stored result of a completed job
+   * @param {string} jobId - Job id
+   * @returns {Object|null} Python service result or null if unavailable
+   */
+  getResult(jobId) {
+    const job = this._getJob(jobId);
+    if (!job || job.status !== 'completed' || !job.resultPath) {
+      return null;
+    }
+
+    try {
+      return JSON.parse(fs.readFileSync(job.resultPath, 'utf8'));
+    } catch (error) {
+      console.error(`Failed to read result of job ${jobId}:`, error.message);
+      return null;
+    }
+  }
+
+  /**
+   * Cancel a submission of a queued or running job
+   *
+   * The token releases its own submission only (again and again, without effect);
+   * a job shared by coalesced submissions keeps running for the others and is
+   * stopped when the last one is released. Without a token only a job held by a
+   * single submission can be cancelled.
+   * @param {string} jobId - Job id
+   * @param {string} [cancelToken] - Token returned by `submit`
+   * @returns {Object|null} Job view (`detached: true` while it keeps running for
+   *   other submissions) or null if unknown
+   * @throws {Error} 403 error for a token of another job, 409 error for a shared
+   *   job cancelled without a token
+   */
+  cancel(jobId, cancelToken) {
+    const job = this._getJob(jobId);
+    if (!job) {
+      return null;
+    }
+
+    const active = job.status === 'queued' || job.status === 'running';
+    if (cancelToken !== undefined) {
+      if (!job.submissions.has(cancelToken) && !job.released.has(cancelToken)) {
+        const error = new Error(`Invalid cancel token for job ${jobId}`);
+        error.status = 403;
+        throw error;
+      }
+      if (!active) {
+        return this._publicView(job);
+      }
+      job.submissions.delete(cancelToken);
+      job.released.add(cancelToken);
+    } else if (active && job.submissions.size > 1) {
+      const error = new Error(
+        `Job ${jobId} is shared by ${job.submissions.size} submissions; cancel with the cancelToken of yours`
+      );
+      error.status = 409;
+      throw error;
+    } else {
+      job.submissions.clear();
+    }
+
+    if (active && job.submissions.size > 0) {
+      console.log(`🔗 Job detached: ${jobId} (${job.submissions.size} submission(s) still attached)`);
+      return { ...this._publicView(job), detached: true };
+    }
+
+    if (job.status === 'queued') {
+      this.queue = this.queue.filter(queued => queued.jobId !== jobId);
+    } else if (job.status === 'running' && job.process) {
+      job.process.kill('SIGTERM');
+    } else {
+      return this._publicView(job);
+    }
+
+    job.status = 'cancelled';
+    job.finishedAt = new Date().toISOString();
+    job.expiresAt = Date.now() + this.resultTtl * 1000;
+    this.stats.cancelled++;
+    console.log(`🛑 Job cancelled: ${jobId}`);
+
+    return this._publicView(job);
+  }
+
+  /**
+   * List all known jobs
+   * @returns {Array} Public views of all jobs, newest first
+   */
+  list() {
+    return Array.from(this.jobs.values())
+      .sort((a, b) => b.sequence - a.sequence)
+      .map(job => this._publicView(job));
+  }
+
+  /**
+   * Get job manager statistics
+   * @returns {Object} Pool and queue statistics
+   */
+  getStats() {
+    return {
+      ...this.stats,
+      queued: this.queue.length,
+      running: this.running,
+      maxWorkers: this.maxWorkers,
+      retained: this.jobs.size,
+      resultTtl: this.resultTtl,
+      resultDir: this.resultDir
+    };
+  }
+
+  /**
+   * Remove expired jobs and their stored results
+   */
+  cleanup() {
+    const now = Date.now();
+    let removed = 0;
+
+    for (const [jobId, job] of this.jobs) {
+      if (job.expiresAt && now > job.expiresAt) {
+        this._removeResult(job);
+        this.jobs.delete(jobId);
+        removed++;
+      }
+    }
+
+    // Results left behind by a previous process; runs from a timer, so a missing
+    // directory or a file removed meanwhile must not throw out of it
+    let files = [];
+    try {
+      files = fs.readdirSync(this.resultDir);
+    } catch (error) {
+      if (error.code !== 'ENOENT') {
+        console.error(`Failed to scan job results in ${this.resultDir}:`, error.message);
+      }
+    }
+
+    for (const file of files) {
+      const jobId = path.basename(file, '.json');
+      const filePath = path.join(this.resultDir, file);
+      try {
+        if (!this.jobs.has(jobId) && now - fs.statSync(filePath).mtimeMs > this.resultTtl * 1000) {
+          fs.unlinkSync(filePath);
+          removed++;
+        }
+      } catch (error) {
+        if (error.code !== 'ENOENT') {
+          console.error(`Failed to remove job result ${filePath}:`, error.message);
+        }
+      }
+    }
+
+    if (removed > 0) {
+      console.log(`🧹 Job cleanup: removed ${removed} expired jobs/results`);
+    }
+  }
+
+  /**
+   * Queued or running job with a request key
+   * @param {string} key - Canonical request key
+   * @returns {Object|null} Job record
+   */
+  _findActive(key) {
+    for (const job of this.jobs.values()) {
+      if (job.key === key && (job.status === 'queued' || job.status === 'running')) {
+        return job;
+      }
+    }
+    return null;
+  }
+
+  /**
+   * Insert a job into the queue, ordered by priority then submission order
+   * @param {Object} job - Job record
+   */
+  _enqueue(job) {
+    const rank = (j) => [PRIORITIES[j.priority], j.sequence];
+    const [priority, sequence] = rank(job);
+    const index = this.queue.findIndex(queued => {
+      const [p, s] = rank(queued);
+      return p > priority || (p === priority && s > sequence);
+    });
+
+    if (index === -1) {
+      this.queue.push(job);
+    } else {
+      this.queue.splice(index, 0, job);
+    }
+  }
+
+  /**
+   * Start queued jobs while workers are available
+   */
+  _schedule() {
+    while (this.running < this.maxWorkers && this.queue.length > 0) {
+      const job = this.queue.shift();
+      this.running++;
+      this._run(job).finally(() => {
+        this.running--;
+        this._schedule();
+      });
+    }
+  }
+
+  /**
+   * Execute one job in a Python worker process
+   * @param {Object} job - Job record
+   */
+  async _run(job) {
+    job.status = 'running';
+    job.startedAt = new Date().toISOString();
+    const startTime = Date.now();
+
+    try {
+      const result = await pythonExecutor.execute(job.service, job.operation, job.parameters, {
+        timeout: job.timeout,
+        onSpawn: (child) => {
+          job.process = child;
+        },
+        onStderrLine: (line) => this._onStderrLine(job, line)
+      });
+
+      if (job.status === 'cancelled') {
+        return;
+      }
+
+      this._storeResult(job, result);
+      job.status = 'completed';
+      this.stats.completed++;
+      console.log(`✅ Job completed: ${job.jobId} (${Date.now() - startTime}ms)`);
+
+    } catch (error) {
+      if (job.status === 'cancelled') {
+        return;
+      }
+
+      job.status = 'failed';
+      job.error = error.message;
+      this.stats.failed++;
+      console.error(`❌ Job failed: ${job.jobId}`, error.message);
+
+    } finally {
+      job.process = null;
+      job.executionTime = Date.now() - startTime;
+      if (!job.finishedAt) {
+        job.finishedAt = new Date().toISOString();
+      }
+      if (!job.expiresAt) {
+        job.expiresAt = Date.now() + this.resultTtl * 1000;
+      }
+    }
+  }
+
+  /**
+   * Track progress reported by the Python process on stderr
+   * @param {Object} job - Job record
+   * @param {string} line - One stderr line
+   */
+  _onStderrLine(job, line) {
+    if (line.startsWith(PARTIAL_RESULT_PREFIX)) {
+      try {
+        const partial = JSON.parse(line.slice(PARTIAL_RESULT_PREFIX.length));
+        job.progress = { ...job.progress, partial, updatedAt: new Date().toISOString() };
+      } catch (error) {
+        // Ignore malformed partial results, the final result is authoritative
+      }
+    } else if (line.startsWith(PROGRESS_PREFIX)) {
+      const message = line.slice(PROGRESS_PREFIX.length).trim();
+      job.progress = { ...job.progress, message, updatedAt: new Date().toISOString() };
+    }
+  }
+
+  /**
+   * Write a job result to the result store
+   * @param {Object} job - Job record
+   * @param {Object} result - Python service result
+   */
+  _storeResult(job, result) {
+    const resultPath = path.join(this.resultDir, `${job.jobId}.json`);
+    fs.writeFileSync(resultPath, JSON.stringify(result));
+    job.resultPath = resultPath;
+  }
+
+  /**
+   * Delete a job's stored result, if any
+   * @param {Object} job - Job record
+   */
+  _removeResult(job) {
+    if (job.resultPath && fs.existsSync(job.resultPath)) {
+      fs.unlinkSync(job.resultPath);
+    }
+  }
+
+  /**
+   * Look up a job, dropping it if it has expired
+   * @param {string} jobId - Job id
+   * @returns {Object|null} Job record
+   */
+  _getJob(jobId) {
+    const job = this.jobs.get(jobId);
+    if (!job) {
+      return null;
+    }
+
+    if (job.expiresAt && Date.now() > job.expiresAt) {
+      this._removeResult(job);
+      this.jobs.delete(jobId);
+      return null;
+    }
+
+    return job;
+  }
+
+  /**
+   * Public (serializable) view of a job record
+   * @param {Object} job - Job record
+   * @returns {Object} Job view
+   */
+  _publicView(job) {
+    const view = {
+      jobId: job.jobId,
+      service: job.service,
+      operation: job.operation,
+      parameters: job.parameters,
+      priority: job.priority,
+      status: job.status,
+      submitters: job.submissions.size,
+      progress: job.progress,
+      error: job.error,
+      submittedAt: job.submittedAt,
+      startedAt: job.startedAt,
+      finishedAt: job.finishedAt,
+      executionTime: job.executionTime,
+      expiresAt: job.expiresAt ? new Date(job.expiresAt).toISOString() : null
+    };
+
+    if (job.status === 'queued') {
+      view.queuePosition = this.queue.findIndex(queued => queued.jobId === job.jobId) + 1;
+    }
+
+    return view;
+  }
+}
+
+// Create singleton instance
+const jobManager = new JobManager();
+
+// Periodic cleanup every 5 minutes
+setInterval(() => {
+  jobManager.cleanup();
+}, 5 * 60 * 1000).unref();
+
+module.exports = jobManager;
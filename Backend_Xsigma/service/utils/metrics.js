@@ -0,0 +1,237 @@
+'use strict';
+
+/**
+ * Metrics Registry
+ * Counters, gauges and histograms of the Python compute layer in Prometheus format
+ * Following Backend_Xsigma structure pattern
+ *
+ * Every Python call (pythonExecutor and persistent workers) is recorded per
+ * service and operation: request count, error count and latency as seen from
+ * Node. The services append the samples they recorded themselves (calibrations,
+ * Monte Carlo paths, Python cache lookups, process memory) to their response as
+ * a `metrics` block (see service/Python/service_metrics.py); these are merged
+ * here with the service and operation labels added.
+ *
+ * @module Metrics
+ * @version 2.1.0
+ */
+
+const LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600];
+
+const FAMILIES = {
+  xsigma_python_requests_total: {
+    type: 'counter',
+    help: 'Python service requests, by service and operation'
+  },
+  xsigma_python_errors_total: {
+    type: 'counter',
+    help: 'Failed Python service requests, by service and operation'
+  },
+  xsigma_python_coalesced_total: {
+    type: 'counter',
+    help: 'Python service requests served by an identical in-flight computation, by service and operation'
+  },
+  xsigma_python_request_duration_seconds: {
+    type: 'histogram',
+    help: 'Python service latency seen from Node (process spawn included for one-shot services)',
+    buckets: LATENCY_BUCKETS
+  }
+};
+
+/**
+ * Prometheus label set of a sample, with deterministic ordering
+ * @param {Object} labels - Label names and values
+ * @returns {string} Key of the label set
+ */
+function labelKey(labels) {
+  return JSON.stringify(Object.keys(labels).sort().map(name => [name, String(labels[name])]));
+}
+
+function formatLabels(labels) {
+  const entries = Object.entries(labels);
+  if (entries.length === 0) {
+    return '';
+  }
+  const escaped = entries.map(([name, value]) =>
+    `${name}="${String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n')}"`
+  );
+  return `{${escaped.join(',')}}`;
+}
+
+function formatValue(value) {
+  return Number.isFinite(value) ? String(value) : (value > 0 ? '+Inf' : value < 0 ? '-Inf' : 'NaN');
+}
+
+class MetricsRegistry {
+  constructor() {
+    // name -> {type, help, buckets, samples: Map(labelKey -> sample)}
+    this.families = new Map();
+  }
+
+  _family(name, definition) {
+    let family = this.families.get(name);
+    if (!family) {
+      family = { ...definition, samples: new Map() };
+      this.families.set(name, family);
+    }
+    return family;
+  }
+
+  _sample(family, labels, initial) {
+    const key = labelKey(labels);
+    let sample = family.samples.get(key);
+    if (!sample) {
+      sample = { labels: { ...labels }, ...initial() };
+      family.samples.set(key, sample);
+    }
+    return sample;
+  }
+
+  /**
+   * Record one Python call
+   * @param {string} service - Python service name
+   * @param {string} operation - Operation performed
+   * @param {number} seconds - Latency in seconds
+   * @param {boolean} ok - Whether the call succeeded
+   */
+  recordRequest(service, operation, seconds, ok) {
+    const labels = { service, operation: operation || 'default' };
+    this._add('xsigma_python_requests_total', FAMILIES.xsigma_python_requests_total, labels, 1);
+    if (!ok) {
+      this._add('xsigma_python_errors_total', FAMILIES.xsigma_python_errors_total, labels, 1);
+    }
+    this._observe('xsigma_python_request_duration_seconds',
+      FAMILIES.xsigma_python_request_duration_seconds, labels, seconds);
+  }
+
+  /**
+   * Record a call attached to an identical in-flight computation
+   * @param {string} service - Python service name
+   * @param {string} operation - Operation performed
+   */
+  recordCoalesced(service, operation) {
+    const labels = { service, operation: operation || 'default' };
+    this._add('xsigma_python_coalesced_total', FAMILIES.xsigma_python_coalesced_total, labels, 1);
+  }
+
+  /**
+   * Merge the `metrics` block of a Python response
+   * @param {string} service - Python service name
+   * @param {string} operation - Operation performed
+   * @param {Object} block - {name: {type, help, buckets?, samples}}
+   */
+  mergePython(service, operation, block) {
+    if (!block || typeof block !== 'object') {
+      return;
+    }
+    const extra = { service, operation: operation || 'default' };
+
+    for (const [name, definition] of Object.entries(block)) {
+      const family = this._family(name, {
+        type: definition.type,
+        help: definition.help,
+        buckets: definition.buckets
+      });
+      if (family.type !== definition.type) {
+        continue;
+      }
+
+      for (const sample of definition.samples || []) {
+        const labels = { ...sample.labels, ...extra };
+        if (family.type === 'counter') {
+          this._add(name, family, labels, sample.value);
+        } else if (family.type === 'gauge') {
+          this._sample(family, labels, () => ({ value: 0 })).value = sample.value;
+        } else if (family.type === 'histogram') {
+          this._mergeHistogram(family, labels, definition.buckets, sample);
+        }
+      }
+    }
+  }
+
+  _add(name, definition, labels, value) {
+    const family = this._family(name, definition);
+    this._sample(family, labels, () => ({ value: 0 })).value += value;
+  }
+
+  _observe(name, definition, labels, value) {
+    const family = this._family(name, definition);
+    const sample = this._sample(family, labels, () => ({
+      counts: new Array(family.buckets.length + 1).fill(0), sum: 0, count: 0
+    }));
+    let index = family.buckets.findIndex(bound => value <= bound);
+    if (index === -1) {
+      index = family.buckets.length;
+    }
+    sample.counts[index]++;
+    sample.sum += value;
+    sample.count++;
+  }
+
+  _mergeHistogram(family, labels, buckets, incoming) {
+    // Samples recorded with other bucket bounds (older service code) are dropped
+    if (!Array.isArray(buckets) || buckets.join() !== family.buckets.join()) {
+      return;
+    }
+    const sample = this._sample(family, labels, () => ({
+      counts: new Array(family.buckets.length + 1).fill(0), sum: 0, count: 0
+    }));
+    incoming.counts.forEach((count, index) => {
+      sample.counts[index] += count;
+    });
+    sample.sum += incoming.sum;
+    sample.count += incoming.count;
+  }
+
+  /**
+   * Prometheus text exposition (version 0.0.4)
+   * @param {Array<Object>} [gauges] - Extra point-in-time gauges {name, help, value, labels}
+   * @returns {string} Exposition text
+   */
+  render(gauges = []) {
+    const lines = [];
+
+    for (const gauge of gauges) {
+      lines.push(`# HELP ${gauge.name} ${gauge.help}`);
+      lines.push(`# TYPE ${gauge.name} ${gauge.type || 'gauge'}`);
+      lines.push(`${gauge.name}${formatLabels(gauge.labels || {})} ${formatValue(gauge.value)}`);
+    }
+
+    const names = Array.from(this.families.keys()).sort();
+    for (const name of names) {
+      const family = this.families.get(name);
+      lines.push(`# HELP ${name} ${family.help}`);
+      lines.push(`# TYPE ${name} ${family.type}`);
+
+      for (const sample of family.samples.values()) {
+        if (family.type !== 'histogram') {
+          lines.push(`${name}${formatLabels(sample.labels)} ${formatValue(sample.value)}`);
+          continue;
+        }
+        let cumulative = 0;
+        family.buckets.forEach((bound, index) => {
+          cumulative += sample.counts[index];
+          lines.push(`${name}_bucket${formatLabels({ ...sample.labels, le: formatValue(bound) })} ${cumulative}`);
+        });
+        cumulative += sample.counts[family.buckets.length];
+        lines.push(`${name}_bucket${formatLabels({ ...sample.labels, le: '+Inf' })} ${cumulative}`);
+        lines.push(`${name}_sum${formatLabels(sample.labels)} ${formatValue(sample.sum)}`);
+        lines.push(`${name}_count${formatLabels(sample.labels)} ${sample.count}`);
+      }
+    }
+
+    return lines.join('\n') + '\n';
+  }
+
+  /**
+   * Clear all recorded samples
+   */
+  reset() {
+    this.families.clear();
+  }
+}
+
+// Create singleton instance
+const metricsRegistry = new MetricsRegistry();
+
+module.exports = metricsRegistry;
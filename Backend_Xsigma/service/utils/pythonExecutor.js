@@ -4,6 +4,14 @@
  * Python Service Executor
  * Centralized service for executing Python computational modules
  * Following Backend_Xsigma structure pattern
+ *
+ * Identical requests are single-flight: while a computation is running, further
+ * calls with the same service, operation and parameters (canonical hash, key order
+ * ignored) attach to it instead of spawning another process, and all receive its
+ * result or its error (`meta.coalesced` on the attached ones, each receiving its
+ * own copy). Callers that drive their own process (onSpawn/onStderrLine, i.e.
+ * jobs) always spawn; identical jobs are deduplicated by the job manager instead.
+ * PYTHON_COALESCE=false disables it.
  * 
  * @module PythonExecutor
  * @version 2.1.0
@@ -11,6 +19,8 @@
 
 const { spawn } = require('child_process');
 const path = require('path');
+const metricsRegistry = require('./metrics');
+const cacheService = require('./cacheService');
 
 /**
  * Python service executor class
@@ -39,6 +49,10 @@ class PythonExecutor {
     }
 
     this.activeProcesses = new Map();
+
+    // Canonical request key -> {shared, attached} of the running computation
+    this.coalesce = !['false', '0'].includes(String(process.env.PYTHON_COALESCE).toLowerCase());
+    this.inFlight = new Map();
   }
 
   /**
@@ -47,9 +61,56 @@ class PythonExecutor {
    * @param {string} operation - Operation to perform
    * @param {Object} parameters - Parameters to pass to the service
    * @param {Object} options - Execution options
+   * @param {number} [options.timeout] - Timeout in milliseconds
+   * @param {Function} [options.onSpawn] - Called with the child process once spawned
+   * @param {Function} [options.onStderrLine] - Called with each complete stderr line
    * @returns {Promise<Object>} Service execution result
    */
   async execute(serviceName, operation, parameters = {}, options = {}) {
+    if (!this.coalesce || options.onSpawn || options.onStderrLine) {
+      return this.run(serviceName, operation, parameters, options);
+    }
+
+    const key = cacheService.generateKey(`${serviceName}.${operation}`, parameters);
+    const running = this.inFlight.get(key);
+    if (running) {
+      running.attached += 1;
+      metricsRegistry.recordCoalesced(serviceName, operation);
+      console.log(`🔗 Attached to in-flight ${serviceName}.${operation} (${running.attached} waiting)`);
+      const attachTime = Date.now();
+      // Parsed per caller, so no nested object is shared with another caller
+      const result = JSON.parse(await running.shared);
+      return {
+        ...result,
+        meta: {
+          ...result.meta,
+          coalesced: true,
+          executionTime: Date.now() - attachTime
+        }
+      };
+    }
+
+    const promise = this.run(serviceName, operation, parameters, options);
+    // Serialized as soon as it resolves, before the first caller can modify it
+    const shared = promise.then(result => JSON.stringify(result));
+    shared.catch(() => {}); // Reported to the first caller (and to the attached ones)
+    this.inFlight.set(key, { shared, attached: 0 });
+    try {
+      return await promise;
+    } finally {
+      this.inFlight.delete(key);
+    }
+  }
+
+  /**
+   * Run one Python process for a request
+   * @param {string} serviceName - Name of the Python service
+   * @param {string} operation - Operation to perform
+   * @param {Object} parameters - Parameters to pass to the service
+   * @param {Object} options - Execution options (see execute)
+   * @returns {Promise<Object>} Service execution result
+   */
+  async run(serviceName, operation, parameters = {}, options = {}) {
     const startTime = Date.now();
     const processId = `${serviceName}_${operation}_${Date.now()}`;
     
@@ -69,6 +130,12 @@ class PythonExecutor {
       const parsedResult = this.parseResult(result, serviceName, operation);
       
       const executionTime = Date.now() - startTime;
+      metricsRegistry.recordRequest(serviceName, operation, executionTime / 1000, true);
+      metricsRegistry.mergePython(serviceName, operation, parsedResult.metrics);
+      delete parsedResult.metrics;
+      if (parsedResult.profile) {
+        console.log(`📈 Profile of ${serviceName}.${operation}: ${parsedResult.profile.file}`);
+      }
       console.log(`✅ Python service completed: ${serviceName}.${operation} (${executionTime}ms)`);
       
       return {
@@ -83,6 +150,7 @@ class PythonExecutor {
       
     } catch (error) {
       const executionTime = Date.now() - startTime;
+      metricsRegistry.recordRequest(serviceName, operation, executionTime / 1000, false);
       console.error(`❌ Python service failed: ${serviceName}.${operation} (${executionTime}ms)`, error.message);
       
       const pythonError = new Error(`Python service execution failed: ${error.message}`);
@@ -110,6 +178,8 @@ class PythonExecutor {
       'analytical_sigma': 'AnalyticalSigmaVolatility.py',
       'analytical_sigma_calibration': 'AnalyticalSigmaVolatilityCalibration.py',
       'test_hjm': 'TestHJM.py',
+      'fx_rates_hybrid': 'FXRatesHybrid.py',
+      'curve_calibration': 'CurveCalibration.py',
       'zabr_variables_impact': 'ZabrVariablesImpact.py'
     };
 
@@ -153,30 +223,51 @@ class PythonExecutor {
 
       const pythonProcess = spawn(this.pythonCommand, [servicePath, ...args], {
         cwd: path.dirname(servicePath),
+        // The metrics block is merged into /metrics and stripped, never sent to clients
+        env: { ...process.env, XSIGMA_METRICS: '1' },
         stdio: ['pipe', 'pipe', 'pipe'],
         encoding: this.encoding
       });
 
       // Track active process
       this.activeProcesses.set(processId, pythonProcess);
+      if (options.onSpawn) {
+        options.onSpawn(pythonProcess);
+      }
 
       let stdout = '';
       let stderr = '';
+      let stderrLineBuffer = '';
 
       // Collect stdout
       pythonProcess.stdout.on('data', (data) => {
         stdout += data.toString();
       });
 
-      // Collect stderr
+      // Collect stderr, optionally forwarding complete lines (progress reporting)
       pythonProcess.stderr.on('data', (data) => {
-        stderr += data.toString();
+        const text = data.toString();
+        stderr += text;
+
+        if (options.onStderrLine) {
+          stderrLineBuffer += text;
+          const lines = stderrLineBuffer.split('\n');
+          stderrLineBuffer = lines.pop();
+          for (const line of lines) {
+            options.onStderrLine(line);
+          }
+        }
       });
 
       // Handle process completion
       pythonProcess.on('close', (code) => {
         if (code !== 0) {
-          const error = new Error(`Python process exited with code ${code}`);
+          // Prefer the error envelope the service printed (e.g. its memory limit)
+          const envelope = this.parseErrorEnvelope(stdout);
+          const error = new Error(envelope ? envelope.error : `Python process exited with code ${code}`);
+          if (envelope && envelope.error_type) {
+            error.errorType = envelope.error_type;
+          }
           error.stderr = stderr;
           error.stdout = stdout;
           reject(error);
@@ -247,6 +338,21 @@ class PythonExecutor {
     }
   }
 
+  /**
+   * Error envelope ({status: 'error', error}) on the last stdout line, if any
+   * @param {string} output - Raw output from Python service
+   * @returns {Object|null} Parsed envelope
+   */
+  parseErrorEnvelope(output) {
+    const lines = output.trim().split('\n');
+    try {
+      const envelope = JSON.parse(lines[lines.length - 1]);
+      return envelope && envelope.status === 'error' && envelope.error ? envelope : null;
+    } catch (error) {
+      return null;
+    }
+  }
+
   /**
    * Kill all active Python processes
    */
@@ -272,6 +378,8 @@ class PythonExecutor {
   getStats() {
     return {
       activeProcesses: this.activeProcesses.size,
+      inFlight: this.inFlight.size,
+      coalesce: this.coalesce,
       configuration: {
         timeout: this.timeout,
         maxBuffer: this.maxBuffer,
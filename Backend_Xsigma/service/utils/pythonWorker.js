@@ -0,0 +1,204 @@
+'use strict';
+
+/**
+ * Persistent Python Worker
+ * Long-lived Python process that keeps state (e.g. calibrated curves) between requests
+ * Following Backend_Xsigma structure pattern
+ *
+ * The worker is started with `python3 <Service>.py serve` and exchanges one JSON
+ * object per line: requests {id, operation, params} on stdin, responses
+ * {id, status, data | error} on stdout. It is started on first use and restarted
+ * on the next request if it exits, a request times out or a request goes over its
+ * memory limit (the worker exits after that reply).
+ *
+ * @module PythonWorker
+ * @version 2.1.0
+ */
+
+const { spawn } = require('child_process');
+const path = require('path');
+const pythonExecutor = require('./pythonExecutor');
+const metricsRegistry = require('./metrics');
+
+class PersistentPythonWorker {
+  /**
+   * @param {string} serviceName - Python service name known to pythonExecutor
+   * @param {Object} options - Worker options
+   * @param {number} [options.timeout=120000] - Default request timeout in milliseconds
+   */
+  constructor(serviceName, options = {}) {
+    this.serviceName = serviceName;
+    this.timeout = options.timeout || 120000;
+    this.process = null;
+    this.pending = new Map();
+    this.nextId = 1;
+    this.stdoutBuffer = '';
+    this.startedAt = null;
+    this.restarts = 0;
+  }
+
+  /**
+   * Start the worker process if it is not running
+   */
+  start() {
+    if (this.process) {
+      return;
+    }
+
+    const servicePath = pythonExecutor.getServicePath(this.serviceName);
+    console.log(`🚀 Starting persistent Python worker: ${this.serviceName}`);
+
+    const child = spawn(pythonExecutor.pythonCommand, [servicePath, 'serve'], {
+      cwd: path.dirname(servicePath),
+      // The metrics block is merged into /metrics and stripped, never sent to clients
+      env: { ...process.env, XSIGMA_METRICS: '1' },
+      stdio: ['pipe', 'pipe', 'pipe']
+    });
+
+    this.process = child;
+    this.stdoutBuffer = '';
+    this.startedAt = new Date().toISOString();
+
+    child.stdout.on('data', (data) => this._onStdout(data.toString()));
+    child.stderr.on('data', (data) => {
+      const text = data.toString().trim();
+      if (text) {
+        console.log(`🐍 [${this.serviceName} worker] ${text}`);
+      }
+    });
+
+    child.on('exit', (code, signal) => {
+      console.log(`⚠️ Python worker ${this.serviceName} exited (code ${code}, signal ${signal})`);
+      if (this.process === child) {
+        this.process = null;
+        this.restarts++;
+        this._rejectAll(new Error(`Python worker ${this.serviceName} exited`));
+      }
+    });
+
+    child.on('error', (error) => {
+      if (this.process === child) {
+        this.process = null;
+        this._rejectAll(error);
+      }
+    });
+  }
+
+  /**
+   * Send a request to the worker
+   * @param {string} operation - Operation to perform
+   * @param {Object} params - Operation parameters
+   * @param {Object} options - Request options
+   * @param {number} [options.timeout] - Timeout in milliseconds
+   * @returns {Promise<Object>} Worker response ({status, data, executionTime})
+   */
+  request(operation, params = {}, options = {}) {
+    this.start();
+
+    const id = this.nextId++;
+    const timeout = options.timeout || this.timeout;
+    const startTime = Date.now();
+
+    return new Promise((resolve, reject) => {
+      const settle = (callback, ok) => (value) => {
+        metricsRegistry.recordRequest(this.serviceName, operation, (Date.now() - startTime) / 1000, ok);
+        callback(value);
+      };
+      const onResolve = settle(resolve, true);
+      const onReject = settle(reject, false);
+
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        // The worker may be stuck mid-calibration; its state can no longer be trusted
+        this.stop('SIGKILL');
+        onReject(new Error(`Python worker ${this.serviceName} timeout after ${timeout}ms`));
+      }, timeout);
+
+      this.pending.set(id, { operation, resolve: onResolve, reject: onReject, timer });
+      this.process.stdin.write(JSON.stringify({ id, operation, params }) + '\n');
+    });
+  }
+
+  /**
+   * Stop the worker process
+   * @param {string} [signal='SIGTERM'] - Signal to send
+   */
+  stop(signal = 'SIGTERM') {
+    if (this.process) {
+      const child = this.process;
+      this.process = null;
+      child.kill(signal);
+      this._rejectAll(new Error(`Python worker ${this.serviceName} stopped`));
+    }
+  }
+
+  /**
+   * Worker status
+   * @returns {Object} Status information
+   */
+  getStatus() {
+    return {
+      service: this.serviceName,
+      running: Boolean(this.process),
+      pid: this.process ? this.process.pid : null,
+      startedAt: this.startedAt,
+      pendingRequests: this.pending.size,
+      restarts: this.restarts
+    };
+  }
+
+  _onStdout(text) {
+    this.stdoutBuffer += text;
+    const lines = this.stdoutBuffer.split('\n');
+    this.stdoutBuffer = lines.pop();
+
+    for (const line of lines) {
+      if (!line.trim()) {
+        continue;
+      }
+
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (error) {
+        console.error(`Invalid response from Python worker ${this.serviceName}:`, line.slice(0, 200));
+        continue;
+      }
+
+      const entry = this.pending.get(response.id);
+      if (!entry) {
+        continue;
+      }
+      this.pending.delete(response.id);
+      clearTimeout(entry.timer);
+      metricsRegistry.mergePython(this.serviceName, entry.operation, response.metrics);
+      delete response.metrics;
+      if (response.profile) {
+        console.log(`📈 Profile of ${this.serviceName}.${entry.operation}: ${response.profile.file}`);
+      }
+
+      if (response.status === 'error') {
+        entry.reject(new Error(response.error || 'Python worker returned error status'));
+      } else {
+        entry.resolve(response);
+      }
+
+      if (response.error_type === 'MemoryLimitExceeded') {
+        // The worker exits after this reply; send no further requests to it
+        console.log(`♻️ Recycling Python worker ${this.serviceName} after a memory limit`);
+        this.stop();
+        return;
+      }
+    }
+  }
+
+  _rejectAll(error) {
+    for (const entry of this.pending.values()) {
+      clearTimeout(entry.timer);
+      entry.reject(error);
+    }
+    this.pending.clear();
+  }
+}
+
+module.exports = { PersistentPythonWorker };
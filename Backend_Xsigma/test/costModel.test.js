@@ -0,0 +1,51 @@
+'use strict';
+
+/**
+ * Cost model: estimates, and rejection only by fitted entries
+ */
+
+const test = require('node:test');
+const assert = require('node:assert');
+
+test.mock.method(console, 'log', () => {});
+test.mock.method(console, 'warn', () => {});
+
+const costModel = require('../service/utils/costModel');
+
+const FITTED = {
+  'TestHJM:test_2': { seconds: [10, 0.001], memory_mb: [200, 0.001], sizes: [4096, 65536], samples: 4 }
+};
+
+test.afterEach(() => {
+  costModel.fitted = {};
+});
+
+test('placeholder estimates never reject', () => {
+  costModel.fitted = {};
+  const estimate = costModel.check('test_hjm', { test: 2, num_paths: 1e9 });
+  assert.strictEqual(estimate.source, 'placeholder');
+  assert.ok(estimate.seconds > costModel.maxSeconds);
+});
+
+test('fitted estimates over budget are rejected with 413', () => {
+  costModel.fitted = FITTED;
+  assert.throws(() => costModel.check('test_hjm', { test: 2, num_paths: 1e6 }), (error) => {
+    assert.strictEqual(error.status, 413);
+    assert.strictEqual(error.cost.estimate.source, 'fitted');
+    assert.strictEqual(error.cost.queue, '/api/jobs');
+    return true;
+  });
+  // Jobs get the larger budget
+  const estimate = costModel.check('test_hjm', { test: 2, num_paths: 1e6 }, { job: true });
+  assert.strictEqual(estimate.seconds, 1010);
+  assert.strictEqual(estimate.extrapolated, true);
+});
+
+test('the simulated steps scale the TestHJM size', () => {
+  const full = costModel.estimate('test_hjm', { test: 2, num_paths: 120000 });
+  const short = costModel.estimate('test_hjm', { test: 2, num_paths: 120000, max_expiry: 5 });
+  const monthly = costModel.estimate('test_hjm', { test: 2, num_paths: 120000, simulation_frequency: '1M' });
+  assert.strictEqual(full.size, 120000);
+  assert.strictEqual(short.size, 20000);
+  assert.strictEqual(monthly.size, 360000);
+});
@@ -0,0 +1,145 @@
+'use strict';
+
+/**
+ * Job manager: priority order, result TTL and resubmission of a job id
+ */
+
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+// The services' progress logging is not under test
+test.mock.method(console, 'log', () => {});
+test.mock.method(console, 'error', () => {});
+
+process.env.JOB_RESULT_DIR = fs.mkdtempSync(path.join(os.tmpdir(), 'xsigma-job-test-'));
+process.env.PYTHON_MAX_WORKERS = '1';
+
+const pythonExecutor = require('../service/utils/pythonExecutor');
+const jobManager = require('../service/utils/jobManager');
+
+/**
+ * Replace the Python call with a controllable one
+ * @returns {Object} {calls, finish(index, outcome)}
+ */
+function fakeExecutor() {
+  const calls = [];
+  pythonExecutor.execute = (service, operation, parameters) => new Promise((resolve, reject) => {
+    calls.push({ service, operation, parameters, resolve, reject });
+  });
+  return calls;
+}
+
+const settle = () => new Promise(resolve => setImmediate(resolve));
+
+test.after(() => {
+  fs.rmSync(process.env.JOB_RESULT_DIR, { recursive: true, force: true });
+});
+
+test('jobs run by priority, then submission order', async () => {
+  const calls = fakeExecutor();
+  jobManager.submit('test_hjm', 'calculate', { run: 'first' });
+  jobManager.submit('test_hjm', 'calculate', { run: 'low' }, { priority: 'low' });
+  jobManager.submit('test_hjm', 'calculate', { run: 'normal' });
+  jobManager.submit('test_hjm', 'calculate', { run: 'high' }, { priority: 'high' });
+
+  const order = [];
+  while (order.length < 4) {
+    await settle();
+    const call = calls[order.length];
+    order.push(call.parameters.run);
+    call.resolve({ status: 'success', data: {} });
+  }
+  assert.deepStrictEqual(order, ['first', 'high', 'normal', 'low']);
+});
+
+test('a failed checkpointed job can be resubmitted under its id', async () => {
+  const calls = fakeExecutor();
+  const jobId = 'resume-after-failure';
+  jobManager.submit('test_hjm', 'calculate', { job_id: jobId }, { jobId });
+  await settle();
+  calls[0].reject(new Error('Python process timeout after 1000ms'));
+  await settle();
+  assert.strictEqual(jobManager.get(jobId).status, 'failed');
+
+  const resubmitted = jobManager.submit('test_hjm', 'calculate', { job_id: jobId }, { jobId });
+  assert.strictEqual(resubmitted.error, null);
+  await settle();
+  calls[1].resolve({ status: 'success', data: { resumed: true } });
+  await settle();
+  assert.strictEqual(jobManager.get(jobId).status, 'completed');
+  assert.deepStrictEqual(jobManager.getResult(jobId).data, { resumed: true });
+});
+
+test('a job id still queued or running is rejected with 409', async () => {
+  const calls = fakeExecutor();
+  const jobId = 'still-running';
+  jobManager.submit('test_hjm', 'calculate', {}, { jobId });
+  await settle();
+  assert.throws(() => jobManager.submit('test_hjm', 'calculate', {}, { jobId }),
+    (error) => error.status === 409);
+  calls[0].resolve({ status: 'success', data: {} });
+  await settle();
+});
+
+test('resubmitting a completed job replaces its stored result', async () => {
+  const calls = fakeExecutor();
+  const jobId = 'completed-then-resubmitted';
+  jobManager.submit('test_hjm', 'calculate', {}, { jobId });
+  await settle();
+  calls[0].resolve({ status: 'success', data: { run: 1 } });
+  await settle();
+  const firstResult = path.join(process.env.JOB_RESULT_DIR, `${jobId}.json`);
+  assert.ok(fs.existsSync(firstResult));
+
+  jobManager.submit('test_hjm', 'calculate', {}, { jobId });
+  assert.ok(!fs.existsSync(firstResult));
+  assert.strictEqual(jobManager.getResult(jobId), null);
+  await settle();
+  calls[1].resolve({ status: 'success', data: { run: 2 } });
+  await settle();
+  assert.deepStrictEqual(jobManager.getResult(jobId).data, { run: 2 });
+});
+
+test('expired jobs are dropped on lookup', async () => {
+  const calls = fakeExecutor();
+  const job = jobManager.submit('test_hjm', 'calculate', {});
+  await settle();
+  calls[0].resolve({ status: 'success', data: {} });
+  await settle();
+
+  jobManager.jobs.get(job.jobId).expiresAt = Date.now() - 1;
+  assert.strictEqual(jobManager.get(job.jobId), null);
+  assert.ok(!jobManager.jobs.has(job.jobId));
+});
+
+test('an identical submission attaches to the queued or running job', async () => {
+  const calls = fakeExecutor();
+  const first = jobManager.submit('test_hjm', 'calculate', { test: 2, num_paths: 4096 });
+  const queued = jobManager.submit('test_hjm', 'calculate', { num_paths: 8192, test: 2 }, { priority: 'low' });
+  const attached = jobManager.submit('test_hjm', 'calculate', { num_paths: 4096, test: 2 });
+  assert.strictEqual(attached.jobId, first.jobId);
+  assert.strictEqual(attached.coalesced, true);
+
+  // A higher priority submission moves the identical queued job up
+  const promoted = jobManager.submit('test_hjm', 'calculate', { test: 2, num_paths: 8192 }, { priority: 'high' });
+  assert.strictEqual(promoted.jobId, queued.jobId);
+  assert.strictEqual(jobManager.get(queued.jobId).priority, 'high');
+
+  await settle();
+  assert.strictEqual(calls.length, 1);
+  calls[0].resolve({ status: 'success', data: {} });
+  await settle();
+  calls[1].resolve({ status: 'success', data: {} });
+  await settle();
+  assert.strictEqual(calls.length, 2);
+
+  // Finished jobs are not attached to
+  const rerun = jobManager.submit('test_hjm', 'calculate', { test: 2, num_paths: 4096 });
+  assert.notStrictEqual(rerun.jobId, first.jobId);
+  await settle();
+  calls[2].resolve({ status: 'success', data: {} });
+  await settle();
+});
@@ -0,0 +1,72 @@
+'use strict';
+
+/**
+ * Python executor: single-flight coalescing of identical requests
+ */
+
+const test = require('node:test');
+const assert = require('node:assert');
+
+// The executor's logging is not under test
+test.mock.method(console, 'log', () => {});
+test.mock.method(console, 'error', () => {});
+
+const pythonExecutor = require('../service/utils/pythonExecutor');
+
+/**
+ * Replace the process spawn with a controllable one
+ * @returns {Array} Pending runs {parameters, resolve, reject}
+ */
+function fakeRuns() {
+  const runs = [];
+  pythonExecutor.run = (service, operation, parameters) => new Promise((resolve, reject) => {
+    runs.push({ parameters, resolve, reject });
+  });
+  return runs;
+}
+
+const result = (data) => ({ status: 'success', data, meta: { executionTime: 1000 } });
+
+test('identical concurrent requests share one run', async () => {
+  const runs = fakeRuns();
+  const first = pythonExecutor.execute('test_hjm', 'calculate', { test: 2, num_paths: 4096 });
+  const second = pythonExecutor.execute('test_hjm', 'calculate', { num_paths: 4096, test: 2 });
+  assert.strictEqual(runs.length, 1);
+  assert.strictEqual(pythonExecutor.inFlight.size, 1);
+
+  runs[0].resolve(result({ curve: [1, 2, 3] }));
+  const [a, b] = await Promise.all([first, second]);
+  assert.deepStrictEqual(a.data, b.data);
+  assert.ok(!a.meta.coalesced);
+  assert.strictEqual(b.meta.coalesced, true);
+  assert.strictEqual(pythonExecutor.inFlight.size, 0);
+
+  // The attached caller owns its copy
+  a.data.curve.push(4);
+  assert.deepStrictEqual(b.data.curve, [1, 2, 3]);
+});
+
+test('the error of a shared run reaches every caller', async () => {
+  const runs = fakeRuns();
+  const first = pythonExecutor.execute('analytical_sigma', 'calculate', { n: 10 });
+  const second = pythonExecutor.execute('analytical_sigma', 'calculate', { n: 10 });
+  runs[0].reject(new Error('engine failure'));
+  await assert.rejects(first, /engine failure/);
+  await assert.rejects(second, /engine failure/);
+  assert.strictEqual(pythonExecutor.inFlight.size, 0);
+});
+
+test('different parameters, finished runs and process-driving callers are not coalesced', async () => {
+  const runs = fakeRuns();
+  const a = pythonExecutor.execute('analytical_sigma', 'calculate', { n: 10 });
+  const b = pythonExecutor.execute('analytical_sigma', 'calculate', { n: 20 });
+  const job = pythonExecutor.execute('analytical_sigma', 'calculate', { n: 10 }, { onSpawn: () => {} });
+  assert.strictEqual(runs.length, 3);
+  runs.forEach(run => run.resolve(result({})));
+  await Promise.all([a, b, job]);
+
+  const again = pythonExecutor.execute('analytical_sigma', 'calculate', { n: 10 });
+  assert.strictEqual(runs.length, 4);
+  runs[3].resolve(result({}));
+  await again;
+});